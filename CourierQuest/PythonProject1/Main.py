@@ -7,592 +7,93 @@ crea el jugador y sus acciones con teclas,
 cargan imagenes de los elementos del juego
 crea al cpu rival y maneja el bucle del
 juego para que funcione.
+
+Importar este módulo no abre la ventana ni carga
+nada: el arranque está en Aplicacion.iniciar() y
+se ejecuta al correr el archivo (python Main.py).
 """
 
+import argparse
 import pygame
+import random
 import time
 import api
+import azar
+from arranque import CargaConcurrente
 from jugador import Jugador
-from jugador_cpu import JugadorCPU
+from jugador_cpu import JugadorCPU, UMBRAL_HPA
 from mapa import cargar_mapa, dibujar_mapa
+from mapa_binario import MapaPaginado
+from dibujo import (ARCHIVOS_JUEGO, cargar_imagenes, dibujar_pedidos,
+                    dibujar_repartidores, dibujar_hud)
 from pedidos import reubicar_pedidos, asignar_posicion_aleatoria
 from clases import ColaPedidos, Pedido
+from entregas import CoordinadorPedidos
 from clima import SistemaClima
+from cache_rutas import invalidar_todas
+from cache_disco import cache_disco
+from costos import obtener_grilla
+from hpa import obtener_grafo
+from planificador import ServicioPlanificacion
+from proceso_ia import ProcesoPlanificador
 from persistencia import SistemaPersistencia, HistorialMovimientos
-from menu import Menu, MenuPausa
-
-pygame.init()
-clock = pygame.time.Clock()
+from menu import Menu, MenuPausa, PantallaCarga
+from perfil import perfilador
+from recursos import gestor as gestor_recursos
+from reloj import reloj
+from grabacion import Grabador
 
 # --- Estados del juego ---
 MENU = 0
 JUGANDO = 1
 PAUSADO = 2
 GAME_OVER = 3
+CARGANDO = 4  # Se eligió dificultad pero faltan mapa, pedidos o clima
 
-# --- Configuración ---
-tile_size = 60
-view_width, view_height = 13, 13  # Tamaño original de la ventan 16,16.
-screen = pygame.display.set_mode((view_width * tile_size,
-                                  view_height * tile_size))
-pygame.display.set_caption("Courier Quest - Mapa")
-
-colors = {"C": (200, 200, 200), "B": (0, 0, 0), "P": (0, 200, 0)}
-
-# --- Cargar imagen del jugador ---
-player_image = pygame.image.load("assets/repartidor.png").convert_alpha()
-player_image = pygame.transform.scale(player_image, (tile_size, tile_size))
-direccion_der = True  # La direccion a la que apunta el repartidor.
-player_imagen_flip = pygame.transform.flip(player_image, True, False)
-
-# --- Cargar imagen del CPU ---
-# Utiliza la imagen del jugador con tinte rojo
-cpu_image = player_image.copy()
-cpu_image.fill((255, 100, 100, 128), special_flags=pygame.BLEND_RGBA_MULT)
-cpu_image_flip = pygame.transform.flip(cpu_image, True, False)
-
-# --- Cargar imágenes de pedidos y puntos de entrega ---
-pickup_image = pygame.image.load("assets/pedido_pickup.png").convert_alpha()
-pickup_image = pygame.transform.scale(pickup_image, (tile_size, tile_size))
-dropoff_normal_image = pygame.image.load(
-    "assets/pedido_dropoff_normal.png").convert_alpha()
-dropoff_normal_image = pygame.transform.scale(
-    dropoff_normal_image, (tile_size, tile_size))
-dropoff_prioridad_image = pygame.image.load(
-    "assets/pedido_dropoff_prioridad.png").convert_alpha()
-dropoff_prioridad_image = pygame.transform.scale(
-    dropoff_prioridad_image, (tile_size, tile_size))
-
-# --- Cargar imágenes de puntos de entrega del CPU ---
-dropoff_normal_image_cpu = dropoff_normal_image.copy()
-dropoff_normal_image_cpu.fill((255, 100, 100, 128),
-                              special_flags=pygame.BLEND_RGBA_MULT)
-dropoff_prioridad_image_cpu = dropoff_prioridad_image.copy()
-dropoff_prioridad_image_cpu.fill((255, 100, 100, 128),
-                                 special_flags=pygame.BLEND_RGBA_MULT)
-
-# --- Cargar imágenes del ambiente ---
-calle_image = pygame.image.load("assets/Calle.jpg").convert()
-calle_image = pygame.transform.scale(calle_image, (tile_size, tile_size))
-parque_image = pygame.image.load("assets/Parque.jpg").convert()
-parque_image = pygame.transform.scale(parque_image, (tile_size, tile_size))
-edificio_image = pygame.image.load("assets/Edificio.jpg").convert()
-edificio_image = pygame.transform.scale(edificio_image, (tile_size, tile_size))
-
-imagenes_tiles = {  # Se guardan las imagenes
-    "C": calle_image,
-    "P": parque_image,
-    "B": edificio_image
-}
-
-# --- Inicializar sistemas ---
-sistema_clima = SistemaClima(api)
-sistema_persistencia = SistemaPersistencia()
-historial_movimientos = HistorialMovimientos()
-
-# --- Inicializar menús ---
-menu_principal = Menu(screen)
-menu_pausa = MenuPausa(screen)
-
-# --- Variables globales del juego ---
-estado_juego = MENU
-dificultad_ia = None
-jugador_cpu = None
-direccion_cpu = 1  # Dirección del sprite del CPU
-pos_x_anterior_cpu = 0  # Para detectar cambios de dirección
-ultimo_autoguardado = 0  # Control de auto-guardado (evita guardados múltiples)
-
-# --- Cargar mapa y pedidos iniciales ---
-tiles = cargar_mapa(api)
-mapa_data = api.obtener_mapa()["data"]
-meta_ingresos = 5500  # Meta de ingresos del mapa
-
-pedidos_data = api.obtener_pedidos()["data"]
-reubicar_pedidos(pedidos_data, tiles)
-cola_pedidos = ColaPedidos(pedidos_data)
-
-# --- Crear jugador ---
-jugador = Jugador(0, 0)
-map_width, map_height = len(tiles[0]), len(tiles)
-
-# --- Variables de control ---
-ultimo_check = time.time()
-check_interval = 15
-pedidos_activos = []
-pedidos_vistos = set()  # IDs de pedidos ya procesados
-ultimo_limpieza_vistos = time.time()
-intervalo_limpieza = 20
-
-# --- Variables de liberación ---
-ultimo_liberado = 0
-liberar_interval = 5
-
-# --- Tiempo de juego ---
-tiempo_inicio = time.time()
-duracion = 10 * 60  # 10 minutos
-
-# --- Variables de estado del juego ---
-juego_terminado = False
-juego_ganado = False
-mostrar_puntajes = False
-puntaje_calculado = None
-
-# --- Variables de UI ---
-mostrar_inventario_detallado = False
-mostrar_estadisticas = False
-ordendar_inventario = False
-
-
-def reiniciar_juego():
-    """Reinicia todas las variables del juego para una nueva partida.
-
-    Esta función restablece:
-      - El jugador humano y el jugador CPU (si existe).
-      - La lista de pedidos, su cola y sus posiciones en el mapa.
-      - Los tiempos globales del juego.
-      - Variables de estado como inventario, estadísticas y banderas visuales.
-      - Historial de movimientos y sistema de clima.
-      - Variables necesarias para la IA
-      (dirección, posición previa, autoguardado).
-
-    Otros:
-        Modifica múltiples variables globales como:
-        `jugador`, `jugador_cpu`, `pedidos_activos`, `pedidos_vistos`,
-        `tiempo_inicio`, `juego_terminado`, `juego_ganado`,
-        `cola_pedidos`, `direccion_cpu`, etc.
-    """
-    global jugador, jugador_cpu, pedidos_activos, pedidos_vistos
-    global tiempo_inicio, juego_terminado, juego_ganado, puntaje_calculado
-    global ultimo_check, ultimo_liberado, ultimo_limpieza_vistos
-    global cola_pedidos, pedidos_data, mostrar_inventario_detallado
-    global mostrar_estadisticas, ordendar_inventario, direccion_der
-    global direccion_cpu, pos_x_anterior_cpu, ultimo_autoguardado  # NUEVO
-
-    # Reiniciar jugador humano
-    jugador = Jugador(0, 0)
-    direccion_der = True
-
-    # Crear jugador CPU según dificultad
-    if dificultad_ia and dificultad_ia != 'sin_ia':
-        jugador_cpu = JugadorCPU(map_width - 1, map_height - 1,
-                                 dificultad_ia, capacidad=10)
-
-        # Inicializar variables del CPU
-        direccion_cpu = 1
-        pos_x_anterior_cpu = jugador_cpu.x
-    else:
-        jugador_cpu = None
-        # SIEMPRE inicializar estas variables (evita errores)
-        direccion_cpu = 1
-        pos_x_anterior_cpu = 0
-
-    # Reiniciar pedidos
-    pedidos_data = api.obtener_pedidos()["data"]
-    reubicar_pedidos(pedidos_data, tiles)
-    cola_pedidos = ColaPedidos(pedidos_data)
-    pedidos_activos = []
-    pedidos_vistos = set()
-
-    # Reiniciar tiempos
-    tiempo_inicio = time.time()
-    ultimo_check = time.time()
-    ultimo_liberado = 0
-    ultimo_limpieza_vistos = time.time()
-    ultimo_autoguardado = 0  # NUEVO
-
-    # Reiniciar estado
-    juego_terminado = False
-    juego_ganado = False
-    puntaje_calculado = None
-    mostrar_inventario_detallado = False
-    mostrar_estadisticas = False
-    ordendar_inventario = False
-
-    # Limpiar historial
-    historial_movimientos.limpiar_historial()
-
-def cargar_juego_guardado(slot=1):
-    """Carga un archivo de guardado y restaura el estado completo del juego.
-
-    Esta función:
-      - Lee el archivo de guardado mediante el sistema de persistencia.
-      - Reconstruye el estado del jugador, CPU (si existe), inventarios y pedidos.
-      - Restaura elementos del clima, tiempos y valores de la IA.
-      - Reposiciona todo de forma segura para continuar la partida.
 
-    Args:
-        slot (int, optional): Número de ranura de guardado a cargar.
-            El valor por defecto es 1.
+def cargar_pedidos():
+    """Pide los pedidos a la API (o al archivo local).
+
+    La API los envuelve en "data"; el archivo local es la lista sola.
 
     Returns:
-        bool: True si la partida se cargó correctamente.
-              False si hubo un error o el archivo no existe.
-
-    Side Effects:
-        Modifica una gran cantidad de variables globales:
-        `jugador`, `jugador_cpu`, `pedidos_activos`, `pedidos_vistos`,
-        `cola_pedidos`, `tiempo_inicio`, `dificultad_ia`, entre otras.
-
-    Notes:
-        - Si ocurre un error durante la carga, el juego muestra un mensaje
-          y devuelve False sin detener la ejecución.
-        - Los pedidos cargados se reconstruyen como nuevas instancias `Pedido`.
+        list[dict]: Datos de los pedidos.
     """
-    global jugador, pedidos_activos, tiempo_inicio, dificultad_ia, jugador_cpu
-    global cola_pedidos, direccion_cpu, pos_x_anterior_cpu, pedidos_vistos  # NUEVO
-
-    estado_cargado = sistema_persistencia.cargar_juego(slot)
-    if not estado_cargado:
-        jugador.mensaje = "Error al cargar partida"
-        jugador.mensaje_tiempo = time.time()
-        return False
-
-    try:
-        #cargar datos del jugador
-        datos_jugador = estado_cargado['jugador']
-        jugador.x = datos_jugador['x']
-        jugador.y = datos_jugador['y']
-        jugador.resistencia = datos_jugador['resistencia']
-        jugador.puntaje = datos_jugador['puntaje']
-        jugador.reputacion = datos_jugador['reputacion']
-        jugador.entregas_completadas = datos_jugador['entregas_completadas']
-
-        # cargar inventario
-        jugador.inventario.clear()
-        for pedido_data in datos_jugador['inventario']:
-            pedido = Pedido(
-                pedido_data['pickup'],
-                pedido_data['dropoff'],
-                pedido_data['weight'],
-                pedido_data['priority'],
-                pedido_data['payout']
-            )
-            if 'id' in pedido_data and pedido_data['id']:
-                pedido.id = pedido_data['id']
-            if 'tiempo_recogido' in pedido_data and pedido_data['tiempo_recogido']:
-                pedido.tiempo_recogido = pedido_data['tiempo_recogido']
-            jugador.inventario.append(pedido)
-
-        # cargar pedidos
-        pedidos_activos.clear()
-        pedidos_vistos.clear()
-
-        for pedido_data in estado_cargado['pedidos_activos']:
-            pedido = Pedido(
-                pedido_data['pickup'],
-                pedido_data['dropoff'],
-                pedido_data['weight'],
-                pedido_data['priority'],
-                pedido_data['payout']
-            )
-            if 'id' in pedido_data and pedido_data['id']:
-                pedido.id = pedido_data['id']
-                pedidos_vistos.add(pedido.id)  # NUEVO: marcar como visto
-            pedidos_activos.append(pedido)
-
-        # cargar cola
-        if 'cola_pedidos' in estado_cargado:
-            cola_pedidos.cola.clear()
-            for pedido_data in estado_cargado['cola_pedidos']:
-                pedido = Pedido(
-                    pedido_data['pickup'],
-                    pedido_data['dropoff'],
-                    pedido_data['weight'],
-                    pedido_data['priority'],
-                    pedido_data['payout']
-                )
-                cola_pedidos.cola.append(pedido)
+    respuesta = api.obtener_pedidos()
+    return respuesta.get("data", []) if isinstance(respuesta, dict) \
+        else respuesta
 
 
-        # cargar clima
-        if 'clima' in estado_cargado:
-            sistema_clima.estado_actual = estado_cargado['clima']['estado_actual']
-            sistema_clima.intensidad_actual = estado_cargado['clima']['intensidad_actual']
-
-
-
-        tiempo_transcurrido = estado_cargado['tiempo_juego']
-        tiempo_inicio = time.time() - tiempo_transcurrido
-
-        #cargar dificultad ia
-        if 'dificultad_ia' in estado_cargado:
-            dificultad_ia = estado_cargado['dificultad_ia']
-
-        # cargar modo solito
-        if dificultad_ia and dificultad_ia != 'sin_ia':
-            # Restaurar CPU si hay datos guardados
-            if 'jugador_cpu' in estado_cargado:
-                datos_cpu = estado_cargado['jugador_cpu']
-                jugador_cpu = JugadorCPU(
-                    datos_cpu['x'],
-                    datos_cpu['y'],
-                    dificultad_ia,
-                    capacidad=10
-                )
-                jugador_cpu.resistencia = datos_cpu['resistencia']
-                jugador_cpu.puntaje = datos_cpu['puntaje']
-                jugador_cpu.reputacion = datos_cpu['reputacion']
-                jugador_cpu.entregas_completadas = datos_cpu['entregas_completadas']
-
-                # Restaurar inventario del CPU
-                jugador_cpu.inventario.clear()
-                for pedido_data in datos_cpu['inventario']:
-                    pedido = Pedido(
-                        pedido_data['pickup'],
-                        pedido_data['dropoff'],
-                        pedido_data['weight'],
-                        pedido_data['priority'],
-                        pedido_data['payout']
-                    )
-                    if 'id' in pedido_data and pedido_data['id']:
-                        pedido.id = pedido_data['id']
-                        pedidos_vistos.add(pedido.id)  # NUEVO
-                    if 'tiempo_recogido' in pedido_data and pedido_data['tiempo_recogido']:
-                        pedido.tiempo_recogido = pedido_data['tiempo_recogido']
-                    jugador_cpu.inventario.append(pedido)
-
-
-            else:
-
-                jugador_cpu = JugadorCPU(map_width - 1, map_height - 1, dificultad_ia, capacidad=10)
-
-
-
-            direccion_cpu = 1
-            pos_x_anterior_cpu = jugador_cpu.x
-        else:
-            jugador_cpu = None
-            # Inicializar variables incluso sin CPU
-            direccion_cpu = 1
-            pos_x_anterior_cpu = 0
-
-        # Limpiar historial de movimientos al cargar
-        historial_movimientos.limpiar_historial()
-
-        jugador.mensaje = "Partida cargada exitosamente!"
-        jugador.mensaje_tiempo = time.time()
-        print("=" * 50)
-        print("CARGA COMPLETA EXITOSA")
-        print(f"   Jugador: {jugador.puntaje}  Rep: {jugador.reputacion}")
-        if jugador_cpu:
-            print(f"   CPU: {jugador_cpu.puntaje}  Rep: {jugador_cpu.reputacion}")
-        print("=" * 50)
-        return True
-
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        jugador.mensaje = "Error al cargar partida"
-        jugador.mensaje_tiempo = time.time()
-        return False
-
-def mostrar_pantalla_final(ganado, puntaje_info):
-    """Renderiza la pantalla final del juego.
-
-     Incluyen resultados y estadísticas.
+def serializar_cpu(cpu):
+    """Convierte el estado de un CPU en un diccionario para guardar.
 
     Args:
-        ganado (bool): Indica si el jugador ganó (True) o perdió (False).
-        puntaje_info (dict): Diccionario con el puntaje final y su desglose.
-            Debe contener:
-                - "puntaje_final" (int/float)
-                - "desglose" (dict con las claves:
-                    'base', 'bonus_tiempo', 'bonus_meta', 'penalizaciones')
+        cpu (JugadorCPU): CPU a guardar.
 
     Returns:
-        None: La función solo dibuja en pantalla.
-
-    Notes:
-        - Muestra textos centrados, estadísticas del jugador
-         y del CPU (si existe).
-        - Depende de `screen`, `pygame`, `jugador`, `jugador_cpu`
-          y variables globales como `meta_ingresos`.
-    """
-    screen.fill((0, 0, 0))
-    font_titulo = pygame.font.SysFont(None, 48)
-    font_texto = pygame.font.SysFont(None, 24)
-    font_small = pygame.font.SysFont(None, 20)
-
-    if ganado:
-        titulo = font_titulo.render("¡VICTORIA!", True, (0, 255, 0))
-        # Determinar motivo de victoria
-        if jugador.puntaje >= meta_ingresos:
-            if jugador_cpu and jugador_cpu.puntaje >= meta_ingresos:
-                subtitulo = font_texto.render(
-                    f"¡Ambos alcanzaron la meta! Ganaste por"
-                    f" ${jugador.puntaje - jugador_cpu.puntaje}",
-                    True, (255, 255, 255))
-            else:
-                subtitulo = font_texto.render(
-                    f"Meta alcanzada: ${meta_ingresos}",
-                    True, (255, 255, 255))
-        else:
-            # Victoria por tiempo
-            if jugador_cpu:
-                subtitulo = font_texto.render(
-                    f"¡Ganaste por puntos! Tu: "
-                    f"${jugador.puntaje} vs CPU: ${jugador_cpu.puntaje}",
-                    True, (255, 255, 255))
-            else:
-                subtitulo = font_texto.render(
-                    f"¡Completaste el juego!",
-                    True, (255, 255, 255))
-    else:
-        titulo = font_titulo.render("GAME OVER", True, (255, 0, 0))
-        # Determinar motivo de derrota
-        if jugador.reputacion <= 20:
-            subtitulo = font_texto.render(
-                "Reputación muy baja", True,
-                (255, 255, 255))
-        elif jugador_cpu and jugador_cpu.puntaje >= meta_ingresos:
-            subtitulo = font_texto.render(
-                f"¡El CPU ganó! CPU: "
-                f"${jugador_cpu.puntaje} vs Tu: ${jugador.puntaje}",
-                True, (255, 255, 255))
-        elif jugador_cpu and jugador_cpu.puntaje > jugador.puntaje:
-            subtitulo = font_texto.render(
-                f"El CPU ganó por puntos: "
-                f"${jugador_cpu.puntaje} vs ${jugador.puntaje}",
-                True, (255, 255, 255))
-        else:
-            subtitulo = font_texto.render(
-                "Tiempo agotado", True,
-                (255, 255, 255))
-
-    # --- Mostrar puntaje final ---
-    puntaje_text = font_texto.render(
-        f"Puntaje Final: {puntaje_info['puntaje_final']}",
-        True, (255, 255, 0))
-    desglose = puntaje_info['desglose']
-
-    y_offset = 150
-    textos = [
-        f"Puntaje Base: {desglose['base']}",
-        f"Bonus Tiempo: +{desglose['bonus_tiempo']}",
-        f"Bonus Meta: +{desglose['bonus_meta']}",
-        f"Penalizaciones: -{desglose['penalizaciones']}",
-        "",
-        "=== TU RENDIMIENTO ===",
-        f"Entregas: {jugador.entregas_completadas}",
-        f"Reputación Final: {jugador.reputacion}",
-        f"Dinero Ganado: ${jugador.puntaje}",
-    ]
-
-    # Agregar info del CPU si existe
-    if jugador_cpu:
-        textos.extend([
-            "",
-            "=== RENDIMIENTO CPU ===",
-            f"Entregas: {jugador_cpu.entregas_completadas}",
-            f"Reputación Final: {jugador_cpu.reputacion}",
-            f"Dinero Ganado: ${jugador_cpu.puntaje}",
-        ])
-
-    textos.append("")
-    textos.append("Presiona ESC para volver al menú...")
-
-    # --- Centrar y mostrar textos ---
-    titulo_rect = titulo.get_rect(center=(screen.get_width() // 2, 50))
-    subtitulo_rect = subtitulo.get_rect(center=(screen.get_width() // 2, 90))
-    puntaje_rect = puntaje_text.get_rect(center=(screen.get_width() // 2, 120))
-
-    screen.blit(titulo, titulo_rect)
-    screen.blit(subtitulo, subtitulo_rect)
-    screen.blit(puntaje_text, puntaje_rect)
-
-    for i, texto in enumerate(textos):
-        if texto:  # No mostrar líneas vacías
-            rendered = font_texto.render(
-                texto, True, (255, 255, 255))
-            rendered_rect = rendered.get_rect(
-                center=(screen.get_width() // 2, y_offset + i * 25))
-            screen.blit(rendered, rendered_rect)
-
-
-def mostrar_hud_mejorado():
-    """Dibuja en pantalla el HUD mejorado.
-
-    Contiene información del jugador y el juego.
-
-    Muestra:
-      - Información del clima (estado e intensidad).
-      - Progreso hacia la meta de ingresos.
-      - Inventario resumido.
-      - Estado del jugador (Resistencia, etc.).
-      - Estadísticas si la opción está activada.
-      - Información del CPU si existe.
-
-    Notes:
-        - Depende de `jugador`, `jugador_cpu`, `sistema_clima`,
-          así como banderas globales como `mostrar_estadisticas`.
+        dict: Posición, resistencia, puntaje, reputación e inventario.
     """
-    font = pygame.font.SysFont(None, 24)
-    font_small = pygame.font.SysFont(None, 18)
-
-    # --- Información del clima ---
-    info_clima = sistema_clima.obtener_info_clima()
-    clima_texto = sistema_clima.traducir_clima(info_clima['estado'])
-    clima_color = (255, 255, 255)
-
-    if info_clima['estado'] in ['storm', 'rain']:
-        clima_color = (255, 100, 100)
-    elif info_clima['estado'] in ['heat', 'cold']:
-        clima_color = (255, 200, 100)
-
-    screen.blit(font.render(
-        f"Clima: {clima_texto}", True,
-        clima_color), (10, 70))
-    screen.blit(font_small.render(
-        f"Intensidad: {info_clima['intensidad']:.1f}",
-        True, (200, 200, 200)), (10, 95))
-
-    # --- Meta de ingresos ---
-    progreso_meta = (jugador.puntaje / meta_ingresos) * 100
-    meta_texto = (f"Meta: ${jugador.puntaje}/${meta_ingresos}"
-                  f" ({progreso_meta:.1f}%)")
-    color_meta = (0, 255, 0) if progreso_meta >= 100 else (255, 255, 255)
-    screen.blit(font.render(meta_texto, True, color_meta), (10, 120))
-
-    # --- Inventario resumen ---
-    inventario_texto = \
-        (f"Inventario: {len(jugador.inventario)}/"
-         f"{jugador.capacidad} (Peso: {jugador.peso_total()})")
-    screen.blit(font.render(
-        inventario_texto, True, (255, 255, 255)),
-        (10, 145))
-
-    # --- Estado del jugador ---
-    estado_resistencia = jugador.obtener_estado_resistencia()
-    color_estado = (255, 255, 255)
-    if estado_resistencia == "Exhausto":
-        color_estado = (255, 0, 0)
-    elif estado_resistencia == "Cansado":
-        color_estado = (255, 255, 0)
-
-    screen.blit(font_small.render(
-        f"Estado: {estado_resistencia}", True, color_estado),
-        (10, 170))
-
-    # --- Info del CPU ---
-    if jugador_cpu:
-        cpu_info = (f"CPU: ${jugador_cpu.puntaje} | "
-                    f"Rep: {jugador_cpu.reputacion} | "
-                    f"Entregas: {jugador_cpu.entregas_completadas}")
-        screen.blit(font_small.render(cpu_info, True,
-                                      (255, 150, 50)), (10, 195))
-
-    # --- Mostrar estadísticas ---
-    if mostrar_estadisticas:
-        estadisticas = jugador.obtener_estadisticas()
-        y = 220  # Ajustado para dar espacio al CPU
-        font_estad = pygame.font.SysFont(None, 22)
-        for clave, valor in estadisticas.items():
-            texto = (f"{clave.replace('_', ' ').capitalize()}:"
-                     f" {valor:.2f}") if isinstance(valor, float) \
-                else f"{clave.replace('_', ' ').capitalize()}: {valor}"
-            texto_render = font_estad.render(texto, True, (0, 0, 0))
-            screen.blit(texto_render, (10, y))
-            y += 25
+    return {
+        'x': cpu.x,
+        'y': cpu.y,
+        'resistencia': cpu.resistencia,
+        'puntaje': cpu.puntaje,
+        'reputacion': cpu.reputacion,
+        'entregas_completadas': cpu.entregas_completadas,
+        'inventario': [
+            {
+                'pickup': pedido.pickup,
+                'dropoff': pedido.dropoff,
+                'weight': pedido.weight,
+                'priority': pedido.priority,
+                'payout': pedido.payout,
+                'id': getattr(pedido, 'id', None),
+                'tiempo_recogido': getattr(pedido, 'tiempo_recogido', None)
+            }
+            for pedido in cpu.inventario
+        ]
+    }
+
 
 """
 def inicializar_persistencia():
@@ -634,156 +135,1006 @@ def guardar_estado_automatico(jugador, pedidos_activos, clima, tiempo_transcurri
         )
 """
 
-def mostrar_inventario_detallado_ui():
-    """Muestra una ventana flotante con los detalles completos del inventario.
 
-    La ventana es semitransparente e incluye:
-      - Los pedidos ordenados por prioridad o por monto (dependiendo del modo).
-      - Colores indicativos si el pedido está retrasado.
-      - Máximo 8 elementos visibles simultáneamente.
+class Aplicacion:
+    """El juego completo: ventana, sistemas, partida y bucle principal.
+
+    El arranque tiene pasos explícitos. `iniciar` abre la ventana, crea
+    los menús y lanza en paralelo la carga del mapa, los pedidos y el
+    clima, así el menú aparece enseguida aunque la API no responda. Los
+    datos se esperan recién al elegir la dificultad, con una pantalla
+    de carga si todavía no llegaron. `ejecutar` corre el bucle.
+
+    Las partidas se graban (grabacion.py) solo con ``--grabar`` o
+    ``grabar=True``, y se pueden repetir sin ventana con repeticion.py.
 
-    Notes:
-        - La función no hace nada si:
-            · El inventario está vacío, o
-            · `mostrar_inventario_detallado` es False.
-        - Depende del objeto global `jugador` y sus métodos
-          `obtener_inventario_ordenado()` y `obtener_inventario_por_plata()`.
+    Attributes:
+        estado_juego (int): MENU, CARGANDO, JUGANDO, PAUSADO o GAME_OVER.
+        grabador (Grabador | None): Grabación de la partida en curso.
+        tiempos_arranque (dict): Segundos hasta el menú ('menu') y hasta
+            tener todos los datos ('datos').
     """
-    if not mostrar_inventario_detallado or not jugador.inventario:
-        return
-
-    # Fondo semi-transparente
-    overlay = pygame.Surface((400, 300))
-    overlay.set_alpha(200)
-    overlay.fill((0, 0, 0))
-    screen.blit(overlay, (200, 100))
-
-    font = pygame.font.SysFont(None, 20)
-    font_titulo = pygame.font.SysFont(None, 24)
-
-    # Título
-    titulo = font_titulo.render("INVENTARIO DETALLADO", True, (255, 255, 255))
-    screen.blit(titulo, (210, 110))
-
-    # Lista de pedidos
-    inventario_ordenado = jugador.obtener_inventario_ordenado('prioridad')
-    y_offset = 140
-
-    for i, pedido in enumerate(inventario_ordenado[:8]):
-        # Mostrar máximo 8
-        color = (255, 100, 100) if (pedido.priority >=
-                                    1) else (255, 255, 255)
-
-        texto = (f"{i + 1}. Peso:{pedido.weight}"
-                 f" Pago:${pedido.payout} Prio:{pedido.priority}")
-        tiempo_transcurrido = time.time() - getattr(
-            pedido, 'tiempo_recogido', time.time())
-        if tiempo_transcurrido > 20:
-            texto += " [TARDE]"
-            color = (255, 200, 100)
-
-        rendered = font.render(texto, True, color)
-        screen.blit(rendered, (210, y_offset + i * 20))
-
-    # Lista de pedidos ordenados por $
-    if ordendar_inventario:
-        inventario_ordenado = jugador.obtener_inventario_por_plata()
+
+    def __init__(self, tile_size=60, view_width=13, view_height=13,
+                 cantidad_cpu=1, grabar=False, planificar_en_proceso=False,
+                 archivo_mapa=None):
+        """Guarda la configuración y deja el estado de la partida vacío.
+
+        No inicializa pygame ni carga datos; eso lo hace `iniciar`.
+
+        Args:
+            tile_size (int): Tamaño en píxeles de cada casilla.
+            view_width (int): Columnas visibles.
+            view_height (int): Filas visibles.
+            cantidad_cpu (int): Cantidad de CPU rivales cuando hay IA.
+            grabar (bool): Grabar cada partida en repeticiones/. Mientras
+                se graba el reloj del juego queda fijo en cada cuadro y
+                las IA cuentan pasos en vez de tiempo (ver grabacion.py).
+            planificar_en_proceso (bool): Planificar los CPU difíciles en
+                otro proceso (ver proceso_ia.py).
+            archivo_mapa (str | None): Mapa binario por bloques (ver
+                mapa_binario.py) en lugar del mapa de la API.
+        """
+        # --- Configuración ---
+        self.tile_size = tile_size
+        self.view_width = view_width  # Tamaño original de la ventana 16,16
+        self.view_height = view_height
+        self.cantidad_cpu = cantidad_cpu
+        self.grabar = grabar
+        self.planificar_en_proceso = planificar_en_proceso
+        self.archivo_mapa = archivo_mapa
+        self.colors = {"C": (200, 200, 200), "B": (0, 0, 0),
+                       "P": (0, 200, 0)}
+        self.meta_ingresos = 5500  # Meta de ingresos del mapa
+        self.duracion = 10 * 60  # 10 minutos
+        self.check_interval = 15
+        self.intervalo_limpieza = 20
+        self.liberar_interval = 5
+
+        # --- Sistemas (se crean en iniciar) ---
+        self.clock = None
+        self.screen = None
+        self.imagenes = None  # Se preparan al entrar a jugar
+        self.sistema_clima = None
+        self.sistema_persistencia = None
+        self.historial_movimientos = None
+        self.servicio_planificacion = None  # Compartido por los CPU
+        self.proceso_ia = None  # Planificador en otro proceso (opcional)
+        self.menu_principal = None
+        self.menu_pausa = None
+        self.pantalla_carga = None
+        self.carga = None  # Carga concurrente de mapa, pedidos y clima
+        self.pedidos_iniciales = None  # Pedidos de la carga, sin usar aún
+        self.inicio_arranque = None
+        self.tiempos_arranque = {}
+        # API y persistencia de la partida (envueltas mientras se graba)
+        self.api = api
+        self.grabador = None
+        self.eventos_repeticion = None  # Teclas del cuadro en una repetición
+        # Decisiones MCTS grabadas del cuadro en una repetición, por CPU
+        self.decisiones_repeticion = None
+
+        # --- Variables del juego ---
+        self.running = False
+        self.estado_juego = MENU
+        self.dificultad_ia = None
+        self.direccion_der = True  # La direccion a la que apunta el repartidor
+        # Perfilador: F3 activa la medición y el overlay, F4 exporta
+        self.mostrar_perfil = False
+        self.jugadores_cpu = []  # CPU rivales
+        self.direccion_cpu = []  # Dirección del sprite de cada CPU
+        self.pos_x_anterior_cpu = []  # Para detectar cambios de dirección
+        self.ultimo_autoguardado = 0  # Control de auto-guardado
+
+        # --- Mapa y pedidos (llegan con la carga) ---
+        self.tiles = None
+        self.map_width = self.map_height = 0
+        self.cola_pedidos = None
+        self.jugador = Jugador(0, 0)
+
+        # --- Variables de control ---
+        self.ultimo_check = reloj.ahora()
+        self.pedidos_activos = []
+        self.coordinador_pedidos = None  # Recogidas y entregas por eventos
+        self.pedidos_vistos = set()  # IDs de pedidos ya procesados
+        self.ultimo_limpieza_vistos = reloj.ahora()
+        self.ultimo_liberado = 0
+        self.tiempo_inicio = reloj.ahora()
+
+        # --- Variables de estado del juego ---
+        self.juego_terminado = False
+        self.juego_ganado = False
+        self.mostrar_puntajes = False
+        self.puntaje_calculado = None
+
+        # --- Variables de UI ---
+        self.mostrar_inventario_detallado = False
+        self.mostrar_estadisticas = False
+        self.ordendar_inventario = False
+
+    # ========================================
+    # ARRANQUE
+    # ========================================
+
+    def iniciar(self):
+        """Secuencia de arranque.
+
+        1. Inicializa pygame y abre la ventana.
+        2. Lanza en hilos la carga del mapa, los pedidos y el clima
+           (API o archivos locales) y la lectura de las imágenes.
+        3. Crea los sistemas locales y los menús.
+
+        No espera a ninguna carga: al volver, el menú ya se puede
+        mostrar.
+        """
+        self.inicio_arranque = time.perf_counter()
+        pygame.init()
+        self.clock = pygame.time.Clock()
+        self.screen = pygame.display.set_mode(
+            (self.view_width * self.tile_size,
+             self.view_height * self.tile_size))
+        pygame.display.set_caption("Courier Quest - Mapa")
+        # Zonas conexas y grafo HPA* de arranques anteriores
+        cache_disco.activar()
+
+        # --- Datos e imágenes en segundo plano ---
+        self.carga = CargaConcurrente({
+            'mapa': lambda: cargar_mapa(self.api, self.archivo_mapa),
+            'pedidos': cargar_pedidos,
+            'clima': lambda: SistemaClima(self.api)
+        }, encadenadas={'rutas': ('mapa', self._preparar_rutas)})
+        gestor_recursos.precargar(ARCHIVOS_JUEGO)
+
+        # --- Inicializar sistemas ---
+        self.sistema_persistencia = SistemaPersistencia()
+        self.historial_movimientos = HistorialMovimientos()
+        self.servicio_planificacion = ServicioPlanificacion()
+
+        # --- Inicializar menús ---
+        self.menu_principal = Menu(self.screen)
+        self.menu_pausa = MenuPausa(self.screen)
+        self.pantalla_carga = PantallaCarga(self.screen)
+
+    def _preparar_rutas(self, mapa):
+        """Completa el grafo HPA* del mapa durante la carga.
+
+        Corre en un hilo de `CargaConcurrente` apenas llega el mapa, así
+        la partida no empieza con sectores sin calcular y el primer plan
+        de los CPU no paga ese costo. El primer arranque con un mapa
+        nuevo lo calcula y lo guarda en disco; los siguientes lo leen.
+
+        Args:
+            mapa (list[list[str]]): Mapa recién cargado.
+        """
+        if self.cantidad_cpu and len(mapa) * len(mapa[0]) >= UMBRAL_HPA:
+            obtener_grafo(mapa).precalcular(pausa=True)
+
+    def _terminar_carga(self):
+        """Toma el mapa, los pedidos y el clima de la carga concurrente.
+
+        Se llama una sola vez, cuando todas las tareas terminaron.
+        """
+        self.tiles = self.carga.resultado('mapa')
+        self.map_width, self.map_height = len(self.tiles[0]), len(self.tiles)
+        self.pedidos_iniciales = self.carga.resultado('pedidos')
+        self.sistema_clima = self.carga.resultado('clima')
+        self.carga.resultado('rutas')  # Relanza si el grafo falló
+        # Las rutas guardadas dejan de servir cuando cambia el clima
+        self.sistema_clima.agregar_observador(invalidar_todas)
+
+        self.tiempos_arranque['datos'] = self.carga.duracion_total()
+        detalle = ", ".join(f"{nombre} {segundos:.2f} s" for nombre, segundos
+                            in self.carga.tiempos.items())
+        print(f"Datos cargados en {self.tiempos_arranque['datos']:.2f} s"
+              f" ({detalle})")
+        self.carga = None
+
+    def _empezar_partida(self):
+        """Empieza la partida, o espera en CARGANDO si faltan datos."""
+        if self.carga is not None:
+            if not self.carga.listo():
+                self.estado_juego = CARGANDO
+                return
+            self._terminar_carga()
+        if self.grabar:
+            self._empezar_grabacion()
+        self.reiniciar_juego()
+        self.estado_juego = JUGANDO
+        print(f"Juego iniciado con dificultad: {self.dificultad_ia}")
+
+    # ========================================
+    # GRABACIÓN
+    # ========================================
+
+    def _empezar_grabacion(self):
+        """Siembra los generadores y empieza a grabar la partida.
+
+        Guarda el mapa y el clima con que empieza; los pedidos se guardan
+        en `reiniciar_juego`. Mientras dura la grabación, la API y la
+        persistencia quedan envueltas para grabar lo que devuelven.
+        """
+        semilla = random.randrange(2 ** 32)
+        azar.sembrar(semilla)
+        self.grabador = Grabador(semilla, {
+            'dificultad_ia': self.dificultad_ia,
+            'cantidad_cpu': self.cantidad_cpu,
+            'planificar_en_proceso': self.planificar_en_proceso,
+            'duracion': self.duracion,
+            'meta_ingresos': self.meta_ingresos
+        })
+        self.grabador.guardar_dato('mapa', self.tiles)
+        self.grabador.guardar_dato(
+            'clima', self.sistema_clima.exportar_configuracion())
+        self.api = self.grabador.envolver(self.api, 'api',
+                                          ('obtener_pedidos',))
+        self.sistema_persistencia = self.grabador.envolver(
+            self.sistema_persistencia, 'persistencia',
+            ('cargar_juego', 'guardar_juego_completo', 'guardar_puntaje'))
+
+    def _terminar_grabacion(self):
+        """Escribe el registro de la partida y quita los envoltorios."""
+        ruta = self.grabador.terminar(self.resumen_partida())
+        self.api = self.api.objeto
+        self.sistema_persistencia = self.sistema_persistencia.objeto
+        self.grabador = None
+        print(f"Partida grabada en {ruta}")
+
+    def resumen_partida(self):
+        """Resultado de la partida en curso.
+
+        Se guarda al final de cada grabación y repeticion.py lo compara
+        con el de la repetición.
+
+        Returns:
+            dict: Tiempo jugado y, del jugador y de cada CPU, puntaje,
+            reputación, entregas y posición.
+        """
+        return {
+            'tiempo': round(reloj.ahora() - self.tiempo_inicio, 3),
+            'terminado': self.juego_terminado,
+            'ganado': self.juego_ganado,
+            'jugador': [self.jugador.puntaje, self.jugador.reputacion,
+                        self.jugador.entregas_completadas,
+                        self.jugador.x, self.jugador.y],
+            'cpu': [[cpu.puntaje, cpu.reputacion, cpu.entregas_completadas,
+                     cpu.x, cpu.y] for cpu in self.jugadores_cpu]
+        }
+
+    def crear_jugadores_cpu(self, dificultad):
+        """Crea los CPU rivales y los registra en el servicio de planificación.
+
+        El primer CPU empieza en la esquina inferior derecha, como siempre;
+        los demás en casillas libres al azar. Todos quedan en la misma
+        zona conexa que el jugador (ver costos.py): si la esquina está
+        encerrada, el primero también va a una casilla al azar.
+
+        Args:
+            dificultad (str): Nivel de IA de los CPU.
+
+        Returns:
+            list[JugadorCPU]: CPU creados.
+        """
+        self.servicio_planificacion.reiniciar()
+        cpus = []
+        jugador = (self.jugador.x, self.jugador.y)
+        ocupadas = {jugador}
+        esquina = (self.map_width - 1, self.map_height - 1)
+        grilla = obtener_grilla(self.tiles)
+        for i in range(self.cantidad_cpu):
+            if i == 0 and grilla.componente(*esquina) == \
+                    grilla.componente_principal(*jugador):
+                x, y = esquina
+            else:
+                posicion = asignar_posicion_aleatoria(
+                    self.tiles, ocupadas, separacion=0,
+                    alcanzable_desde=jugador)
+                x, y = posicion if posicion else (self.map_width - 1,
+                                                  self.map_height - 1)
+            cpu = JugadorCPU(x, y, dificultad, capacidad=10)
+            cpu.clima = self.sistema_clima
+            cpu.proceso_plan = self._proceso_ia(dificultad)
+            self.servicio_planificacion.registrar(cpu)
+            cpus.append(cpu)
+        for cpu in cpus:
+            cpu.rivales = len(cpus)  # Los otros CPU y el jugador
+        return cpus
+
+    def _proceso_ia(self, dificultad):
+        """Planificador en otro proceso para los CPU, si se pidió.
+
+        Se crea la primera vez y se rehace si cambió el mapa.
+
+        Args:
+            dificultad (str): Nivel de IA de los CPU; solo el difícil
+                planifica en otro proceso.
+
+        Returns:
+            ProcesoPlanificador | None: Proceso compartido por los CPU.
+        """
+        if not self.planificar_en_proceso or dificultad != 'dificil':
+            return None
+        if (self.proceso_ia is None or not self.proceso_ia.activo
+                or self.proceso_ia.mapa is not self.tiles):
+            if self.proceso_ia is not None:
+                self.proceso_ia.cerrar()
+            self.proceso_ia = ProcesoPlanificador(self.tiles,
+                                                  self.sistema_clima)
+        return self.proceso_ia
+
+    def _conectar_coordinador(self):
+        """Crea el coordinador de recogidas y entregas de la partida.
+
+        Reemplaza al anterior (que deja de observar a sus repartidores)
+        con el jugador, los CPU y la lista de pedidos actuales.
+        """
+        if self.coordinador_pedidos is not None:
+            self.coordinador_pedidos.desconectar()
+        self.coordinador_pedidos = CoordinadorPedidos(
+            self.pedidos_activos, [self.jugador] + self.jugadores_cpu)
+
+    def cpu_lider(self):
+        """Devuelve el CPU con más dinero, o None si no hay CPU.
+
+        Returns:
+            JugadorCPU | None: CPU con mayor puntaje.
+        """
+        if not self.jugadores_cpu:
+            return None
+        return max(self.jugadores_cpu, key=lambda cpu: cpu.puntaje)
+
+    def reiniciar_juego(self):
+        """Reinicia todas las variables del juego para una nueva partida.
+
+        Esta función restablece:
+          - El jugador humano y los jugadores CPU (si hay IA).
+          - La lista de pedidos, su cola y sus posiciones en el mapa.
+          - Los tiempos globales del juego.
+          - Variables de estado como inventario, estadísticas y banderas visuales.
+          - Historial de movimientos y sistema de clima.
+          - Variables necesarias para la IA
+          (dirección, posición previa, autoguardado).
+
+        Otros:
+            Modifica múltiples atributos como:
+            `jugador`, `jugadores_cpu`, `pedidos_activos`, `pedidos_vistos`,
+            `tiempo_inicio`, `juego_terminado`, `juego_ganado`,
+            `cola_pedidos`, `direccion_cpu`, etc.
+        """
+
+        # Reiniciar jugador humano
+        self.jugador = Jugador(0, 0)
+        self.direccion_der = True
+
+        # Crear jugadores CPU según dificultad
+        if self.dificultad_ia and self.dificultad_ia != 'sin_ia':
+            self.jugadores_cpu = self.crear_jugadores_cpu(self.dificultad_ia)
+        else:
+            self.servicio_planificacion.reiniciar()
+            self.jugadores_cpu = []
+
+        # Inicializar variables de los CPU
+        self.direccion_cpu = [1] * len(self.jugadores_cpu)
+        self.pos_x_anterior_cpu = [cpu.x for cpu in self.jugadores_cpu]
+
+        # Reiniciar pedidos (la primera partida usa los de la carga)
+        if self.pedidos_iniciales is not None:
+            pedidos_data, self.pedidos_iniciales = \
+                self.pedidos_iniciales, None
+        else:
+            pedidos_data = cargar_pedidos()
+        if self.grabador is not None:
+            self.grabador.guardar_dato('pedidos', pedidos_data)
+        reubicar_pedidos(pedidos_data, self.tiles,
+                         alcanzable_desde=(self.jugador.x, self.jugador.y))
+        self.cola_pedidos = ColaPedidos(pedidos_data)
+        self.pedidos_activos = []
+        self._conectar_coordinador()
+        self.pedidos_vistos = set()
+
+        # Reiniciar tiempos
+        self.tiempo_inicio = reloj.ahora()
+        self.ultimo_check = reloj.ahora()
+        self.ultimo_liberado = 0
+        self.ultimo_limpieza_vistos = reloj.ahora()
+        self.ultimo_autoguardado = 0  # NUEVO
+
+        # Reiniciar estado
+        self.juego_terminado = False
+        self.juego_ganado = False
+        self.puntaje_calculado = None
+        self.mostrar_inventario_detallado = False
+        self.mostrar_estadisticas = False
+        self.ordendar_inventario = False
+
+        # Clima de toda la partida, sorteado de antemano
+        self.sistema_clima.generar_linea_tiempo(self.duracion)
+
+        # Limpiar historial
+        self.historial_movimientos.limpiar_historial()
+
+    def cargar_juego_guardado(self, slot=1):
+        """Carga un archivo de guardado y restaura el estado completo del juego.
+
+        Esta función:
+          - Lee el archivo de guardado mediante el sistema de persistencia.
+          - Reconstruye el estado del jugador, los CPU, inventarios y pedidos.
+          - Restaura elementos del clima, tiempos y valores de la IA.
+          - Reposiciona todo de forma segura para continuar la partida.
+
+        Args:
+            slot (int, optional): Número de ranura de guardado a cargar.
+                El valor por defecto es 1.
+
+        Returns:
+            bool: True si la partida se cargó correctamente.
+                  False si hubo un error o el archivo no existe.
+
+        Side Effects:
+            Modifica una gran cantidad de atributos:
+            `jugador`, `jugadores_cpu`, `pedidos_activos`, `pedidos_vistos`,
+            `cola_pedidos`, `tiempo_inicio`, `dificultad_ia`, entre otras.
+
+        Notes:
+            - Si ocurre un error durante la carga, el juego muestra un mensaje
+              y devuelve False sin detener la ejecución.
+            - Los pedidos cargados se reconstruyen como nuevas instancias `Pedido`.
+        """
+
+        estado_cargado = self.sistema_persistencia.cargar_juego(slot)
+        if not estado_cargado:
+            self.jugador.mensaje = "Error al cargar partida"
+            self.jugador.mensaje_tiempo = reloj.ahora()
+            return False
+
+        try:
+            #cargar datos del jugador
+            datos_jugador = estado_cargado['jugador']
+            self.jugador.x = datos_jugador['x']
+            self.jugador.y = datos_jugador['y']
+            self.jugador.resistencia = datos_jugador['resistencia']
+            self.jugador.puntaje = datos_jugador['puntaje']
+            self.jugador.reputacion = datos_jugador['reputacion']
+            self.jugador.entregas_completadas = \
+                datos_jugador['entregas_completadas']
+
+            # cargar inventario
+            self.jugador.inventario.clear()
+            for pedido_data in datos_jugador['inventario']:
+                pedido = Pedido(
+                    pedido_data['pickup'],
+                    pedido_data['dropoff'],
+                    pedido_data['weight'],
+                    pedido_data['priority'],
+                    pedido_data['payout']
+                )
+                if 'id' in pedido_data and pedido_data['id']:
+                    pedido.id = pedido_data['id']
+                if 'tiempo_recogido' in pedido_data and pedido_data['tiempo_recogido']:
+                    pedido.tiempo_recogido = pedido_data['tiempo_recogido']
+                self.jugador.inventario.append(pedido)
+
+            # cargar pedidos
+            self.pedidos_activos.clear()
+            self.pedidos_vistos.clear()
+
+            for pedido_data in estado_cargado['pedidos_activos']:
+                pedido = Pedido(
+                    pedido_data['pickup'],
+                    pedido_data['dropoff'],
+                    pedido_data['weight'],
+                    pedido_data['priority'],
+                    pedido_data['payout']
+                )
+                if 'id' in pedido_data and pedido_data['id']:
+                    pedido.id = pedido_data['id']
+                    self.pedidos_vistos.add(pedido.id)  # NUEVO: marcar como visto
+                self.pedidos_activos.append(pedido)
+
+            # cargar cola
+            if 'cola_pedidos' in estado_cargado:
+                self.cola_pedidos.cola.clear()
+                for pedido_data in estado_cargado['cola_pedidos']:
+                    pedido = Pedido(
+                        pedido_data['pickup'],
+                        pedido_data['dropoff'],
+                        pedido_data['weight'],
+                        pedido_data['priority'],
+                        pedido_data['payout']
+                    )
+                    self.cola_pedidos.cola.append(pedido)
+
+
+            # cargar clima
+            if 'clima' in estado_cargado:
+                clima_guardado = estado_cargado['clima']
+                self.sistema_clima.estado_actual = \
+                    clima_guardado['estado_actual']
+                self.sistema_clima.intensidad_actual = \
+                    clima_guardado['intensidad_actual']
+
+
+
+            tiempo_transcurrido = estado_cargado['tiempo_juego']
+            self.tiempo_inicio = reloj.ahora() - tiempo_transcurrido
+            # Nueva línea de clima desde el estado guardado
+            self.sistema_clima.generar_linea_tiempo(
+                self.duracion - tiempo_transcurrido)
+
+            #cargar dificultad ia
+            if 'dificultad_ia' in estado_cargado:
+                self.dificultad_ia = estado_cargado['dificultad_ia']
+
+            # cargar modo solito
+            if self.dificultad_ia and self.dificultad_ia != 'sin_ia':
+                # Restaurar CPU si hay datos guardados
+                if 'jugadores_cpu' in estado_cargado:
+                    lista_cpu = estado_cargado['jugadores_cpu']
+                elif 'jugador_cpu' in estado_cargado:
+                    lista_cpu = [estado_cargado['jugador_cpu']]
+                else:
+                    lista_cpu = []
+
+                if lista_cpu:
+                    self.servicio_planificacion.reiniciar()
+                    self.jugadores_cpu = []
+                    for datos_cpu in lista_cpu:
+                        cpu = JugadorCPU(
+                            datos_cpu['x'],
+                            datos_cpu['y'],
+                            self.dificultad_ia,
+                            capacidad=10
+                        )
+                        cpu.clima = self.sistema_clima
+                        cpu.proceso_plan = self._proceso_ia(self.dificultad_ia)
+                        cpu.resistencia = datos_cpu['resistencia']
+                        cpu.puntaje = datos_cpu['puntaje']
+                        cpu.reputacion = datos_cpu['reputacion']
+                        cpu.entregas_completadas = datos_cpu['entregas_completadas']
+
+                        # Restaurar inventario del CPU
+                        cpu.inventario.clear()
+                        for pedido_data in datos_cpu['inventario']:
+                            pedido = Pedido(
+                                pedido_data['pickup'],
+                                pedido_data['dropoff'],
+                                pedido_data['weight'],
+                                pedido_data['priority'],
+                                pedido_data['payout']
+                            )
+                            if 'id' in pedido_data and pedido_data['id']:
+                                pedido.id = pedido_data['id']
+                                self.pedidos_vistos.add(pedido.id)  # NUEVO
+                            if 'tiempo_recogido' in pedido_data and pedido_data['tiempo_recogido']:
+                                pedido.tiempo_recogido = pedido_data['tiempo_recogido']
+                            cpu.inventario.append(pedido)
+
+                        self.servicio_planificacion.registrar(cpu)
+                        self.jugadores_cpu.append(cpu)
+                    for cpu in self.jugadores_cpu:
+                        cpu.rivales = len(self.jugadores_cpu)
+
+                else:
+
+                    self.jugadores_cpu = \
+                        self.crear_jugadores_cpu(self.dificultad_ia)
+
+            else:
+                self.servicio_planificacion.reiniciar()
+                self.jugadores_cpu = []
+
+            # Inicializar variables incluso sin CPU
+            self.direccion_cpu = [1] * len(self.jugadores_cpu)
+            self.pos_x_anterior_cpu = [cpu.x for cpu in self.jugadores_cpu]
+
+            # Limpiar historial de movimientos al cargar
+            self.historial_movimientos.limpiar_historial()
+
+            # Recogidas y entregas con los repartidores y pedidos cargados
+            self._conectar_coordinador()
+            self.coordinador_pedidos.revisar_todos()
+
+            self.jugador.mensaje = "Partida cargada exitosamente!"
+            self.jugador.mensaje_tiempo = reloj.ahora()
+            print("=" * 50)
+            print("CARGA COMPLETA EXITOSA")
+            print(f"   Jugador: {self.jugador.puntaje}"
+                  f"  Rep: {self.jugador.reputacion}")
+            for cpu in self.jugadores_cpu:
+                print(f"   CPU: {cpu.puntaje}  Rep: {cpu.reputacion}")
+            print("=" * 50)
+            return True
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.jugador.mensaje = "Error al cargar partida"
+            self.jugador.mensaje_tiempo = reloj.ahora()
+            return False
+
+    def mostrar_pantalla_final(self, ganado, puntaje_info):
+        """Renderiza la pantalla final del juego.
+
+         Incluyen resultados y estadísticas.
+
+        Args:
+            ganado (bool): Indica si el jugador ganó (True) o perdió (False).
+            puntaje_info (dict): Diccionario con el puntaje final y su desglose.
+                Debe contener:
+                    - "puntaje_final" (int/float)
+                    - "desglose" (dict con las claves:
+                        'base', 'bonus_tiempo', 'bonus_meta', 'penalizaciones')
+
+        Returns:
+            None: La función solo dibuja en pantalla.
+
+        Notes:
+            - Muestra textos centrados, estadísticas del jugador
+             y del CPU con más dinero (si hay CPU).
+            - Depende de `screen`, `pygame`, `jugador`, `jugadores_cpu`
+              y atributos como `meta_ingresos`.
+        """
+        jugador_cpu = self.cpu_lider()  # El rival con más dinero
+        self.screen.fill((0, 0, 0))
+        font_titulo = gestor_recursos.fuente(48)
+        font_texto = gestor_recursos.fuente(24)
+        font_small = gestor_recursos.fuente(20)
+
+        if ganado:
+            titulo = font_titulo.render("¡VICTORIA!", True, (0, 255, 0))
+            # Determinar motivo de victoria
+            if self.jugador.puntaje >= self.meta_ingresos:
+                if jugador_cpu and jugador_cpu.puntaje >= self.meta_ingresos:
+                    subtitulo = font_texto.render(
+                        f"¡Ambos alcanzaron la meta! Ganaste por"
+                        f" ${self.jugador.puntaje - jugador_cpu.puntaje}",
+                        True, (255, 255, 255))
+                else:
+                    subtitulo = font_texto.render(
+                        f"Meta alcanzada: ${self.meta_ingresos}",
+                        True, (255, 255, 255))
+            else:
+                # Victoria por tiempo
+                if jugador_cpu:
+                    subtitulo = font_texto.render(
+                        f"¡Ganaste por puntos! Tu: "
+                        f"${self.jugador.puntaje} vs CPU:"
+                        f" ${jugador_cpu.puntaje}",
+                        True, (255, 255, 255))
+                else:
+                    subtitulo = font_texto.render(
+                        f"¡Completaste el juego!",
+                        True, (255, 255, 255))
+        else:
+            titulo = font_titulo.render("GAME OVER", True, (255, 0, 0))
+            # Determinar motivo de derrota
+            if self.jugador.reputacion <= 20:
+                subtitulo = font_texto.render(
+                    "Reputación muy baja", True,
+                    (255, 255, 255))
+            elif jugador_cpu and jugador_cpu.puntaje >= self.meta_ingresos:
+                subtitulo = font_texto.render(
+                    f"¡El CPU ganó! CPU: "
+                    f"${jugador_cpu.puntaje} vs Tu: ${self.jugador.puntaje}",
+                    True, (255, 255, 255))
+            elif jugador_cpu and jugador_cpu.puntaje > self.jugador.puntaje:
+                subtitulo = font_texto.render(
+                    f"El CPU ganó por puntos: "
+                    f"${jugador_cpu.puntaje} vs ${self.jugador.puntaje}",
+                    True, (255, 255, 255))
+            else:
+                subtitulo = font_texto.render(
+                    "Tiempo agotado", True,
+                    (255, 255, 255))
+
+        # --- Mostrar puntaje final ---
+        puntaje_text = font_texto.render(
+            f"Puntaje Final: {puntaje_info['puntaje_final']}",
+            True, (255, 255, 0))
+        desglose = puntaje_info['desglose']
+
+        y_offset = 150
+        textos = [
+            f"Puntaje Base: {desglose['base']}",
+            f"Bonus Tiempo: +{desglose['bonus_tiempo']}",
+            f"Bonus Meta: +{desglose['bonus_meta']}",
+            f"Penalizaciones: -{desglose['penalizaciones']}",
+            "",
+            "=== TU RENDIMIENTO ===",
+            f"Entregas: {self.jugador.entregas_completadas}",
+            f"Reputación Final: {self.jugador.reputacion}",
+            f"Dinero Ganado: ${self.jugador.puntaje}",
+        ]
+
+        # Agregar info del CPU si existe
+        if jugador_cpu:
+            textos.extend([
+                "",
+                "=== RENDIMIENTO CPU ===" if len(self.jugadores_cpu) == 1
+                else f"=== MEJOR CPU (de {len(self.jugadores_cpu)}) ===",
+                f"Entregas: {jugador_cpu.entregas_completadas}",
+                f"Reputación Final: {jugador_cpu.reputacion}",
+                f"Dinero Ganado: ${jugador_cpu.puntaje}",
+            ])
+
+        textos.append("")
+        textos.append("Presiona ESC para volver al menú...")
+
+        # --- Centrar y mostrar textos ---
+        centro = self.screen.get_width() // 2
+        titulo_rect = titulo.get_rect(center=(centro, 50))
+        subtitulo_rect = subtitulo.get_rect(center=(centro, 90))
+        puntaje_rect = puntaje_text.get_rect(center=(centro, 120))
+
+        self.screen.blit(titulo, titulo_rect)
+        self.screen.blit(subtitulo, subtitulo_rect)
+        self.screen.blit(puntaje_text, puntaje_rect)
+
+        for i, texto in enumerate(textos):
+            if texto:  # No mostrar líneas vacías
+                rendered = font_texto.render(
+                    texto, True, (255, 255, 255))
+                rendered_rect = rendered.get_rect(
+                    center=(self.screen.get_width() // 2, y_offset + i * 25))
+                self.screen.blit(rendered, rendered_rect)
+
+    def mostrar_hud_mejorado(self):
+        """Dibuja en pantalla el HUD mejorado.
+
+        Contiene información del jugador y el juego.
+
+        Muestra:
+          - Información del clima (estado e intensidad).
+          - Progreso hacia la meta de ingresos.
+          - Inventario resumido.
+          - Estado del jugador (Resistencia, etc.).
+          - Estadísticas si la opción está activada.
+          - Información de los CPU si hay IA.
+
+        Notes:
+            - Depende de `jugador`, `jugadores_cpu`, `sistema_clima`,
+              así como banderas como `mostrar_estadisticas`.
+        """
+        dibujar_hud(self.screen, self.jugador, self.jugadores_cpu,
+                    self.sistema_clima, self.meta_ingresos,
+                    self.mostrar_estadisticas,
+                    self.servicio_planificacion.entregas_por_minuto())
+
+    def mostrar_inventario_detallado_ui(self):
+        """Muestra una ventana flotante con los detalles completos del inventario.
+
+        La ventana es semitransparente e incluye:
+          - Los pedidos ordenados por prioridad o por monto (dependiendo del modo).
+          - Colores indicativos si el pedido está retrasado.
+          - Máximo 8 elementos visibles simultáneamente.
+
+        Notes:
+            - La función no hace nada si:
+                · El inventario está vacío, o
+                · `mostrar_inventario_detallado` es False.
+            - Depende del atributo `jugador` y sus métodos
+              `obtener_inventario_ordenado()` y `obtener_inventario_por_plata()`.
+        """
+        if (not self.mostrar_inventario_detallado or
+                not self.jugador.inventario):
+            return
+
+        # Fondo semi-transparente
+        overlay = pygame.Surface((400, 300))
+        overlay.set_alpha(200)
+        overlay.fill((0, 0, 0))
+        self.screen.blit(overlay, (200, 100))
+
+        font = gestor_recursos.fuente(20)
+        font_titulo = gestor_recursos.fuente(24)
+
+        # Título
+        titulo = font_titulo.render("INVENTARIO DETALLADO", True,
+                                    (255, 255, 255))
+        self.screen.blit(titulo, (210, 110))
+
+        # Lista de pedidos
+        inventario_ordenado = \
+            self.jugador.obtener_inventario_ordenado('prioridad')
         y_offset = 140
 
         for i, pedido in enumerate(inventario_ordenado[:8]):
             # Mostrar máximo 8
-            color = (255, 100, 100) if\
-                pedido.priority >= 1 else (255, 255, 255)
+            color = (255, 100, 100) if (pedido.priority >=
+                                        1) else (255, 255, 255)
 
             texto = (f"{i + 1}. Peso:{pedido.weight}"
                      f" Pago:${pedido.payout} Prio:{pedido.priority}")
-            tiempo_transcurrido = (
-                    time.time() - getattr
-            (pedido, 'tiempo_recogido', time.time()))
+            tiempo_transcurrido = reloj.ahora() - getattr(
+                pedido, 'tiempo_recogido', reloj.ahora())
             if tiempo_transcurrido > 20:
                 texto += " [TARDE]"
                 color = (255, 200, 100)
 
             rendered = font.render(texto, True, color)
-            screen.blit(rendered, (210, y_offset + i * 20))
-
-
-# --- Bucle principal ---
-running = True
-while running:
-
-    # ==========================================
-    # ===== ESTADO: MENÚ PRINCIPAL =====
-    # ==========================================
-    if estado_juego == MENU:
-        menu_principal.mostrar()
+            self.screen.blit(rendered, (210, y_offset + i * 20))
+
+        # Lista de pedidos ordenados por $
+        if self.ordendar_inventario:
+            inventario_ordenado = self.jugador.obtener_inventario_por_plata()
+            y_offset = 140
+
+            for i, pedido in enumerate(inventario_ordenado[:8]):
+                # Mostrar máximo 8
+                color = (255, 100, 100) if\
+                    pedido.priority >= 1 else (255, 255, 255)
+
+                texto = (f"{i + 1}. Peso:{pedido.weight}"
+                         f" Pago:${pedido.payout} Prio:{pedido.priority}")
+                tiempo_transcurrido = (
+                        reloj.ahora() - getattr
+                (pedido, 'tiempo_recogido', reloj.ahora()))
+                if tiempo_transcurrido > 20:
+                    texto += " [TARDE]"
+                    color = (255, 200, 100)
+
+                rendered = font.render(texto, True, color)
+                self.screen.blit(rendered, (210, y_offset + i * 20))
+
+    def mostrar_perfil_ui(self):
+        """Dibuja el overlay del perfilador con los percentiles por tramo.
+
+        Muestra p50/p95/p99 en milisegundos de cada subsistema medido en
+        los últimos cuadros, ordenados de mayor a menor p95.
+
+        Notes:
+            - No hace nada si `mostrar_perfil` es False.
+            - El resumen se calcula sobre el buffer del perfilador global.
+        """
+        if not self.mostrar_perfil:
+            return
+
+        resumen = perfilador.resumen()
+        alto = 40 + 18 * max(1, len(resumen))
+        overlay = pygame.Surface((330, alto))
+        overlay.set_alpha(200)
+        overlay.fill((0, 0, 0))
+        x = self.screen.get_width() - 340
+        self.screen.blit(overlay, (x, 50))
+
+        font = pygame.font.SysFont("monospace", 14)
+        encabezado = f"{'tramo':<13}{'p50':>7}{'p95':>7}{'p99':>7}  ms"
+        self.screen.blit(font.render(encabezado, True, (255, 255, 0)),
+                         (x + 8, 58))
+        for i, (nombre, datos) in enumerate(resumen.items()):
+            texto = (f"{nombre[:12]:<13}{datos['p50']:>7.2f}"
+                     f"{datos['p95']:>7.2f}{datos['p99']:>7.2f}")
+            self.screen.blit(font.render(texto, True, (255, 255, 255)),
+                             (x + 8, 78 + i * 18))
+
+    def exportar_perfil(self):
+        """Exporta la traza del perfilador a JSON y CSV en `perfiles/`.
+
+        El JSON usa el formato de eventos de Chrome (chrome://tracing o
+        Perfetto) e incluye el resumen de percentiles.
+
+        Notes:
+            - Informa el resultado con un mensaje temporal del jugador.
+        """
+        if not perfilador.cuadros:
+            self.jugador.mensaje = "Perfil vacío: activa la medición con F3"
+            self.jugador.mensaje_tiempo = reloj.ahora()
+            return
+
+        base = time.strftime("perfiles/traza_%Y%m%d_%H%M%S")
+        perfilador.exportar_json(base + ".json")
+        perfilador.exportar_csv(base + ".csv")
+        self.jugador.mensaje = f"Traza exportada: {base}.json/.csv"
+        self.jugador.mensaje_tiempo = reloj.ahora()
+        print(f"Traza del perfilador exportada en {base}.json y {base}.csv")
+
+    # ========================================
+    # ESTADOS DEL BUCLE
+    # ========================================
+
+    def _paso_menu(self):
+        """Un cuadro del menú principal."""
+        self.menu_principal.mostrar()
+        if 'menu' not in self.tiempos_arranque:
+            # Tiempo de arranque: desde iniciar() hasta el primer menú
+            self.tiempos_arranque['menu'] = \
+                time.perf_counter() - self.inicio_arranque
+            print(f"Menú listo en"
+                  f" {self.tiempos_arranque['menu'] * 1000:.0f} ms")
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                running = False
+                self.running = False
 
             # Procesar selección de dificultad
-            dificultad_seleccionada = menu_principal.procesar_input(event)
+            dificultad_seleccionada = \
+                self.menu_principal.procesar_input(event)
             if dificultad_seleccionada:
-                dificultad_ia = dificultad_seleccionada
-                reiniciar_juego()
-                estado_juego = JUGANDO
-                print(f"Juego iniciado con dificultad: {dificultad_ia}")
+                self.dificultad_ia = dificultad_seleccionada
+                self._empezar_partida()
 
-        clock.tick(60)
-        continue
+        self.clock.tick(60)
 
-    # ==========================================
-    # ===== ESTADO: PAUSADO =====
-    # ==========================================
-    elif estado_juego == PAUSADO:
-        menu_pausa.mostrar()
+    def _paso_pausa(self):
+        """Un cuadro del menú de pausa."""
+        self.menu_pausa.mostrar()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                running = False
+                self.running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_p:
-                    estado_juego = JUGANDO
+                    self.estado_juego = JUGANDO
                 elif event.key == pygame.K_ESCAPE:
-                    estado_juego = MENU
+                    self.estado_juego = MENU
 
-        clock.tick(60)
-        continue
+        self.clock.tick(60)
 
-    # ==========================================
-    # ===== ESTADO: GAME OVER =====
-    # ==========================================
-    elif estado_juego == GAME_OVER:
-        mostrar_pantalla_final(juego_ganado, puntaje_calculado)
+    def _paso_game_over(self):
+        """Un cuadro de la pantalla final."""
+        self.mostrar_pantalla_final(self.juego_ganado, self.puntaje_calculado)
         pygame.display.flip()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                running = False
+                self.running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    estado_juego = MENU
-
-        clock.tick(60)
-        continue
-
-    # ==========================================
-    # ===== ESTADO: JUGANDO =====
-    # ==========================================
-    elif estado_juego == JUGANDO:
-        ahora = time.time()
-        tiempo_transcurrido = ahora - tiempo_inicio
+                    self.estado_juego = MENU
+
+        self.clock.tick(60)
+
+    def _paso_jugando(self):
+        """Un cuadro de la partida."""
+        if self.imagenes is None:
+            self.imagenes = cargar_imagenes(self.tile_size, gestor_recursos)
+        perfilador.inicio_cuadro()
+        if self.grabador is not None:
+            self.grabador.nuevo_cuadro()
+        tiempo_transcurrido = self.actualizar_partida()
+        if tiempo_transcurrido is None:
+            return  # La partida terminó en este cuadro
+        self._dibujar_partida(tiempo_transcurrido)
+        perfilador.fin_cuadro()
+        self.clock.tick(60)
+
+    def _eventos_cuadro(self):
+        """Eventos del cuadro: los de pygame o los de la repetición.
+
+        Returns:
+            list[pygame.event.Event]: Eventos a procesar.
+        """
+        if self.eventos_repeticion is not None:
+            return self.eventos_repeticion
+        eventos = pygame.event.get()
+        if self.grabador is not None:
+            self.grabador.registrar_eventos(eventos)
+        return eventos
+
+    def actualizar_partida(self):
+        """Lógica de un cuadro de la partida, sin dibujar.
+
+        Además de `_paso_jugando`, la usa repeticion.py para repetir una
+        partida grabada cuadro a cuadro sin ventana.
+
+        Returns:
+            float | None: Segundos de juego transcurridos, o None si la
+            partida terminó en este cuadro.
+        """
+        ahora = reloj.ahora()
+        tiempo_transcurrido = ahora - self.tiempo_inicio
 
         # Actualizar sistemas
-        sistema_clima.actualizar()
-        jugador.recuperar()
+        with perfilador.tramo('clima'):
+            self.sistema_clima.actualizar()
+        self.jugador.recuperar()
 
         # Guardar automáticamente cada 2 minutos (120 segundos)
         if tiempo_transcurrido >= 10:  # Solo después de 10 segundos de juego
-            tiempo_desde_ultimo = tiempo_transcurrido - ultimo_autoguardado
+            tiempo_desde_ultimo = \
+                tiempo_transcurrido - self.ultimo_autoguardado
             if tiempo_desde_ultimo >= 120:  # Han pasado 2 minutos
-                ultimo_autoguardado = tiempo_transcurrido
+                self.ultimo_autoguardado = tiempo_transcurrido
+                perfilador.iniciar('autoguardado')
 
                 print(f"Iniciando auto-guardado en segundo"
                       f" {int(tiempo_transcurrido)}...")
@@ -791,12 +1142,13 @@ while running:
                 # Preparar datos del jugador
                 estado_actual = {
                     'jugador': {
-                        'x': jugador.x,
-                        'y': jugador.y,
-                        'resistencia': jugador.resistencia,
-                        'puntaje': jugador.puntaje,
-                        'reputacion': jugador.reputacion,
-                        'entregas_completadas': jugador.entregas_completadas,
+                        'x': self.jugador.x,
+                        'y': self.jugador.y,
+                        'resistencia': self.jugador.resistencia,
+                        'puntaje': self.jugador.puntaje,
+                        'reputacion': self.jugador.reputacion,
+                        'entregas_completadas':
+                            self.jugador.entregas_completadas,
                         'inventario': [
                             {
                                 'pickup': pedido.pickup,
@@ -808,7 +1160,7 @@ while running:
                                 'tiempo_recogido':
                                     getattr(pedido, 'tiempo_recogido', None)
                             }
-                            for pedido in jugador.inventario
+                            for pedido in self.jugador.inventario
                         ]
                     },
                     'pedidos_activos': [
@@ -820,45 +1172,29 @@ while running:
                             'payout': pedido.payout,
                             'id': getattr(pedido, 'id', None)
                         }
-                        for pedido in pedidos_activos
+                        for pedido in self.pedidos_activos
                     ],
                     'clima': {
-                        'estado_actual': sistema_clima.estado_actual,
-                        'intensidad_actual': sistema_clima.intensidad_actual
+                        'estado_actual': self.sistema_clima.estado_actual,
+                        'intensidad_actual':
+                            self.sistema_clima.intensidad_actual
                     },
                     'tiempo_juego': tiempo_transcurrido,
-                    'timestamp': time.time(),
-                    'dificultad_ia': dificultad_ia,
-                    'meta_ingresos': meta_ingresos
+                    'timestamp': reloj.ahora(),
+                    'dificultad_ia': self.dificultad_ia,
+                    'meta_ingresos': self.meta_ingresos
                 }
 
-                # Guardar datos del CPU si existe
-                if jugador_cpu:
-                    estado_actual['jugador_cpu'] = {
-                        'x': jugador_cpu.x,
-                        'y': jugador_cpu.y,
-                        'resistencia': jugador_cpu.resistencia,
-                        'puntaje': jugador_cpu.puntaje,
-                        'reputacion': jugador_cpu.reputacion,
-                        'entregas_completadas':
-                            jugador_cpu.entregas_completadas,
-                        'inventario': [
-                            {
-                                'pickup': pedido.pickup,
-                                'dropoff': pedido.dropoff,
-                                'weight': pedido.weight,
-                                'priority': pedido.priority,
-                                'payout': pedido.payout,
-                                'id': getattr(pedido, 'id', None),
-                                'tiempo_recogido':
-                                    getattr(pedido, 'tiempo_recogido', None)
-                            }
-                            for pedido in jugador_cpu.inventario
-                        ]
-                    }
+                # Guardar datos de los CPU si existen
+                if self.jugadores_cpu:
+                    estado_actual['jugadores_cpu'] = [
+                        serializar_cpu(cpu) for cpu in self.jugadores_cpu]
+                    # Compatibilidad con guardados de un solo CPU
+                    estado_actual['jugador_cpu'] = \
+                        estado_actual['jugadores_cpu'][0]
 
                 # Guardar pedidos pendientes en la cola
-                if hasattr(cola_pedidos, 'cola'):
+                if hasattr(self.cola_pedidos, 'cola'):
                     estado_actual['cola_pedidos'] = [
                         {
                             'pickup': pedido.pickup,
@@ -867,116 +1203,149 @@ while running:
                             'priority': pedido.priority,
                             'payout': pedido.payout
                         }
-                        for pedido in cola_pedidos.cola
+                        for pedido in self.cola_pedidos.cola
                     ]
 
-                sistema_persistencia.guardar_juego_completo(
+                self.sistema_persistencia.guardar_juego_completo(
                     estado_actual,
                     f"Auto-guardado - {int(tiempo_transcurrido)}s",
                     slot=0
                 )
                 print(f"Auto-guardado exitoso en segundo"
                       f" {int(tiempo_transcurrido)}")
-        # Actualizar CPU si existe
-        if jugador_cpu and not juego_terminado:
-            clima_mult = sistema_clima.obtener_multiplicador_actual()
+                perfilador.terminar('autoguardado')
+        # Actualizar CPU si existen
+        if self.jugadores_cpu and not self.juego_terminado:
+            perfilador.iniciar('cpu')
+            clima_mult = self.sistema_clima.obtener_multiplicador_actual()
             consumo_clima_extra =\
-                sistema_clima.obtener_consumo_resistencia_extra()
-            jugador_cpu.actualizar(tiles, pedidos_activos,
-                                   clima_mult, consumo_clima_extra)
+                self.sistema_clima.obtener_consumo_resistencia_extra()
+            # Olvidar reservas de pedidos que ya se recogieron
+            self.servicio_planificacion.limpiar(self.pedidos_activos)
+            # Con varios CPU, repartir los pedidos de forma global
+            if len(self.jugadores_cpu) > 1:
+                with perfilador.tramo('despacho'):
+                    self.servicio_planificacion.despachar(
+                        self.tiles, self.pedidos_activos, clima_mult,
+                        consumo_clima_extra)
+            # El MCTS y los planes en otro proceso graban sus decisiones
+            # o repiten las grabadas
+            if self.decisiones_repeticion is not None:
+                modo = 'repetir'
+            else:
+                modo = 'grabar' if self.grabador is not None else None
+            for indice, jugador_cpu in enumerate(self.jugadores_cpu):
+                jugador_cpu.modo_decisiones = modo
+                if modo == 'repetir':
+                    jugador_cpu.decision_repetida = \
+                        self.decisiones_repeticion.get(indice)
+                jugador_cpu.actualizar(self.tiles, self.pedidos_activos,
+                                       clima_mult, consumo_clima_extra)
+                if jugador_cpu.decision_cuadro is not None:
+                    self.grabador.anotar_decision(
+                        indice, *jugador_cpu.decision_cuadro)
+                    jugador_cpu.decision_cuadro = None
+            perfilador.terminar('cpu')
 
         # Guardar estado para deshacer
         # (cada 2 segundos para no saturar memoria)
         if int(tiempo_transcurrido) % 2 == 0 and tiempo_transcurrido > 1:
-            historial_movimientos.guardar_estado(
-                jugador, pedidos_activos, ahora)
+            self.historial_movimientos.guardar_estado(
+                self.jugador, self.pedidos_activos, ahora)
 
         # Condiciones de finalización del juego
-        if not juego_terminado:
+        if not self.juego_terminado:
+            jugador_cpu = self.cpu_lider()  # El rival con más dinero
             # Victoria del jugador por meta alcanzada
-            if jugador.puntaje >= meta_ingresos:
+            if self.jugador.puntaje >= self.meta_ingresos:
                 # Verificar si el CPU también alcanzó la meta
-                if jugador_cpu and jugador_cpu.puntaje >= meta_ingresos:
+                if jugador_cpu and jugador_cpu.puntaje >= self.meta_ingresos:
                     # Ambos alcanzaron la meta, gana quien tenga más dinero
-                    if jugador.puntaje > jugador_cpu.puntaje:
-                        juego_terminado = True
-                        juego_ganado = True
+                    if self.jugador.puntaje > jugador_cpu.puntaje:
+                        self.juego_terminado = True
+                        self.juego_ganado = True
                         tiempo_final = tiempo_transcurrido
                     else:
-                        juego_terminado = True
-                        juego_ganado = False
+                        self.juego_terminado = True
+                        self.juego_ganado = False
                         tiempo_final = tiempo_transcurrido
                 else:
                     # Solo el jugador alcanzó la meta
-                    juego_terminado = True
-                    juego_ganado = True
+                    self.juego_terminado = True
+                    self.juego_ganado = True
                     tiempo_final = tiempo_transcurrido
 
             # Derrota por CPU alcanzó la meta primero
-            elif jugador_cpu and jugador_cpu.puntaje >= meta_ingresos:
-                juego_terminado = True
-                juego_ganado = False
+            elif jugador_cpu and jugador_cpu.puntaje >= self.meta_ingresos:
+                self.juego_terminado = True
+                self.juego_ganado = False
                 tiempo_final = tiempo_transcurrido
 
             # Fin del tiempo: comparar puntajes
-            elif tiempo_transcurrido >= duracion:
-                juego_terminado = True
-                tiempo_final = duracion
+            elif tiempo_transcurrido >= self.duracion:
+                self.juego_terminado = True
+                tiempo_final = self.duracion
                 # Si hay CPU, comparar puntajes
                 if jugador_cpu:
-                    juego_ganado = jugador.puntaje > jugador_cpu.puntaje
+                    self.juego_ganado = \
+                        self.jugador.puntaje > jugador_cpu.puntaje
                 else:
                     # Sin CPU, solo perder si no alcanzó la meta
-                    juego_ganado = jugador.puntaje >= meta_ingresos
+                    self.juego_ganado = \
+                        self.jugador.puntaje >= self.meta_ingresos
 
             # Derrota por reputación
-            elif jugador.reputacion <= 20:
-                juego_terminado = True
-                juego_ganado = False
+            elif self.jugador.reputacion <= 20:
+                self.juego_terminado = True
+                self.juego_ganado = False
                 tiempo_final = tiempo_transcurrido
 
             # Si el juego acaba de terminar, calcular puntaje
-            if juego_terminado and puntaje_calculado is None:
-                puntaje_calculado = sistema_persistencia.calcular_puntaje_final(
-                    jugador, tiempo_final, duracion, meta_ingresos
-                )
+            if self.juego_terminado and self.puntaje_calculado is None:
+                self.puntaje_calculado = \
+                    self.sistema_persistencia.calcular_puntaje_final(
+                        self.jugador, tiempo_final, self.duracion,
+                        self.meta_ingresos
+                    )
 
                 # Guardar puntaje
-                sistema_persistencia.guardar_puntaje(
+                self.sistema_persistencia.guardar_puntaje(
                     "Jugador",
-                    puntaje_calculado['puntaje_final'],
+                    self.puntaje_calculado['puntaje_final'],
                     {
                         'tiempo_total': tiempo_final,
-                        'entregas_completadas': jugador.entregas_completadas,
-                        'reputacion_final': jugador.reputacion,
-                        'dinero_ganado': jugador.puntaje,
-                        'meta_alcanzada': juego_ganado
+                        'entregas_completadas':
+                            self.jugador.entregas_completadas,
+                        'reputacion_final': self.jugador.reputacion,
+                        'dinero_ganado': self.jugador.puntaje,
+                        'meta_alcanzada': self.juego_ganado
                     }
                 )
 
-                estado_juego = GAME_OVER
-                continue
+                self.estado_juego = GAME_OVER
+                return None
 
         # --- Limpiar pedidos vistos periódicamente ---
-        if ahora - ultimo_limpieza_vistos >= intervalo_limpieza:
+        if ahora - self.ultimo_limpieza_vistos >= self.intervalo_limpieza:
 
             ids_activos = set()
-            for ped in pedidos_activos:
+            for ped in self.pedidos_activos:
                 ids_activos.add(getattr(ped, 'id', None))
-            for ped in jugador.inventario:
+            for ped in self.jugador.inventario:
                 ids_activos.add(getattr(ped, 'id', None))
-            if jugador_cpu:
+            for jugador_cpu in self.jugadores_cpu:
                 for ped in jugador_cpu.inventario:
                     ids_activos.add(getattr(ped, 'id', None))
 
             # Limpiar pedidos_vistos manteniendo solo los activos
-            pedidos_vistos = ids_activos
-            ultimo_limpieza_vistos = ahora
+            self.pedidos_vistos = ids_activos
+            self.ultimo_limpieza_vistos = ahora
 
         # --- Chequear nuevos pedidos (solo si juego activo) ---
-        if ahora - ultimo_check >= check_interval:
+        if ahora - self.ultimo_check >= self.check_interval:
+            perfilador.iniciar('api_pedidos')
             try:
-                resp = api.obtener_pedidos()
+                resp = self.api.obtener_pedidos()
                 nuevos_pedidos_data = resp.get("data", []) if (
                     isinstance(resp, dict)) else resp
             except Exception as e:
@@ -987,31 +1356,36 @@ while running:
                 # Verificar duplicados usando el ID si existe
                 pedido_id = p.get("id", f"{p['pickup']}-{p['dropoff']}")
 
-                if pedido_id not in pedidos_vistos:
-                    pedidos_vistos.add(pedido_id)
+                if pedido_id not in self.pedidos_vistos:
+                    self.pedidos_vistos.add(pedido_id)
 
                     # Obtener casillas ocupadas
                     ocupadas = set()
-                    for ped in pedidos_activos + list(jugador.inventario):
+                    for ped in (self.pedidos_activos +
+                                list(self.jugador.inventario)):
                         ocupadas.add(tuple(ped.pickup))
                         ocupadas.add(tuple(ped.dropoff))
-                    ocupadas.add((jugador.x, jugador.y))
-                    if jugador_cpu:
+                    ocupadas.add((self.jugador.x, self.jugador.y))
+                    for jugador_cpu in self.jugadores_cpu:
                         ocupadas.add((jugador_cpu.x, jugador_cpu.y))
                         for ped in jugador_cpu.inventario:
                             ocupadas.add(tuple(ped.pickup))
                             ocupadas.add(tuple(ped.dropoff))
 
-                    # Asignar posiciones aleatorias con separación
+                    # Asignar posiciones aleatorias con separación, donde
+                    # el jugador pueda llegar
+                    zona = (self.jugador.x, self.jugador.y)
                     pickup_pos = (asignar_posicion_aleatoria
-                                  (tiles, ocupadas, separacion=4))
+                                  (self.tiles, ocupadas, separacion=4,
+                                   alcanzable_desde=zona))
                     if pickup_pos:
                         p["pickup"] = pickup_pos
                         ocupadas.add(tuple(pickup_pos))
                     else:
                         # Si no hay espacio con sep=4, intentar con sep=2
                         pickup_pos =(asignar_posicion_aleatoria
-                                     (tiles, ocupadas, separacion=2))
+                                     (self.tiles, ocupadas, separacion=2,
+                                      alcanzable_desde=zona))
                         if pickup_pos:
                             p["pickup"] = pickup_pos
                             ocupadas.add(tuple(pickup_pos))
@@ -1021,14 +1395,16 @@ while running:
                             continue
 
                     dropoff_pos = (asignar_posicion_aleatoria
-                                   (tiles, ocupadas, separacion=4))
+                                   (self.tiles, ocupadas, separacion=4,
+                                    alcanzable_desde=zona))
                     if dropoff_pos:
                         p["dropoff"] = dropoff_pos
                         ocupadas.add(tuple(dropoff_pos))
                     else:
                         # Si no hay espacio con sep=4, intentar con sep=2
                         dropoff_pos = (asignar_posicion_aleatoria
-                                       (tiles, ocupadas, separacion=2))
+                                       (self.tiles, ocupadas, separacion=2,
+                                        alcanzable_desde=zona))
                         if dropoff_pos:
                             p["dropoff"] = dropoff_pos
                             ocupadas.add(tuple(dropoff_pos))
@@ -1047,66 +1423,71 @@ while running:
                     # Guardar el ID
                     nuevo_pedido.id = pedido_id
 
-                    cola_pedidos.agregar_pedido(nuevo_pedido)
+                    self.cola_pedidos.agregar_pedido(nuevo_pedido)
 
-            ultimo_check = ahora
+            self.ultimo_check = ahora
+            perfilador.terminar('api_pedidos')
 
         # --- Liberar pedidos ---
-        if (len(pedidos_activos) < 5 and ahora - ultimo_liberado
-                >= liberar_interval):
-            pedido = cola_pedidos.obtener_siguiente()
+        if (len(self.pedidos_activos) < 5 and ahora - self.ultimo_liberado
+                >= self.liberar_interval):
+            pedido = self.cola_pedidos.obtener_siguiente()
             if pedido:
-                pedidos_activos.append(pedido)
-                ultimo_liberado = ahora
+                self.coordinador_pedidos.agregar(pedido)
+                self.ultimo_liberado = ahora
 
         # --- Eventos ---
-        for event in pygame.event.get():
+        perfilador.iniciar('eventos')
+        for event in self._eventos_cuadro():
             if event.type == pygame.QUIT:
-                running = False
+                self.running = False
             elif event.type == pygame.KEYDOWN:
                 dx = dy = 0
 
                 # Movimiento
                 if event.key == pygame.K_LEFT:
                     dx = -1
-                    if direccion_der:
-                        direccion_der = False
+                    if self.direccion_der:
+                        self.direccion_der = False
                 elif event.key == pygame.K_RIGHT:
                     dx = 1
-                    if not direccion_der:
-                        direccion_der = True
+                    if not self.direccion_der:
+                        self.direccion_der = True
                 elif event.key == pygame.K_UP:
                     dy = -1
                 elif event.key == pygame.K_DOWN:
                     dy = 1
                 # Pausa
                 elif event.key == pygame.K_p:
-                    estado_juego = PAUSADO
+                    self.estado_juego = PAUSADO
                 # Acciones especiales
                 elif (event.key == pygame.K_l and
-                      pygame.key.get_pressed()[pygame.K_LCTRL]):
+                      event.mod & pygame.KMOD_LCTRL):
                     # Ctrl+L Cargar partida
-                    if cargar_juego_guardado(slot=1):
+                    if self.cargar_juego_guardado(slot=1):
                         print("Partida cargada desde slot 1")
 
                 elif event.key == pygame.K_q:
-                    jugador.cancelar_ultimo_pedido()
+                    self.jugador.cancelar_ultimo_pedido()
                 elif event.key == pygame.K_u:  # Deshacer
-                    historial_movimientos.deshacer(jugador, pedidos_activos)
+                    if self.historial_movimientos.deshacer(
+                            self.jugador, self.pedidos_activos):
+                        self.coordinador_pedidos.reindexar()
+                        self.coordinador_pedidos.revisar(self.jugador)
                 elif (event.key == pygame.K_s and
-                      pygame.key.get_pressed()[pygame.K_LCTRL]):
+                      event.mod & pygame.KMOD_LCTRL):
                     # Ctrl+S Guardar manualmente
                     print("Guardando manualmente...")
 
                     estado_actual = {
                         'jugador': {
-                            'x': jugador.x,
-                            'y': jugador.y,
-                            'resistencia': jugador.resistencia,
-                            'puntaje': jugador.puntaje,
-                            'reputacion': jugador.reputacion,
+                            'x': self.jugador.x,
+                            'y': self.jugador.y,
+                            'resistencia': self.jugador.resistencia,
+                            'puntaje': self.jugador.puntaje,
+                            'reputacion': self.jugador.reputacion,
                             'entregas_completadas':
-                                jugador.entregas_completadas,
+                                self.jugador.entregas_completadas,
                             'inventario': [
                                 {
                                     'pickup': pedido.pickup,
@@ -1118,7 +1499,7 @@ while running:
                                     'tiempo_recogido': getattr
                                     (pedido, 'tiempo_recogido', None)
                                 }
-                                for pedido in jugador.inventario
+                                for pedido in self.jugador.inventario
                             ]
                         },
                         'pedidos_activos': [
@@ -1130,45 +1511,29 @@ while running:
                                 'payout': pedido.payout,
                                 'id': getattr(pedido, 'id', None)
                             }
-                            for pedido in pedidos_activos
+                            for pedido in self.pedidos_activos
                         ],
                         'clima': {
-                            'estado_actual': sistema_clima.estado_actual,
-                            'intensidad_actual': sistema_clima.intensidad_actual
+                            'estado_actual': self.sistema_clima.estado_actual,
+                            'intensidad_actual':
+                                self.sistema_clima.intensidad_actual
                         },
                         'tiempo_juego': tiempo_transcurrido,
-                        'timestamp': time.time(),
-                        'dificultad_ia': dificultad_ia,
-                        'meta_ingresos': meta_ingresos
+                        'timestamp': reloj.ahora(),
+                        'dificultad_ia': self.dificultad_ia,
+                        'meta_ingresos': self.meta_ingresos
                     }
 
-                    # Guardar CPU si existe
-                    if jugador_cpu:
-                        estado_actual['jugador_cpu'] = {
-                            'x': jugador_cpu.x,
-                            'y': jugador_cpu.y,
-                            'resistencia': jugador_cpu.resistencia,
-                            'puntaje': jugador_cpu.puntaje,
-                            'reputacion': jugador_cpu.reputacion,
-                            'entregas_completadas':
-                                jugador_cpu.entregas_completadas,
-                            'inventario': [
-                                {
-                                    'pickup': pedido.pickup,
-                                    'dropoff': pedido.dropoff,
-                                    'weight': pedido.weight,
-                                    'priority': pedido.priority,
-                                    'payout': pedido.payout,
-                                    'id': getattr(pedido, 'id', None),
-                                    'tiempo_recogido': getattr(
-                                        pedido, 'tiempo_recogido', None)
-                                }
-                                for pedido in jugador_cpu.inventario
-                            ]
-                        }
+                    # Guardar CPU si existen
+                    if self.jugadores_cpu:
+                        estado_actual['jugadores_cpu'] = [
+                            serializar_cpu(cpu) for cpu in self.jugadores_cpu]
+                        # Compatibilidad con guardados de un solo CPU
+                        estado_actual['jugador_cpu'] = \
+                            estado_actual['jugadores_cpu'][0]
 
                     # Guardar cola
-                    if hasattr(cola_pedidos, 'cola'):
+                    if hasattr(self.cola_pedidos, 'cola'):
                         estado_actual['cola_pedidos'] = [
                             {
                                 'pickup': pedido.pickup,
@@ -1177,211 +1542,132 @@ while running:
                                 'priority': pedido.priority,
                                 'payout': pedido.payout
                             }
-                            for pedido in cola_pedidos.cola
+                            for pedido in self.cola_pedidos.cola
                         ]
 
-                    if (sistema_persistencia.guardar_juego_completo
+                    if (self.sistema_persistencia.guardar_juego_completo
                         (estado_actual,"Guardado manual", slot=1)):
-                        jugador.mensaje = "Juego guardado exitosamente!"
-                        jugador.mensaje_tiempo = time.time()
+                        self.jugador.mensaje = "Juego guardado exitosamente!"
+                        self.jugador.mensaje_tiempo = reloj.ahora()
                         print("Guardado manual exitoso en slot 1")
                     else:
-                        jugador.mensaje = "Error al guardar"
-                        jugador.mensaje_tiempo = time.time()
+                        self.jugador.mensaje = "Error al guardar"
+                        self.jugador.mensaje_tiempo = reloj.ahora()
                         print("Error en guardado manual")
 
                 elif event.key == pygame.K_i:
                     # Mostrar/ocultar inventario detallado
-                    mostrar_inventario_detallado = not mostrar_inventario_detallado
+                    self.mostrar_inventario_detallado = \
+                        not self.mostrar_inventario_detallado
                 elif event.key == pygame.K_t:  # Mostrar/ocultar estadísticas
-                    mostrar_estadisticas = not mostrar_estadisticas
+                    self.mostrar_estadisticas = not self.mostrar_estadisticas
                 elif event.key == pygame.K_o:  # Ordenar pedidos por plata
-                    ordendar_inventario = not ordendar_inventario
+                    self.ordendar_inventario = not self.ordendar_inventario
+                elif event.key == pygame.K_F3:  # Perfilador y su overlay
+                    self.mostrar_perfil = perfilador.alternar()
+                elif event.key == pygame.K_F4:  # Exportar traza
+                    self.exportar_perfil()
 
                 # Realizar movimiento con clima
                 if dx != 0 or dy != 0:
-                    clima_mult = sistema_clima.obtener_multiplicador_actual()
-                    consumo_clima = (sistema_clima.
+                    clima_mult = \
+                        self.sistema_clima.obtener_multiplicador_actual()
+                    consumo_clima = (self.sistema_clima.
                                      obtener_consumo_resistencia_extra())
-                    jugador.mover(dx, dy, tiles, clima_mult, consumo_clima)
-
-        # --- Revisar pickups (ambos jugadores) ---
-        for pedido in list(pedidos_activos):
-            # Jugador humano
-            if [jugador.x, jugador.y] == pedido.pickup:
-                if jugador.recoger_pedido(pedido):
-                    pedidos_activos.remove(pedido)
-            # Jugador CPU
-            elif (jugador_cpu and [jugador_cpu.x, jugador_cpu.y]
-                  == pedido.pickup):
-                if jugador_cpu.recoger_pedido(pedido):
-                    pedidos_activos.remove(pedido)
-
-        # --- Revisar dropoffs ---
-        entregado = jugador.entregar_pedido()
-        if entregado:
-            print(f"Pedido entregado - Puntaje: {jugador.puntaje},"
-                  f" Reputación: {jugador.reputacion}")
-
-        # Entregar pedidos del CPU
-        if jugador_cpu:
-            entregado_cpu = jugador_cpu.entregar_pedido()
-            if entregado_cpu:
-                print(f"CPU entregó pedido - Puntaje: {jugador_cpu.puntaje},"
-                      f" Reputación: {jugador_cpu.reputacion}")
+                    self.jugador.mover(dx, dy, self.tiles, clima_mult,
+                                       consumo_clima)
+        perfilador.terminar('eventos')
+
+        # Las recogidas y entregas las resuelve coordinador_pedidos cuando
+        # un repartidor se mueve (ver entregas.py)
+        return tiempo_transcurrido
+
+    def _dibujar_partida(self, tiempo_transcurrido):
+        """Dibuja un cuadro de la partida: mapa, objetos, HUD y overlays.
 
+        Args:
+            tiempo_transcurrido (float): Segundos de juego (cronómetro).
+        """
         # --- Renderizado ---
         # Cámara
-        cam_x = max(0, min(jugador.x - view_width
-                           // 2, map_width - view_width))
-        cam_y = max(0, min(jugador.y - view_height
-                           // 2, map_height - view_height))
+        cam_x = max(0, min(self.jugador.x - self.view_width
+                           // 2, self.map_width - self.view_width))
+        cam_y = max(0, min(self.jugador.y - self.view_height
+                           // 2, self.map_height - self.view_height))
 
         # Dibujar mapa y objetos
-        screen.fill((255, 255, 255))
-        dibujar_mapa(screen, tiles, colors, cam_x, cam_y, tile_size,
-                     view_width, view_height, imagenes_tiles)
-
-        # Pedidos activos (pickups)
-        for pedido in pedidos_activos:
-            px, py = pedido.pickup
-            if (cam_x <= px < cam_x + view_width and
-                    cam_y <= py < cam_y + view_height):
-                screen.blit(pickup_image,
-                            ((px - cam_x) * tile_size,
-                             (py - cam_y) * tile_size))
-
-        # --- Leyenda de prioridades arriba a la izquierda ---
-        leyenda_size = 26
-        dropoff_prioridad_img_scaled = \
-            pygame.transform.scale(dropoff_prioridad_image,
-                                   (leyenda_size, leyenda_size))
-        dropoff_normal_img_scaled = \
-            pygame.transform.scale(dropoff_normal_image,
-                                   (leyenda_size, leyenda_size))
-
-        font = pygame.font.SysFont(None, 26)
-        if dropoff_prioridad_img_scaled:
-            screen.blit(dropoff_prioridad_img_scaled, (5, 5))
-        else:
-            pygame.draw.rect(screen, (255, 0, 0), (10, 10, 20, 20))
-        screen.blit(font.render("Prioridad máxima",
-                                True, (255, 255, 255)), (35, 10))
-
-        if dropoff_normal_img_scaled:
-            screen.blit(dropoff_normal_img_scaled, (5, 30))
-        else:
-            pygame.draw.rect(screen, (255, 105, 180), (10, 40, 20, 20))
-        screen.blit(font.render("Prioridad normal", True,
-                                (255, 255, 255)), (35, 40))
-
-        # Dropoffs del inventario del jugador
-        for pedido in jugador.inventario:
-            dx, dy = pedido.dropoff
-            if (cam_x <= dx < cam_x + view_width and
-                    cam_y <= dy < cam_y + view_height):
-                if pedido.priority >= 1:  # Si es prioridad maxima
-                    imagen_dropoff = dropoff_prioridad_image
-                else:
-                    imagen_dropoff = dropoff_normal_image
-
-                screen.blit(
-                    imagen_dropoff, ((dx - cam_x) *
-                                     tile_size, (dy - cam_y) * tile_size))
-
-        # Dropoffs del inventario del CPU
-        if jugador_cpu:
-            for pedido in jugador_cpu.inventario:
-                dx, dy = pedido.dropoff
-                if (cam_x <= dx < cam_x + view_width and
-                        cam_y <= dy < cam_y + view_height):
-                    if pedido.priority >= 1:
-                        imagen_dropoff = dropoff_prioridad_image_cpu
-                    else:
-                        imagen_dropoff = dropoff_normal_image_cpu
-
-                    screen.blit(
-                        imagen_dropoff, ((dx - cam_x) *
-                                         tile_size, (dy - cam_y) * tile_size))
-
-        # Jugador
-        # ---Cambia la direccion del jugador ---
-        if direccion_der:
-            screen.blit(
-                player_image, ((jugador.x - cam_x) *
-                               tile_size, (jugador.y - cam_y)
-                               * tile_size))
-        else:
-            screen.blit(
-                player_imagen_flip, ((jugador.x - cam_x) *
-                                     tile_size, (jugador.y - cam_y) * tile_size))
-
-        # Dibujar CPU si existe
-        if jugador_cpu:
-            cpu_cam_x = jugador_cpu.x - cam_x
-            cpu_cam_y = jugador_cpu.y - cam_y
-
-            # Detectar movimiento del CPU
-            if jugador_cpu.x < pos_x_anterior_cpu:
-                direccion_cpu = -1  # Izquierda
-            elif jugador_cpu.x > pos_x_anterior_cpu:
-                direccion_cpu = 1  # Derecha
-
-            # Elegir imagen según dirección
-            if direccion_cpu == -1:
-                imagen_actual_cpu = cpu_image_flip
-            else:
-                imagen_actual_cpu = cpu_image
-
-            # Solo dibujar si está visible
-            if (0 <= cpu_cam_x < view_width and 0 <= cpu_cam_y < view_height):
-                screen.blit(imagen_actual_cpu,
-                            (cpu_cam_x * tile_size, cpu_cam_y * tile_size))
-
-            # Actualizar posición anterior
-            pos_x_anterior_cpu = jugador_cpu.x
+        with perfilador.tramo('mapa'):
+            if isinstance(self.tiles, MapaPaginado):
+                # Bloques de la vista y de los repartidores, antes de usarlos
+                self.tiles.precargar(
+                    [(cam_x + self.view_width // 2,
+                      cam_y + self.view_height // 2)]
+                    + [(cpu.x, cpu.y) for cpu in self.jugadores_cpu],
+                    max(self.view_width, self.view_height))
+            self.screen.fill((255, 255, 255))
+            dibujar_mapa(self.screen, self.tiles, self.colors, cam_x, cam_y,
+                         self.tile_size, self.view_width, self.view_height,
+                         self.imagenes['tiles'])
+        perfilador.iniciar('objetos')
+
+        # Pedidos, leyenda y puntos de entrega
+        dibujar_pedidos(self.screen, self.imagenes, self.pedidos_activos,
+                        self.jugador, self.jugadores_cpu, cam_x, cam_y,
+                        self.tile_size,
+                        self.view_width, self.view_height)
+
+        # Jugador y CPU
+        dibujar_repartidores(self.screen, self.imagenes, self.jugador,
+                             self.direccion_der, self.jugadores_cpu,
+                             self.direccion_cpu, self.pos_x_anterior_cpu,
+                             cam_x, cam_y, self.tile_size,
+                             self.view_width, self.view_height)
+        perfilador.terminar('objetos')
         # UI
-        mostrar_hud_mejorado()
+        perfilador.iniciar('hud')
+        self.mostrar_hud_mejorado()
 
         # Barra de resistencia
-        font = pygame.font.SysFont(None, 24)
+        font = gestor_recursos.fuente(24)
         ancho_barra = 200
         alto_barra = 20
         x_barra = 10
-        y_barra = screen.get_height() - 80
+        y_barra = self.screen.get_height() - 80
 
-        porcentaje = max(0, jugador.resistencia / jugador.max_resistencia)
+        porcentaje = max(0, self.jugador.resistencia
+                         / self.jugador.max_resistencia)
         ancho_actual = int(ancho_barra * porcentaje)
         color_barra = (0, 255, 0) \
             if porcentaje > 0.3 else (255, 255, 0) \
             if porcentaje > 0.1 else (255, 0, 0)
 
-        pygame.draw.rect(screen, (100, 100, 100),
+        pygame.draw.rect(self.screen, (100, 100, 100),
                          (x_barra, y_barra, ancho_barra, alto_barra))
-        pygame.draw.rect(screen, color_barra,
+        pygame.draw.rect(self.screen, color_barra,
                          (x_barra, y_barra, ancho_actual, alto_barra))
-        screen.blit(font.render(
+        self.screen.blit(font.render(
             "Resistencia", True, (0, 0, 0)),
             (x_barra, y_barra - 20))
 
         # Barra de reputación
-        y_barra_rep = screen.get_height() - 30
-        porcentaje_rep = max(0, jugador.reputacion / 100)
+        y_barra_rep = self.screen.get_height() - 30
+        porcentaje_rep = max(0, self.jugador.reputacion / 100)
         ancho_actual_rep = int(ancho_barra * porcentaje_rep)
         color_barra_rep = (255, 0, 0) \
-            if jugador.reputacion <= 30 else (255, 255, 0) \
-            if jugador.reputacion <= 60 else (0, 0, 255)
+            if self.jugador.reputacion <= 30 else (255, 255, 0) \
+            if self.jugador.reputacion <= 60 else (0, 0, 255)
 
-        pygame.draw.rect(screen, (100, 100, 100),
+        pygame.draw.rect(self.screen, (100, 100, 100),
                          (x_barra, y_barra_rep, ancho_barra, alto_barra))
-        pygame.draw.rect(screen, color_barra_rep,
+        pygame.draw.rect(self.screen, color_barra_rep,
                          (x_barra, y_barra_rep, ancho_actual_rep, alto_barra))
-        screen.blit(font.render("Reputación", True,
-                                (0, 0, 0)), (x_barra, y_barra_rep - 20))
+        self.screen.blit(font.render("Reputación", True,
+                                     (0, 0, 0)), (x_barra, y_barra_rep - 20))
 
-        # Barras de CPU
-        if dificultad_ia and dificultad_ia != 'sin_ia':
-            y_barra_cpu = screen.get_height() - 180
+        # Barras del CPU líder
+        if self.jugadores_cpu:
+            jugador_cpu = self.cpu_lider()
+            y_barra_cpu = self.screen.get_height() - 180
 
             porcentaje = max(0, jugador_cpu.resistencia
                              / jugador_cpu.max_resistencia)
@@ -1390,71 +1676,143 @@ while running:
                 if porcentaje > 0.3 else (255, 255, 0) \
                 if porcentaje > 0.1 else (255, 0, 0)
 
-            pygame.draw.rect(screen, (100, 100, 100),
+            pygame.draw.rect(self.screen, (100, 100, 100),
                              (x_barra, y_barra_cpu, ancho_barra, alto_barra))
-            pygame.draw.rect(screen, color_barra,
+            pygame.draw.rect(self.screen, color_barra,
                              (x_barra, y_barra_cpu,
                               ancho_actual, alto_barra))
-            screen.blit(font.render(
+            self.screen.blit(font.render(
                 "Resistencia-CPU", True, (0, 0, 0)),
                 (x_barra, y_barra_cpu - 20))
 
             # Barra de reputación del CPU
-            y_barra_rep = screen.get_height() - 130
+            y_barra_rep = self.screen.get_height() - 130
             porcentaje_rep = max(0, jugador_cpu.reputacion / 100)
             ancho_actual_rep = int(ancho_barra * porcentaje_rep)
             color_barra_rep = (255, 165, 0) \
                 if jugador_cpu.reputacion <= 30 else (255, 255, 0) \
                 if jugador_cpu.reputacion <= 60 else (87, 35, 100)
 
-            pygame.draw.rect(screen, (100, 100, 100),
+            pygame.draw.rect(self.screen, (100, 100, 100),
                              (x_barra, y_barra_rep, ancho_barra, alto_barra))
-            pygame.draw.rect(screen, color_barra_rep,
+            pygame.draw.rect(self.screen, color_barra_rep,
                              (x_barra, y_barra_rep, ancho_actual_rep, alto_barra))
-            screen.blit(font.render("Reputación-CPU", True,
-                                    (0, 0, 0)), (x_barra, y_barra_rep - 20))
+            self.screen.blit(font.render("Reputación-CPU", True,
+                                         (0, 0, 0)), (x_barra, y_barra_rep - 20))
 
         # Cronómetro
-        tiempo_restante = max(0, int(duracion - tiempo_transcurrido))
+        tiempo_restante = max(0, int(self.duracion - tiempo_transcurrido))
         minutos = tiempo_restante // 60
         segundos = tiempo_restante % 60
         cronometro_texto = f"Tiempo: {minutos:02d}:{segundos:02d}"
-        font_crono = pygame.font.SysFont(None, 36)
+        font_crono = gestor_recursos.fuente(36)
         color_tiempo = (255, 0, 0) if tiempo_restante < 60 else (0, 0, 0)
-        screen.blit(font_crono.render(cronometro_texto, True, color_tiempo),
-                    (screen.get_width() - 180, 10))
+        self.screen.blit(font_crono.render(cronometro_texto, True,
+                                           color_tiempo),
+                         (self.screen.get_width() - 180, 10))
 
         # Mostrar mensajes temporales
-        if jugador.mensaje and time.time() - jugador.mensaje_tiempo < 3:
-            font_msg = pygame.font.SysFont(None, 28)
+        if (self.jugador.mensaje and
+                reloj.ahora() - self.jugador.mensaje_tiempo < 3):
+            font_msg = gestor_recursos.fuente(28)
             aviso = font_msg.render(
-                jugador.mensaje, True, (0, 0, 0))
-            screen.blit(aviso, (10, screen.get_height() - 230))
+                self.jugador.mensaje, True, (0, 0, 0))
+            self.screen.blit(aviso, (10, self.screen.get_height() - 230))
 
         # Mensaje de energía
-        if jugador.bloqueado:
-            font_msg = pygame.font.SysFont(None, 36)
+        if self.jugador.bloqueado:
+            font_msg = gestor_recursos.fuente(36)
             aviso = font_msg.render(
                 "¡Sin energía! Descansando...", True, (255, 0, 0))
-            screen.blit(aviso, (10, screen.get_height() - 230))
+            self.screen.blit(aviso, (10, self.screen.get_height() - 230))
 
         # --- Controles ---
-        font_controles = pygame.font.SysFont(None, 20)
+        font_controles = gestor_recursos.fuente(20)
         controles_texto = [
-            '"Q" cancelar  "U" deshacer  "I" inventario  "P" pausa',
+            '"Q" cancelar  "U" deshacer  "I" inventario  "P" pausa'
+            '  "F3" perfil',
             '"Ctrl+S" guardar  "Ctrl+L" cargar  "T" estadísticas  "O" orden $'
         ]
         for i, texto in enumerate(controles_texto):
             rendered = font_controles.render(texto, True, (0, 0, 0))
             rect = rendered.get_rect()
-            rect.bottomright = (screen.get_width() -
-                                10, screen.get_height() - 30 + i * 20)
-            screen.blit(rendered, rect)
+            rect.bottomright = (self.screen.get_width() -
+                                10, self.screen.get_height() - 30 + i * 20)
+            self.screen.blit(rendered, rect)
+        perfilador.terminar('hud')
 
         # Overlays opcionales
-        mostrar_inventario_detallado_ui()
+        with perfilador.tramo('overlays'):
+            self.mostrar_inventario_detallado_ui()
+            self.mostrar_perfil_ui()
 
-        pygame.display.flip()
-        clock.tick(60)
+        with perfilador.tramo('flip'):
+            pygame.display.flip()
+
+    def _paso_cargando(self):
+        """Un cuadro de la pantalla de carga."""
+        if self.carga.listo():
+            self._empezar_partida()
+            return
 
-pygame.quit()
+        self.pantalla_carga.mostrar(self.carga.progreso(),
+                                    self.carga.duracion_total())
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+        self.clock.tick(30)
+
+    # ========================================
+    # BUCLE PRINCIPAL
+    # ========================================
+
+    def ejecutar(self):
+        """Arranca la aplicación si hace falta y corre el bucle principal."""
+        if self.screen is None:
+            self.iniciar()
+        pasos = {
+            MENU: self._paso_menu,
+            CARGANDO: self._paso_cargando,
+            PAUSADO: self._paso_pausa,
+            GAME_OVER: self._paso_game_over,
+            JUGANDO: self._paso_jugando
+        }
+        self.running = True
+        while self.running:
+            pasos[self.estado_juego]()
+            # La grabación termina al salir de la partida o del juego
+            if self.grabador is not None and (
+                    not self.running or
+                    self.estado_juego not in (JUGANDO, PAUSADO)):
+                self._terminar_grabacion()
+        if self.proceso_ia is not None:
+            self.proceso_ia.cerrar()
+        pygame.quit()
+
+
+def main():
+    """Punto de entrada: crea la aplicación y la ejecuta.
+
+    ``python Main.py --mapa data/generado/ciudad.cqm`` juega en un mapa
+    binario (ver mapa_binario.py); ``--grabar`` graba las partidas para
+    repetirlas con repeticion.py; ``--cpu N`` juega contra N CPU y
+    ``--proceso`` planifica los CPU difíciles en otro proceso (ver
+    proceso_ia.py).
+    """
+    parser = argparse.ArgumentParser(description="Courier Quest")
+    parser.add_argument('--mapa', default=None,
+                        help='mapa binario por bloques en lugar de la API')
+    parser.add_argument('--grabar', action='store_true',
+                        help='grabar cada partida en repeticiones/')
+    parser.add_argument('--cpu', type=int, default=1,
+                        help='cantidad de CPU rivales')
+    parser.add_argument('--proceso', action='store_true',
+                        help='planificar los CPU difíciles en otro proceso')
+    args = parser.parse_args()
+    Aplicacion(cantidad_cpu=args.cpu, grabar=args.grabar,
+               planificar_en_proceso=args.proceso,
+               archivo_mapa=args.mapa).ejecutar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+arranque.py.
+
+Carga concurrente de los datos del juego. El mapa,
+los pedidos y el clima se piden a la API (o a los
+archivos locales) en hilos separados mientras el
+menú ya está en pantalla, así el arranque no espera
+a los tiempos de espera de la red uno detrás de otro.
+Una tarea puede ir encadenada a otra: empieza cuando
+la anterior termina y recibe su resultado (así se
+calcula el grafo de rutas apenas llega el mapa).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CargaConcurrente:
+    """Ejecuta tareas de carga en paralelo y mide cuánto tarda cada una.
+
+    Attributes:
+        tareas (dict): Nombre -> Future de cada tarea.
+        tiempos (dict): Nombre -> segundos que tardó cada tarea terminada.
+        inicio (float): Momento en que se lanzaron las tareas.
+    """
+
+    def __init__(self, tareas, encadenadas=None):
+        """Lanza todas las tareas en un hilo cada una.
+
+        Args:
+            tareas (dict): Nombre -> función sin argumentos que devuelve
+                el dato cargado.
+            encadenadas (dict | None): Nombre -> (nombre de la tarea
+                previa, función que recibe su resultado). Su tiempo se
+                cuenta desde el lanzamiento, con la espera incluida.
+        """
+        encadenadas = encadenadas or {}
+        self.inicio = time.perf_counter()
+        self.tiempos = {}
+        self._ejecutor = ThreadPoolExecutor(
+            max_workers=max(1, len(tareas) + len(encadenadas)),
+            thread_name_prefix="carga")
+        self.tareas = {nombre: self._ejecutor.submit(self._medir, nombre,
+                                                     funcion)
+                       for nombre, funcion in tareas.items()}
+        for nombre, (previa, funcion) in encadenadas.items():
+            futuro = self.tareas[previa]
+            self.tareas[nombre] = self._ejecutor.submit(
+                self._medir, nombre,
+                lambda f=futuro, g=funcion: g(f.result()))
+        self._ejecutor.shutdown(wait=False)
+
+    def _medir(self, nombre, funcion):
+        """Ejecuta una tarea y guarda su duración."""
+        inicio = time.perf_counter()
+        try:
+            return funcion()
+        finally:
+            self.tiempos[nombre] = time.perf_counter() - inicio
+
+    def listo(self):
+        """Indica si terminaron todas las tareas.
+
+        Returns:
+            bool: True si ninguna tarea sigue en curso.
+        """
+        return all(futuro.done() for futuro in self.tareas.values())
+
+    def progreso(self):
+        """Estado de cada tarea, para la pantalla de carga.
+
+        Returns:
+            dict: Nombre -> True si la tarea terminó.
+        """
+        return {nombre: futuro.done()
+                for nombre, futuro in self.tareas.items()}
+
+    def resultado(self, nombre):
+        """Devuelve el dato de una tarea, esperando si hace falta.
+
+        Args:
+            nombre (str): Nombre de la tarea.
+
+        Returns:
+            Any: Lo que devolvió la función de la tarea. Si la tarea
+            lanzó una excepción, se vuelve a lanzar acá.
+        """
+        return self.tareas[nombre].result()
+
+    def duracion_total(self):
+        """Segundos desde que se lanzaron las tareas hasta la última.
+
+        Returns:
+            float: Duración de la carga completa (o hasta ahora).
+        """
+        if not self.listo():
+            return time.perf_counter() - self.inicio
+        return max(self.tiempos.values(), default=0.0)
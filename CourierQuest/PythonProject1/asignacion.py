@@ -0,0 +1,175 @@
+"""
+asignacion.py.
+
+Resuelve el problema de asignación repartidor-pedido:
+dada una matriz de costos (filas = CPU, columnas =
+pedidos) elige a lo sumo un pedido por CPU y un CPU
+por pedido minimizando el costo total.
+
+- Instancias pequeñas: algoritmo húngaro, O(n² m),
+  óptimo exacto.
+- Instancias grandes: algoritmo de subasta con
+  escalado de epsilon; con costos enteros y
+  epsilon < 1 / n el resultado también es óptimo,
+  y en la práctica converge mucho más rápido.
+
+Los pares con costo INALCANZABLE se descartan del
+resultado.
+"""
+
+INALCANZABLE = 10 ** 9  # Costo de un par imposible (sin ruta o sin espacio)
+UMBRAL_HUNGARO = 40 * 40  # Celdas de la matriz hasta las que se usa húngaro
+
+
+def resolver_asignacion(costos):
+    """Elige el algoritmo según el tamaño y resuelve la asignación.
+
+    Args:
+        costos (list[list[int]]): Costo de asignar el CPU i al pedido j.
+
+    Returns:
+        dict: Índice de CPU -> índice de pedido asignado.
+    """
+    if not costos or not costos[0]:
+        return {}
+    if len(costos) * len(costos[0]) <= UMBRAL_HUNGARO:
+        return hungaro(costos)
+    return subasta(costos)
+
+
+def _transponer(costos):
+    """Devuelve la matriz transpuesta."""
+    return [list(columna) for columna in zip(*costos)]
+
+
+def hungaro(costos):
+    """Algoritmo húngaro con potenciales para matrices rectangulares.
+
+    Args:
+        costos (list[list[int]]): Matriz n x m de costos.
+
+    Returns:
+        dict: Índice de fila -> índice de columna asignada.
+    """
+    n, m = len(costos), len(costos[0])
+    if n > m:
+        # Con más CPU que pedidos se asignan los pedidos a los CPU
+        return {i: j for j, i in hungaro(_transponer(costos)).items()}
+
+    infinito = float('inf')
+    u = [0] * (n + 1)  # Potencial de las filas
+    v = [0] * (m + 1)  # Potencial de las columnas
+    fila_de = [0] * (m + 1)  # Columna -> fila asignada (1-indexado)
+    camino = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        fila_de[0] = i
+        j0 = 0
+        minimo = [infinito] * (m + 1)
+        usadas = [False] * (m + 1)
+        while True:
+            usadas[j0] = True
+            i0 = fila_de[j0]
+            delta = infinito
+            j1 = 0
+            fila = costos[i0 - 1]
+            for j in range(1, m + 1):
+                if usadas[j]:
+                    continue
+                actual = fila[j - 1] - u[i0] - v[j]
+                if actual < minimo[j]:
+                    minimo[j] = actual
+                    camino[j] = j0
+                if minimo[j] < delta:
+                    delta = minimo[j]
+                    j1 = j
+            for j in range(m + 1):
+                if usadas[j]:
+                    u[fila_de[j]] += delta
+                    v[j] -= delta
+                else:
+                    minimo[j] -= delta
+            j0 = j1
+            if fila_de[j0] == 0:
+                break
+        # Invertir el camino aumentante
+        while j0:
+            j1 = camino[j0]
+            fila_de[j0] = fila_de[j1]
+            j0 = j1
+
+    return {fila_de[j] - 1: j - 1 for j in range(1, m + 1)
+            if fila_de[j] and costos[fila_de[j] - 1][j - 1] < INALCANZABLE}
+
+
+def subasta(costos, epsilon_final=None):
+    """Algoritmo de subasta (Bertsekas) con escalado de epsilon.
+
+    Cada CPU sin pedido puja por el pedido de mayor beneficio
+    (``-costo - precio``) y sube su precio en la diferencia con el
+    segundo mejor más epsilon. Epsilon empieza grande y se divide
+    en cada ronda, reutilizando los precios de la ronda anterior.
+    El escalado solo es válido si el problema es cuadrado: cuando
+    las filas son más de la mitad de las columnas se agregan filas
+    ficticias de costo 0; con muchas menos filas hay poca competencia
+    y se hace una sola ronda con el epsilon final, sin filas extra.
+
+    Args:
+        costos (list[list[int]]): Matriz n x m de costos enteros.
+        epsilon_final (float | None): Epsilon de la última ronda. Por
+            defecto ``1 / (filas + 1)``, que garantiza el óptimo.
+
+    Returns:
+        dict: Índice de fila -> índice de columna asignada.
+    """
+    n, m = len(costos), len(costos[0])
+    if n > m:
+        return {i: j for j, i in subasta(_transponer(costos),
+                                         epsilon_final).items()}
+
+    # Los pares imposibles cuestan más que cualquier asignación posible,
+    # pero con un valor acotado para que los saltos de precio sean cortos
+    maximo = max((c for fila in costos for c in fila if c < INALCANZABLE),
+                 default=0)
+    tope = maximo * (m + 1) + 1
+    matriz = [[c if c < INALCANZABLE else tope for c in fila]
+              for fila in costos]
+    escalar = 2 * n > m
+    if escalar:
+        matriz.extend([0] * m for _ in range(m - n))
+    filas = len(matriz)
+
+    if epsilon_final is None:
+        epsilon_final = 1.0 / (filas + 1)
+    precios = [0.0] * m
+    epsilon = max(maximo / 4.0, epsilon_final) if escalar else epsilon_final
+    while True:
+        asignado = {}  # Fila -> columna
+        duenio = {}  # Columna -> fila
+        pendientes = list(range(filas))
+        while pendientes:
+            i = pendientes.pop()
+            fila = matriz[i]
+            mejor_j = 0
+            mejor = segundo = float('-inf')
+            for j in range(m):
+                beneficio = -fila[j] - precios[j]
+                if beneficio > mejor:
+                    segundo = mejor
+                    mejor = beneficio
+                    mejor_j = j
+                elif beneficio > segundo:
+                    segundo = beneficio
+            if segundo == float('-inf'):
+                segundo = mejor  # Una sola columna
+            precios[mejor_j] += mejor - segundo + epsilon
+            anterior = duenio.get(mejor_j)
+            if anterior is not None:
+                del asignado[anterior]
+                pendientes.append(anterior)
+            duenio[mejor_j] = i
+            asignado[i] = mejor_j
+        if epsilon <= epsilon_final:
+            return {i: j for i, j in asignado.items()
+                    if i < n and costos[i][j] < INALCANZABLE}
+        epsilon = max(epsilon / 4.0, epsilon_final)
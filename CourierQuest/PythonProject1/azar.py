@@ -0,0 +1,64 @@
+"""
+azar.py.
+
+Generadores de números aleatorios del juego, uno por
+subsistema (pedidos, clima y jugador_cpu). Cada módulo
+pide el suyo con `flujo` en vez de usar `random`
+directamente, así una sola semilla (`sembrar`) repite
+toda la partida y lo que consume un subsistema no
+cambia los números de otro.
+"""
+
+import random
+
+SUBSISTEMAS = ('pedidos', 'clima', 'jugador_cpu')
+
+_flujos = {nombre: random.Random() for nombre in SUBSISTEMAS}
+
+
+def flujo(nombre):
+    """Generador de un subsistema.
+
+    Siempre devuelve el mismo objeto; `sembrar` lo reinicia en su lugar,
+    así se puede guardar en una variable del módulo que lo usa.
+
+    Args:
+        nombre (str): Uno de SUBSISTEMAS.
+
+    Returns:
+        random.Random: Generador del subsistema.
+    """
+    return _flujos[nombre]
+
+
+def sembrar(semilla):
+    """Siembra todos los generadores a partir de una semilla.
+
+    Cada subsistema usa la semilla combinada con su nombre, así los
+    generadores son independientes entre sí.
+
+    Args:
+        semilla (int): Semilla de la partida.
+    """
+    for nombre, generador in _flujos.items():
+        generador.seed(f"{semilla}:{nombre}")
+
+
+def estados():
+    """Estado interno de todos los generadores (para los keyframes).
+
+    Returns:
+        dict: Nombre -> estado de `random.Random.getstate`.
+    """
+    return {nombre: generador.getstate()
+            for nombre, generador in _flujos.items()}
+
+
+def restaurar(estados_guardados):
+    """Vuelve los generadores a un estado guardado con `estados`.
+
+    Args:
+        estados_guardados (dict): Resultado de `estados`.
+    """
+    for nombre, estado in estados_guardados.items():
+        _flujos[nombre].setstate(estado)
@@ -0,0 +1,8 @@
+"""
+benchmarks.
+
+Pruebas de rendimiento del juego. Se ejecutan desde
+la carpeta del proyecto, por ejemplo:
+
+    python -m benchmarks.bench_jps
+"""
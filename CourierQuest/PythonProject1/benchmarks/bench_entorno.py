@@ -0,0 +1,129 @@
+"""
+bench_entorno.py.
+
+Velocidad del entorno vectorizado (entorno.py): pasos por
+segundo con K partidas en paralelo, con acciones al azar
+y con una política voraz de referencia (ir al dropoff de
+mayor prioridad o al pickup más cercano). También muestra
+cuánto ganan esas políticas por partida, como base contra
+la cual comparar una política entrenada.
+
+Uso (desde PythonProject1, donde está data/clima.json):
+    python -m benchmarks.bench_entorno [--segundos S]
+"""
+
+import argparse
+import time
+import numpy as np
+from benchmarks.comun import generar_mapa
+from clima import SistemaClima
+from entorno import ACCIONES, EN_INVENTARIO, EN_MAPA, EntornoVectorizado
+
+CANTIDADES = [64, 256, 1024, 4096]
+TAMANO = 60
+
+
+def politica_voraz(entorno):
+    """Acción voraz de cada partida, calculada sobre los arreglos.
+
+    Va al dropoff de mayor prioridad del inventario; si está vacío, al
+    pickup más cercano. Avanza por el eje con más distancia y, si esa
+    casilla es un edificio, por el otro. Una de cada cuatro veces se
+    mueve al azar, para no quedar rebotando contra una manzana.
+
+    Args:
+        entorno (EntornoVectorizado): Entorno a leer.
+
+    Returns:
+        numpy.ndarray: Una acción por partida.
+    """
+    x, y = entorno.x[:, None], entorno.y[:, None]
+    inventario = entorno.estado_pedido == EN_INVENTARIO
+    en_mapa = entorno.estado_pedido == EN_MAPA
+    distancia = (np.abs(np.where(inventario, entorno.dropoff_x,
+                                 entorno.pickup_x) - x)
+                 + np.abs(np.where(inventario, entorno.dropoff_y,
+                                   entorno.pickup_y) - y))
+    # Primero el inventario por prioridad, después los pickups por cercanía
+    puntaje = np.where(inventario, -1000 * entorno.prioridad + distancia,
+                       np.where(en_mapa, 10_000 + distancia, 1 << 30))
+    cual = puntaje.argmin(axis=1)
+    filas = np.arange(entorno.cantidad)
+    a_inventario = inventario[filas, cual]
+    ox = np.where(a_inventario, entorno.dropoff_x[filas, cual],
+                  entorno.pickup_x[filas, cual])
+    oy = np.where(a_inventario, entorno.dropoff_y[filas, cual],
+                  entorno.pickup_y[filas, cual])
+
+    dx, dy = ox - entorno.x, oy - entorno.y
+    accion_x = np.where(dx > 0, 4, np.where(dx < 0, 3, 0))
+    accion_y = np.where(dy > 0, 2, np.where(dy < 0, 1, 0))
+    primero = np.where(np.abs(dx) >= np.abs(dy), accion_x, accion_y)
+    segundo = np.where(np.abs(dx) >= np.abs(dy), accion_y, accion_x)
+
+    paso = ACCIONES[primero]
+    nx = np.clip(entorno.x + paso[:, 0], 0, entorno.ancho - 1)
+    ny = np.clip(entorno.y + paso[:, 1], 0, entorno.alto - 1)
+    bloqueada = ~entorno._transitable[ny, nx]
+    accion = np.where(bloqueada & (segundo != 0), segundo, primero)
+    # Atascado (o una de cada cuatro veces): moverse al azar
+    atascado = ((accion == 0) | (bloqueada & (segundo == 0))
+                | (entorno.rng.random(entorno.cantidad) < 0.25))
+    azar = entorno.rng.integers(1, len(ACCIONES), entorno.cantidad)
+    return np.where(atascado, azar, accion)
+
+
+def medir(entorno, politica, segundos):
+    """Corre el entorno un tiempo fijo con una política.
+
+    Args:
+        entorno (EntornoVectorizado): Entorno ya creado.
+        politica (callable): Recibe el entorno y devuelve las acciones.
+        segundos (float): Duración de la medición.
+
+    Returns:
+        tuple[float, float, int]: Pasos por segundo, ingreso medio por
+        partida terminada y partidas terminadas.
+    """
+    entorno.reset()
+    pasos = 0
+    terminadas = 0
+    ingresos = 0.0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < segundos:
+        _, _, terminados, truncados, info = entorno.step(politica(entorno))
+        pasos += entorno.cantidad
+        fin = terminados | truncados
+        if fin.any():
+            terminadas += int(fin.sum())
+            ingresos += float(info['puntaje'].sum())
+    duracion = time.perf_counter() - inicio
+    return pasos / duracion, ingresos / max(1, terminadas), terminadas
+
+
+def ejecutar(segundos):
+    """Imprime una fila por cantidad de partidas y política."""
+    mapa = generar_mapa(TAMANO, TAMANO, semilla=TAMANO)
+    clima = SistemaClima()
+    politicas = {
+        'azar': lambda e: e.rng.integers(0, len(ACCIONES), e.cantidad),
+        'voraz': politica_voraz,
+    }
+    print(f"{'partidas':>9} {'política':>9} {'pasos/s':>12}"
+          f" {'terminadas':>11} {'ingreso medio':>14}")
+    for cantidad in CANTIDADES:
+        for nombre, politica in politicas.items():
+            # Partidas de 60 s para ver partidas terminadas en la medición
+            entorno = EntornoVectorizado(mapa, clima, cantidad=cantidad,
+                                         duracion=60, semilla=0)
+            por_segundo, ingreso, terminadas = medir(entorno, politica,
+                                                     segundos)
+            print(f"{cantidad:>9} {nombre:>9} {por_segundo:>12,.0f}"
+                  f" {terminadas:>11} {ingreso:>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--segundos', type=float, default=3.0,
+                        help='duración de cada medición')
+    ejecutar(parser.parse_args().segundos)
@@ -0,0 +1,132 @@
+"""
+bench_flota.py.
+
+Prueba de carga de varios CPU difíciles compartiendo un
+`ServicioPlanificacion` en una ciudad sintética. Mide el
+tiempo promedio por tick (todos los CPU deciden una vez),
+las entregas por minuto simulado, el uso de las consultas
+agrupadas y la tasa de aciertos de la caché de rutas, con
+cada CPU eligiendo su pedido (voraz) y con el despachador
+global. Corre en una ciudad chica (Dijkstra agrupado) y en
+ciudades de 500x500 y 2000x2000, donde las rutas salen de
+HPA*; la primera corrida en cada una incluye armar el
+grafo jerárquico.
+
+Uso:
+    python -m benchmarks.bench_flota
+"""
+
+import contextlib
+import io
+import random
+import time
+from benchmarks.comun import generar_mapa
+from cache_rutas import obtener_cache
+from clases import Pedido
+from entregas import CoordinadorPedidos
+from jugador_cpu import JugadorCPU
+from planificador import ServicioPlanificacion
+
+FLOTAS = [50, 100, 200, 500]
+TAMANO = 60  # Debajo de UMBRAL_HPA: usa el Dijkstra agrupado
+# Encima de UMBRAL_HPA, con flotas más chicas porque cada tick tarda más
+TAMANOS_HPA = [500, 2000]
+FLOTAS_HPA = [10, 50]
+TICKS = 150
+TICKS_ENTRE_DESPACHOS = 5
+
+
+def crear_pedido(rng, libres):
+    """Crea un pedido con pickup y dropoff en casillas libres."""
+    return Pedido(list(rng.choice(libres)), list(rng.choice(libres)),
+                  weight=1, priority=rng.randint(0, 1), payout=100)
+
+
+def simular(cantidad, mapa, semilla=0, despachar=False):
+    """Simula una flota durante ``TICKS`` ticks.
+
+    Cada tick equivale a un movimiento de todos los CPU, así que un
+    minuto simulado son ``60 * movimientos_por_segundo`` ticks.
+
+    Args:
+        cantidad (int): Cantidad de CPU.
+        mapa (list[list[str]]): Mapa de la ciudad.
+        semilla (int): Semilla del generador aleatorio.
+        despachar (bool): Usar el despachador global.
+
+    Returns:
+        tuple[float, float, dict]: Milisegundos por tick, entregas por
+        minuto simulado y estadísticas del servicio, con la tasa de
+        aciertos de la caché de rutas en 'tasa_cache'.
+    """
+    rng = random.Random(semilla)
+    libres = [(x, y) for y in range(len(mapa))
+              for x in range(len(mapa[0])) if mapa[y][x] != "B"]
+
+    servicio = ServicioPlanificacion()
+    cpus = []
+    for _ in range(cantidad):
+        cpu = JugadorCPU(*rng.choice(libres), 'dificil')
+        servicio.registrar(cpu)
+        cpus.append(cpu)
+    pedidos = [crear_pedido(rng, libres) for _ in range(cantidad)]
+    coordinador = CoordinadorPedidos(pedidos, cpus)
+    # La caché es del mapa: se vacía y se cuenta solo esta corrida
+    cache = obtener_cache(mapa)
+    cache.invalidar()
+    antes = cache.estadisticas()
+
+    inicio = time.perf_counter()
+    for tick in range(TICKS):
+        servicio.limpiar(pedidos)
+        if despachar and tick % TICKS_ENTRE_DESPACHOS == 0:
+            servicio.despachar(mapa, pedidos, 1.0, 0.0, forzar=True)
+        for cpu in cpus:
+            cpu.resistencia = cpu.max_resistencia
+            cpu.bloqueado = False
+            cpu._ia_dificil(mapa, pedidos, 1.0, 0.0)
+            # El plan se termina en el mismo tick (en el juego se
+            # reparte entre cuadros)
+            while cpu.tarea_plan is not None:
+                cpu._avanzar_plan(mapa, pedidos)
+            while cpu.tarea_tramo is not None:
+                cpu._avanzar_tramo(mapa)
+        while len(pedidos) < cantidad:
+            coordinador.agregar(crear_pedido(rng, libres))
+    ms_tick = (time.perf_counter() - inicio) * 1000 / TICKS
+
+    entregas = sum(cpu.entregas_completadas for cpu in cpus)
+    minutos = TICKS / (60 * cpus[0].movimientos_por_segundo)
+    despues = cache.estadisticas()
+    aciertos = sum(despues[clave] - antes[clave]
+                   for clave in ('aciertos', 'aciertos_sufijo'))
+    consultas = aciertos + despues['fallos'] - antes['fallos']
+    stats = servicio.estadisticas()
+    stats['tasa_cache'] = aciertos / consultas if consultas else 0.0
+    return ms_tick, entregas / minutos, stats
+
+
+def ejecutar():
+    """Corre la prueba e imprime una fila por mapa y tamaño de flota."""
+    casos = [(TAMANO, FLOTAS)] + [(tamano, FLOTAS_HPA)
+                                  for tamano in TAMANOS_HPA]
+    print(f"{'mapa':>6} {'CPU':>6} {'modo':>10} {'ms/tick':>10}"
+          f" {'ms/CPU':>8} {'entregas/min':>13} {'consultas':>10}"
+          f" {'destinos':>9} {'caché':>6}")
+    for tamano, flotas in casos:
+        mapa = generar_mapa(tamano, tamano, semilla=tamano)
+        for cantidad in flotas:
+            for despachar in (False, True):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ms_tick, por_minuto, stats = simular(
+                        cantidad, mapa, despachar=despachar)
+                modo = 'despacho' if despachar else 'voraz'
+                print(f"{tamano:>6} {cantidad:>6} {modo:>10}"
+                      f" {ms_tick:>10.1f} {ms_tick / cantidad:>8.2f}"
+                      f" {por_minuto:>13.1f}"
+                      f" {stats['busquedas_agrupadas']:>10}"
+                      f" {stats['destinos_resueltos']:>9}"
+                      f" {stats['tasa_cache']:>6.0%}")
+
+if __name__ == "__main__":
+    ejecutar()
@@ -0,0 +1,311 @@
+"""
+bench_ia.py.
+
+Micro-benchmarks de las rutas y la IA sobre ciudades
+sintéticas de distintos tamaños y densidades. Mide:
+
+- JugadorCPU._a_star
+- JugadorCPU._mover_expectimax
+- JugadorCPU._planificar_estrategia_entregas
+- pedidos.reubicar_pedidos
+- pedidos.asignar_posicion_aleatoria
+
+Para cada caso guarda el tiempo (mediana y mínimo),
+los nodos expandidos y la memoria pico (tracemalloc)
+en benchmarks/resultados/ia_<commit>.json, para poder
+comparar dos commits y detectar regresiones.
+
+Uso:
+    python -m benchmarks.bench_ia [--rapido] [--salida ARCHIVO]
+    python -m benchmarks.bench_ia --comparar BASE.json NUEVO.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import azar
+from benchmarks.comun import generar_mapa, elegir_pares
+from cache_rutas import obtener_cache
+from clases import Pedido
+from jugador_cpu import JugadorCPU
+from pedidos import reubicar_pedidos, asignar_posicion_aleatoria
+
+TAMANOS = [25, 50, 100, 200]
+TAMANOS_RAPIDO = [25, 50]
+DENSIDADES = [0.1, 0.3]
+REPETICIONES = 15
+CARPETA_RESULTADOS = os.path.join(os.path.dirname(__file__), 'resultados')
+UMBRAL_REGRESION = 1.25  # Un caso 25% más lento cuenta como regresión
+
+
+# ========================================
+# CASOS
+# ========================================
+
+def caso_a_star(mapa, semilla):
+    """Prepara consultas de A* entre pares de casillas al azar."""
+    cpu = JugadorCPU(0, 0, 'dificil')
+    pares = elegir_pares(mapa, REPETICIONES, semilla)
+    indice = [0]
+
+    def ejecutar():
+        inicio, destino = pares[indice[0] % len(pares)]
+        indice[0] += 1
+        cpu._a_star(mapa, inicio, destino, 1.0, 0.0)
+        return cpu.nodos_expandidos
+    return ejecutar
+
+
+def caso_expectimax(mapa, semilla):
+    """Prepara una búsqueda Expectimax completa (sin límite de tiempo)."""
+    rng = random.Random(semilla)
+    inicio, destino = elegir_pares(mapa, 1, semilla)[0]
+    cpu = JugadorCPU(*inicio, 'media')
+    cpu.objetivo_actual = list(destino)
+
+    def ejecutar():
+        cpu.x, cpu.y = inicio
+        cpu.resistencia = cpu.max_resistencia
+        cpu.tabla_transposicion.clear()
+        azar.sembrar(rng.getrandbits(32))
+        cpu._mover_expectimax(mapa, 1.0, 0.0,
+                              profundidad=cpu.horizonte_busqueda,
+                              presupuesto_ms=10_000)
+        return cpu.nodos_expandidos
+    return ejecutar
+
+
+def caso_planificar(mapa, semilla):
+    """Prepara la elección de pedido de la IA difícil con caché vacía."""
+    pares = elegir_pares(mapa, 6, semilla)
+    inicio = pares[0][0]
+    pedidos = [Pedido(list(a), list(b)) for a, b in pares[1:]]
+    cpu = JugadorCPU(*inicio, 'dificil')
+
+    # Sumar los nodos de todas las rutas que pide la planificación (el
+    # plan busca con la versión por partes, ver tareas.py)
+    nodos = [0]
+    buscar_ruta = cpu._buscar_ruta_por_partes
+
+    def buscar_y_contar(*args):
+        resultado = yield from buscar_ruta(*args)
+        nodos[0] += cpu.nodos_expandidos
+        return resultado
+    cpu._buscar_ruta_por_partes = buscar_y_contar
+
+    def ejecutar():
+        obtener_cache(mapa).invalidar()
+        nodos[0] = 0
+        cpu._planificar_estrategia_entregas(mapa, list(pedidos), 1.0, 0.0)
+        return nodos[0]
+    return ejecutar
+
+
+def caso_reubicar(mapa, semilla):
+    """Prepara la reubicación de pedidos con puntos en edificios."""
+    rng = random.Random(semilla)
+    alto, ancho = len(mapa), len(mapa[0])
+    pedidos = [{'pickup': [rng.randrange(ancho), rng.randrange(alto)],
+                'dropoff': [rng.randrange(ancho), rng.randrange(alto)]}
+               for _ in range(20)]
+
+    def ejecutar():
+        copia = [{'pickup': list(p['pickup']), 'dropoff': list(p['dropoff'])}
+                 for p in pedidos]
+        reubicar_pedidos(copia, mapa)
+        return None
+    return ejecutar
+
+
+def caso_posicion_aleatoria(mapa, semilla):
+    """Prepara la búsqueda de una casilla libre lejos de 20 ocupadas."""
+    rng = random.Random(semilla)
+    ocupadas = {a for a, _ in elegir_pares(mapa, 20, semilla)}
+
+    def ejecutar():
+        azar.sembrar(rng.getrandbits(32))
+        asignar_posicion_aleatoria(mapa, set(ocupadas), separacion=4)
+        return None
+    return ejecutar
+
+
+CASOS = {
+    'a_star': caso_a_star,
+    'expectimax': caso_expectimax,
+    'planificar_entregas': caso_planificar,
+    'reubicar_pedidos': caso_reubicar,
+    'asignar_posicion_aleatoria': caso_posicion_aleatoria,
+}
+
+
+# ========================================
+# MEDICIÓN
+# ========================================
+
+def medir(preparar, mapa, semilla):
+    """Mide un caso: tiempos, nodos y memoria pico.
+
+    La memoria se mide en una ejecución aparte, porque tracemalloc
+    hace más lento el código y alteraría los tiempos.
+
+    Args:
+        preparar (callable): Función que devuelve el caso a ejecutar.
+        mapa (list[list[str]]): Mapa sintético.
+        semilla (int): Semilla del caso.
+
+    Returns:
+        dict: ms_mediana, ms_min, nodos (promedio o None) y
+        memoria_pico_kib.
+    """
+    ejecutar = preparar(mapa, semilla)
+    ejecutar()  # Calentamiento (grillas y grafos compartidos)
+
+    tiempos = []
+    nodos = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        expandidos = ejecutar()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        if expandidos is not None:
+            nodos.append(expandidos)
+
+    tracemalloc.start()
+    ejecutar()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'ms_mediana': round(statistics.median(tiempos), 4),
+        'ms_min': round(min(tiempos), 4),
+        'nodos': round(statistics.mean(nodos), 1) if nodos else None,
+        'memoria_pico_kib': round(pico / 1024, 1)
+    }
+
+
+def commit_actual():
+    """Hash corto del commit actual, o 'desconocido' fuera de git."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocido'
+
+
+def ejecutar(tamanos, salida=None):
+    """Corre todos los casos y guarda los resultados.
+
+    Args:
+        tamanos (list[int]): Lados de los mapas a generar.
+        salida (str | None): Archivo de resultados. Por defecto
+            ``resultados/ia_<commit>.json``.
+
+    Returns:
+        str: Ruta del archivo escrito.
+    """
+    commit = commit_actual()
+    casos = []
+    print(f"{'operación':<28} {'mapa':>5} {'dens':>5} {'ms med':>9}"
+          f" {'ms min':>9} {'nodos':>9} {'KiB pico':>9}")
+    for tamano in tamanos:
+        for densidad in DENSIDADES:
+            semilla = tamano * 100 + int(densidad * 10)
+            mapa = generar_mapa(tamano, tamano, densidad, semilla)
+            for nombre, preparar in CASOS.items():
+                resultado = medir(preparar, mapa, semilla)
+                casos.append(dict(operacion=nombre, tamano=tamano,
+                                  densidad=densidad, **resultado))
+                nodos = resultado['nodos']
+                print(f"{nombre:<28} {tamano:>5} {densidad:>5}"
+                      f" {resultado['ms_mediana']:>9.3f}"
+                      f" {resultado['ms_min']:>9.3f}"
+                      f" {'-' if nodos is None else nodos:>9}"
+                      f" {resultado['memoria_pico_kib']:>9}")
+
+    if salida is None:
+        salida = os.path.join(CARPETA_RESULTADOS, f"ia_{commit}.json")
+    carpeta = os.path.dirname(salida)
+    if carpeta and not os.path.exists(carpeta):
+        os.makedirs(carpeta)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'repeticiones': REPETICIONES,
+            'casos': casos
+        }, f, indent=2)
+    print(f"\nResultados guardados en {salida}")
+    return salida
+
+
+def comparar(archivo_base, archivo_nuevo, umbral=UMBRAL_REGRESION):
+    """Compara dos archivos de resultados caso por caso.
+
+    Args:
+        archivo_base (str): Resultados de referencia.
+        archivo_nuevo (str): Resultados a evaluar.
+        umbral (float): Cociente de tiempo a partir del cual un caso
+            se marca como regresión.
+
+    Returns:
+        int: Cantidad de regresiones encontradas.
+    """
+    with open(archivo_base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(archivo_nuevo, encoding='utf-8') as f:
+        nuevo = json.load(f)
+
+    def clave(caso):
+        return caso['operacion'], caso['tamano'], caso['densidad']
+    referencia = {clave(c): c for c in base['casos']}
+
+    print(f"{base['commit']} -> {nuevo['commit']}")
+    print(f"{'operación':<28} {'mapa':>5} {'dens':>5} {'tiempo':>8}"
+          f" {'nodos':>8} {'memoria':>8}")
+    regresiones = 0
+    for caso in nuevo['casos']:
+        anterior = referencia.get(clave(caso))
+        if anterior is None:
+            continue
+        tiempo = caso['ms_mediana'] / max(anterior['ms_mediana'], 1e-9)
+        nodos = (caso['nodos'] / max(anterior['nodos'], 1e-9)
+                 if caso['nodos'] is not None and anterior['nodos']
+                 else None)
+        memoria = (caso['memoria_pico_kib'] /
+                   max(anterior['memoria_pico_kib'], 1e-9))
+        marca = ''
+        if tiempo > umbral:
+            marca = '  <-- REGRESIÓN'
+            regresiones += 1
+        print(f"{caso['operacion']:<28} {caso['tamano']:>5}"
+              f" {caso['densidad']:>5} {tiempo:>7.2f}x"
+              f" {'-' if nodos is None else f'{nodos:.2f}x':>8}"
+              f" {memoria:>7.2f}x{marca}")
+    print(f"\n{regresiones} regresiones (umbral {umbral:.2f}x)")
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rapido', action='store_true',
+                        help='solo mapas pequeños')
+    parser.add_argument('--salida', help='archivo de resultados')
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'NUEVO'),
+                        help='compara dos archivos de resultados')
+    parser.add_argument('--umbral', type=float, default=UMBRAL_REGRESION,
+                        help='cociente de tiempo que cuenta como regresión')
+    argumentos = parser.parse_args()
+
+    if argumentos.comparar:
+        sys.exit(1 if comparar(*argumentos.comparar,
+                               umbral=argumentos.umbral) else 0)
+    ejecutar(TAMANOS_RAPIDO if argumentos.rapido else TAMANOS,
+             argumentos.salida)
@@ -0,0 +1,78 @@
+"""
+bench_jps.py.
+
+Compara A* contra Jump Point Search en mapas sintéticos
+y ciudades generadas de distintos tamaños: nodos
+expandidos, tiempo y costo de la ruta encontrada. Para
+JPS se cuentan los puntos de salto expandidos y las
+casillas que revisan los saltos.
+
+Uso:
+    python -m benchmarks.bench_jps
+"""
+
+import time
+from benchmarks.comun import generar_mapa, elegir_pares
+from jugador_cpu import JugadorCPU
+from costos import obtener_grilla
+from generador import generar_ciudad
+from jps import buscar_jps
+
+TAMANOS = [25, 50, 100, 200]
+CONSULTAS = 30
+
+
+def costo_ruta(mapa, ruta):
+    """Suma el costo base de las casillas de una ruta."""
+    grilla = obtener_grilla(mapa)
+    return sum(grilla.base[y][x] for x, y in ruta)
+
+
+def mapas():
+    """Mapas de la comparación.
+
+    Returns:
+        list[tuple[str, list[list[str]]]]: (nombre, mapa).
+    """
+    casos = [(f"azar {tamano}", generar_mapa(tamano, tamano, semilla=tamano))
+             for tamano in TAMANOS]
+    casos += [(f"ciudad {tamano}",
+               generar_ciudad(tamano, tamano, semilla=tamano)["tiles"])
+              for tamano in TAMANOS[1:]]
+    return casos
+
+
+def ejecutar():
+    """Corre la comparación e imprime una fila por mapa."""
+    print(f"{'mapa':>11} {'exp A*':>8} {'puntos JPS':>11}"
+          f" {'revisadas JPS':>14} {'ms A*':>7} {'ms JPS':>7}"
+          f" {'costo JPS/A*':>13}")
+    for nombre, mapa in mapas():
+        cpu_a = JugadorCPU(0, 0, 'dificil')
+
+        exp_a = puntos = revisadas = 0
+        t_a = t_j = 0.0
+        costo_a = costo_j = 0.0
+        for inicio, destino in elegir_pares(mapa, CONSULTAS, len(mapa)):
+            t = time.perf_counter()
+            ruta_a = cpu_a._a_star(mapa, inicio, destino, 1.0, 0.0)
+            t_a += time.perf_counter() - t
+            exp_a += cpu_a.nodos_expandidos
+
+            t = time.perf_counter()
+            ruta_j, expandidos, casillas = buscar_jps(mapa, inicio, destino)
+            t_j += time.perf_counter() - t
+            puntos += expandidos
+            revisadas += casillas
+
+            costo_a += costo_ruta(mapa, ruta_a)
+            costo_j += costo_ruta(mapa, ruta_j)
+
+        print(f"{nombre:>11} {exp_a:>8} {puntos:>11} {revisadas:>14}"
+              f" {t_a * 1000 / CONSULTAS:>7.2f}"
+              f" {t_j * 1000 / CONSULTAS:>7.2f}"
+              f" {costo_j / max(costo_a, 1e-9):>13.4f}")
+
+
+if __name__ == "__main__":
+    ejecutar()
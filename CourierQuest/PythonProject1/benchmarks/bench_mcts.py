@@ -0,0 +1,156 @@
+"""
+bench_mcts.py.
+
+Compara el CPU experto (MCTS, ver mcts.py) con el
+difícil en partidas sin ventana: mismo mapa, mismo clima
+y mismos pedidos para los dos niveles. Cada partida corre
+a 60 cuadros por segundo con el reloj fijo, como al
+grabar: el MCTS busca con sus 3 ms por cuadro, igual que
+en una partida real (con --iteraciones hace una cantidad
+fija de iteraciones por cuadro, como en los registros
+viejos). Muestra el dinero por minuto de cada nivel, en
+cuántas partidas gana cada uno y el tiempo que toma
+`JugadorCPU.actualizar` por cuadro (mediana, p99 y
+máximo) frente al cuadro de 16.7 ms.
+
+Uso (desde PythonProject1, donde está data/clima.json):
+    python -m benchmarks.bench_mcts [--partidas N] [--minutos M]
+                                    [--iteraciones]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+import numpy as np
+import azar
+from benchmarks.comun import generar_mapa
+from clases import Pedido
+from clima import SistemaClima
+from costos import obtener_grilla
+from entregas import CoordinadorPedidos
+from jugador_cpu import JugadorCPU
+from reloj import reloj
+
+NIVELES = ['dificil', 'mcts']
+TAMANO = 40
+CUADROS_POR_SEGUNDO = 60
+INTERVALO_PEDIDOS = 5  # Como liberar_interval en Main.py
+MAX_PEDIDOS = 5
+CUADRO_MS = 1000 / CUADROS_POR_SEGUNDO
+
+
+def crear_pedido(rng, libres):
+    """Crea un pedido con pickup y dropoff en casillas libres."""
+    return Pedido(list(rng.choice(libres)), list(rng.choice(libres)),
+                  weight=rng.randint(1, 3), priority=rng.randint(0, 1),
+                  payout=rng.choice([100, 150, 200, 300]))
+
+
+def conectadas(mapa):
+    """Casillas libres conectadas a la casilla libre más central.
+
+    Los obstáculos sueltos de `generar_mapa` pueden encerrar casillas;
+    el CPU y los pedidos se ponen solo en la zona alcanzable (las
+    componentes de `GrillaCostos`).
+    """
+    alto, ancho = len(mapa), len(mapa[0])
+    grilla = obtener_grilla(mapa)
+    libres = np.argwhere(grilla.mascara_libres())  # (y, x), fila por fila
+    distancias = (np.abs(libres[:, 1] - ancho // 2)
+                  + np.abs(libres[:, 0] - alto // 2))
+    y, x = libres[int(np.argmin(distancias))]
+    zona = grilla.mascara_libres(alcanzable_desde=(int(x), int(y)))
+    return [(int(x), int(y)) for y, x in np.argwhere(zona)]
+
+
+def jugar(nivel, semilla, minutos, por_tiempo=True):
+    """Juega una partida de un CPU solo.
+
+    Args:
+        nivel (str): Dificultad del CPU.
+        semilla (int): Semilla del mapa, el clima y los pedidos.
+        minutos (float): Duración simulada.
+        por_tiempo (bool): El MCTS busca con su presupuesto de tiempo
+            (como al jugar o grabar) en vez de contar iteraciones.
+
+    Returns:
+        tuple[float, list[float]]: Dinero por minuto y milisegundos de
+        `actualizar` en cada cuadro.
+    """
+    azar.sembrar(semilla)
+    mapa = generar_mapa(TAMANO, TAMANO, semilla=semilla)
+    rng = random.Random(semilla)
+    libres = conectadas(mapa)
+
+    inicio = 1_000_000.0
+    reloj.fijar(inicio)
+    clima = SistemaClima()
+    clima.generar_linea_tiempo(minutos * 60, semilla=semilla, inicio=inicio)
+    cpu = JugadorCPU(*libres[-1], nivel)
+    cpu.clima = clima
+    cpu.rivales = 0
+    if por_tiempo:
+        cpu.modo_decisiones = 'grabar'
+    pedidos = []
+    coordinador = CoordinadorPedidos(pedidos, [cpu])
+
+    tiempos = []
+    ultimo_pedido = inicio
+    try:
+        for cuadro in range(int(minutos * 60 * CUADROS_POR_SEGUNDO)):
+            ahora = inicio + cuadro / CUADROS_POR_SEGUNDO
+            reloj.fijar(ahora)
+            clima.actualizar()
+            if (ahora - ultimo_pedido >= INTERVALO_PEDIDOS
+                    and len(pedidos) < MAX_PEDIDOS):
+                coordinador.agregar(crear_pedido(rng, libres))
+                ultimo_pedido = ahora
+            antes = time.perf_counter()
+            cpu.actualizar(mapa, pedidos, clima.obtener_multiplicador_actual(),
+                           clima.obtener_consumo_resistencia_extra())
+            tiempos.append((time.perf_counter() - antes) * 1000)
+    finally:
+        reloj.liberar()
+    return cpu.puntaje / minutos, tiempos
+
+
+def ejecutar(partidas, minutos, por_tiempo=True):
+    """Imprime una fila por partida y nivel, y el resumen por nivel."""
+    print(f"{'partida':>8} {'nivel':>8} {'$/min':>8} {'ms med':>7}"
+          f" {'ms p99':>7} {'ms max':>7}")
+    resumen = {nivel: [] for nivel in NIVELES}
+    for semilla in range(partidas):
+        for nivel in NIVELES:
+            with contextlib.redirect_stdout(io.StringIO()):
+                por_minuto, tiempos = jugar(nivel, semilla, minutos,
+                                            por_tiempo)
+            tiempos.sort()
+            p99 = tiempos[int(len(tiempos) * 0.99)]
+            resumen[nivel].append(por_minuto)
+            print(f"{semilla:>8} {nivel:>8} {por_minuto:>8.0f}"
+                  f" {statistics.median(tiempos):>7.2f} {p99:>7.2f}"
+                  f" {tiempos[-1]:>7.2f}")
+    print(f"\nPromedio $/min (cuadro de {CUADRO_MS:.1f} ms):")
+    for nivel, valores in resumen.items():
+        print(f"  {nivel:>8}: {statistics.mean(valores):8.0f}")
+    print("Partidas ganadas:")
+    for nivel, valores in resumen.items():
+        ganadas = sum(valor > max(otros[i] for otro, otros in resumen.items()
+                                  if otro != nivel)
+                      for i, valor in enumerate(valores))
+        print(f"  {nivel:>8}: {ganadas} de {partidas}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--partidas', type=int, default=4,
+                        help='partidas (semillas) por nivel')
+    parser.add_argument('--minutos', type=float, default=3.0,
+                        help='minutos simulados por partida')
+    parser.add_argument('--iteraciones', action='store_true',
+                        help='el MCTS cuenta iteraciones en vez de tiempo')
+    argumentos = parser.parse_args()
+    ejecutar(argumentos.partidas, argumentos.minutos,
+             not argumentos.iteraciones)
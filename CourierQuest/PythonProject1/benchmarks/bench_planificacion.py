@@ -0,0 +1,146 @@
+"""
+bench_planificacion.py.
+
+Tiempo por cuadro de los CPU difíciles con la
+planificación completa en un cuadro (como antes),
+repartida entre cuadros (ver tareas.py) y en otro
+proceso (ver proceso_ia.py). Varios CPU
+juegan en un mapa mediano (A*) y en uno grande (HPA*)
+con muchos pedidos a la vez, así cada replanificación
+hace decenas de búsquedas. Muestra la mediana, el p99 y
+el máximo de lo que tardan todos los CPU en un cuadro,
+y el dinero por minuto para ver que los planes por
+partes o en otro proceso no juegan peor.
+
+Cada modo corre primero con el reloj fijo, como al
+grabar (el presupuesto es de pasos por cuadro), y los
+modos por partes y en proceso también con el reloj
+real, como en una partida sin grabar: el presupuesto es
+de microsegundos y cada cuadro espera su turno a 60
+cuadros por segundo, así que esas filas tardan los
+segundos simulados. El grafo de HPA* no se precalcula:
+las primeras búsquedas calculan las aristas de los
+sectores que cruzan, igual que en el juego.
+
+Uso (desde PythonProject1, donde está data/clima.json):
+    python -m benchmarks.bench_planificacion [--segundos S]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+from benchmarks.bench_mcts import conectadas, crear_pedido
+from benchmarks.comun import generar_mapa
+from clima import SistemaClima
+from costos import obtener_grilla
+from entregas import CoordinadorPedidos
+from jugador_cpu import JugadorCPU
+from proceso_ia import ProcesoPlanificador
+from reloj import reloj
+
+TAMANOS = [60, 128]
+MODOS = ['completo', 'por partes', 'proceso']
+MODOS_RELOJ_REAL = ['por partes', 'proceso']
+CANTIDAD_CPU = 4
+PEDIDOS = 20  # Pedidos en el mapa a la vez
+CUADROS_POR_SEGUNDO = 60
+# Pasos por cuadro que alcanzan para terminar cualquier plan en un cuadro
+SIN_LIMITE = 1 << 30
+
+
+def jugar(tamano, modo, segundos, semilla=0, reloj_real=False):
+    """Juega una partida de varios CPU difíciles.
+
+    Args:
+        tamano (int): Lado del mapa.
+        modo (str): Uno de MODOS.
+        segundos (float): Duración simulada.
+        semilla (int): Semilla del mapa y los pedidos.
+        reloj_real (bool): Jugar con la hora real, a 60 cuadros por
+            segundo, en lugar de fijar el reloj en cada cuadro.
+
+    Returns:
+        tuple[float, list[float]]: Dinero por minuto del conjunto y
+        milisegundos de todos los `actualizar` de cada cuadro.
+    """
+    mapa = generar_mapa(tamano, tamano, semilla=semilla)
+    rng = random.Random(semilla)
+    libres = conectadas(mapa)
+
+    if reloj_real:
+        inicio = reloj.ahora()
+    else:
+        inicio = 1_000_000.0
+        reloj.fijar(inicio)
+    clima = SistemaClima()
+    clima.generar_linea_tiempo(segundos, semilla=semilla, inicio=inicio)
+    proceso = (ProcesoPlanificador(mapa, clima) if modo == 'proceso'
+               else None)
+    cpus = []
+    for _ in range(CANTIDAD_CPU):
+        cpu = JugadorCPU(*rng.choice(libres), 'dificil')
+        cpu.clima = clima
+        cpu.proceso_plan = proceso
+        if modo == 'completo':
+            cpu.pasos_plan_por_cuadro = SIN_LIMITE
+        cpus.append(cpu)
+    pedidos = []
+    coordinador = CoordinadorPedidos(pedidos, cpus)
+    # La grilla y el proceso se preparan al arrancar: no se miden
+    obtener_grilla(mapa)
+    if proceso is not None:
+        proceso.esperar_listo()
+
+    tiempos = []
+    comienzo = time.perf_counter()
+    try:
+        for cuadro in range(int(segundos * CUADROS_POR_SEGUNDO)):
+            if reloj_real:
+                # Cada cuadro empieza a su hora, como en el bucle del juego
+                time.sleep(max(0.0, comienzo + cuadro / CUADROS_POR_SEGUNDO
+                               - time.perf_counter()))
+            else:
+                reloj.fijar(inicio + cuadro / CUADROS_POR_SEGUNDO)
+            clima.actualizar()
+            while len(pedidos) < PEDIDOS:
+                coordinador.agregar(crear_pedido(rng, libres))
+            antes = time.perf_counter()
+            for cpu in cpus:
+                cpu.actualizar(mapa, pedidos,
+                               clima.obtener_multiplicador_actual(),
+                               clima.obtener_consumo_resistencia_extra())
+            tiempos.append((time.perf_counter() - antes) * 1000)
+    finally:
+        reloj.liberar()
+        if proceso is not None:
+            proceso.cerrar()
+    return sum(cpu.puntaje for cpu in cpus) * 60 / segundos, tiempos
+
+
+def ejecutar(segundos):
+    """Imprime una fila por tamaño de mapa, modo de planificación y reloj."""
+    print(f"{'mapa':>8} {'plan':>10} {'reloj':>5} {'$/min':>8}"
+          f" {'ms med':>7} {'ms p99':>7} {'ms max':>7}")
+    casos = ([(modo, False) for modo in MODOS]
+             + [(modo, True) for modo in MODOS_RELOJ_REAL])
+    for tamano in TAMANOS:
+        for modo, reloj_real in casos:
+            with contextlib.redirect_stdout(io.StringIO()):
+                por_minuto, tiempos = jugar(tamano, modo, segundos,
+                                            reloj_real=reloj_real)
+            tiempos.sort()
+            p99 = tiempos[int(len(tiempos) * 0.99)]
+            print(f"{tamano:>4}x{tamano:<3} {modo:>10}"
+                  f" {'real' if reloj_real else 'fijo':>5}"
+                  f" {por_minuto:>8.0f} {statistics.median(tiempos):>7.2f}"
+                  f" {p99:>7.2f} {tiempos[-1]:>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--segundos', type=float, default=60.0,
+                        help='segundos simulados por partida')
+    ejecutar(parser.parse_args().segundos)
@@ -0,0 +1,196 @@
+"""
+bench_render.py.
+
+Benchmark del renderizado real del juego sin ventana:
+usa el driver de video "dummy" de SDL, mueve la cámara
+con un recorrido fijo y cambia los pedidos (aparecen,
+se recogen, se entregan) mientras dibuja cada cuadro
+con dibujar_mapa y las funciones de dibujo.py.
+
+Reporta cuadros por segundo y el costo por etapa
+(mapa, pedidos, repartidores, hud, flip) para varias
+combinaciones de tile_size y tamaño de la vista.
+
+Uso (desde PythonProject1, donde está assets/):
+    python -m benchmarks.bench_render [--cuadros N] [--salida ARCHIVO]
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse  # noqa: E402
+import contextlib  # noqa: E402
+import io  # noqa: E402
+import json  # noqa: E402
+import random  # noqa: E402
+import time  # noqa: E402
+import pygame  # noqa: E402
+from benchmarks.comun import generar_mapa  # noqa: E402
+from clases import Pedido  # noqa: E402
+from clima import SistemaClima  # noqa: E402
+from dibujo import (cargar_imagenes, dibujar_pedidos,  # noqa: E402
+                    dibujar_repartidores, dibujar_hud)
+from jugador import Jugador  # noqa: E402
+from jugador_cpu import JugadorCPU  # noqa: E402
+from mapa import dibujar_mapa  # noqa: E402
+from perfil import Perfilador  # noqa: E402
+
+# (tile_size, view_width, view_height)
+CONFIGURACIONES = [
+    (60, 13, 13),  # Valores del juego
+    (40, 20, 20),
+    (30, 32, 18),
+    (20, 48, 27),
+]
+TAMANO_MAPA = 120
+CUADROS = 300
+CANTIDAD_CPU = 3
+COLORES = {"C": (200, 200, 200), "B": (0, 0, 0), "P": (0, 200, 0)}
+ETAPAS = ['mapa', 'pedidos', 'repartidores', 'hud', 'flip']
+
+
+def _pedido_al_azar(rng, libres):
+    """Crea un pedido con pickup y dropoff en casillas libres."""
+    return Pedido(list(rng.choice(libres)), list(rng.choice(libres)),
+                  weight=1, priority=rng.randint(0, 1),
+                  payout=rng.randint(50, 300))
+
+
+def _recorrido(mapa, cuadros):
+    """Posiciones de la cámara: un zigzag que cruza todo el mapa."""
+    alto, ancho = len(mapa), len(mapa[0])
+    posiciones = []
+    x, y, dx = 0, 0, 1
+    while len(posiciones) < cuadros:
+        posiciones.append((x, y))
+        x += dx
+        if not 0 <= x < ancho:
+            dx = -dx
+            x += dx
+            y = (y + 3) % alto
+    return posiciones
+
+
+def medir_configuracion(tile_size, view_width, view_height, cuadros,
+                        semilla=0):
+    """Dibuja ``cuadros`` cuadros con una configuración de pantalla.
+
+    Args:
+        tile_size (int): Tamaño en píxeles de cada casilla.
+        view_width (int): Columnas visibles.
+        view_height (int): Filas visibles.
+        cuadros (int): Cantidad de cuadros a dibujar.
+        semilla (int): Semilla de los pedidos y los CPU.
+
+    Returns:
+        dict: FPS y resumen de percentiles por etapa (ms).
+    """
+    rng = random.Random(semilla)
+    screen = pygame.display.set_mode((view_width * tile_size,
+                                      view_height * tile_size))
+    # Lo que imprimen el clima y la carga no va a la tabla de resultados
+    with contextlib.redirect_stdout(io.StringIO()):
+        imagenes = cargar_imagenes(tile_size)
+
+        mapa = generar_mapa(TAMANO_MAPA, TAMANO_MAPA, semilla=semilla)
+        libres = [(x, y) for y in range(TAMANO_MAPA)
+                  for x in range(TAMANO_MAPA) if mapa[y][x] != "B"]
+        jugador = Jugador(0, 0)
+        cpus = [JugadorCPU(*rng.choice(libres), 'dificil')
+                for _ in range(CANTIDAD_CPU)]
+        direccion_cpu = [1] * len(cpus)
+        pos_x_anterior_cpu = [cpu.x for cpu in cpus]
+        pedidos = [_pedido_al_azar(rng, libres) for _ in range(5)]
+        clima = SistemaClima(None)
+
+    perfilador = Perfilador(capacidad=cuadros, activo=True)
+    inicio = time.perf_counter()
+    for cuadro, (px, py) in enumerate(_recorrido(mapa, cuadros)):
+        perfilador.inicio_cuadro()
+        pygame.event.pump()
+
+        # Movimiento del jugador y de los CPU
+        direccion_der = px >= jugador.x
+        jugador.x, jugador.y = px, py
+        for cpu in cpus:
+            cpu.x = max(0, min(TAMANO_MAPA - 1, cpu.x + rng.choice((-1, 1))))
+
+        # Rotación de pedidos: recoger, entregar y crear nuevos
+        if cuadro % 10 == 0:
+            portador = rng.choice([jugador] + cpus)
+            if pedidos and len(portador.inventario) < 6:
+                portador.inventario.append(pedidos.pop(0))
+            for repartidor in [jugador] + cpus:
+                if len(repartidor.inventario) > 3:
+                    repartidor.inventario.popleft()
+            while len(pedidos) < 5:
+                pedidos.append(_pedido_al_azar(rng, libres))
+
+        cam_x = max(0, min(jugador.x - view_width // 2,
+                           TAMANO_MAPA - view_width))
+        cam_y = max(0, min(jugador.y - view_height // 2,
+                           TAMANO_MAPA - view_height))
+
+        with perfilador.tramo('mapa'):
+            screen.fill((255, 255, 255))
+            dibujar_mapa(screen, mapa, COLORES, cam_x, cam_y, tile_size,
+                         view_width, view_height, imagenes['tiles'])
+        with perfilador.tramo('pedidos'):
+            dibujar_pedidos(screen, imagenes, pedidos, jugador, cpus,
+                            cam_x, cam_y, tile_size, view_width, view_height)
+        with perfilador.tramo('repartidores'):
+            dibujar_repartidores(screen, imagenes, jugador, direccion_der,
+                                 cpus, direccion_cpu, pos_x_anterior_cpu,
+                                 cam_x, cam_y, tile_size,
+                                 view_width, view_height)
+        with perfilador.tramo('hud'):
+            dibujar_hud(screen, jugador, cpus, clima, 1000)
+        with perfilador.tramo('flip'):
+            pygame.display.flip()
+        perfilador.fin_cuadro()
+    total = time.perf_counter() - inicio
+
+    return {'fps': cuadros / total, 'etapas': perfilador.resumen()}
+
+
+def ejecutar(cuadros=CUADROS, salida=None):
+    """Mide todas las configuraciones e imprime una tabla.
+
+    Args:
+        cuadros (int): Cuadros por configuración.
+        salida (str | None): Archivo JSON donde guardar los resultados.
+    """
+    pygame.init()
+    encabezado = f"{'tile':>5} {'vista':>7} {'FPS':>8}"
+    for etapa in ETAPAS:
+        encabezado += f" {etapa[:9]:>10}"
+    print(encabezado + "   (ms: p50/p95)")
+
+    resultados = []
+    for tile_size, view_width, view_height in CONFIGURACIONES:
+        medicion = medir_configuracion(tile_size, view_width, view_height,
+                                       cuadros)
+        fila = (f"{tile_size:>5} {f'{view_width}x{view_height}':>7}"
+                f" {medicion['fps']:>8.1f}")
+        for etapa in ETAPAS:
+            datos = medicion['etapas'][etapa]
+            fila += f" {datos['p50']:>4.2f}/{datos['p95']:<5.2f}"
+        print(fila)
+        resultados.append({'tile_size': tile_size, 'view_width': view_width,
+                           'view_height': view_height, **medicion})
+    pygame.quit()
+
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\nResultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--cuadros', type=int, default=CUADROS,
+                        help='cuadros por configuración')
+    parser.add_argument('--salida', help='archivo JSON de resultados')
+    argumentos = parser.parse_args()
+    ejecutar(argumentos.cuadros, argumentos.salida)
@@ -0,0 +1,62 @@
+"""
+comun.py.
+
+Funciones compartidas por los benchmarks: generación
+de mapas sintéticos y selección de pares de casillas.
+"""
+
+import random
+
+
+def generar_mapa(ancho, alto, densidad=0.2, semilla=0):
+    """Genera un mapa sintético con manzanas, calles y parques.
+
+    Las manzanas son bloques de edificios separados por calles; una
+    parte de las manzanas se convierte en parque y ``densidad`` controla
+    la fracción de casillas de calle ocupadas por obstáculos sueltos.
+
+    Args:
+        ancho (int): Columnas del mapa.
+        alto (int): Filas del mapa.
+        densidad (float): Fracción de obstáculos extra (0 a 1).
+        semilla (int): Semilla del generador aleatorio.
+
+    Returns:
+        list[list[str]]: Matriz del mapa con "C", "P" y "B".
+    """
+    rng = random.Random(semilla)
+    mapa = [["C"] * ancho for _ in range(alto)]
+    manzana = 4
+    for y0 in range(1, alto, manzana + 1):
+        for x0 in range(1, ancho, manzana + 1):
+            tipo = "P" if rng.random() < 0.15 else "B"
+            for y in range(y0, min(y0 + manzana, alto)):
+                for x in range(x0, min(x0 + manzana, ancho)):
+                    mapa[y][x] = tipo
+    for y in range(alto):
+        for x in range(ancho):
+            if mapa[y][x] == "C" and rng.random() < densidad * 0.3:
+                mapa[y][x] = "B"
+    return mapa
+
+
+def elegir_pares(mapa, cantidad, semilla=0):
+    """Elige pares (inicio, destino) de casillas transitables distintas.
+
+    Args:
+        mapa (list[list[str]]): Matriz del mapa.
+        cantidad (int): Cantidad de pares.
+        semilla (int): Semilla del generador aleatorio.
+
+    Returns:
+        list[tuple[tuple[int, int], tuple[int, int]]]: Pares elegidos.
+    """
+    rng = random.Random(semilla)
+    libres = [(x, y) for y in range(len(mapa))
+              for x in range(len(mapa[0])) if mapa[y][x] != "B"]
+    pares = []
+    while len(pares) < cantidad:
+        a, b = rng.choice(libres), rng.choice(libres)
+        if a != b:
+            pares.append((a, b))
+    return pares
@@ -0,0 +1,217 @@
+"""
+cache_disco.py.
+
+Caché en disco de lo que se calcula a partir del mapa
+(zonas conexas, grafo de HPA*). En un mapa grande esos
+cálculos tardan segundos y dan siempre lo mismo para
+el mismo mapa, así que se guardan como arreglos NumPy
+comprimidos (.npz) y el segundo arranque los lee.
+
+Cada archivo se llama <huella>_<nombre>_<versión>.npz:
+la huella es el hash de las casillas del mapa
+(`huella_mapa`) y la versión es el hash del código que
+calcula el dato (`version_codigo`). Si el código
+cambia, la versión cambia y el archivo viejo se borra
+al guardar el nuevo. También se borran los archivos
+que no se usan hace MAX_DIAS y, si la carpeta pasa de
+MAX_BYTES, los usados hace más tiempo.
+
+Está apagada por defecto (los benchmarks miden el
+cálculo); el juego la activa al arrancar.
+"""
+
+import hashlib
+import os
+import time
+import numpy as np
+
+CARPETA = "cache"
+MAX_BYTES = 256 * 1024 * 1024
+MAX_DIAS = 30
+
+
+def huella_mapa(letras):
+    """Hash del contenido de un mapa.
+
+    Args:
+        letras (numpy.ndarray): Matriz de letras (ver
+            mapa_binario.matriz_letras).
+
+    Returns:
+        str: 16 caracteres hexadecimales.
+    """
+    resumen = hashlib.sha1(repr(letras.shape).encode())
+    resumen.update(np.ascontiguousarray(letras).tobytes())
+    return resumen.hexdigest()[:16]
+
+
+def version_codigo(*archivos):
+    """Hash de los archivos de código que calculan un dato.
+
+    Args:
+        *archivos (str): Rutas de los módulos (su ``__file__``).
+
+    Returns:
+        str: 8 caracteres hexadecimales.
+    """
+    resumen = hashlib.sha1()
+    for archivo in archivos:
+        with open(archivo, "rb") as f:
+            resumen.update(f.read())
+    return resumen.hexdigest()[:8]
+
+
+class CacheDisco:
+    """Archivos .npz de datos derivados del mapa.
+
+    Attributes:
+        carpeta (str): Carpeta de los archivos.
+        activa (bool): Si es False, `cargar` y `guardar` no hacen nada.
+        max_bytes (int): Tamaño máximo de la carpeta.
+        aciertos (int): Datos leídos del disco.
+        fallos (int): Datos buscados que no estaban.
+    """
+
+    def __init__(self, carpeta=CARPETA, max_bytes=MAX_BYTES):
+        """Crea la caché apagada.
+
+        Args:
+            carpeta (str): Carpeta de los archivos.
+            max_bytes (int): Tamaño máximo de la carpeta.
+        """
+        self.carpeta = carpeta
+        self.max_bytes = max_bytes
+        self.activa = False
+        self.aciertos = 0
+        self.fallos = 0
+
+    def activar(self, carpeta=None):
+        """Enciende la caché y borra los archivos sin uso hace MAX_DIAS.
+
+        Args:
+            carpeta (str | None): Otra carpeta, si se quiere cambiar.
+        """
+        if carpeta is not None:
+            self.carpeta = carpeta
+        os.makedirs(self.carpeta, exist_ok=True)
+        self.activa = True
+        limite = time.time() - MAX_DIAS * 24 * 3600
+        for archivo, usado, _ in self._archivos():
+            if usado < limite:
+                self._borrar(archivo)
+
+    def desactivar(self):
+        """Apaga la caché (los archivos quedan)."""
+        self.activa = False
+
+    def cargar(self, huella, nombre, version):
+        """Lee un dato guardado.
+
+        Args:
+            huella (str | None): Huella del mapa.
+            nombre (str): Nombre del dato (por ejemplo 'componentes').
+            version (str): Versión del código que lo calcula.
+
+        Returns:
+            dict | None: Nombre -> arreglo, o None si no está (o la
+            caché está apagada).
+        """
+        if not self.activa or huella is None:
+            return None
+        archivo = self._archivo(huella, nombre, version)
+        try:
+            with np.load(archivo) as datos:
+                arreglos = {clave: datos[clave] for clave in datos.files}
+        except (OSError, ValueError, KeyError):
+            # No existe o quedó a medio escribir: se recalcula
+            self.fallos += 1
+            return None
+        os.utime(archivo)  # Para el desalojo por antigüedad
+        self.aciertos += 1
+        return arreglos
+
+    def guardar(self, huella, nombre, version, **arreglos):
+        """Guarda un dato y desaloja las versiones viejas.
+
+        Se escribe en un archivo temporal y se renombra, así otro
+        proceso nunca lee un archivo a medio escribir.
+
+        Args:
+            huella (str | None): Huella del mapa.
+            nombre (str): Nombre del dato.
+            version (str): Versión del código que lo calcula.
+            **arreglos (numpy.ndarray): Arreglos a guardar.
+        """
+        if not self.activa or huella is None:
+            return
+        archivo = self._archivo(huella, nombre, version)
+        temporal = f"{archivo}.{os.getpid()}.tmp"
+        try:
+            with open(temporal, "wb") as f:
+                np.savez_compressed(f, **arreglos)
+            os.replace(temporal, archivo)
+        except OSError:
+            self._borrar(temporal)
+            return
+        self._desalojar(huella, nombre, archivo)
+
+    def _archivo(self, huella, nombre, version):
+        """Ruta del archivo de un dato."""
+        return os.path.join(self.carpeta, f"{huella}_{nombre}_{version}.npz")
+
+    def _archivos(self):
+        """Archivos .npz de la carpeta.
+
+        Returns:
+            list[tuple[str, float, int]]: (ruta, último uso, bytes).
+        """
+        archivos = []
+        try:
+            nombres = os.listdir(self.carpeta)
+        except OSError:
+            return archivos
+        for nombre in nombres:
+            if not nombre.endswith(".npz"):
+                continue
+            ruta = os.path.join(self.carpeta, nombre)
+            try:
+                estado = os.stat(ruta)
+            except OSError:
+                continue
+            archivos.append((ruta, estado.st_mtime, estado.st_size))
+        return archivos
+
+    def _desalojar(self, huella, nombre, conservar):
+        """Borra las otras versiones de un dato y lo que sobre del tamaño.
+
+        Args:
+            huella (str): Huella del mapa.
+            nombre (str): Nombre del dato recién guardado.
+            conservar (str): Archivo recién guardado.
+        """
+        prefijo = os.path.join(self.carpeta, f"{huella}_{nombre}_")
+        archivos = []
+        for archivo, usado, tamano in self._archivos():
+            if archivo.startswith(prefijo) and archivo != conservar:
+                self._borrar(archivo)  # Lo calculó código viejo
+            else:
+                archivos.append((usado, archivo, tamano))
+
+        total = sum(tamano for _, _, tamano in archivos)
+        for _, archivo, tamano in sorted(archivos):
+            if total <= self.max_bytes:
+                break
+            if archivo != conservar:
+                self._borrar(archivo)
+                total -= tamano
+
+    @staticmethod
+    def _borrar(archivo):
+        """Borra un archivo si todavía existe."""
+        try:
+            os.remove(archivo)
+        except OSError:
+            pass
+
+
+cache_disco = CacheDisco()
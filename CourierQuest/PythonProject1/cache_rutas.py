@@ -0,0 +1,176 @@
+"""
+cache_rutas.py.
+
+Caché de rutas compartida por todos los CPU de un mapa.
+Guarda las rutas ya calculadas en un LRU con clave
+(inicio, destino, parámetros de costo cuantizados) y
+permite reutilizar el final de una ruta cuando el
+nuevo inicio está sobre una ruta guardada hacia el
+mismo destino (todo tramo de una ruta óptima también
+es óptimo). Se vacía cuando el clima cambia de estado.
+"""
+
+from collections import OrderedDict
+
+
+class CacheRutas:
+    """LRU de rutas con reutilización de sufijos.
+
+    Attributes:
+        capacidad (int): Cantidad máxima de rutas guardadas.
+        aciertos (int): Consultas resueltas con una ruta exacta.
+        aciertos_sufijo (int): Consultas resueltas con parte de una ruta.
+        fallos (int): Consultas que requirieron una búsqueda nueva.
+    """
+
+    def __init__(self, capacidad=256):
+        """Crea una caché vacía.
+
+        Args:
+            capacidad (int): Cantidad máxima de rutas guardadas.
+        """
+        self.capacidad = capacidad
+        self._rutas = OrderedDict()  # (inicio, destino, clave) -> ruta
+        # (destino, clave) -> {casilla: (clave de la ruta, índice)}
+        self._sufijos = {}
+        self.aciertos = 0
+        self.aciertos_sufijo = 0
+        self.fallos = 0
+
+    def obtener(self, inicio, destino, clave):
+        """Busca una ruta guardada.
+
+        Args:
+            inicio (tuple[int, int]): Posición inicial.
+            destino (tuple[int, int]): Meta.
+            clave (tuple): Parámetros de costo cuantizados.
+
+        Returns:
+            list[tuple[int, int]] | None: Copia de la ruta (sin incluir
+            ``inicio``), o None si no está en la caché.
+        """
+        clave_ruta = (inicio, destino, clave)
+        ruta = self._rutas.get(clave_ruta)
+        if ruta is not None:
+            self._rutas.move_to_end(clave_ruta)
+            self.aciertos += 1
+            return list(ruta)
+
+        # Reutilizar el final de una ruta que pasa por el inicio
+        indice = self._sufijos.get((destino, clave))
+        if indice and inicio in indice:
+            clave_guardada, posicion = indice[inicio]
+            ruta = self._rutas.get(clave_guardada)
+            if ruta is not None:
+                self._rutas.move_to_end(clave_guardada)
+                self.aciertos_sufijo += 1
+                return list(ruta[posicion + 1:])
+
+        self.fallos += 1
+        return None
+
+    def guardar(self, inicio, destino, clave, ruta):
+        """Guarda una ruta calculada.
+
+        También se guardan las rutas vacías (destino inalcanzable),
+        porque el mapa no cambia durante la partida.
+
+        Args:
+            inicio (tuple[int, int]): Posición inicial.
+            destino (tuple[int, int]): Meta.
+            clave (tuple): Parámetros de costo cuantizados.
+            ruta (list[tuple[int, int]]): Ruta sin incluir ``inicio``.
+        """
+        clave_ruta = (inicio, destino, clave)
+        if clave_ruta in self._rutas:
+            self._quitar(clave_ruta)
+
+        ruta = tuple(ruta)
+        self._rutas[clave_ruta] = ruta
+        if ruta:
+            indice = self._sufijos.setdefault((destino, clave), {})
+            indice[inicio] = (clave_ruta, -1)
+            for i, casilla in enumerate(ruta):
+                indice[casilla] = (clave_ruta, i)
+
+        while len(self._rutas) > self.capacidad:
+            self._quitar(next(iter(self._rutas)))
+
+    def _quitar(self, clave_ruta):
+        """Elimina una ruta y sus entradas en el índice de sufijos.
+
+        Args:
+            clave_ruta (tuple): Clave (inicio, destino, clave) de la ruta.
+        """
+        ruta = self._rutas.pop(clave_ruta)
+        inicio, destino, clave = clave_ruta
+        indice = self._sufijos.get((destino, clave))
+        if not indice:
+            return
+        for casilla in (inicio,) + ruta:
+            if indice.get(casilla, (None,))[0] == clave_ruta:
+                del indice[casilla]
+        if not indice:
+            del self._sufijos[(destino, clave)]
+
+    def invalidar(self, *_):
+        """Vacía la caché (por ejemplo, al cambiar el clima)."""
+        self._rutas.clear()
+        self._sufijos.clear()
+
+    def estadisticas(self):
+        """Resume el uso de la caché.
+
+        Returns:
+            dict: Rutas guardadas, aciertos, fallos y tasa de aciertos.
+        """
+        consultas = self.aciertos + self.aciertos_sufijo + self.fallos
+        return {
+            'rutas': len(self._rutas),
+            'capacidad': self.capacidad,
+            'aciertos': self.aciertos,
+            'aciertos_sufijo': self.aciertos_sufijo,
+            'fallos': self.fallos,
+            'tasa_aciertos': ((self.aciertos + self.aciertos_sufijo)
+                              / consultas if consultas else 0.0)
+        }
+
+
+_caches = {}  # id(mapa) -> (mapa, CacheRutas)
+
+
+def obtener_cache(mapa):
+    """Devuelve la caché de rutas compartida de un mapa.
+
+    Args:
+        mapa (list[list[str]]): Matriz del mapa.
+
+    Returns:
+        CacheRutas: Caché asociada al mapa.
+    """
+    entrada = _caches.get(id(mapa))
+    if entrada is None or entrada[0] is not mapa:
+        if len(_caches) >= 4:
+            _caches.clear()
+        entrada = (mapa, CacheRutas())
+        _caches[id(mapa)] = entrada
+    return entrada[1]
+
+
+def invalidar_todas(*_):
+    """Vacía las cachés de todos los mapas.
+
+    Pensada para registrarse como observador de `SistemaClima`.
+    """
+    for _, cache in _caches.values():
+        cache.invalidar()
+
+
+def reemplazar_cache(mapa, cache):
+    """Usa una caché dada para un mapa (por ejemplo, la de un keyframe).
+
+    Args:
+        mapa (list[list[str]]): Matriz del mapa.
+        cache (CacheRutas): Caché a usar desde ahora.
+    """
+    _caches[id(mapa)] = (mapa, cache)
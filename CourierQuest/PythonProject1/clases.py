@@ -4,9 +4,13 @@ clases.py.
 Se crea la clase "Pedido" y se crea la clase
 "ColaPedidos" que será utilizada mediante un
 heap para ordenar los pedidos por prioridad.
+También está "Inventario", el contenedor de los
+pedidos que lleva un repartidor.
 """
 
 import heapq
+from bisect import bisect_left, insort
+from operator import attrgetter
 
 
 class Pedido:
@@ -112,3 +116,210 @@ class ColaPedidos:
         if self.cola:
             return heapq.heappop(self.cola)  # sale el de mayor prioridad
         return None
+
+
+class Inventario:
+    """Pedidos que lleva un repartidor, con índices al día.
+
+    Se usa como la deque de antes (append, pop, popleft, remove, clear,
+    iterar en orden de recogida), pero además mantiene en O(1) con cada
+    inserción y cada baja:
+
+    - el peso total,
+    - los pedidos por prioridad exacta y por casilla de entrega.
+
+    La prioridad máxima sale de una lista ordenada de las prioridades
+    distintas (pocas, así que insertar y quitar es barato aunque corra
+    la lista). Las dos vistas ordenadas, por prioridad y por pago (de
+    mayor a menor, y en orden de recogida si empatan), se arman al
+    pedirlas, en O(n log n), y quedan guardadas hasta el próximo
+    cambio: el HUD las pide en cada cuadro y el inventario cambia solo
+    al recoger o entregar.
+
+    Así pesar, entregar y dibujar el inventario no recorre todos los
+    pedidos. Los pedidos no deben cambiar de peso, prioridad, pago ni
+    entrega mientras están en el inventario.
+
+    Attributes:
+        peso (float): Peso total de los pedidos.
+    """
+
+    def __init__(self, pedidos=()):
+        """Crea el inventario.
+
+        Args:
+            pedidos (Iterable[Pedido]): Pedidos iniciales, en orden de
+                recogida.
+        """
+        self.peso = 0
+        self._pedidos = {}  # id -> pedido, en orden de recogida
+        self._por_prioridad_exacta = {}  # prioridad -> {id: pedido}
+        self._prioridades = []  # Prioridades presentes, ordenadas
+        self._por_entrega = {}  # (x, y) -> {id: pedido}
+        # Vistas ordenadas; None si hay que volver a armarlas
+        self._vista_prioridad = None
+        self._vista_pago = None
+        for pedido in pedidos:
+            self.append(pedido)
+
+    # ========================================
+    # USO COMO COLA
+    # ========================================
+
+    def __len__(self):
+        return len(self._pedidos)
+
+    def __iter__(self):
+        # Sin copiar: quien saque pedidos mientras recorre, que recorra
+        # una copia (list(inventario)).
+        return iter(self._pedidos.values())
+
+    def __contains__(self, pedido):
+        return id(pedido) in self._pedidos
+
+    def __repr__(self):
+        return f"Inventario({list(self._pedidos.values())!r})"
+
+    def __getstate__(self):
+        # Los índices usan id(): al copiar o guardar con pickle solo va la
+        # lista de pedidos y se reconstruyen.
+        return list(self._pedidos.values())
+
+    def __setstate__(self, pedidos):
+        self.__init__(pedidos)
+
+    def append(self, pedido):
+        """Agrega un pedido al final (el más reciente).
+
+        Args:
+            pedido (Pedido): Pedido recogido.
+        """
+        clave = id(pedido)
+        self._pedidos[clave] = pedido
+        self.peso += pedido.weight
+
+        grupo = self._por_prioridad_exacta.get(pedido.priority)
+        if grupo is None:
+            grupo = self._por_prioridad_exacta[pedido.priority] = {}
+            insort(self._prioridades, pedido.priority)
+        grupo[clave] = pedido
+        self._por_entrega.setdefault(tuple(pedido.dropoff), {})[clave] = \
+            pedido
+        self._vista_prioridad = self._vista_pago = None
+
+    def remove(self, pedido):
+        """Saca un pedido del inventario.
+
+        Args:
+            pedido (Pedido): Pedido a sacar.
+
+        Raises:
+            ValueError: Si el pedido no está en el inventario.
+        """
+        clave = id(pedido)
+        if clave not in self._pedidos:
+            raise ValueError("El pedido no está en el inventario")
+        del self._pedidos[clave]
+        self.peso -= pedido.weight
+
+        grupo = self._por_prioridad_exacta[pedido.priority]
+        del grupo[clave]
+        if not grupo:
+            del self._por_prioridad_exacta[pedido.priority]
+            del self._prioridades[bisect_left(self._prioridades,
+                                              pedido.priority)]
+        entrega = tuple(pedido.dropoff)
+        del self._por_entrega[entrega][clave]
+        if not self._por_entrega[entrega]:
+            del self._por_entrega[entrega]
+        self._vista_prioridad = self._vista_pago = None
+
+    def pop(self):
+        """Saca y devuelve el pedido más reciente.
+
+        Raises:
+            IndexError: Si el inventario está vacío.
+        """
+        if not self._pedidos:
+            raise IndexError("pop de un inventario vacío")
+        pedido = next(reversed(self._pedidos.values()))
+        self.remove(pedido)
+        return pedido
+
+    def popleft(self):
+        """Saca y devuelve el pedido más antiguo.
+
+        Raises:
+            IndexError: Si el inventario está vacío.
+        """
+        if not self._pedidos:
+            raise IndexError("popleft de un inventario vacío")
+        pedido = next(iter(self._pedidos.values()))
+        self.remove(pedido)
+        return pedido
+
+    def clear(self):
+        """Vacía el inventario."""
+        self.__init__()
+
+    # ========================================
+    # CONSULTAS
+    # ========================================
+
+    def prioridad_maxima(self):
+        """Prioridad más alta entre los pedidos (None si está vacío)."""
+        return self._prioridades[-1] if self._prioridades else None
+
+    def en_entrega(self, x, y):
+        """Pedidos que se entregan en una casilla, en orden de recogida.
+
+        Args:
+            x (int): Columna.
+            y (int): Fila.
+
+        Returns:
+            list[Pedido]: Pedidos con ese dropoff.
+        """
+        grupo = self._por_entrega.get((x, y))
+        return list(grupo.values()) if grupo else []
+
+    def puntos_entrega(self):
+        """Casillas de entrega distintas, para dibujarlas una vez cada una.
+
+        Yields:
+            tuple[tuple[int, int], Pedido]: Casilla y el último pedido
+                recogido con ese dropoff (el que quedaba encima al dibujar
+                todos los pedidos en orden).
+        """
+        for casilla, grupo in self._por_entrega.items():
+            yield casilla, next(reversed(grupo.values()))
+
+    def por_prioridad(self):
+        """Vista ordenada por prioridad, de mayor a menor.
+
+        Es la lista guardada: no hay que modificarla.
+
+        Returns:
+            list[Pedido]: Pedidos ordenados.
+        """
+        if self._vista_prioridad is None:
+            self._vista_prioridad = self._ordenar('priority')
+        return self._vista_prioridad
+
+    def por_pago(self):
+        """Vista ordenada por pago, de mayor a menor.
+
+        Es la lista guardada: no hay que modificarla.
+
+        Returns:
+            list[Pedido]: Pedidos ordenados.
+        """
+        if self._vista_pago is None:
+            self._vista_pago = self._ordenar('payout')
+        return self._vista_pago
+
+    def _ordenar(self, atributo):
+        """Pedidos de mayor a menor `atributo`, en orden de recogida si
+        empatan (sorted es estable y `_pedidos` está en ese orden)."""
+        return sorted(self._pedidos.values(), key=attrgetter(atributo),
+                      reverse=True)
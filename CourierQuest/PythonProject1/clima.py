@@ -6,9 +6,18 @@ con ayuda de la API, también maneja
 los efectos del clima sobre el jugador.
 """
 
+import bisect
 import random
-import time
 import json
+import numpy as np
+import markov
+from azar import flujo
+from reloj import reloj
+
+_azar = flujo('clima')
+
+DURACION_MEDIA_SEGMENTO = (45 + 90) / 2  # Segundos entre cambios de clima
+INTENSIDAD_MEDIA = (0.2 + 1.0) / 2  # Intensidad esperada tras un cambio
 
 
 class SistemaClima:
@@ -68,7 +77,7 @@ class SistemaClima:
         self.estado_actual = 'clear'
         self.intensidad_actual = 0.0
         self.tiempo_cambio = (
-                time.time() + random.randint(45, 90))
+                reloj.ahora() + _azar.randint(45, 90))
         # 45-90 segundos
 
         # Variables de transición suave
@@ -78,6 +87,17 @@ class SistemaClima:
         self.tiempo_inicio_transicion = 0
         self.duracion_transicion = 3.0  # 3 segundos de transición
 
+        # Funciones a llamar cuando cambia el estado del clima
+        self.observadores = []
+
+        # Línea de tiempo pregenerada (ver generar_linea_tiempo)
+        self.linea_tiempo = None
+        self.inicio_linea = 0.0
+        self.segmento_actual = -1
+        self._matriz_numpy = None  # (estados, matriz) para markov.py
+        self._potencias = []  # P^0, P^1, ... de la matriz de transición
+        self._esperados = {}  # Estado -> (multiplicadores, consumos) por k
+
         # Cargar configuración del clima desde API
         self.cargar_configuracion_clima()
 
@@ -207,14 +227,73 @@ class SistemaClima:
 
         print("Usando configuración de clima por defecto")
 
+    def exportar_configuracion(self):
+        """Configuración y estado actual, para grabar una partida.
+
+        Returns:
+            dict: Estados, matriz de transición, multiplicadores, consumos
+            y el estado e intensidad actuales.
+        """
+        return {
+            'estados_disponibles': list(self.estados_disponibles),
+            'matriz_transicion': self.matriz_transicion,
+            'multiplicadores': self.multiplicadores,
+            'consumo_resistencia': self.consumo_resistencia,
+            'estado_actual': self.estado_actual,
+            'intensidad_actual': self.intensidad_actual
+        }
+
+    def importar_configuracion(self, configuracion):
+        """Aplica una configuración de `exportar_configuracion`.
+
+        Args:
+            configuracion (dict): Configuración grabada.
+        """
+        for atributo, valor in configuracion.items():
+            setattr(self, atributo, valor)
+        self._matriz_numpy = None
+        self._potencias = []
+        self._esperados = {}
+
+    def multiplicador_efectivo(self, estado, intensidad):
+        """Multiplicador de velocidad de un estado con su intensidad.
+
+        Args:
+            estado (str): Estado del clima.
+            intensidad (float): Intensidad entre 0 y 1.
+
+        Returns:
+            float: Multiplicador de velocidad.
+        """
+        base_mult = self.multiplicadores.get(estado, 1.0)
+        return base_mult * (1.0 - 0.5 * intensidad * (1.0 - base_mult))
+
+    def consumo_efectivo(self, estado, intensidad):
+        """Consumo extra de resistencia de un estado con su intensidad.
+
+        Args:
+            estado (str): Estado del clima.
+            intensidad (float): Intensidad entre 0 y 1.
+
+        Returns:
+            float: Consumo adicional de resistencia.
+        """
+        return self.consumo_resistencia.get(estado, 0.0) * (1.0 + intensidad)
+
     def obtener_multiplicador_actual(self):
         """Calcula el multiplicador de velocidad según el clima actual.
 
-        Aplica interpolación lineal si hay una transición activa.
+        Aplica interpolación lineal si hay una transición activa. Con
+        una línea de tiempo se responde con una búsqueda binaria sobre
+        los segmentos ya calculados.
 
         Returns:
             float: Multiplicador de velocidad (entre ~0.75 y 1.00).
         """
+        if self.linea_tiempo is not None:
+            return self.linea_tiempo.multiplicador(
+                reloj.ahora() - self.inicio_linea)
+
         if not self.en_transicion:
             base_mult = self.multiplicadores.get(self.estado_actual, 1.0)
             # Aplicar intensidad: a mayor intensidad, mayor efecto.
@@ -222,7 +301,7 @@ class SistemaClima:
                     1.0 - 0.5 * self.intensidad_actual * (1.0 - base_mult))
 
         # Durante transición, interpolar entre estados.
-        tiempo_transcurrido = time.time() - self.tiempo_inicio_transicion
+        tiempo_transcurrido = reloj.ahora() - self.tiempo_inicio_transicion
         progreso = min(1.0, tiempo_transcurrido / self.duracion_transicion)
 
         mult_anterior = self.multiplicadores.get(self.estado_anterior, 1.0)
@@ -246,13 +325,16 @@ class SistemaClima:
         Returns:
             float: Consumo adicional de resistencia (0.0 a ~0.3+).
         """
+        if self.linea_tiempo is not None:
+            return self.linea_tiempo.consumo(reloj.ahora() - self.inicio_linea)
+
         consumo_base = self.consumo_resistencia.get(self.estado_actual, 0.0)
 
         if not self.en_transicion:
             return consumo_base * (1.0 + self.intensidad_actual)
 
         # Durante transición, interpolar.
-        tiempo_transcurrido = time.time() - self.tiempo_inicio_transicion
+        tiempo_transcurrido = reloj.ahora() - self.tiempo_inicio_transicion
         progreso = min(1.0, tiempo_transcurrido / self.duracion_transicion)
 
         consumo_anterior = self.consumo_resistencia.get(
@@ -266,12 +348,253 @@ class SistemaClima:
 
         Lo actualiza según el tiempo y la cadena de Markov.
         """
-        ahora = time.time()
+        ahora = reloj.ahora()
+
+        if self.linea_tiempo is not None:
+            self._seguir_linea_tiempo(ahora - self.inicio_linea)
+            return
 
         # Verificar si es hora de cambiar el clima.
         if ahora >= self.tiempo_cambio:
             self._cambiar_clima()
 
+    # ========================================
+    # LÍNEA DE TIEMPO PREGENERADA
+    # ========================================
+
+    def generar_linea_tiempo(self, duracion, semilla=None, inicio=None):
+        """Genera de antemano todo el clima de una partida.
+
+        Parte del estado e intensidad actuales y sortea los cambios con
+        la misma cadena de Markov y los mismos rangos que
+        `_cambiar_clima` (45-90 s por segmento, intensidad 0.2-1.0),
+        pero con un generador propio, así la misma semilla da el mismo
+        clima. Desde ese momento las consultas no sortean nada.
+
+        Args:
+            duracion (float): Segundos de juego a cubrir.
+            semilla (int | None): Semilla; si es None se elige una y
+                queda en `linea_tiempo.semilla`.
+            inicio (float | None): Momento (reloj.ahora()) del segundo 0.
+
+        Returns:
+            LineaTiempoClima: La línea generada.
+        """
+        if semilla is None:
+            semilla = _azar.randrange(2 ** 32)
+        rng = random.Random(semilla)
+
+        segmentos = [(0.0, self.estado_actual, self.intensidad_actual)]
+        tiempo = float(rng.randint(45, 90))
+        estado = self.estado_actual
+        while tiempo < duracion:
+            estado = self._sortear_siguiente(estado, rng)
+            segmentos.append((tiempo, estado, rng.uniform(0.2, 1.0)))
+            tiempo += rng.randint(45, 90)
+
+        self.linea_tiempo = LineaTiempoClima(self, segmentos, semilla)
+        self.inicio_linea = reloj.ahora() if inicio is None else inicio
+        self.segmento_actual = 0
+        self.en_transicion = False
+        self.tiempo_cambio = \
+            self.inicio_linea + self.linea_tiempo.fin_segmento(0)
+        return self.linea_tiempo
+
+    def _sortear_siguiente(self, estado, rng):
+        """Sortea el estado siguiente con la matriz de transición.
+
+        Args:
+            estado (str): Estado actual.
+            rng (random.Random): Generador a usar.
+
+        Returns:
+            str: Estado siguiente.
+        """
+        transicion = self.matriz_transicion.get(estado)
+        if not transicion:
+            return rng.choice(self.estados_disponibles)
+        return rng.choices(transicion['estados'],
+                           weights=transicion['probabilidades'])[0]
+
+    def _seguir_linea_tiempo(self, segundos):
+        """Pasa al segmento que corresponde y avisa a los observadores.
+
+        Args:
+            segundos (float): Tiempo desde el inicio de la línea.
+        """
+        linea = self.linea_tiempo
+        indice = linea.indice(segundos)
+        self.en_transicion = linea.en_transicion(segundos)
+        if indice == self.segmento_actual:
+            return
+
+        self.segmento_actual = indice
+        self.estado_anterior = linea.estados[indice - 1] if indice \
+            else linea.estados[0]
+        self.estado_actual = linea.estados[indice]
+        self.intensidad_actual = linea.intensidades[indice]
+        self.tiempo_inicio_transicion = \
+            self.inicio_linea + linea.inicios[indice]
+        self.tiempo_cambio = self.inicio_linea + linea.fin_segmento(indice)
+
+        print(f"Clima: {self.estado_anterior} → {self.estado_actual}"
+              f" (intensidad: {self.intensidad_actual:.2f})")
+        for observador in self.observadores:
+            observador(self.estado_actual)
+
+    # ========================================
+    # ANÁLISIS DE LA CADENA (NumPy)
+    # ========================================
+
+    def matriz_numpy(self):
+        """Matriz de transición como arreglo de NumPy (con caché).
+
+        Returns:
+            tuple[list[str], numpy.ndarray]: Orden de los estados y
+            matriz n x n.
+        """
+        if self._matriz_numpy is None:
+            estados = list(self.estados_disponibles)
+            self._matriz_numpy = (estados, markov.matriz_numpy(
+                self.matriz_transicion, estados))
+        return self._matriz_numpy
+
+    def _esperados_desde(self, estado, cambios):
+        """Multiplicador y consumo esperados tras k cambios de clima.
+
+        La fila del estado en P^k es la distribución del clima después
+        de k cambios; su producto con los valores de cada estado (con la
+        intensidad media) da el valor esperado. Las potencias se
+        comparten y los resultados se guardan por estado.
+
+        Args:
+            estado (str): Estado de partida.
+            cambios (int): Mayor k que se va a consultar.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Multiplicador y consumo
+            esperados para k = 0..cambios (o más).
+        """
+        esperados = self._esperados.get(estado)
+        if esperados is not None and len(esperados[0]) > cambios:
+            return esperados
+
+        estados, matriz = self.matriz_numpy()
+        n = len(estados)
+        if not self._potencias:
+            self._potencias.append(np.eye(n))
+        while len(self._potencias) <= cambios:
+            self._potencias.append(self._potencias[-1] @ matriz)
+
+        if estado in estados:
+            filas = np.array([p[estados.index(estado)]
+                              for p in self._potencias])
+        else:
+            filas = np.array([np.full(n, 1.0 / n) @ p
+                              for p in self._potencias])
+        multiplicadores = np.array([
+            self.multiplicador_efectivo(e, INTENSIDAD_MEDIA) for e in estados])
+        consumos = np.array([
+            self.consumo_efectivo(e, INTENSIDAD_MEDIA) for e in estados])
+        esperados = (filas @ multiplicadores, filas @ consumos)
+        self._esperados[estado] = esperados
+        return esperados
+
+    def pronostico(self, horizonte):
+        """Pronóstico del clima para los próximos segundos.
+
+        El clima actual sigue hasta el próximo cambio programado; de ahí
+        en adelante se supone un cambio cada DURACION_MEDIA_SEGMENTO
+        segundos y, para el k-ésimo cambio, se usa el valor esperado
+        según P^k (ver `_esperados_desde`). El resultado es el promedio
+        en el tiempo sobre todo el horizonte.
+
+        Args:
+            horizonte (float): Segundos hacia adelante.
+
+        Returns:
+            dict: 'multiplicador' y 'consumo' promedio esperados y
+            'cambios' (cantidad de cambios de clima que se esperan).
+        """
+        return self.pronostico_desde(
+            self.estado_actual, self.obtener_multiplicador_actual(),
+            self.obtener_consumo_resistencia_extra(),
+            max(0.0, self.tiempo_cambio - reloj.ahora()), horizonte)
+
+    def pronostico_desde(self, estado, mult_actual, consumo_actual,
+                         restante, horizonte):
+        """Pronóstico a partir de un clima dado, no del actual.
+
+        Lo usa el planificador en otro proceso (ver proceso_ia.py), que
+        recibe el clima del momento en que se pidió el plan.
+
+        Args:
+            estado (str): Estado del clima.
+            mult_actual (float): Multiplicador de velocidad actual.
+            consumo_actual (float): Consumo extra de resistencia actual.
+            restante (float): Segundos hasta el próximo cambio.
+            horizonte (float): Segundos hacia adelante.
+
+        Returns:
+            dict: Igual que `pronostico`.
+        """
+        if horizonte <= 0 or restante >= horizonte:
+            return {'multiplicador': mult_actual, 'consumo': consumo_actual,
+                    'cambios': 0}
+
+        cambios = 1 + int((horizonte - restante) // DURACION_MEDIA_SEGMENTO)
+        multiplicadores, consumos = self._esperados_desde(estado, cambios)
+        suma_mult = mult_actual * restante
+        suma_consumo = consumo_actual * restante
+        tiempo = restante
+        for k in range(1, cambios + 1):
+            tramo = min(DURACION_MEDIA_SEGMENTO, horizonte - tiempo)
+            suma_mult += multiplicadores[k] * tramo
+            suma_consumo += consumos[k] * tramo
+            tiempo += tramo
+        return {'multiplicador': float(suma_mult / horizonte),
+                'consumo': float(suma_consumo / horizonte),
+                'cambios': cambios}
+
+    def simular_lote(self, pasos, cantidad=1000, semilla=None):
+        """Simula muchas secuencias de clima desde el estado actual.
+
+        Args:
+            pasos (int): Cambios de clima por secuencia.
+            cantidad (int): Cantidad de secuencias.
+            semilla (int | None): Semilla del generador de NumPy.
+
+        Returns:
+            numpy.ndarray: Índices de estado (cantidad x pasos + 1), en
+            el orden de `matriz_numpy()[0]`.
+        """
+        estados, matriz = self.matriz_numpy()
+        inicial = estados.index(self.estado_actual) \
+            if self.estado_actual in estados else 0
+        return markov.simular_cadenas(matriz, inicial, pasos, cantidad,
+                                      semilla)
+
+    def analizar_estacionaria(self, pasos=200, cantidad=5000, semilla=0):
+        """Compara la distribución estacionaria con una simulación.
+
+        Args:
+            pasos (int): Cambios de clima por secuencia simulada.
+            cantidad (int): Cantidad de secuencias.
+            semilla (int): Semilla de la simulación.
+
+        Returns:
+            dict: Estado -> {'teorica', 'simulada'} con la proporción de
+            tiempo en cada clima a largo plazo.
+        """
+        estados, matriz = self.matriz_numpy()
+        teorica = markov.distribucion_estacionaria(matriz)
+        cadenas = self.simular_lote(pasos, cantidad, semilla)
+        simulada = markov.distribucion_empirica(cadenas, len(estados),
+                                                descartar=pasos // 4)
+        return {estado: {'teorica': float(teorica[i]),
+                         'simulada': float(simulada[i])}
+                for i, estado in enumerate(estados)}
+
     def _cambiar_clima(self):
         """Cambia el clima usando la matriz de Markov cargada.
 
@@ -282,17 +605,17 @@ class SistemaClima:
         if self.estado_actual not in self.matriz_transicion:
             print(f"Estado {self.estado_actual} no encontrado en matriz,"
                   f" usando aleatorio")
-            nuevo_estado = random.choice(self.estados_disponibles)
+            nuevo_estado = _azar.choice(self.estados_disponibles)
         else:
             transicion = self.matriz_transicion[self.estado_actual]
             estados = transicion['estados']
             probabilidades = transicion['probabilidades']
 
             # Seleccionar siguiente estado basado en probabilidades.
-            nuevo_estado = random.choices(estados, weights=probabilidades)[0]
+            nuevo_estado = _azar.choices(estados, weights=probabilidades)[0]
 
         # Generar nueva intensidad (0.0 a 1.0).
-        nueva_intensidad = random.uniform(0.2, 1.0)
+        nueva_intensidad = _azar.uniform(0.2, 1.0)
 
         # Iniciar transición suave.
         self.estado_anterior = self.estado_actual
@@ -300,14 +623,25 @@ class SistemaClima:
         self.intensidad_actual = nueva_intensidad
 
         self.en_transicion = True
-        self.tiempo_inicio_transicion = time.time()
+        self.tiempo_inicio_transicion = reloj.ahora()
 
         # Programar próximo cambio (45-90 segundos según especificación).
-        self.tiempo_cambio = time.time() + random.randint(45, 90)
+        self.tiempo_cambio = reloj.ahora() + _azar.randint(45, 90)
 
         print(f"Clima: {self.estado_anterior} → {self.estado_actual}"
               f" (intensidad: {self.intensidad_actual:.2f})")
 
+        for observador in self.observadores:
+            observador(self.estado_actual)
+
+    def agregar_observador(self, funcion):
+        """Registra una función que se llama en cada cambio de clima.
+
+        Args:
+            funcion (callable): Recibe el nuevo estado (str).
+        """
+        self.observadores.append(funcion)
+
     def obtener_info_clima(self):
         """Retorna información útil del clima para mostrar en pantalla.
 
@@ -320,7 +654,7 @@ class SistemaClima:
             'intensidad': self.intensidad_actual,
             'multiplicador': self.obtener_multiplicador_actual(),
             'en_transicion': self.en_transicion,
-            'tiempo_hasta_cambio': max(0, self.tiempo_cambio - time.time()),
+            'tiempo_hasta_cambio': max(0, self.tiempo_cambio - reloj.ahora()),
             'consumo_extra': self.obtener_consumo_resistencia_extra()
         }
 
@@ -380,3 +714,141 @@ class SistemaClima:
                      .get('estados', [])),
             'api_conectada': self.api is not None
         }
+
+
+class LineaTiempoClima:
+    """Clima de una partida completa, calculado de antemano.
+
+    Guarda los segmentos (inicio, estado, intensidad) en listas
+    paralelas ordenadas por inicio, y para cada segmento los valores de
+    multiplicador y consumo al empezar la transición y al terminarla.
+    Una consulta busca el segmento con `bisect` (o reusa el último si el
+    tiempo sigue dentro de él) e interpola solo durante los primeros
+    `duracion_transicion` segundos.
+
+    Attributes:
+        semilla (int): Semilla con la que se generó.
+        inicios (list[float]): Segundo en que empieza cada segmento.
+        estados (list[str]): Estado de cada segmento.
+        intensidades (list[float]): Intensidad de cada segmento.
+        duracion_transicion (float): Segundos de interpolación.
+    """
+
+    def __init__(self, clima, segmentos, semilla):
+        """Precalcula los valores de cada segmento.
+
+        Args:
+            clima (SistemaClima): Da los multiplicadores y consumos.
+            segmentos (list[tuple]): (inicio, estado, intensidad).
+            semilla (int): Semilla usada para generarlos.
+        """
+        self.semilla = semilla
+        self.inicios = [inicio for inicio, _, _ in segmentos]
+        self.estados = [estado for _, estado, _ in segmentos]
+        self.intensidades = [intensidad for _, _, intensidad in segmentos]
+        self.duracion_transicion = clima.duracion_transicion
+
+        # Valor al terminar la transición de cada segmento
+        self._mult_hasta = [clima.multiplicador_efectivo(e, i)
+                            for _, e, i in segmentos]
+        self._consumo_hasta = [clima.consumo_efectivo(e, i)
+                               for _, e, i in segmentos]
+        # Valor al empezar: el base del estado anterior, como en la
+        # interpolación de SistemaClima
+        self._mult_desde = [self._mult_hasta[0]] + [
+            clima.multiplicadores.get(e, 1.0) for e in self.estados[:-1]]
+        self._consumo_desde = [self._consumo_hasta[0]] + [
+            clima.consumo_resistencia.get(e, 0.0)
+            for e in self.estados[:-1]]
+        self._ultimo = 0  # Último segmento consultado
+
+    def __len__(self):
+        """Cantidad de segmentos."""
+        return len(self.inicios)
+
+    def indice(self, segundos):
+        """Segmento activo en un momento de la partida.
+
+        Args:
+            segundos (float): Tiempo desde el inicio de la línea.
+
+        Returns:
+            int: Índice del segmento.
+        """
+        i = self._ultimo
+        if self.inicios[i] <= segundos < self.fin_segmento(i):
+            return i
+        i = max(0, bisect.bisect_right(self.inicios, segundos) - 1)
+        self._ultimo = i
+        return i
+
+    def fin_segmento(self, indice):
+        """Segundo en que termina un segmento (inf si es el último).
+
+        Args:
+            indice (int): Índice del segmento.
+
+        Returns:
+            float: Inicio del segmento siguiente.
+        """
+        if indice + 1 < len(self.inicios):
+            return self.inicios[indice + 1]
+        return float('inf')
+
+    def _progreso(self, indice, segundos):
+        """Avance de la transición del segmento (1.0 si terminó)."""
+        if indice == 0:
+            return 1.0
+        return min(1.0, (segundos - self.inicios[indice]) /
+                   self.duracion_transicion)
+
+    def en_transicion(self, segundos):
+        """Indica si en ese momento se está interpolando entre climas.
+
+        Args:
+            segundos (float): Tiempo desde el inicio de la línea.
+
+        Returns:
+            bool: True durante la transición de un segmento.
+        """
+        return self._progreso(self.indice(segundos), segundos) < 1.0
+
+    def multiplicador(self, segundos):
+        """Multiplicador de velocidad en un momento de la partida.
+
+        Args:
+            segundos (float): Tiempo desde el inicio de la línea.
+
+        Returns:
+            float: Multiplicador de velocidad.
+        """
+        i = self.indice(segundos)
+        progreso = self._progreso(i, segundos)
+        if progreso >= 1.0:
+            return self._mult_hasta[i]
+        desde = self._mult_desde[i]
+        return desde + (self._mult_hasta[i] - desde) * progreso
+
+    def consumo(self, segundos):
+        """Consumo extra de resistencia en un momento de la partida.
+
+        Args:
+            segundos (float): Tiempo desde el inicio de la línea.
+
+        Returns:
+            float: Consumo adicional de resistencia.
+        """
+        i = self.indice(segundos)
+        progreso = self._progreso(i, segundos)
+        if progreso >= 1.0:
+            return self._consumo_hasta[i]
+        desde = self._consumo_desde[i]
+        return desde + (self._consumo_hasta[i] - desde) * progreso
+
+    def segmentos(self):
+        """Lista de segmentos, para guardar o mostrar.
+
+        Returns:
+            list[tuple[float, str, float]]: (inicio, estado, intensidad).
+        """
+        return list(zip(self.inicios, self.estados, self.intensidades))
@@ -0,0 +1,399 @@
+"""
+costos.py.
+
+Calcula la grilla de costos por casilla que usan
+los planificadores de rutas del CPU. La grilla se
+construye con NumPy una sola vez por combinación
+de clima y nivel de resistencia y se guarda en
+caché, así la búsqueda solo hace consultas a una
+lista en vez de recalcular el costo de cada arista.
+"""
+
+from collections import OrderedDict, deque
+import numpy as np
+from cache_disco import cache_disco, huella_mapa, version_codigo
+from mapa_binario import matriz_letras
+
+# Peso de superficie de cada tipo de casilla (igual que en ciudad.json)
+PESOS_SUPERFICIE = {
+    'C': 1.0,  # Calle
+    'P': 0.95,  # Parque (más rápido)
+    'B': 999.0  # Edificio (bloqueado)
+}
+
+BLOQUEADO = float('inf')  # Costo de una casilla intransitable
+# Versión del cálculo de zonas conexas para la caché en disco
+VERSION_COMPONENTES = version_codigo(__file__)
+
+
+def factor_resistencia(resistencia):
+    """Devuelve la penalización de costo según la resistencia.
+
+    Args:
+        resistencia (float): Resistencia actual del jugador.
+
+    Returns:
+        float: 1.5 si está cansado, 1.2 si está fatigado, 1.0 si no.
+    """
+    if resistencia < 30:
+        return 1.5
+    elif resistencia < 50:
+        return 1.2
+    return 1.0
+
+
+class GrillaCostos:
+    """Grilla de costos de movimiento de un mapa.
+
+    Guarda el costo base de entrar a cada casilla (1 / surface_weight)
+    y genera, para cada combinación de clima y resistencia, una grilla
+    escalada en una sola operación vectorizada.
+
+    Attributes:
+        ancho (int): Cantidad de columnas del mapa.
+        alto (int): Cantidad de filas del mapa.
+        base (numpy.ndarray): Costo base por casilla, ``inf`` si es "B".
+        huella (str | None): Hash de las casillas (ver cache_disco.py).
+    """
+
+    def __init__(self, mapa, max_entradas=16):
+        """Construye la grilla base a partir del mapa.
+
+        Args:
+            mapa (list[list[str]] | MapaPaginado): Matriz del mapa.
+            max_entradas (int): Cantidad de grillas escaladas en caché.
+        """
+        tiles = matriz_letras(mapa)
+        self.alto, self.ancho = tiles.shape
+        self.huella = huella_mapa(tiles)
+        self.base = np.ones((self.alto, self.ancho), dtype=np.float64)
+        for tile, peso in PESOS_SUPERFICIE.items():
+            self.base[tiles == tile] = 1.0 / peso
+        self.base[tiles == "B"] = BLOQUEADO
+        self._iniciar_caches(max_entradas)
+
+    @classmethod
+    def desde_base(cls, base, max_entradas=16, huella=None):
+        """Crea la grilla sobre un arreglo de costos base ya armado.
+
+        El arreglo no se copia: el planificador en otro proceso (ver
+        proceso_ia.py) lo lee directo de la memoria compartida.
+
+        Args:
+            base (numpy.ndarray): Costo base (alto x ancho), ``inf`` en
+                los edificios.
+            max_entradas (int): Cantidad de grillas escaladas en caché.
+            huella (str | None): Huella del mapa original, para usar la
+                caché en disco.
+
+        Returns:
+            GrillaCostos: Grilla que usa ``base``.
+        """
+        grilla = cls.__new__(cls)
+        grilla.alto, grilla.ancho = base.shape
+        grilla.base = base
+        grilla.huella = huella
+        grilla._iniciar_caches(max_entradas)
+        return grilla
+
+    def _iniciar_caches(self, max_entradas):
+        """Crea las cachés vacías de grillas escaladas y de pasos."""
+        self.max_entradas = max_entradas
+        self._cache = OrderedDict()  # LRU de grillas escaladas
+        self.max_campos = 64
+        self._campos = OrderedDict()  # LRU de pasos desde una casilla
+        self._componentes = None  # Componente de cada casilla (ver abajo)
+        self._mayor = -1  # Componente con más casillas
+        self._etiquetas = None  # Las mismas componentes en un arreglo
+        self._libres = {}  # Componente (o None) -> máscara de libres
+
+    @staticmethod
+    def clave(clima_mult, consumo_clima_extra, resistencia):
+        """Cuantiza los parámetros de costo en una clave de caché.
+
+        El clima se redondea a centésimas para que la interpolación
+        entre estados no genere una grilla nueva en cada cuadro.
+
+        Args:
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Costo adicional por clima.
+            resistencia (float): Resistencia actual.
+
+        Returns:
+            tuple[float, float, float]: Clave cuantizada.
+        """
+        return (round(clima_mult, 2), round(consumo_clima_extra, 2),
+                factor_resistencia(resistencia))
+
+    def costos(self, clima_mult, consumo_clima_extra, resistencia):
+        """Devuelve la grilla de costos aplanada para los parámetros dados.
+
+        El costo de entrar a la casilla (x, y) está en la posición
+        ``y * ancho + x``. Las casillas bloqueadas valen ``inf``.
+
+        Args:
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Costo adicional por clima.
+            resistencia (float): Resistencia actual.
+
+        Returns:
+            list[float]: Costos por casilla en orden fila por fila.
+        """
+        clave = self.clave(clima_mult, consumo_clima_extra, resistencia)
+        plana = self._cache.get(clave)
+        if plana is not None:
+            self._cache.move_to_end(clave)
+            return plana
+
+        clima, consumo, penalizacion = clave
+        # clima_mult=1.0 → costo*1.0, clima_mult=0.75 → costo*1.25
+        factor = (2.0 - clima) * (1.0 + consumo) * penalizacion
+        # Se pasa a lista porque leer elementos sueltos de una lista
+        # es más rápido que de un arreglo de NumPy.
+        plana = (self.base * factor).ravel().tolist()
+
+        self._cache[clave] = plana
+        if len(self._cache) > self.max_entradas:
+            self._cache.popitem(last=False)
+        return plana
+
+    def costo(self, x, y, clima_mult, consumo_clima_extra, resistencia):
+        """Costo de entrar a una casilla puntual.
+
+        Args:
+            x (int): Columna de la casilla.
+            y (int): Fila de la casilla.
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Costo adicional por clima.
+            resistencia (float): Resistencia actual.
+
+        Returns:
+            float: Costo de la casilla (``inf`` si está bloqueada).
+        """
+        return self.costos(clima_mult, consumo_clima_extra,
+                           resistencia)[y * self.ancho + x]
+
+    def pasos_desde(self, x, y):
+        """Menor cantidad de pasos desde una casilla hasta cada casilla.
+
+        Es un BFS sobre las casillas transitables, así que no depende
+        del clima ni de la resistencia. Como los movimientos son
+        reversibles, también da los pasos desde cada casilla hasta
+        (x, y). Se guardan los últimos ``max_campos`` resultados.
+
+        Args:
+            x (int): Columna de la casilla.
+            y (int): Fila de la casilla.
+
+        Returns:
+            list[int]: Pasos por casilla (posición ``y * ancho + x``),
+            -1 si no se puede llegar.
+        """
+        campo = self._campos.get((x, y))
+        if campo is not None:
+            self._campos.move_to_end((x, y))
+            return campo
+
+        ancho, alto = self.ancho, self.alto
+        base = self.costos(1.0, 0.0, 100)
+        campo = [-1] * (ancho * alto)
+        inicio = y * ancho + x
+        if 0 <= x < ancho and 0 <= y < alto and base[inicio] != BLOQUEADO:
+            campo[inicio] = 0
+            pendientes = deque([inicio])
+            while pendientes:
+                actual = pendientes.popleft()
+                pasos = campo[actual] + 1
+                cx = actual % ancho
+                for vecino, valido in ((actual - ancho, actual >= ancho),
+                                       (actual + ancho,
+                                        actual < ancho * (alto - 1)),
+                                       (actual - 1, cx > 0),
+                                       (actual + 1, cx < ancho - 1)):
+                    if (valido and campo[vecino] < 0
+                            and base[vecino] != BLOQUEADO):
+                        campo[vecino] = pasos
+                        pendientes.append(vecino)
+
+        self._campos[(x, y)] = campo
+        if len(self._campos) > self.max_campos:
+            self._campos.popitem(last=False)
+        return campo
+
+    def componentes(self):
+        """Componente conexa de cada casilla (se calcula una vez).
+
+        Un flood fill (BFS) etiqueta las casillas transitables: dos
+        casillas tienen la misma etiqueta si hay un camino entre ellas.
+        El resultado se guarda en la caché en disco (ver cache_disco.py).
+
+        Returns:
+            list[int]: Etiqueta por casilla (posición ``y * ancho + x``),
+            -1 en los edificios.
+        """
+        if self._componentes is not None:
+            return self._componentes
+        guardado = cache_disco.cargar(self.huella, 'componentes',
+                                      VERSION_COMPONENTES)
+        if guardado is not None:
+            self._etiquetas = guardado['etiquetas']
+            self._componentes = self._etiquetas.tolist()
+            self._mayor = int(guardado['mayor'])
+            return self._componentes
+
+        ancho, alto = self.ancho, self.alto
+        transitable = (self.base != BLOQUEADO).ravel().tolist()
+        etiquetas = [-1] * (ancho * alto)
+        tamanos = []
+        for inicio in range(ancho * alto):
+            if not transitable[inicio] or etiquetas[inicio] >= 0:
+                continue
+            etiqueta = len(tamanos)
+            etiquetas[inicio] = etiqueta
+            pendientes = [inicio]
+            tamano = 0
+            while pendientes:
+                actual = pendientes.pop()
+                tamano += 1
+                cx = actual % ancho
+                for vecino, valido in ((actual - ancho, actual >= ancho),
+                                       (actual + ancho,
+                                        actual < ancho * (alto - 1)),
+                                       (actual - 1, cx > 0),
+                                       (actual + 1, cx < ancho - 1)):
+                    if (valido and etiquetas[vecino] < 0
+                            and transitable[vecino]):
+                        etiquetas[vecino] = etiqueta
+                        pendientes.append(vecino)
+            tamanos.append(tamano)
+
+        self._componentes = etiquetas
+        self._etiquetas = np.array(etiquetas, dtype=np.int32)
+        if tamanos:
+            self._mayor = max(range(len(tamanos)), key=tamanos.__getitem__)
+        cache_disco.guardar(self.huella, 'componentes', VERSION_COMPONENTES,
+                            etiquetas=self._etiquetas,
+                            mayor=np.array(self._mayor))
+        return etiquetas
+
+    def mascara_libres(self, alcanzable_desde=None):
+        """Casillas transitables como máscara NumPy.
+
+        Sirve para elegir casillas con ``np.flatnonzero`` sin recorrer
+        el mapa casilla por casilla (ver pedidos.py).
+
+        Args:
+            alcanzable_desde (tuple[int, int] | None): Si se da, solo las
+                casillas de la componente de los repartidores que parten
+                de ahí (ver `componente_principal`).
+
+        Returns:
+            numpy.ndarray: Matriz alto x ancho de bool. Es una copia: se
+            puede modificar.
+        """
+        etiqueta = None
+        if alcanzable_desde is not None:
+            etiqueta = self.componente_principal(*alcanzable_desde)
+        mascara = self._libres.get(etiqueta)
+        if mascara is None:
+            if etiqueta is None:
+                mascara = self.base != BLOQUEADO
+            else:
+                mascara = (self._etiquetas == etiqueta).reshape(
+                    self.alto, self.ancho) & (etiqueta >= 0)
+            if len(self._libres) >= 4:
+                self._libres.clear()
+            self._libres[etiqueta] = mascara
+        return mascara.copy()
+
+    def componente(self, x, y):
+        """Etiqueta de la componente de una casilla.
+
+        Args:
+            x (int): Columna de la casilla.
+            y (int): Fila de la casilla.
+
+        Returns:
+            int: Etiqueta, o -1 si es un edificio o está fuera del mapa.
+        """
+        if not (0 <= x < self.ancho and 0 <= y < self.alto):
+            return -1
+        return self.componentes()[y * self.ancho + x]
+
+    def componente_principal(self, x, y):
+        """Componente de los repartidores que parten de una casilla.
+
+        Si la casilla no es transitable se usa la componente más grande.
+
+        Args:
+            x (int): Columna de la casilla.
+            y (int): Fila de la casilla.
+
+        Returns:
+            int: Etiqueta de la componente (-1 si el mapa no tiene
+            casillas transitables).
+        """
+        self.componentes()  # Calcula `_mayor` si hace falta
+        etiqueta = self.componente(x, y)
+        return etiqueta if etiqueta >= 0 else self._mayor
+
+    def conectadas(self, origen, destino):
+        """Indica en O(1) si hay un camino entre dos casillas.
+
+        Un repartidor parado sobre un edificio puede salir a una casilla
+        vecina, así que en ese caso cuentan las componentes de los vecinos.
+
+        Args:
+            origen (tuple[int, int]): Casilla de salida.
+            destino (tuple[int, int]): Casilla de llegada.
+
+        Returns:
+            bool: True si el destino es transitable y está en la misma
+            componente que el origen.
+        """
+        etiqueta = self.componente(*destino)
+        if etiqueta < 0:
+            return False
+        x, y = origen
+        if self.componente(x, y) >= 0:
+            return self.componente(x, y) == etiqueta
+        return etiqueta in (self.componente(x - 1, y),
+                            self.componente(x + 1, y),
+                            self.componente(x, y - 1),
+                            self.componente(x, y + 1))
+
+
+_grillas = {}  # id(mapa) -> (mapa, GrillaCostos)
+
+
+def obtener_grilla(mapa):
+    """Devuelve la grilla de costos compartida de un mapa.
+
+    Todos los jugadores que usan el mismo mapa comparten la misma
+    grilla y por lo tanto su caché.
+
+    Args:
+        mapa (list[list[str]]): Matriz del mapa.
+
+    Returns:
+        GrillaCostos: Grilla asociada al mapa.
+    """
+    entrada = _grillas.get(id(mapa))
+    if entrada is None or entrada[0] is not mapa:
+        if len(_grillas) >= 4:
+            _grillas.clear()
+        entrada = (mapa, GrillaCostos(mapa))
+        _grillas[id(mapa)] = entrada
+    return entrada[1]
+
+
+def registrar_grilla(mapa, grilla):
+    """Asocia una grilla ya armada a un mapa.
+
+    Args:
+        mapa (list[list[str]]): Matriz del mapa.
+        grilla (GrillaCostos): Grilla que devolverá `obtener_grilla`.
+    """
+    if len(_grillas) >= 4:
+        _grillas.clear()
+    _grillas[id(mapa)] = (mapa, grilla)
@@ -0,0 +1,280 @@
+"""
+dibujo.py.
+
+Dibuja los elementos del juego que están sobre el
+mapa (pedidos, puntos de entrega, repartidores) y
+el HUD. Las funciones reciben todo lo que dibujan
+como parámetros, así Main.py y el benchmark de
+renderizado usan exactamente el mismo código.
+"""
+
+from recursos import gestor as gestor_compartido
+
+TINTE_CPU = (255, 100, 100, 128)  # Tinte rojo de los sprites del CPU
+TAMANO_LEYENDA = 26  # Lado en píxeles de los íconos de la leyenda
+BLANCO = (255, 255, 255)
+
+# Archivos de assets/ que usa el juego (los del menú no están acá)
+SPRITE_REPARTIDOR = "repartidor.png"
+SPRITE_PICKUP = "pedido_pickup.png"
+SPRITE_DROPOFF_NORMAL = "pedido_dropoff_normal.png"
+SPRITE_DROPOFF_PRIORIDAD = "pedido_dropoff_prioridad.png"
+ARCHIVOS_TILES = {"C": "Calle.jpg", "P": "Parque.jpg", "B": "Edificio.jpg"}
+ARCHIVOS_JUEGO = [SPRITE_REPARTIDOR, SPRITE_PICKUP, SPRITE_DROPOFF_NORMAL,
+                  SPRITE_DROPOFF_PRIORIDAD, *ARCHIVOS_TILES.values()]
+
+
+def cargar_imagenes(tile_size, gestor=None):
+    """Prepara todas las imágenes del juego para un tamaño de casilla.
+
+    Requiere que la ventana ya exista (``pygame.display.set_mode``),
+    porque las imágenes se convierten al formato de la pantalla. Si el
+    gestor ya leyó los archivos en segundo plano
+    (``gestor.precargar(ARCHIVOS_JUEGO)``) no se vuelve a tocar el disco.
+
+    Los sprites con transparencia (repartidores, pedidos y los íconos de
+    la leyenda) se empaquetan en un atlas; las casillas quedan como
+    superficies opacas aparte, que son más rápidas de copiar.
+
+    Args:
+        tile_size (int): Tamaño en píxeles de cada casilla.
+        gestor (GestorRecursos | None): Gestor a usar. Por defecto el
+            compartido de recursos.py.
+
+    Returns:
+        dict: Superficies por nombre ('jugador', 'jugador_flip', 'cpu',
+        'cpu_flip', 'pickup', 'dropoff_normal', 'dropoff_prioridad', sus
+        versiones '_cpu', 'leyenda_normal', 'leyenda_prioridad' y 'tiles'
+        con las imágenes de "C", "P" y "B").
+    """
+    gestor = gestor or gestor_compartido
+    claves = {
+        'jugador': (SPRITE_REPARTIDOR, tile_size),
+        'jugador_flip': (SPRITE_REPARTIDOR, tile_size, None, True),
+        'cpu': (SPRITE_REPARTIDOR, tile_size, TINTE_CPU),
+        'cpu_flip': (SPRITE_REPARTIDOR, tile_size, TINTE_CPU, True),
+        'pickup': (SPRITE_PICKUP, tile_size),
+        'dropoff_normal': (SPRITE_DROPOFF_NORMAL, tile_size),
+        'dropoff_prioridad': (SPRITE_DROPOFF_PRIORIDAD, tile_size),
+        'dropoff_normal_cpu': (SPRITE_DROPOFF_NORMAL, tile_size, TINTE_CPU),
+        'dropoff_prioridad_cpu': (SPRITE_DROPOFF_PRIORIDAD, tile_size,
+                                  TINTE_CPU),
+        'leyenda_normal': (SPRITE_DROPOFF_NORMAL, TAMANO_LEYENDA),
+        'leyenda_prioridad': (SPRITE_DROPOFF_PRIORIDAD, TAMANO_LEYENDA)
+    }
+    gestor.empaquetar(list(claves.values()))
+    imagenes = {nombre: gestor.obtener(*clave)
+                for nombre, clave in claves.items()}
+    imagenes['tiles'] = {tile: gestor.obtener(archivo, tile_size)
+                         for tile, archivo in ARCHIVOS_TILES.items()}
+    return imagenes
+
+
+def _dibujar_dropoffs(screen, inventario, imagen_normal, imagen_prioridad,
+                      cam_x, cam_y, tile_size, view_width, view_height):
+    """Dibuja los puntos de entrega visibles de un inventario.
+
+    Recorre las casillas de entrega distintas, no cada pedido.
+    """
+    for (dx, dy), pedido in inventario.puntos_entrega():
+        if (cam_x <= dx < cam_x + view_width and
+                cam_y <= dy < cam_y + view_height):
+            if pedido.priority >= 1:  # Si es prioridad maxima
+                imagen_dropoff = imagen_prioridad
+            else:
+                imagen_dropoff = imagen_normal
+
+            screen.blit(imagen_dropoff, ((dx - cam_x) * tile_size,
+                                         (dy - cam_y) * tile_size))
+
+
+def dibujar_pedidos(screen, imagenes, pedidos_activos, jugador,
+                    jugadores_cpu, cam_x, cam_y, tile_size,
+                    view_width, view_height):
+    """Dibuja los pickups, la leyenda y los dropoffs de los inventarios.
+
+    Args:
+        screen (pygame.Surface): Superficie de destino.
+        imagenes (dict): Imágenes de `cargar_imagenes`.
+        pedidos_activos (list[Pedido]): Pedidos sin recoger.
+        jugador (Jugador): Jugador humano.
+        jugadores_cpu (list[JugadorCPU]): CPU rivales.
+        cam_x (int): Primera columna visible.
+        cam_y (int): Primera fila visible.
+        tile_size (int): Tamaño en píxeles de cada casilla.
+        view_width (int): Columnas visibles.
+        view_height (int): Filas visibles.
+    """
+    # Pedidos activos (pickups)
+    for pedido in pedidos_activos:
+        px, py = pedido.pickup
+        if (cam_x <= px < cam_x + view_width and
+                cam_y <= py < cam_y + view_height):
+            screen.blit(imagenes['pickup'],
+                        ((px - cam_x) * tile_size,
+                         (py - cam_y) * tile_size))
+
+    # --- Leyenda de prioridades arriba a la izquierda ---
+    # Íconos y textos vienen ya escalados y renderizados del gestor
+    screen.blit(imagenes['leyenda_prioridad'], (5, 5))
+    screen.blit(gestor_compartido.texto("Prioridad máxima", 26, BLANCO),
+                (35, 10))
+    screen.blit(imagenes['leyenda_normal'], (5, 30))
+    screen.blit(gestor_compartido.texto("Prioridad normal", 26, BLANCO),
+                (35, 40))
+
+    # Dropoffs del inventario del jugador y de los CPU
+    _dibujar_dropoffs(screen, jugador.inventario, imagenes['dropoff_normal'],
+                      imagenes['dropoff_prioridad'], cam_x, cam_y,
+                      tile_size, view_width, view_height)
+    for jugador_cpu in jugadores_cpu:
+        _dibujar_dropoffs(screen, jugador_cpu.inventario,
+                          imagenes['dropoff_normal_cpu'],
+                          imagenes['dropoff_prioridad_cpu'], cam_x, cam_y,
+                          tile_size, view_width, view_height)
+
+
+def dibujar_repartidores(screen, imagenes, jugador, direccion_der,
+                         jugadores_cpu, direccion_cpu, pos_x_anterior_cpu,
+                         cam_x, cam_y, tile_size, view_width, view_height):
+    """Dibuja al jugador y a los CPU mirando hacia donde se mueven.
+
+    Actualiza ``direccion_cpu`` y ``pos_x_anterior_cpu`` en su lugar.
+
+    Args:
+        screen (pygame.Surface): Superficie de destino.
+        imagenes (dict): Imágenes de `cargar_imagenes`.
+        jugador (Jugador): Jugador humano.
+        direccion_der (bool): Si el jugador mira a la derecha.
+        jugadores_cpu (list[JugadorCPU]): CPU rivales.
+        direccion_cpu (list[int]): Dirección de cada CPU (1 o -1).
+        pos_x_anterior_cpu (list[int]): Última columna de cada CPU.
+        cam_x (int): Primera columna visible.
+        cam_y (int): Primera fila visible.
+        tile_size (int): Tamaño en píxeles de cada casilla.
+        view_width (int): Columnas visibles.
+        view_height (int): Filas visibles.
+    """
+    # ---Cambia la direccion del jugador ---
+    imagen_jugador = (imagenes['jugador'] if direccion_der
+                      else imagenes['jugador_flip'])
+    screen.blit(imagen_jugador, ((jugador.x - cam_x) * tile_size,
+                                 (jugador.y - cam_y) * tile_size))
+
+    for i, jugador_cpu in enumerate(jugadores_cpu):
+        cpu_cam_x = jugador_cpu.x - cam_x
+        cpu_cam_y = jugador_cpu.y - cam_y
+
+        # Detectar movimiento del CPU
+        if jugador_cpu.x < pos_x_anterior_cpu[i]:
+            direccion_cpu[i] = -1  # Izquierda
+        elif jugador_cpu.x > pos_x_anterior_cpu[i]:
+            direccion_cpu[i] = 1  # Derecha
+
+        # Elegir imagen según dirección
+        if direccion_cpu[i] == -1:
+            imagen_actual_cpu = imagenes['cpu_flip']
+        else:
+            imagen_actual_cpu = imagenes['cpu']
+
+        # Solo dibujar si está visible
+        if 0 <= cpu_cam_x < view_width and 0 <= cpu_cam_y < view_height:
+            screen.blit(imagen_actual_cpu,
+                        (cpu_cam_x * tile_size, cpu_cam_y * tile_size))
+
+        # Actualizar posición anterior
+        pos_x_anterior_cpu[i] = jugador_cpu.x
+
+
+def dibujar_hud(screen, jugador, jugadores_cpu, sistema_clima,
+                meta_ingresos, mostrar_estadisticas=False,
+                entregas_por_minuto=0.0):
+    """Dibuja el HUD: clima, meta, inventario, estado y CPU.
+
+    Args:
+        screen (pygame.Surface): Superficie de destino.
+        jugador (Jugador): Jugador humano.
+        jugadores_cpu (list[JugadorCPU]): CPU rivales.
+        sistema_clima (SistemaClima): Clima actual.
+        meta_ingresos (int): Dinero necesario para ganar.
+        mostrar_estadisticas (bool): Mostrar las estadísticas del jugador.
+        entregas_por_minuto (float): Rendimiento de la flota de CPU.
+    """
+    font = gestor_compartido.fuente(24)
+    font_small = gestor_compartido.fuente(18)
+
+    # --- Información del clima ---
+    info_clima = sistema_clima.obtener_info_clima()
+    clima_texto = sistema_clima.traducir_clima(info_clima['estado'])
+    clima_color = (255, 255, 255)
+
+    if info_clima['estado'] in ['storm', 'rain']:
+        clima_color = (255, 100, 100)
+    elif info_clima['estado'] in ['heat', 'cold']:
+        clima_color = (255, 200, 100)
+
+    screen.blit(font.render(
+        f"Clima: {clima_texto}", True,
+        clima_color), (10, 70))
+    screen.blit(font_small.render(
+        f"Intensidad: {info_clima['intensidad']:.1f}",
+        True, (200, 200, 200)), (10, 95))
+
+    # --- Meta de ingresos ---
+    progreso_meta = (jugador.puntaje / meta_ingresos) * 100
+    meta_texto = (f"Meta: ${jugador.puntaje}/${meta_ingresos}"
+                  f" ({progreso_meta:.1f}%)")
+    color_meta = (0, 255, 0) if progreso_meta >= 100 else (255, 255, 255)
+    screen.blit(font.render(meta_texto, True, color_meta), (10, 120))
+
+    # --- Inventario resumen ---
+    inventario_texto = \
+        (f"Inventario: {len(jugador.inventario)}/"
+         f"{jugador.capacidad} (Peso: {jugador.peso_total()})")
+    screen.blit(font.render(
+        inventario_texto, True, (255, 255, 255)),
+        (10, 145))
+
+    # --- Estado del jugador ---
+    estado_resistencia = jugador.obtener_estado_resistencia()
+    color_estado = (255, 255, 255)
+    if estado_resistencia == "Exhausto":
+        color_estado = (255, 0, 0)
+    elif estado_resistencia == "Cansado":
+        color_estado = (255, 255, 0)
+
+    screen.blit(font_small.render(
+        f"Estado: {estado_resistencia}", True, color_estado),
+        (10, 170))
+
+    # --- Info del CPU ---
+    if len(jugadores_cpu) == 1:
+        jugador_cpu = jugadores_cpu[0]
+        cpu_info = (f"CPU: ${jugador_cpu.puntaje} | "
+                    f"Rep: {jugador_cpu.reputacion} | "
+                    f"Entregas: {jugador_cpu.entregas_completadas}")
+        screen.blit(font_small.render(cpu_info, True,
+                                      (255, 150, 50)), (10, 195))
+    elif jugadores_cpu:
+        # Con varios CPU se resume: el líder y el total de entregas
+        lider = max(jugadores_cpu, key=lambda cpu: cpu.puntaje)
+        entregas = sum(cpu.entregas_completadas for cpu in jugadores_cpu)
+        cpu_info = (f"CPUs: {len(jugadores_cpu)} | "
+                    f"Líder: ${lider.puntaje} | "
+                    f"Entregas: {entregas} "
+                    f"({entregas_por_minuto:.1f}/min)")
+        screen.blit(font_small.render(cpu_info, True,
+                                      (255, 150, 50)), (10, 195))
+
+    # --- Mostrar estadísticas ---
+    if mostrar_estadisticas:
+        estadisticas = jugador.obtener_estadisticas()
+        y = 220  # Ajustado para dar espacio al CPU
+        font_estad = gestor_compartido.fuente(22)
+        for clave, valor in estadisticas.items():
+            texto = (f"{clave.replace('_', ' ').capitalize()}:"
+                     f" {valor:.2f}") if isinstance(valor, float) \
+                else f"{clave.replace('_', ' ').capitalize()}: {valor}"
+            texto_render = font_estad.render(texto, True, (0, 0, 0))
+            screen.blit(texto_render, (10, y))
+            y += 25
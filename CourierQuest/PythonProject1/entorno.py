@@ -0,0 +1,471 @@
+"""
+entorno.py.
+
+Entorno vectorizado para entrenar y evaluar repartidores
+automáticos (una política aprendida para el CPU). Corre
+K partidas independientes a la vez, paso a paso y todas
+juntas, con las reglas del juego:
+
+- movimiento y consumo de resistencia de Jugador.mover,
+  recuperación de Jugador.recuperar,
+- recogidas por capacidad y entregas por prioridad (el
+  inventario y entregas.py),
+- reputación, pago, bonos y rachas de
+  Jugador.entregar_pedido,
+- clima con la cadena de Markov de SistemaClima,
+- pedidos que aparecen cada 5 s hasta un máximo en el
+  mapa, como en Main.
+
+El estado de todas las partidas está en arreglos de
+NumPy (posiciones, resistencia, pesos, tabla de pedidos)
+y cada paso se calcula con operaciones sobre arreglos,
+sin recorrer las partidas una por una. La API sigue la
+convención de gym: `reset()` devuelve las observaciones
+y `step(acciones)` devuelve observaciones, recompensas,
+terminados, truncados e información; las partidas que
+terminan se reinician solas.
+
+Simplificaciones frente al juego: los cambios de clima
+no tienen los 3 s de transición suave y los pedidos
+nuevos se ubican en cualquier casilla transitable de la
+zona conexa más grande, sin la separación mínima de
+asignar_posicion_aleatoria.
+"""
+
+import numpy as np
+from costos import obtener_grilla
+
+# Acción -> (dx, dy): quieto, arriba, abajo, izquierda, derecha
+ACCIONES = np.array([(0, 0), (0, -1), (0, 1), (-1, 0), (1, 0)],
+                    dtype=np.int32)
+
+SEGUNDOS_POR_PASO = 1 / 8  # Un movimiento del CPU (8 por segundo)
+CAPACIDAD = 10
+MAX_PEDIDOS_MAPA = 5  # Pedidos sin recoger a la vez (como Main)
+INTERVALO_LIBERAR = 5  # Segundos entre pedidos nuevos
+DURACION = 10 * 60
+META_INGRESOS = 5500
+RADIO_VISTA = 2  # Vista local de (2 * radio + 1)^2 casillas
+
+PESOS_PEDIDO = np.array([1, 2, 3])
+PAGO_MINIMO = 80
+PAGO_MAXIMO = 300
+
+# Estados de una fila de la tabla de pedidos
+LIBRE, EN_MAPA, EN_INVENTARIO = 0, 1, 2
+
+DATOS_REPARTIDOR = 10  # Valores del repartidor al inicio de la observación
+DATOS_PEDIDO = 7  # Valores por fila de la tabla de pedidos
+
+
+class EntornoVectorizado:
+    """K partidas de un repartidor que avanzan juntas.
+
+    Attributes:
+        cantidad (int): Partidas en paralelo (K).
+        filas_pedidos (int): Filas de la tabla de pedidos de cada
+            partida (en el mapa + en el inventario).
+        dim_observacion (int): Largo del vector de observación.
+        n_acciones (int): Acciones posibles (ver ACCIONES).
+        pasos_totales (int): Pasos dados por todas las partidas.
+    """
+
+    def __init__(self, tiles, clima, cantidad=256, duracion=DURACION,
+                 meta=META_INGRESOS, semilla=None):
+        """Crea el entorno (hay que llamar a `reset` antes de `step`).
+
+        Args:
+            tiles (list[list[str]]): Mapa del juego.
+            clima (SistemaClima): De donde salen la cadena de Markov,
+                los multiplicadores y el consumo de cada clima.
+            cantidad (int): Partidas en paralelo.
+            duracion (float): Segundos de juego de cada partida.
+            meta (float): Ingresos con los que se gana.
+            semilla (int | None): Semilla del generador de NumPy.
+        """
+        self.cantidad = cantidad
+        self.duracion = duracion
+        self.meta = meta
+        self.rng = np.random.default_rng(semilla)
+
+        # --- Mapa ---
+        self.alto, self.ancho = len(tiles), len(tiles[0])
+        transitable = np.array([[c != "B" for c in fila] for fila in tiles])
+        self._transitable = transitable
+        # Repartidores y pedidos solo en la zona conexa más grande, así
+        # ningún pedido queda encerrado donde no se puede llegar
+        grilla = obtener_grilla(tiles)
+        etiquetas = np.array(grilla.componentes()).reshape(self.alto,
+                                                           self.ancho)
+        libres_y, libres_x = np.nonzero(
+            etiquetas == grilla.componente_principal(-1, -1))
+        self._libres = np.stack([libres_x, libres_y], axis=1).astype(np.int32)
+        # Mapa con borde bloqueado para la vista local
+        r = RADIO_VISTA
+        self._vista_mapa = np.ones((self.alto + 2 * r, self.ancho + 2 * r),
+                                   dtype=np.float32)
+        self._vista_mapa[r:-r, r:-r] = ~transitable
+        desp = np.arange(-r, r + 1)
+        self._vista_dy = np.repeat(desp, 2 * r + 1)
+        self._vista_dx = np.tile(desp, 2 * r + 1)
+
+        # --- Clima ---
+        estados, matriz = clima.matriz_numpy()
+        self._clima_acumulada = np.cumsum(matriz, axis=1)
+        self._clima_acumulada[:, -1] = 1.0
+        self._clima_mult = np.array(
+            [clima.multiplicadores.get(e, 1.0) for e in estados])
+        self._clima_consumo = np.array(
+            [clima.consumo_resistencia.get(e, 0.0) for e in estados])
+        self._clima_inicial = (estados.index(clima.estado_actual)
+                               if clima.estado_actual in estados else 0)
+        self._intensidad_inicial = clima.intensidad_actual
+
+        # --- Tamaños ---
+        self.filas_pedidos = MAX_PEDIDOS_MAPA + CAPACIDAD
+        self.n_acciones = len(ACCIONES)
+        self.dim_observacion = (DATOS_REPARTIDOR
+                                + DATOS_PEDIDO * self.filas_pedidos
+                                + (2 * RADIO_VISTA + 1) ** 2)
+        self.pasos_totales = 0
+        self._crear_arreglos()
+
+    def _crear_arreglos(self):
+        """Reserva los arreglos del estado de todas las partidas."""
+        k, n = self.cantidad, self.filas_pedidos
+        # Repartidor (uno por partida)
+        self.x = np.zeros(k, dtype=np.int32)
+        self.y = np.zeros(k, dtype=np.int32)
+        self.resistencia = np.zeros(k)
+        self.peso = np.zeros(k, dtype=np.int32)
+        self.reputacion = np.zeros(k)
+        self.puntaje = np.zeros(k)
+        self.bloqueado = np.zeros(k, dtype=bool)
+        self.ultimo_recupero = np.zeros(k)
+        self.racha = np.zeros(k, dtype=np.int32)
+        self.entregas = np.zeros(k, dtype=np.int32)
+        self.tiempo = np.zeros(k)
+        self._contador = np.zeros(k, dtype=np.int64)  # Orden de recogida
+        self._proximo_pedido = np.zeros(k)
+        # Clima (uno por partida)
+        self.clima_estado = np.zeros(k, dtype=np.int64)
+        self.clima_intensidad = np.zeros(k)
+        self._fin_segmento = np.zeros(k)
+        # Tabla de pedidos (partida x fila)
+        self.estado_pedido = np.zeros((k, n), dtype=np.int8)
+        self.pickup_x = np.zeros((k, n), dtype=np.int32)
+        self.pickup_y = np.zeros((k, n), dtype=np.int32)
+        self.dropoff_x = np.zeros((k, n), dtype=np.int32)
+        self.dropoff_y = np.zeros((k, n), dtype=np.int32)
+        self.peso_pedido = np.zeros((k, n), dtype=np.int32)
+        self.prioridad = np.zeros((k, n), dtype=np.int32)
+        self.pago = np.zeros((k, n))
+        self.recogido = np.zeros((k, n))
+        self.orden = np.zeros((k, n), dtype=np.int64)
+        self._filas = np.arange(k)
+
+    # ========================================
+    # API (convención gym)
+    # ========================================
+
+    def reset(self):
+        """Reinicia todas las partidas.
+
+        Returns:
+            numpy.ndarray: Observaciones (cantidad x dim_observacion).
+        """
+        self._reiniciar(np.ones(self.cantidad, dtype=bool))
+        return self._observar()
+
+    def step(self, acciones):
+        """Avanza un paso (1/8 s de juego) en todas las partidas.
+
+        Args:
+            acciones (numpy.ndarray): Una acción (índice de ACCIONES)
+                por partida.
+
+        Returns:
+            tuple: (observaciones, recompensas, terminados, truncados,
+            info). La recompensa es el dinero ganado en el paso;
+            terminado indica victoria (meta) o derrota (reputación
+            <= 20) y truncado que se acabó el tiempo. `info` trae
+            'ganado', 'puntaje' y 'entregas' de las partidas que
+            terminaron en este paso, antes de reiniciarlas.
+        """
+        acciones = np.asarray(acciones)
+        if acciones.shape != (self.cantidad,):
+            raise ValueError(f"Se esperaban {self.cantidad} acciones")
+
+        self.tiempo += SEGUNDOS_POR_PASO
+        self._avanzar_clima()
+        self._recuperar()
+        self._mover(acciones)
+        recompensas = self._recoger_y_entregar()
+        self._liberar_pedidos()
+        self.pasos_totales += self.cantidad
+
+        ganado = self.puntaje >= self.meta
+        terminados = ganado | (self.reputacion <= 20)
+        truncados = ~terminados & (self.tiempo >= self.duracion)
+        fin = terminados | truncados
+        info = {}
+        if fin.any():
+            info = {'ganado': ganado & fin,
+                    'puntaje': np.where(fin, self.puntaje, 0.0),
+                    'entregas': np.where(fin, self.entregas, 0)}
+            self._reiniciar(fin)
+        return self._observar(), recompensas, terminados, truncados, info
+
+    # ========================================
+    # REGLAS
+    # ========================================
+
+    def _reiniciar(self, mascara):
+        """Empieza de cero las partidas marcadas.
+
+        Args:
+            mascara (numpy.ndarray): Partidas a reiniciar.
+        """
+        cuantas = int(mascara.sum())
+        inicio = self._libres[self.rng.integers(len(self._libres),
+                                                size=cuantas)]
+        self.x[mascara] = inicio[:, 0]
+        self.y[mascara] = inicio[:, 1]
+        self.resistencia[mascara] = 100
+        self.peso[mascara] = 0
+        self.reputacion[mascara] = 70
+        self.puntaje[mascara] = 0
+        self.bloqueado[mascara] = False
+        self.ultimo_recupero[mascara] = 0
+        self.racha[mascara] = 0
+        self.entregas[mascara] = 0
+        self.tiempo[mascara] = 0
+        self._contador[mascara] = 0
+        self._proximo_pedido[mascara] = 0  # El primero sale enseguida
+        self.clima_estado[mascara] = self._clima_inicial
+        self.clima_intensidad[mascara] = self._intensidad_inicial
+        self._fin_segmento[mascara] = self.rng.integers(45, 91, size=cuantas)
+        self.estado_pedido[mascara] = LIBRE
+
+    def _avanzar_clima(self):
+        """Sortea el clima siguiente en las partidas cuyo segmento terminó."""
+        cambio = self.tiempo >= self._fin_segmento
+        if not cambio.any():
+            return
+        cuantas = int(cambio.sum())
+        filas = self._clima_acumulada[self.clima_estado[cambio]]
+        sorteo = self.rng.random(cuantas)[:, None]
+        self.clima_estado[cambio] = (sorteo >= filas).sum(axis=1)
+        self.clima_intensidad[cambio] = self.rng.uniform(0.2, 1.0, cuantas)
+        self._fin_segmento[cambio] += self.rng.integers(45, 91, size=cuantas)
+
+    def _clima_actual(self):
+        """Multiplicador y consumo extra del clima de cada partida.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Ver
+            SistemaClima.multiplicador_efectivo y consumo_efectivo.
+        """
+        base = self._clima_mult[self.clima_estado]
+        intensidad = self.clima_intensidad
+        mult = base * (1.0 - 0.5 * intensidad * (1.0 - base))
+        consumo = self._clima_consumo[self.clima_estado] * (1.0 + intensidad)
+        return mult, consumo
+
+    def _recuperar(self):
+        """+5 de resistencia por segundo; se desbloquea al llegar a 30."""
+        toca = self.tiempo - self.ultimo_recupero >= 1
+        self.resistencia = np.where(
+            toca, np.minimum(100, self.resistencia + 5), self.resistencia)
+        self.ultimo_recupero = np.where(toca, self.tiempo,
+                                        self.ultimo_recupero)
+        self.bloqueado &= ~(toca & (self.resistencia >= 30))
+
+    def _mover(self, acciones):
+        """Mueve a los repartidores y descuenta la resistencia.
+
+        Args:
+            acciones (numpy.ndarray): Acción de cada partida.
+        """
+        paso = ACCIONES[acciones]
+        nx = self.x + paso[:, 0]
+        ny = self.y + paso[:, 1]
+        dentro = (nx >= 0) & (nx < self.ancho) & (ny >= 0) & (ny < self.alto)
+        nx_c = np.clip(nx, 0, self.ancho - 1)
+        ny_c = np.clip(ny, 0, self.alto - 1)
+        clima_mult, consumo_clima = self._clima_actual()
+        mueve = ((acciones != 0) & ~self.bloqueado & dentro
+                 & self._transitable[ny_c, nx_c]
+                 & (clima_mult > 0))
+
+        self.x = np.where(mueve, nx_c, self.x)
+        self.y = np.where(mueve, ny_c, self.y)
+        consumo = (0.5 + 0.2 * np.maximum(0, self.peso - 3) + consumo_clima)
+        self.resistencia = np.where(
+            mueve, np.maximum(0, self.resistencia - consumo),
+            self.resistencia)
+        agotado = mueve & (self.resistencia <= 0)
+        self.bloqueado |= agotado
+        self.ultimo_recupero = np.where(agotado, self.tiempo,
+                                        self.ultimo_recupero)
+
+    def _recoger_y_entregar(self):
+        """Recoge los pedidos de la casilla y entrega los que se puede.
+
+        Igual que CoordinadorPedidos.revisar: si entregó, vuelve a
+        intentar, porque se liberó espacio o puede quedar otro pedido
+        para esa casilla.
+
+        Returns:
+            numpy.ndarray: Dinero ganado en cada partida.
+        """
+        ganado = np.zeros(self.cantidad)
+        x, y = self.x[:, None], self.y[:, None]
+        while True:
+            # Recogidas (en orden de fila, si hay varias en la casilla)
+            en_pickup = ((self.estado_pedido == EN_MAPA)
+                         & (self.pickup_x == x) & (self.pickup_y == y))
+            for j in np.flatnonzero(en_pickup.any(axis=0)):
+                cabe = en_pickup[:, j] & (
+                    self.peso + self.peso_pedido[:, j] <= CAPACIDAD)
+                self.estado_pedido[cabe, j] = EN_INVENTARIO
+                self.peso[cabe] += self.peso_pedido[cabe, j]
+                self.recogido[cabe, j] = self.tiempo[cabe]
+                self.orden[cabe, j] = self._contador[cabe]
+                self._contador[cabe] += 1
+
+            # Entregas: solo un pedido de la mayor prioridad del inventario
+            inventario = self.estado_pedido == EN_INVENTARIO
+            maxima = np.where(inventario, self.prioridad, -1).max(axis=1)
+            entregable = (inventario & (self.dropoff_x == x)
+                          & (self.dropoff_y == y)
+                          & (self.prioridad == maxima[:, None]))
+            hay = entregable.any(axis=1)
+            if not hay.any():
+                return ganado
+            cual = np.where(entregable, self.orden,
+                            np.iinfo(np.int64).max).argmin(axis=1)
+            ganado += self._entregar(hay, cual)
+
+    def _entregar(self, hay, cual):
+        """Aplica reputación, pago, bono y racha de una entrega.
+
+        Args:
+            hay (numpy.ndarray): Partidas que entregan.
+            cual (numpy.ndarray): Fila del pedido entregado en cada una.
+
+        Returns:
+            numpy.ndarray: Dinero ganado en cada partida.
+        """
+        filas = self._filas[hay]
+        j = cual[hay]
+        self.estado_pedido[filas, j] = LIBRE
+        self.peso[filas] -= self.peso_pedido[filas, j]
+        demora = self.tiempo[filas] - self.recogido[filas, j]
+
+        # Reputación según la demora (ver Jugador.entregar_pedido)
+        cambio = np.select(
+            [demora <= 16, demora <= 20, demora <= 50, demora <= 140],
+            [5, 3, -2, -5], default=-10)
+        reputacion = np.clip(self.reputacion[filas] + cambio, 0, 100)
+
+        pago = self.pago[filas, j]
+        bono = np.where(reputacion >= 90, np.floor(pago * 0.05), 0)
+        self.puntaje[filas] += pago + bono
+        self.entregas[filas] += 1
+
+        # Racha: +2 de reputación cada 3 entregas puntuales seguidas
+        puntual = demora <= 20
+        racha = np.where(puntual, self.racha[filas] + 1, 0)
+        completa = racha >= 3
+        reputacion = np.where(completa, np.minimum(100, reputacion + 2),
+                              reputacion)
+        self.racha[filas] = np.where(completa, 0, racha)
+        self.reputacion[filas] = reputacion
+
+        ganado = np.zeros(self.cantidad)
+        ganado[filas] = pago + bono
+        return ganado
+
+    def _liberar_pedidos(self):
+        """Pone un pedido nuevo cada INTERVALO_LIBERAR s si hay lugar."""
+        en_mapa = (self.estado_pedido == EN_MAPA).sum(axis=1)
+        libre = self.estado_pedido == LIBRE
+        toca = ((self.tiempo >= self._proximo_pedido)
+                & (en_mapa < MAX_PEDIDOS_MAPA) & libre.any(axis=1))
+        if not toca.any():
+            return
+        filas = self._filas[toca]
+        j = libre[toca].argmax(axis=1)
+        cuantas = len(filas)
+        total = len(self._libres)
+        a = self.rng.integers(total, size=cuantas)
+        b = (a + self.rng.integers(1, total, size=cuantas)) % total
+        prioridad = self.rng.integers(0, 2, size=cuantas)
+
+        self.estado_pedido[filas, j] = EN_MAPA
+        self.pickup_x[filas, j] = self._libres[a, 0]
+        self.pickup_y[filas, j] = self._libres[a, 1]
+        self.dropoff_x[filas, j] = self._libres[b, 0]
+        self.dropoff_y[filas, j] = self._libres[b, 1]
+        self.peso_pedido[filas, j] = self.rng.choice(PESOS_PEDIDO, cuantas)
+        self.prioridad[filas, j] = prioridad
+        self.pago[filas, j] = self.rng.integers(
+            PAGO_MINIMO, PAGO_MAXIMO + 1, size=cuantas) + 50 * prioridad
+        self._proximo_pedido[filas] = self.tiempo[filas] + INTERVALO_LIBERAR
+
+    # ========================================
+    # OBSERVACIONES
+    # ========================================
+
+    def _observar(self):
+        """Arma el tensor de observaciones de todas las partidas.
+
+        Por partida, en este orden:
+
+        - repartidor: x, y, resistencia, peso, reputación, bloqueado,
+          multiplicador y consumo del clima, tiempo y puntaje
+          (normalizados),
+        - por fila de la tabla de pedidos: en el mapa, en el inventario,
+          distancia en x e y a su objetivo (pickup si está en el mapa,
+          dropoff si está en el inventario), peso, prioridad y pago,
+        - la vista local: 1 donde hay edificio o borde.
+
+        Returns:
+            numpy.ndarray: float32 de cantidad x dim_observacion.
+        """
+        k, n = self.cantidad, self.filas_pedidos
+        obs = np.empty((k, self.dim_observacion), dtype=np.float32)
+        clima_mult, consumo_clima = self._clima_actual()
+        for i, valor in enumerate((
+                self.x / self.ancho, self.y / self.alto,
+                self.resistencia / 100, self.peso / CAPACIDAD,
+                self.reputacion / 100, self.bloqueado, clima_mult,
+                consumo_clima, self.tiempo / self.duracion,
+                self.puntaje / self.meta)):
+            obs[:, i] = valor
+
+        # Vista (partida, fila, dato) sobre el mismo arreglo
+        pedidos = obs[:, DATOS_REPARTIDOR:DATOS_REPARTIDOR
+                      + DATOS_PEDIDO * n].reshape(k, n, DATOS_PEDIDO)
+        en_mapa = self.estado_pedido == EN_MAPA
+        activo = self.estado_pedido != LIBRE
+        pedidos[:, :, 0] = en_mapa
+        pedidos[:, :, 1] = self.estado_pedido == EN_INVENTARIO
+        objetivo_x = np.where(en_mapa, self.pickup_x, self.dropoff_x)
+        objetivo_y = np.where(en_mapa, self.pickup_y, self.dropoff_y)
+        np.multiply(objetivo_x - self.x[:, None], activo / self.ancho,
+                    out=pedidos[:, :, 2], casting='unsafe')
+        np.multiply(objetivo_y - self.y[:, None], activo / self.alto,
+                    out=pedidos[:, :, 3], casting='unsafe')
+        np.multiply(self.peso_pedido, activo / CAPACIDAD,
+                    out=pedidos[:, :, 4], casting='unsafe')
+        np.multiply(self.prioridad, activo, out=pedidos[:, :, 5],
+                    casting='unsafe')
+        np.multiply(self.pago, activo / PAGO_MAXIMO, out=pedidos[:, :, 6],
+                    casting='unsafe')
+
+        obs[:, DATOS_REPARTIDOR + DATOS_PEDIDO * n:] = self._vista_mapa[
+            self.y[:, None] + RADIO_VISTA + self._vista_dy,
+            self.x[:, None] + RADIO_VISTA + self._vista_dx]
+        return obs
@@ -0,0 +1,112 @@
+"""
+entregas.py.
+
+Recogidas y entregas por eventos. Antes el juego
+revisaba en cada cuadro todos los pedidos activos
+contra la casilla de cada repartidor, y cada CPU
+repetía lo mismo en su turno. Pero un repartidor solo
+puede recoger o entregar algo nuevo cuando cambia de
+casilla (o cuando se le libera espacio o cambia la
+prioridad de su inventario al cancelar).
+
+El CoordinadorPedidos se registra como observador de
+cada repartidor (ver `Jugador.agregar_observador`) y,
+cuando le avisan, busca los pickups de esa casilla en
+un diccionario por coordenada. Un cuadro sin
+movimientos no hace ningún trabajo con los pedidos.
+"""
+
+
+class CoordinadorPedidos:
+    """Resuelve recogidas y entregas cuando un repartidor se mueve.
+
+    Attributes:
+        pedidos_activos (list[Pedido]): Lista de pedidos sin recoger que
+            usa el resto del juego (se modifica en su lugar).
+        repartidores (list[Jugador]): Jugador y CPU, en el orden en que
+            se les ofrece un pedido nuevo que cae en su casilla.
+    """
+
+    def __init__(self, pedidos_activos, repartidores):
+        """Crea el coordinador y se suscribe a los repartidores.
+
+        Args:
+            pedidos_activos (list[Pedido]): Pedidos sin recoger.
+            repartidores (list[Jugador]): Jugador humano primero y
+                después los CPU.
+        """
+        self.pedidos_activos = pedidos_activos
+        self.repartidores = list(repartidores)
+        self._por_pickup = {}  # (x, y) -> pedidos con ese pickup
+        self.reindexar()
+        for repartidor in self.repartidores:
+            repartidor.agregar_observador(self.revisar)
+
+    def desconectar(self):
+        """Deja de observar a los repartidores (al reemplazar el coordinador)."""
+        for repartidor in self.repartidores:
+            if self.revisar in repartidor.observadores:
+                repartidor.observadores.remove(self.revisar)
+
+    def reindexar(self):
+        """Rehace el índice por pickup desde `pedidos_activos`.
+
+        Se llama cuando la lista cambió por fuera del coordinador
+        (deshacer, cargar partida).
+        """
+        self._por_pickup = {}
+        for pedido in self.pedidos_activos:
+            self._por_pickup.setdefault(tuple(pedido.pickup), []).append(
+                pedido)
+
+    def agregar(self, pedido):
+        """Activa un pedido y lo ofrece a quien ya esté en su pickup.
+
+        Args:
+            pedido (Pedido): Pedido liberado de la cola.
+        """
+        self.pedidos_activos.append(pedido)
+        casilla = tuple(pedido.pickup)
+        self._por_pickup.setdefault(casilla, []).append(pedido)
+        for repartidor in self.repartidores:
+            if (repartidor.x, repartidor.y) == casilla:
+                self.revisar(repartidor)
+                if pedido not in self._por_pickup.get(casilla, ()):
+                    break
+
+    def revisar_todos(self):
+        """Revisa la casilla de cada repartidor (tras cargar una partida)."""
+        for repartidor in self.repartidores:
+            self.revisar(repartidor)
+
+    def revisar(self, repartidor):
+        """Recoge y entrega lo que se pueda en la casilla del repartidor.
+
+        Es el observador que se registra en cada repartidor. Primero
+        recoge los pedidos de la casilla y después entrega; si entregó,
+        vuelve a intentar, porque se liberó espacio y puede haber otro
+        pedido de la misma prioridad para entregar ahí.
+
+        Args:
+            repartidor (Jugador): Repartidor que cambió de casilla o de
+                inventario.
+        """
+        casilla = (repartidor.x, repartidor.y)
+        while True:
+            for pedido in list(self._por_pickup.get(casilla, ())):
+                if repartidor.recoger_pedido(pedido):
+                    self._quitar(casilla, pedido)
+                    repartidor.al_recoger(pedido)
+
+            entregado = repartidor.entregar_pedido()
+            if not entregado:
+                return
+            repartidor.al_entregar(entregado)
+
+    def _quitar(self, casilla, pedido):
+        """Saca un pedido recogido de la lista y del índice."""
+        self.pedidos_activos.remove(pedido)
+        pedidos = self._por_pickup[casilla]
+        pedidos.remove(pedido)
+        if not pedidos:
+            del self._por_pickup[casilla]
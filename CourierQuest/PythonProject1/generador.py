@@ -0,0 +1,331 @@
+"""
+generador.py.
+
+Genera ciudades grandes con semilla para probar el
+rendimiento del mapa, las rutas y la ubicación de
+pedidos con entradas mucho más grandes que el
+ciudad.json de 5x3. Escribe los mismos formatos que
+la API: ciudad.json (tiles y legend), pedidos.json y
+clima.json, y con --binario también ciudad.cqm (ver
+mapa_binario.py).
+
+La ciudad es una cuadrícula de calles con manzanas de
+tamaño variable. Cada manzana puede ser edificio,
+parque o plaza abierta, y algunos tramos de calle se
+cierran. Con `conexo` se abren pasos desde las zonas
+encerradas hasta la zona principal, así se llega a
+todas las casillas transitables.
+
+Uso (desde PythonProject1):
+    python generador.py --ancho 2000 --alto 2000 --semilla 1 \\
+        --salida data/generado
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from costos import GrillaCostos
+from mapa_binario import guardar_mapa_binario
+
+LADO_MAXIMO = 2000
+CALLE, EDIFICIO, PARQUE = 0, 1, 2
+LETRAS = np.array(["C", "B", "P"])
+LEYENDA = {
+    "C": {"name": "calle", "surface_weight": 1.0},
+    "B": {"name": "edificio", "blocked": True},
+    "P": {"name": "parque", "surface_weight": 0.95},
+}
+CONDICIONES = ["clear", "clouds", "rain_light", "rain", "storm", "fog",
+               "wind", "heat", "cold"]
+INICIO_PEDIDOS = datetime(2025, 9, 1, 12, 0, 0)
+# Pago de los pedidos: 100 a 300, como en pedidos.json, para que la meta
+# de 5500 sirva en cualquier tamaño de mapa
+PAGO_MINIMO = 100
+PAGO_DISTANCIA = 120  # Para la distancia más larga posible del mapa
+PAGO_PESO = 10  # Por cada unidad de peso arriba de 1
+PAGO_PRIORIDAD = 20  # Por cada nivel de prioridad
+
+
+def _bandas(largo, manzana, calle, rng):
+    """Reparte un eje en calles y manzanas de tamaño variable.
+
+    Args:
+        largo (int): Casillas del eje.
+        manzana (int): Tamaño medio de una manzana.
+        calle (int): Ancho de las calles.
+        rng (np.random.Generator): Generador aleatorio.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Por casilla, si es calle y el
+        índice de la banda (manzana o calle) a la que pertenece.
+    """
+    es_calle = np.zeros(largo, dtype=bool)
+    banda = np.zeros(largo, dtype=np.int32)
+    pos, indice = 0, 0
+    while pos < largo:
+        fin = min(pos + calle, largo)
+        es_calle[pos:fin] = True
+        banda[pos:fin] = indice
+        pos = fin
+        fin = min(pos + int(rng.integers(max(2, manzana - 1),
+                                         manzana + 3)), largo)
+        banda[pos:fin] = indice
+        pos, indice = fin, indice + 1
+    return es_calle, banda
+
+
+def _conectar(codigos):
+    """Abre pasos desde las zonas encerradas hasta la principal.
+
+    Cada zona que no es la más grande abre un camino en L (primero en
+    x, después en y) hacia el centro de la zona principal y se detiene
+    en cuanto toca una casilla de esa zona.
+
+    Args:
+        codigos (np.ndarray): Matriz de CALLE, EDIFICIO y PARQUE; se
+            modifica en el lugar.
+
+    Returns:
+        int: Cantidad de zonas que se conectaron.
+    """
+    alto, ancho = codigos.shape
+    grilla = GrillaCostos(LETRAS[codigos].tolist())
+    etiquetas = grilla.componentes()
+    principal = grilla.componente_principal(-1, -1)
+    if principal < 0:
+        return 0
+    plana = np.asarray(etiquetas, dtype=np.int64)
+    celdas = np.flatnonzero(plana == principal)
+    centro = (alto // 2) * ancho + ancho // 2
+    meta = int(celdas[np.abs(celdas - centro).argmin()])
+    mx, my = meta % ancho, meta // ancho
+
+    # Primera casilla de cada zona (np.unique da el primer índice)
+    zonas, primeras = np.unique(plana, return_index=True)
+    conectadas = 0
+    for zona, celda in zip(zonas.tolist(), primeras.tolist()):
+        if zona < 0 or zona == principal:
+            continue
+        x, y = celda % ancho, celda // ancho
+        while etiquetas[y * ancho + x] != principal:
+            if x != mx:
+                x += 1 if mx > x else -1
+            else:
+                y += 1 if my > y else -1
+            if codigos[y, x] == EDIFICIO:
+                codigos[y, x] = CALLE
+        conectadas += 1
+    return conectadas
+
+
+def generar_ciudad(ancho, alto, semilla=0, manzana=6, calle=1,
+                   densidad_manzanas=0.8, densidad_calles=0.9,
+                   parques=0.1, conexo=True, meta=5500):
+    """Genera una ciudad en el formato de ciudad.json.
+
+    Args:
+        ancho (int): Columnas (hasta LADO_MAXIMO).
+        alto (int): Filas (hasta LADO_MAXIMO).
+        semilla (int): Semilla del generador.
+        manzana (int): Tamaño medio de las manzanas.
+        calle (int): Ancho de las calles.
+        densidad_manzanas (float): Fracción de manzanas construidas
+            (edificio o parque); el resto son plazas abiertas.
+        densidad_calles (float): Fracción de tramos de calle abiertos;
+            los demás se cierran con edificios.
+        parques (float): Fracción de las manzanas construidas que son
+            parque.
+        conexo (bool): Si es True, se llega a todas las casillas
+            transitables desde cualquier otra.
+        meta (int): Dinero para ganar.
+
+    Returns:
+        dict: Ciudad con "version", "width", "height", "tiles", "legend"
+        y "goal".
+
+    Raises:
+        ValueError: Si el tamaño está fuera de 1..LADO_MAXIMO.
+    """
+    if not (1 <= ancho <= LADO_MAXIMO and 1 <= alto <= LADO_MAXIMO):
+        raise ValueError(f"El mapa debe medir entre 1 y {LADO_MAXIMO} "
+                         f"casillas por lado")
+    rng = np.random.default_rng(semilla)
+    calle_x, banda_x = _bandas(ancho, manzana, calle, rng)
+    calle_y, banda_y = _bandas(alto, manzana, calle, rng)
+    bandas_x, bandas_y = banda_x[-1] + 1, banda_y[-1] + 1
+
+    # Tipo de cada manzana
+    sorteo = rng.random((bandas_y, bandas_x))
+    tipos = np.full((bandas_y, bandas_x), CALLE, dtype=np.uint8)
+    tipos[sorteo < densidad_manzanas] = EDIFICIO
+    tipos[sorteo < densidad_manzanas * parques] = PARQUE
+    codigos = tipos[np.ix_(banda_y, banda_x)]
+
+    # Calles y tramos cerrados (los cruces quedan siempre abiertos)
+    es_calle = calle_y[:, None] | calle_x[None, :]
+    codigos[es_calle] = CALLE
+    cerrado_h = rng.random((bandas_y, bandas_x)) >= densidad_calles
+    cerrado_v = rng.random((bandas_y, bandas_x)) >= densidad_calles
+    tramo_h = calle_y[:, None] & ~calle_x[None, :]
+    tramo_v = calle_x[None, :] & ~calle_y[:, None]
+    codigos[tramo_h & cerrado_h[np.ix_(banda_y, banda_x)]] = EDIFICIO
+    codigos[tramo_v & cerrado_v[np.ix_(banda_y, banda_x)]] = EDIFICIO
+
+    if conexo:
+        _conectar(codigos)
+
+    return {
+        "version": "1.0",
+        "width": ancho,
+        "height": alto,
+        "tiles": LETRAS[codigos].tolist(),
+        "legend": LEYENDA,
+        "goal": meta,
+    }
+
+
+def generar_pedidos(tiles, cantidad, semilla=0):
+    """Genera pedidos con el formato de pedidos.json.
+
+    Los puntos se eligen entre las casillas de la zona transitable más
+    grande, así se puede llegar a todos. El pago va de 100 a 300 según
+    la distancia (relativa al tamaño del mapa), el peso y la prioridad.
+
+    Args:
+        tiles (list[list[str]]): Matriz del mapa.
+        cantidad (int): Cantidad de pedidos.
+        semilla (int): Semilla del generador.
+
+    Returns:
+        list[dict]: Pedidos con id, pickup, dropoff, payout, deadline,
+        weight, priority y release_time.
+    """
+    rng = np.random.default_rng(semilla + 1)
+    grilla = GrillaCostos(tiles)
+    etiquetas = np.asarray(grilla.componentes())
+    libres = np.flatnonzero(etiquetas == grilla.componente_principal(-1, -1))
+    if len(libres) < 2:
+        return []
+    ancho = grilla.ancho
+    distancia_maxima = max(1, grilla.ancho + grilla.alto - 2)
+    # El segundo índice se corre del primero: pickup y dropoff distintos
+    indices = rng.integers(len(libres), size=(cantidad, 2))
+    indices[:, 1] = (indices[:, 0] + 1 + indices[:, 1] % (len(libres) - 1)
+                     ) % len(libres)
+    puntos = libres[indices]
+    pesos = rng.integers(1, 6, size=cantidad)
+    prioridades = rng.choice(3, size=cantidad, p=[0.7, 0.2, 0.1])
+    liberacion = np.sort(rng.integers(0, 60 * max(1, cantidad // 10),
+                                      size=cantidad))
+    pedidos = []
+    for i in range(cantidad):
+        a, b = puntos[i].tolist()
+        # Pago según la distancia, el peso y la prioridad
+        distancia = abs(a % ancho - b % ancho) + abs(a // ancho - b // ancho)
+        payout = int(PAGO_MINIMO
+                     + PAGO_DISTANCIA * distancia / distancia_maxima
+                     + PAGO_PESO * (pesos[i] - 1)
+                     + PAGO_PRIORIDAD * prioridades[i])
+        plazo = INICIO_PEDIDOS + timedelta(
+            seconds=int(liberacion[i]) + 120 + distancia * 3)
+        pedidos.append({
+            "id": f"PED-{i + 1:03d}",
+            "pickup": [a % ancho, a // ancho],
+            "dropoff": [b % ancho, b // ancho],
+            "payout": payout,
+            "deadline": plazo.isoformat(),
+            "weight": int(pesos[i]),
+            "priority": int(prioridades[i]),
+            "release_time": int(liberacion[i]),
+        })
+    return pedidos
+
+
+def generar_clima(semilla=0, ciudad="CiudadGenerada"):
+    """Genera un clima con el formato de clima.json.
+
+    Cada condición puede seguir en sí misma o pasar a otras tres al
+    azar; las probabilidades de cada fila suman 1.
+
+    Args:
+        semilla (int): Semilla del generador.
+        ciudad (str): Nombre de la ciudad.
+
+    Returns:
+        dict: Clima con "version" y "data" (initial, conditions y
+        transition).
+    """
+    rng = np.random.default_rng(semilla + 2)
+    transicion = {}
+    for estado in CONDICIONES:
+        otros = [c for c in CONDICIONES if c != estado]
+        destinos = [estado] + rng.choice(otros, size=3,
+                                         replace=False).tolist()
+        pesos = rng.random(len(destinos)) + 0.2
+        pesos = np.round(pesos / pesos.sum(), 2)
+        pesos[0] = round(1 - pesos[1:].sum(), 2)  # Que sumen 1 exacto
+        transicion[estado] = dict(zip(destinos, pesos.tolist()))
+    return {
+        "version": "1.0",
+        "data": {
+            "city": ciudad,
+            "initial": {"condition": "clear",
+                        "intensity": round(float(rng.random()), 2)},
+            "conditions": CONDICIONES,
+            "transition": transicion,
+        },
+    }
+
+
+def guardar(carpeta, ciudad, pedidos, clima):
+    """Escribe ciudad.json, pedidos.json y clima.json en una carpeta.
+
+    Args:
+        carpeta (str): Carpeta de salida (se crea si no existe).
+        ciudad (dict): Resultado de `generar_ciudad`.
+        pedidos (list[dict]): Resultado de `generar_pedidos`.
+        clima (dict): Resultado de `generar_clima`.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    for nombre, datos in (("ciudad.json", ciudad), ("pedidos.json", pedidos),
+                          ("clima.json", clima)):
+        with open(os.path.join(carpeta, nombre), "w") as f:
+            # Sin sangría: el mapa grande ocupa decenas de MB
+            json.dump(datos, f, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--ancho', type=int, default=500)
+    parser.add_argument('--alto', type=int, default=500)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--manzana', type=int, default=6,
+                        help='tamaño medio de las manzanas')
+    parser.add_argument('--calle', type=int, default=1,
+                        help='ancho de las calles')
+    parser.add_argument('--densidad-manzanas', type=float, default=0.8,
+                        help='fracción de manzanas construidas')
+    parser.add_argument('--densidad-calles', type=float, default=0.9,
+                        help='fracción de tramos de calle abiertos')
+    parser.add_argument('--parques', type=float, default=0.1,
+                        help='fracción de manzanas construidas que son parque')
+    parser.add_argument('--sin-conexion', action='store_true',
+                        help='no abrir pasos hacia las zonas encerradas')
+    parser.add_argument('--pedidos', type=int, default=200)
+    parser.add_argument('--salida', default='data/generado')
+    parser.add_argument('--binario', action='store_true',
+                        help='escribir también ciudad.cqm')
+    args = parser.parse_args()
+
+    ciudad = generar_ciudad(args.ancho, args.alto, args.semilla,
+                            args.manzana, args.calle,
+                            args.densidad_manzanas, args.densidad_calles,
+                            args.parques, conexo=not args.sin_conexion)
+    pedidos = generar_pedidos(ciudad["tiles"], args.pedidos, args.semilla)
+    guardar(args.salida, ciudad, pedidos, generar_clima(args.semilla))
+    if args.binario:
+        guardar_mapa_binario(os.path.join(args.salida, "ciudad.cqm"), ciudad)
+    print(f"Ciudad de {args.ancho}x{args.alto} con {len(pedidos)} pedidos "
+          f"en {args.salida}")
@@ -0,0 +1,310 @@
+"""
+grabacion.py.
+
+Grabación de partidas para repetirlas después (ver
+repeticion.py). Una partida queda como un registro
+JSON chico con:
+
+- la semilla de los generadores de azar.py,
+- las versiones de los datos usados (mapa, pedidos,
+  configuración del clima): un hash de cada uno,
+  guardado aparte en una carpeta de datos,
+- la duración de cada cuadro en milisegundos,
+  comprimida en tramos [duración, repeticiones],
+- las teclas presionadas, con el cuadro en que
+  llegaron,
+- el resultado de las llamadas a la API y a la
+  persistencia (pedidos nuevos, guardar y cargar),
+  también como versiones de datos,
+- las decisiones del MCTS, con la cantidad de
+  iteraciones que llevó cada una: el MCTS busca con el
+  reloj real aunque se grabe, y la repetición usa la
+  acción grabada sin volver a buscar; también el cuadro
+  en que llegó cada plan del proceso planificador
+  (proceso_ia.py), que no se espera al jugar,
+- el resultado final, para comprobar la repetición.
+
+Los datos se guardan con pickle en archivos cuyo
+nombre es su hash, así un mismo dato (el mapa, una
+respuesta de la API que no cambió) se guarda una vez.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+from datetime import datetime
+import pygame
+from reloj import reloj
+
+VERSION_REGISTRO = 1
+CARPETA_REPETICIONES = "repeticiones"
+
+# Teclas que cambian la partida (F3 y F4 solo miden y no se graban)
+TECLAS_GRABADAS = {
+    pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+    pygame.K_p, pygame.K_q, pygame.K_u, pygame.K_i, pygame.K_t,
+    pygame.K_o, pygame.K_s, pygame.K_l
+}
+
+
+class AlmacenDatos:
+    """Datos guardados por contenido: el nombre del archivo es su hash.
+
+    Attributes:
+        carpeta (str): Carpeta de los archivos.
+    """
+
+    def __init__(self, carpeta):
+        """Crea el almacén (y la carpeta si no existe).
+
+        Args:
+            carpeta (str): Carpeta de los archivos.
+        """
+        self.carpeta = carpeta
+        os.makedirs(carpeta, exist_ok=True)
+
+    def guardar(self, dato):
+        """Guarda un dato si no estaba y devuelve su versión.
+
+        El dato se serializa en el momento, así cambios posteriores al
+        objeto no afectan lo guardado.
+
+        Args:
+            dato (Any): Dato serializable con pickle.
+
+        Returns:
+            str: Versión (hash del contenido).
+        """
+        contenido = pickle.dumps(dato, protocol=pickle.HIGHEST_PROTOCOL)
+        version = hashlib.sha1(contenido).hexdigest()[:16]
+        archivo = os.path.join(self.carpeta, f"{version}.pkl")
+        if not os.path.exists(archivo):
+            with open(archivo, 'wb') as f:
+                f.write(contenido)
+        return version
+
+    def cargar(self, version):
+        """Lee un dato guardado (una copia nueva en cada llamada).
+
+        Args:
+            version (str): Versión devuelta por `guardar`.
+
+        Returns:
+            Any: El dato.
+        """
+        with open(os.path.join(self.carpeta, f"{version}.pkl"), 'rb') as f:
+            return pickle.load(f)
+
+
+def comprimir_cuadros(duraciones):
+    """Agrupa duraciones de cuadro iguales y seguidas.
+
+    Args:
+        duraciones (list[int]): Milisegundos de cada cuadro.
+
+    Returns:
+        list[list[int]]: Tramos [duración, repeticiones].
+    """
+    tramos = []
+    for duracion in duraciones:
+        if tramos and tramos[-1][0] == duracion:
+            tramos[-1][1] += 1
+        else:
+            tramos.append([duracion, 1])
+    return tramos
+
+
+def expandir_cuadros(tramos):
+    """Inverso de `comprimir_cuadros`.
+
+    Args:
+        tramos (list[list[int]]): Tramos [duración, repeticiones].
+
+    Returns:
+        list[int]: Milisegundos de cada cuadro.
+    """
+    duraciones = []
+    for duracion, veces in tramos:
+        duraciones.extend([duracion] * veces)
+    return duraciones
+
+
+class Grabador:
+    """Graba una partida mientras se juega.
+
+    Mientras existe, el reloj del juego queda fijo en la hora de cada
+    cuadro (redondeada al milisegundo), que es exactamente lo que verá
+    la repetición. El MCTS sigue buscando con su presupuesto de tiempo
+    y sus decisiones se anotan con `anotar_decision`, igual que la
+    llegada de los planes calculados en otro proceso.
+
+    Attributes:
+        semilla (int): Semilla de los generadores de azar.py.
+        configuracion (dict): Parámetros de la partida.
+        almacen (AlmacenDatos): Dónde se guardan los datos.
+        inicio (float): Hora del segundo 0 de la grabación.
+        versiones (dict): Nombre -> versión de los datos iniciales.
+    """
+
+    def __init__(self, semilla, configuracion, carpeta=CARPETA_REPETICIONES):
+        """Empieza a grabar y fija el reloj en el segundo 0.
+
+        Args:
+            semilla (int): Semilla de los generadores.
+            configuracion (dict): Dificultad, cantidad de CPU, duración y
+                meta de la partida.
+            carpeta (str): Carpeta de los registros.
+        """
+        self.semilla = semilla
+        self.configuracion = configuracion
+        self.carpeta = carpeta
+        self.almacen = AlmacenDatos(os.path.join(carpeta, "datos"))
+        self.inicio = round(time.time(), 3)
+        self.versiones = {}
+        self._milisegundos = 0
+        self._cuadros = []  # Duración de cada cuadro en ms
+        self._entradas = []  # [cuadro, tecla, modificadores]
+        self._llamadas = []  # [cuadro, nombre, versión, error]
+        self._decisiones = []  # [cuadro, CPU, acción, iteraciones]
+        reloj.fijar(self.inicio)
+
+    @property
+    def cuadro(self):
+        """Índice del cuadro en curso (-1 antes del primero)."""
+        return len(self._cuadros) - 1
+
+    def guardar_dato(self, nombre, dato):
+        """Guarda uno de los datos con que empieza la partida.
+
+        Args:
+            nombre (str): 'mapa', 'pedidos' o 'clima'.
+            dato (Any): El dato, antes de que el juego lo modifique.
+        """
+        self.versiones[nombre] = self.almacen.guardar(dato)
+
+    def nuevo_cuadro(self):
+        """Anota la duración del cuadro que empieza y fija el reloj."""
+        transcurrido = round((time.time() - self.inicio) * 1000)
+        duracion = max(0, transcurrido - self._milisegundos)
+        self._milisegundos += duracion
+        self._cuadros.append(duracion)
+        reloj.fijar(self.inicio + self._milisegundos / 1000)
+
+    def registrar_eventos(self, eventos):
+        """Anota las teclas del cuadro en curso.
+
+        Args:
+            eventos (list[pygame.event.Event]): Eventos del cuadro.
+        """
+        for evento in eventos:
+            if (evento.type == pygame.KEYDOWN
+                    and evento.key in TECLAS_GRABADAS):
+                self._entradas.append([self.cuadro, evento.key, evento.mod])
+
+    def anotar_decision(self, indice, accion, iteraciones):
+        """Anota la acción que eligió el MCTS de un CPU en este cuadro.
+
+        Args:
+            indice (int): Posición del CPU en la lista de la partida.
+            accion (tuple | str): Acción elegida (ver mcts.acciones), o
+                proceso_ia.PLAN_LISTO si llegó un plan del proceso.
+            iteraciones (int): Iteraciones hechas desde la decisión
+                anterior de ese CPU.
+        """
+        self._decisiones.append([self.cuadro, indice, accion, iteraciones])
+
+    def envolver(self, objeto, nombre, metodos):
+        """Envuelve un objeto para grabar lo que devuelven sus métodos.
+
+        Args:
+            objeto (Any): Objeto real (módulo api, SistemaPersistencia).
+            nombre (str): Prefijo de las llamadas en el registro.
+            metodos (tuple[str]): Métodos a grabar.
+
+        Returns:
+            ObjetoGrabado: Objeto que se usa en lugar del real.
+        """
+        return ObjetoGrabado(objeto, nombre, metodos, self)
+
+    def registrar_llamada(self, nombre, resultado=None, error=None):
+        """Anota el resultado (o el error) de una llamada.
+
+        Args:
+            nombre (str): 'objeto.metodo'.
+            resultado (Any): Lo que devolvió.
+            error (Exception | None): Excepción que lanzó, si hubo.
+        """
+        if error is not None:
+            self._llamadas.append([self.cuadro, nombre, None, repr(error)])
+        else:
+            self._llamadas.append([self.cuadro, nombre,
+                                   self.almacen.guardar(resultado), None])
+
+    def terminar(self, resultado):
+        """Escribe el registro y devuelve el reloj a la hora real.
+
+        Args:
+            resultado (dict): Resumen final de la partida.
+
+        Returns:
+            str: Ruta del registro.
+        """
+        reloj.liberar()
+        registro = {
+            'version': VERSION_REGISTRO,
+            'semilla': self.semilla,
+            'configuracion': self.configuracion,
+            'inicio': self.inicio,
+            'datos': self.versiones,
+            'cuadros': comprimir_cuadros(self._cuadros),
+            'entradas': self._entradas,
+            'llamadas': self._llamadas,
+            'decisiones': self._decisiones,
+            'resultado': resultado
+        }
+        nombre = datetime.now().strftime("%Y%m%d_%H%M%S")
+        ruta = os.path.join(self.carpeta, f"partida_{nombre}.json")
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(registro, f, separators=(',', ':'))
+        return ruta
+
+
+class ObjetoGrabado:
+    """Delegado que graba el resultado de algunos métodos del objeto real.
+
+    Attributes:
+        objeto (Any): Objeto real.
+    """
+
+    def __init__(self, objeto, nombre, metodos, grabador):
+        """Crea el delegado.
+
+        Args:
+            objeto (Any): Objeto real.
+            nombre (str): Prefijo de las llamadas en el registro.
+            metodos (tuple[str]): Métodos a grabar.
+            grabador (Grabador): Dónde se anotan las llamadas.
+        """
+        self.objeto = objeto
+        self._nombre = nombre
+        self._metodos = metodos
+        self._grabador = grabador
+
+    def __getattr__(self, atributo):
+        """Devuelve el atributo real, envuelto si es un método grabado."""
+        valor = getattr(self.objeto, atributo)
+        if atributo not in self._metodos:
+            return valor
+        nombre = f"{self._nombre}.{atributo}"
+
+        def grabado(*args, **kwargs):
+            try:
+                resultado = valor(*args, **kwargs)
+            except Exception as e:
+                self._grabador.registrar_llamada(nombre, error=e)
+                raise
+            self._grabador.registrar_llamada(nombre, resultado)
+            return resultado
+        return grabado
@@ -0,0 +1,620 @@
+"""
+hpa.py.
+
+Búsqueda jerárquica de rutas (HPA*) para mapas grandes.
+El mapa se divide en sectores de tamaño fijo, se buscan
+las entradas entre sectores vecinos y se conectan las
+entradas de un mismo sector. A* corre sobre ese grafo
+abstracto y la ruta real se refina por tramos, solo
+cuando el CPU la necesita.
+
+Como el clima y la resistencia multiplican el costo de
+todas las casillas por el mismo factor, la forma de la
+ruta óptima no depende de ellos y el grafo se calcula
+una sola vez con los costos base de costos.py. En mapas
+grandes eso tarda segundos: `precalcular` calcula todas
+las aristas internas (el juego lo llama detrás de la
+pantalla de carga, ver Main.py) y guarda el grafo
+completo en la caché en disco (ver cache_disco.py). El arranque siguiente lo lee por
+sectores: cada sector se rearma la primera vez que una
+búsqueda pasa por él (ver `_cargar_sector`).
+
+La búsqueda y el refinamiento tienen versiones
+reanudables (`buscar_por_partes`, `refinar_por_partes`)
+para repartirlas entre cuadros (ver tareas.py). Ceden
+cada NODOS_POR_PASO unidades de trabajo: un nodo
+expandido es una unidad y entrar a un sector nuevo son
+COSTO_SECTOR, esté calculado o no. Así la cantidad de
+pasos no depende de lo que ya esté calculado o en disco
+y la repetición de una partida termina cada plan en el
+mismo cuadro que la grabación.
+"""
+
+import time
+from heapq import heappush, heappop
+import costos
+import numpy as np
+from cache_disco import cache_disco, version_codigo
+from costos import obtener_grilla, BLOQUEADO
+from tareas import completar, NODOS_POR_PASO
+
+DIRECCIONES = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+# Trabajo que se cuenta al entrar a un sector (sus aristas internas en
+# frío cuestan más o menos lo que tantos nodos de A*)
+COSTO_SECTOR = 128
+# Peso de la heurística en el grafo abstracto. Con Manhattan pura, las
+# zonas caras obligan a abrir decenas de miles de entradas en 2000x2000;
+# con este peso la ruta cuesta a lo sumo 1.2 veces la óptima del grafo
+PESO_HEURISTICA = 1.2
+# Versión del grafo para la caché en disco (depende también de los costos)
+VERSION_GRAFO = version_codigo(__file__, costos.__file__)
+
+
+class GrafoJerarquico:
+    """Grafo abstracto de sectores y entradas de un mapa.
+
+    Attributes:
+        tamano_sector (int): Lado de cada sector en casillas.
+        ancho (int): Columnas del mapa.
+        alto (int): Filas del mapa.
+        aristas_inter (dict): Entrada -> lista de (entrada vecina, costo)
+            en otro sector.
+        entradas_sector (dict): Sector -> entradas del sector (un dict
+            con valores None, usado como conjunto ordenado).
+        nodos_expandidos (int): Nodos del grafo abstracto que expandió
+            la última búsqueda.
+    """
+
+    def __init__(self, mapa, tamano_sector=10):
+        """Divide el mapa en sectores y detecta sus entradas.
+
+        Si el grafo de este mapa está en la caché en disco, se lee de
+        ahí (con las aristas internas que ya se hayan calculado); los
+        sectores se rearman al usarlos.
+
+        Args:
+            mapa (list[list[str]]): Matriz del mapa.
+            tamano_sector (int): Lado de cada sector en casillas.
+        """
+        grilla = obtener_grilla(mapa)
+        self.costos = grilla.base.ravel().tolist()
+        self.ancho = grilla.ancho
+        self.alto = grilla.alto
+        self.tamano_sector = tamano_sector
+        self._sectores_x = -(-self.ancho // tamano_sector)
+
+        self.aristas_inter = {}
+        self.entradas_sector = {}
+        # Aristas dentro de cada sector, calculadas la primera vez
+        # que la búsqueda pasa por el sector.
+        self._aristas_intra = {}
+        self._huella = grilla.huella
+        self.nodos_expandidos = 0
+        self._guardado = None  # Arreglos leídos del disco
+        self._por_cargar = set()  # Sectores del disco aún sin rearmar
+
+        guardado = cache_disco.cargar(self._huella, self._nombre_cache(),
+                                      VERSION_GRAFO)
+        if guardado is None:
+            self._detectar_entradas()
+        else:
+            self._restaurar(guardado)
+
+    def sector_de(self, pos):
+        """Devuelve el sector al que pertenece una casilla.
+
+        Args:
+            pos (tuple[int, int]): Casilla (x, y).
+
+        Returns:
+            tuple[int, int]: Índices (columna, fila) del sector.
+        """
+        return pos[0] // self.tamano_sector, pos[1] // self.tamano_sector
+
+    def _limites(self, sector):
+        """Calcula los límites en casillas de un sector.
+
+        Args:
+            sector (tuple[int, int]): Sector.
+
+        Returns:
+            tuple[int, int, int, int]: (x_min, y_min, x_max, y_max),
+            con máximos exclusivos.
+        """
+        x0 = sector[0] * self.tamano_sector
+        y0 = sector[1] * self.tamano_sector
+        return (x0, y0, min(x0 + self.tamano_sector, self.ancho),
+                min(y0 + self.tamano_sector, self.alto))
+
+    def _libre(self, x, y):
+        """Indica si una casilla es transitable."""
+        return self.costos[y * self.ancho + x] != BLOQUEADO
+
+    def _detectar_entradas(self):
+        """Busca las entradas en cada borde entre sectores vecinos.
+
+        Cada tramo continuo de casillas libres a ambos lados del borde
+        genera una entrada en su centro, o dos (una en cada extremo) si
+        el tramo es largo.
+        """
+        t = self.tamano_sector
+        # Bordes verticales: entre columna x y x + 1
+        for x in range(t - 1, self.ancho - 1, t):
+            for y0 in range(0, self.alto, t):
+                pares = [((x, y), (x + 1, y))
+                         for y in range(y0, min(y0 + t, self.alto))]
+                self._agregar_entradas(pares)
+        # Bordes horizontales: entre fila y y y + 1
+        for y in range(t - 1, self.alto - 1, t):
+            for x0 in range(0, self.ancho, t):
+                pares = [((x, y), (x, y + 1))
+                         for x in range(x0, min(x0 + t, self.ancho))]
+                self._agregar_entradas(pares)
+
+    def _agregar_entradas(self, pares):
+        """Crea las entradas de un borde a partir de sus pares de casillas.
+
+        Args:
+            pares (list[tuple]): Pares (casilla_a, casilla_b) vecinos a
+                través del borde, en orden.
+        """
+        tramo = []
+        for a, b in pares + [(None, None)]:
+            if a is not None and self._libre(*a) and self._libre(*b):
+                tramo.append((a, b))
+                continue
+            if tramo:
+                if len(tramo) >= 6:
+                    elegidos = [tramo[0], tramo[-1]]
+                else:
+                    elegidos = [tramo[len(tramo) // 2]]
+                for ea, eb in elegidos:
+                    self._conectar(ea, eb)
+                tramo = []
+
+    def _conectar(self, a, b):
+        """Agrega una arista entre dos entradas de sectores vecinos."""
+        self.aristas_inter.setdefault(a, []).append(
+            (b, self.costos[b[1] * self.ancho + b[0]]))
+        self.aristas_inter.setdefault(b, []).append(
+            (a, self.costos[a[1] * self.ancho + a[0]]))
+        self.entradas_sector.setdefault(self.sector_de(a), {})[a] = None
+        self.entradas_sector.setdefault(self.sector_de(b), {})[b] = None
+
+    def _dijkstra_local(self, origen, sector, inverso=False):
+        """Distancias desde una casilla a todo su sector.
+
+        Args:
+            origen (tuple[int, int]): Casilla inicial.
+            sector (tuple[int, int]): Sector al que se limita la búsqueda.
+            inverso (bool): Si es True calcula el costo de llegar *hacia*
+                el origen en lugar de salir de él.
+
+        Returns:
+            dict: Casilla -> costo mínimo.
+        """
+        x_min, y_min, x_max, y_max = self._limites(sector)
+        ancho = self.ancho
+        costos = self.costos
+        distancias = {origen: 0}
+        frontera = [(0, origen)]
+        while frontera:
+            dist, actual = heappop(frontera)
+            if dist > distancias[actual]:
+                continue
+            # En modo inverso se paga el costo de la casilla que se deja
+            paso_inverso = costos[actual[1] * ancho + actual[0]]
+            for dx, dy in DIRECCIONES:
+                nx, ny = actual[0] + dx, actual[1] + dy
+                if not (x_min <= nx < x_max and y_min <= ny < y_max):
+                    continue
+                costo = costos[ny * ancho + nx]
+                if costo == BLOQUEADO:
+                    continue
+                nueva = dist + (paso_inverso if inverso else costo)
+                if nueva < distancias.get((nx, ny), BLOQUEADO):
+                    distancias[(nx, ny)] = nueva
+                    heappush(frontera, (nueva, (nx, ny)))
+        return distancias
+
+    def _aristas_sector(self, sector):
+        """Devuelve (y calcula si hace falta) las aristas de un sector.
+
+        Args:
+            sector (tuple[int, int]): Sector (ya cargado, ver
+                `_cargar_sector`).
+
+        Returns:
+            dict: Entrada -> lista de (otra entrada, costo).
+        """
+        aristas = self._aristas_intra.get(sector)
+        if aristas is not None:
+            return aristas
+
+        aristas = {}
+        entradas = self.entradas_sector.get(sector, ())
+        for entrada in entradas:
+            distancias = self._dijkstra_local(entrada, sector)
+            aristas[entrada] = [(otra, distancias[otra])
+                                for otra in entradas
+                                if otra != entrada and otra in distancias]
+        self._aristas_intra[sector] = aristas
+        return aristas
+
+    def precalcular(self, pausa=False):
+        """Calcula de una vez las aristas internas de todos los sectores.
+
+        Si faltaba alguno, el grafo completo se guarda en disco.
+
+        Args:
+            pausa (bool): Soltar el GIL después de cada sector, para no
+                frenar al hilo de la pantalla de carga.
+        """
+        guardado = self._guardado
+        if guardado is not None and all(guardado['calculados']):
+            return  # El disco ya tiene el grafo completo
+        self._cargar_todos(pausa)
+        faltan = [sector for sector in list(self.entradas_sector)
+                  if sector not in self._aristas_intra]
+        if not faltan:
+            return
+        for sector in faltan:
+            self._aristas_sector(sector)
+            if pausa:
+                time.sleep(0)
+        self._guardar()
+
+    def _nombre_cache(self):
+        """Nombre del grafo en la caché en disco."""
+        return f"hpa{self.tamano_sector}"
+
+    def _indice(self, sector):
+        """Posición de un sector en los arreglos del disco."""
+        return sector[1] * self._sectores_x + sector[0]
+
+    def _guardar(self):
+        """Guarda el grafo en la caché en disco.
+
+        Todo queda por sector (en el orden de `_indice`), para que
+        `_cargar_sector` rearme uno solo; el destino de una arista
+        interna se guarda como su posición entre las entradas del
+        sector. Las entradas se guardan en el orden de `entradas_sector`
+        y las aristas en el de sus listas, así el grafo leído recorre
+        los vecinos igual que el calculado y las rutas (y las
+        repeticiones) no cambian.
+        """
+        if not cache_disco.activa:
+            return
+        self._cargar_todos()
+        cantidad = self._sectores_x * -(-self.alto // self.tamano_sector)
+        por_indice = {self._indice(sector): sector
+                      for sector in list(self.entradas_sector)}
+        sectores = [0]
+        calculados = np.zeros(cantidad, dtype=bool)
+        entradas, inter, inter_destinos = [], [0], []
+        intra, intra_destinos, intra_costos = [0], [], []
+        for indice in range(cantidad):
+            sector = por_indice.get(indice)
+            if sector is not None:
+                internas = self._aristas_intra.get(sector)
+                calculados[indice] = internas is not None
+                posiciones = {entrada: k for k, entrada in
+                              enumerate(self.entradas_sector[sector])}
+                for entrada in posiciones:
+                    entradas.append(entrada)
+                    inter_destinos.extend(
+                        otra for otra, _ in self.aristas_inter[entrada])
+                    inter.append(len(inter_destinos))
+                    for otra, costo in (internas or {}).get(entrada, ()):
+                        intra_destinos.append(posiciones[otra])
+                        intra_costos.append(costo)
+                    intra.append(len(intra_destinos))
+            sectores.append(len(entradas))
+        cache_disco.guardar(
+            self._huella, self._nombre_cache(), VERSION_GRAFO,
+            sectores=np.array(sectores, dtype=np.int32),
+            calculados=calculados,
+            entradas=np.array(entradas, dtype=np.int32).reshape(-1, 2),
+            inter=np.array(inter, dtype=np.int32),
+            inter_destinos=np.array(inter_destinos,
+                                    dtype=np.int32).reshape(-1, 2),
+            intra=np.array(intra, dtype=np.int32),
+            intra_destinos=np.array(intra_destinos, dtype=np.int32),
+            intra_costos=np.array(intra_costos, dtype=np.float64))
+
+    def _restaurar(self, guardado):
+        """Prepara la lectura por sectores de lo leído del disco.
+
+        Args:
+            guardado (dict): Arreglos escritos por `_guardar`.
+        """
+        # Los índices se pasan a listas de una vez: leerlos de a uno
+        # desde NumPy es lo más lento de `_cargar_sector`.
+        guardado = dict(guardado)
+        for clave in ('sectores', 'calculados', 'inter', 'intra'):
+            guardado[clave] = guardado[clave].tolist()
+        self._guardado = guardado
+        con_entradas = np.flatnonzero(np.diff(self._guardado['sectores']))
+        self._por_cargar = {
+            (indice % self._sectores_x, indice // self._sectores_x)
+            for indice in con_entradas.tolist()}
+
+    def _cargar_sector(self, sector):
+        """Rearma un sector leído del disco, la primera vez que se usa.
+
+        Las entradas del sector se publican al final, así otro hilo
+        nunca ve el sector a medio armar.
+
+        Args:
+            sector (tuple[int, int]): Sector.
+        """
+        if sector not in self._por_cargar:
+            return
+        guardado = self._guardado
+        indice = self._indice(sector)
+        desde, hasta = guardado['sectores'][indice:indice + 2]
+        entradas = [tuple(e) for e in guardado['entradas'][desde:hasta]
+                    .tolist()]
+        costos, ancho = self.costos, self.ancho
+
+        limites = guardado['inter'][desde:hasta + 1]
+        destinos = [tuple(d) for d in guardado['inter_destinos'][
+            limites[0]:limites[-1]].tolist()]
+        for k, entrada in enumerate(entradas):
+            self.aristas_inter[entrada] = [
+                (otra, costos[otra[1] * ancho + otra[0]])
+                for otra in destinos[limites[k] - limites[0]:
+                                     limites[k + 1] - limites[0]]]
+
+        if guardado['calculados'][indice]:
+            limites = guardado['intra'][desde:hasta + 1]
+            destinos = guardado['intra_destinos'][
+                limites[0]:limites[-1]].tolist()
+            valores = guardado['intra_costos'][
+                limites[0]:limites[-1]].tolist()
+            aristas = {}
+            for k, entrada in enumerate(entradas):
+                i, j = limites[k] - limites[0], limites[k + 1] - limites[0]
+                aristas[entrada] = [(entradas[d], v) for d, v in
+                                    zip(destinos[i:j], valores[i:j])]
+            self._aristas_intra.setdefault(sector, aristas)
+
+        self.entradas_sector[sector] = dict.fromkeys(entradas)
+        self._por_cargar.discard(sector)
+
+    def _cargar_todos(self, pausa=False):
+        """Rearma todos los sectores del disco que falten.
+
+        Args:
+            pausa (bool): Soltar el GIL después de cada sector.
+        """
+        for sector in list(self._por_cargar):
+            self._cargar_sector(sector)
+            if pausa:
+                time.sleep(0)
+
+    def buscar(self, inicio, destino):
+        """Busca una ruta abstracta entre dos casillas.
+
+        Args:
+            inicio (tuple[int, int]): Casilla de salida.
+            destino (tuple[int, int]): Casilla de llegada.
+
+        Returns:
+            tuple[float, list[tuple[int, int]]] | None: Costo base de la
+            ruta y lista de puntos intermedios (termina en ``destino``),
+            o None si no hay ruta.
+        """
+        return completar(self.buscar_por_partes(inicio, destino))
+
+    def buscar_por_partes(self, inicio, destino):
+        """Versión reanudable de `buscar` (generador, ver tareas.py).
+
+        Cede cada `NODOS_POR_PASO` unidades de trabajo: un nodo
+        expandido es una, y entrar a un sector que la búsqueda no había
+        tocado son `COSTO_SECTOR` (ahí se calculan sus aristas internas
+        si faltaban, que es lo más caro de una búsqueda en frío).
+
+        Args:
+            inicio (tuple[int, int]): Casilla de salida.
+            destino (tuple[int, int]): Casilla de llegada.
+
+        Returns:
+            tuple[float, list[tuple[int, int]]] | None: Costo base de la
+            ruta y lista de puntos intermedios (termina en ``destino``),
+            o None si no hay ruta.
+        """
+        self.nodos_expandidos = 0
+        if inicio == destino:
+            return 0, []
+        if not self._libre(*destino):
+            return None
+
+        sector_inicio = self.sector_de(inicio)
+        sector_destino = self.sector_de(destino)
+        self._cargar_sector(sector_inicio)
+        self._cargar_sector(sector_destino)
+
+        # Conectar temporalmente inicio y destino a las entradas
+        salida = self._dijkstra_local(inicio, sector_inicio)
+        llegada = self._dijkstra_local(destino, sector_destino,
+                                       inverso=True)
+        entradas_llegada = {e: llegada[e]
+                            for e in self.entradas_sector.get(
+                                sector_destino, ())
+                            if e in llegada}
+
+        # Caso simple: ambos en el mismo sector y conectados por dentro
+        mejor_local = salida.get(destino) \
+            if sector_inicio == sector_destino else None
+
+        # A* ponderado (PESO_HEURISTICA) sobre el grafo abstracto
+        g_score = {inicio: 0}
+        vino_de = {}
+        frontera = []
+        contador = 0
+        heappush(frontera, (PESO_HEURISTICA
+                            * self._heuristica(inicio, destino),
+                            contador, inicio))
+        visitados = set()
+        mejor_costo = (mejor_local if mejor_local is not None
+                       else BLOQUEADO)
+        mejor_final = None
+        sectores = set()  # Sectores que tocó esta búsqueda
+        trabajo = 0
+        pausa = NODOS_POR_PASO
+
+        while frontera:
+            f, _, actual = heappop(frontera)
+            if f >= mejor_costo:
+                break
+            if actual in visitados:
+                continue
+            visitados.add(actual)
+            sector = self.sector_de(actual)
+            trabajo += 1
+            if sector not in sectores:
+                sectores.add(sector)
+                self._cargar_sector(sector)
+                trabajo += COSTO_SECTOR
+            if trabajo >= pausa:
+                pausa = trabajo + NODOS_POR_PASO
+                yield
+
+            if actual in entradas_llegada:
+                total = g_score[actual] + entradas_llegada[actual]
+                if total < mejor_costo:
+                    mejor_costo = total
+                    mejor_final = actual
+
+            if actual == inicio:
+                vecinos = [(e, salida[e])
+                           for e in self.entradas_sector.get(
+                               sector_inicio, ())
+                           if e in salida]
+                vecinos += self.aristas_inter.get(actual, [])
+            else:
+                vecinos = (self._aristas_sector(sector).get(actual, [])
+                           + self.aristas_inter.get(actual, []))
+
+            for vecino, costo in vecinos:
+                tentativo = g_score[actual] + costo
+                if tentativo < g_score.get(vecino, BLOQUEADO):
+                    g_score[vecino] = tentativo
+                    vino_de[vecino] = actual
+                    contador += 1
+                    heappush(frontera,
+                             (tentativo + PESO_HEURISTICA
+                              * self._heuristica(vecino, destino),
+                              contador, vecino))
+
+        self.nodos_expandidos = len(visitados)
+        if mejor_final is None:
+            if mejor_local is None:
+                return None
+            return mejor_local, [destino]
+
+        puntos = [destino]
+        actual = mejor_final
+        while actual != inicio:
+            if actual != destino:
+                puntos.append(actual)
+            actual = vino_de[actual]
+        puntos.reverse()
+        return mejor_costo, puntos
+
+    def refinar(self, desde, hasta):
+        """Convierte un tramo abstracto en la lista de casillas a recorrer.
+
+        Los tramos siempre están dentro de un sector o cruzan un único
+        borde, así que A* se limita a ese sector.
+
+        Args:
+            desde (tuple[int, int]): Casilla de inicio del tramo.
+            hasta (tuple[int, int]): Casilla final del tramo.
+
+        Returns:
+            list[tuple[int, int]]: Casillas del tramo sin incluir
+            ``desde``; vacía si no se pudo refinar.
+        """
+        return completar(self.refinar_por_partes(desde, hasta))
+
+    def refinar_por_partes(self, desde, hasta):
+        """Versión reanudable de `refinar`: cede cada `NODOS_POR_PASO` nodos.
+
+        Args:
+            desde (tuple[int, int]): Casilla de inicio del tramo.
+            hasta (tuple[int, int]): Casilla final del tramo.
+
+        Returns:
+            list[tuple[int, int]]: Casillas del tramo sin incluir
+            ``desde``; vacía si no se pudo refinar.
+        """
+        if abs(desde[0] - hasta[0]) + abs(desde[1] - hasta[1]) == 1:
+            return [hasta]
+
+        sector = self.sector_de(hasta)
+        x_min, y_min, x_max, y_max = self._limites(sector)
+        ancho = self.ancho
+        costos = self.costos
+
+        g_score = {desde: 0}
+        vino_de = {}
+        frontera = [(self._heuristica(desde, hasta), 0, desde)]
+        contador = 1
+        expandidos = 0
+        while frontera:
+            _, _, actual = heappop(frontera)
+            expandidos += 1
+            if expandidos % NODOS_POR_PASO == 0:
+                yield
+            if actual == hasta:
+                camino = []
+                while actual in vino_de:
+                    camino.append(actual)
+                    actual = vino_de[actual]
+                camino.reverse()
+                return camino
+            for dx, dy in DIRECCIONES:
+                nx, ny = actual[0] + dx, actual[1] + dy
+                if not (x_min <= nx < x_max and y_min <= ny < y_max):
+                    continue
+                costo = costos[ny * ancho + nx]
+                if costo == BLOQUEADO:
+                    continue
+                tentativo = g_score[actual] + costo
+                if tentativo < g_score.get((nx, ny), BLOQUEADO):
+                    g_score[(nx, ny)] = tentativo
+                    vino_de[(nx, ny)] = actual
+                    heappush(frontera,
+                             (tentativo + self._heuristica((nx, ny), hasta),
+                              contador, (nx, ny)))
+                    contador += 1
+        return []
+
+    @staticmethod
+    def _heuristica(a, b):
+        """Distancia Manhattan (admisible: el costo mínimo es 1)."""
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+_grafos = {}  # id(mapa) -> (mapa, GrafoJerarquico)
+
+
+def obtener_grafo(mapa, tamano_sector=10):
+    """Devuelve el grafo jerárquico compartido de un mapa.
+
+    Args:
+        mapa (list[list[str]]): Matriz del mapa.
+        tamano_sector (int): Lado de cada sector.
+
+    Returns:
+        GrafoJerarquico: Grafo asociado al mapa.
+    """
+    entrada = _grafos.get(id(mapa))
+    if entrada is None or entrada[0] is not mapa:
+        if len(_grafos) >= 4:
+            _grafos.clear()
+        entrada = (mapa, GrafoJerarquico(mapa, tamano_sector))
+        _grafos[id(mapa)] = entrada
+    return entrada[1]
@@ -0,0 +1,229 @@
+"""
+jps.py.
+
+Jump Point Search para mapas con movimiento en 4
+direcciones. En vez de expandir cada casilla como A*,
+avanza en línea recta ("salta") y solo agrega a la
+frontera las casillas donde la ruta puede doblar:
+junto a obstáculos, en cambios de superficie o
+alineadas con el destino.
+
+Las rutas canónicas avanzan primero en horizontal y
+luego en vertical. Un salto vertical solo dobla en un
+vecino forzado (una casilla lateral libre cuya casilla
+anterior estaba bloqueada). Los saltos se detienen
+también donde cambia el tipo de superficie, porque el
+parque (0.95) no cuesta lo mismo que la calle (1.0);
+así la ruta es óptima dentro de cada zona uniforme y
+en el peor caso cuesta como máximo 1 / 0.95 veces la
+ruta de A*.
+
+Cada salto recorre casillas sin agregarlas a la
+frontera; esas casillas revisadas también son trabajo
+y se cuentan aparte de los puntos expandidos. En
+Python los saltos cuestan más que lo que ahorran: en
+los mapas de benchmarks/bench_jps.py JPS tarda más que
+A*, por eso el juego usa A* y JPS queda opcional.
+
+`buscar_jps_por_partes` es la versión reanudable (ver
+tareas.py): cede cada NODOS_POR_PASO casillas de
+trabajo, entre puntos expandidos y revisadas.
+"""
+
+from heapq import heappush, heappop
+from costos import obtener_grilla, BLOQUEADO
+from tareas import completar, NODOS_POR_PASO
+
+
+def buscar_jps(mapa, inicio, destino):
+    """Busca una ruta con Jump Point Search.
+
+    Args:
+        mapa (list[list[str]]): Matriz del mapa.
+        inicio (tuple[int, int]): Posición inicial.
+        destino (tuple[int, int]): Meta.
+
+    Returns:
+        tuple[list[tuple[int, int]], int, int]: Ruta casilla por casilla
+        (sin incluir ``inicio``), puntos de salto expandidos y casillas
+        revisadas por los saltos. La ruta es vacía si no existe.
+    """
+    return completar(buscar_jps_por_partes(mapa, inicio, destino))
+
+
+def buscar_jps_por_partes(mapa, inicio, destino):
+    """Versión reanudable de `buscar_jps` (generador, ver tareas.py).
+
+    Args:
+        mapa (list[list[str]]): Matriz del mapa.
+        inicio (tuple[int, int]): Posición inicial.
+        destino (tuple[int, int]): Meta.
+
+    Returns:
+        tuple[list[tuple[int, int]], int, int]: Ruta casilla por casilla
+        (sin incluir ``inicio``), puntos de salto expandidos y casillas
+        revisadas por los saltos. La ruta es vacía si no existe.
+    """
+    grilla = obtener_grilla(mapa)
+    ancho, alto = grilla.ancho, grilla.alto
+    costos = grilla.base.ravel().tolist()
+
+    def costo(x, y):
+        if 0 <= x < ancho and 0 <= y < alto:
+            return costos[y * ancho + x]
+        return BLOQUEADO
+
+    def libre(x, y):
+        return costo(x, y) != BLOQUEADO
+
+    gx, gy = destino
+    if not libre(gx, gy) or not libre(*inicio):
+        return [], 0, 0
+    revisadas = 0
+
+    def saltar_vertical(x, y, dy):
+        """Avanza en vertical hasta un punto de salto o un obstáculo."""
+        nonlocal revisadas
+        while True:
+            anterior = costo(x, y)
+            y += dy
+            revisadas += 1
+            actual = costo(x, y)
+            if actual == BLOQUEADO:
+                return None
+            if (x, y) == destino or actual != anterior:
+                return x, y
+            # Vecinos forzados a los lados
+            for sx in (-1, 1):
+                if libre(x + sx, y) and not libre(x + sx, y - dy):
+                    return x, y
+
+    def saltar_horizontal(x, y, dx):
+        """Avanza en horizontal; se detiene si un salto vertical encuentra
+        algo desde la casilla actual."""
+        nonlocal revisadas
+        while True:
+            anterior = costo(x, y)
+            x += dx
+            revisadas += 1
+            actual = costo(x, y)
+            if actual == BLOQUEADO:
+                return None
+            if (x, y) == destino or actual != anterior:
+                return x, y
+            if (saltar_vertical(x, y, -1) is not None or
+                    saltar_vertical(x, y, 1) is not None):
+                return x, y
+
+    def direcciones_podadas(x, y, direccion):
+        """Direcciones a explorar desde un punto según cómo se llegó."""
+        if direccion is None:
+            return [(0, -1), (0, 1), (-1, 0), (1, 0)]
+        dx, dy = direccion
+        if dx != 0:
+            return [(dx, 0), (0, -1), (0, 1)]
+        resultado = [(0, dy)]
+        for sx in (-1, 1):
+            if libre(x + sx, y) and not libre(x + sx, y - dy):
+                resultado.append((sx, 0))
+        return resultado
+
+    def costo_tramo(desde, hasta):
+        """Suma el costo de las casillas de un tramo recto."""
+        total = 0.0
+        for x, y in casillas_tramo(desde, hasta):
+            total += costo(x, y)
+        return total
+
+    frontera = [(_manhattan(inicio, destino), 0, inicio)]
+    contador = 1
+    g_score = {inicio: 0.0}
+    vino_de = {}
+    direccion_de = {inicio: None}
+    cerrados = set()
+    expandidos = 0
+    pausa = NODOS_POR_PASO  # Trabajo al que se cede la próxima vez
+
+    while frontera:
+        if expandidos + revisadas >= pausa:
+            pausa = expandidos + revisadas + NODOS_POR_PASO
+            yield
+        _, _, actual = heappop(frontera)
+        if actual in cerrados:
+            continue
+        if actual == destino:
+            return _expandir_ruta(vino_de, actual), expandidos, revisadas
+        cerrados.add(actual)
+        expandidos += 1
+
+        x, y = actual
+        # Después de un cambio de superficie se exploran las 4 direcciones
+        direccion = direccion_de[actual]
+        anterior = vino_de.get(actual)
+        if anterior is not None and costo(*anterior) != costo(x, y):
+            direccion = None
+
+        for dx, dy in direcciones_podadas(x, y, direccion):
+            if dx != 0:
+                punto = saltar_horizontal(x, y, dx)
+            else:
+                punto = saltar_vertical(x, y, dy)
+            if punto is None or punto in cerrados:
+                continue
+            tentativo = g_score[actual] + costo_tramo(actual, punto)
+            if tentativo < g_score.get(punto, BLOQUEADO):
+                g_score[punto] = tentativo
+                vino_de[punto] = actual
+                direccion_de[punto] = (dx, dy)
+                heappush(frontera, (tentativo + _manhattan(punto, destino),
+                                    contador, punto))
+                contador += 1
+
+    return [], expandidos, revisadas
+
+
+def casillas_tramo(desde, hasta):
+    """Casillas de un tramo recto, sin incluir la inicial.
+
+    Args:
+        desde (tuple[int, int]): Inicio del tramo.
+        hasta (tuple[int, int]): Fin del tramo (misma fila o columna).
+
+    Returns:
+        list[tuple[int, int]]: Casillas recorridas.
+    """
+    dx = (hasta[0] > desde[0]) - (hasta[0] < desde[0])
+    dy = (hasta[1] > desde[1]) - (hasta[1] < desde[1])
+    x, y = desde
+    casillas = []
+    while (x, y) != hasta:
+        x, y = x + dx, y + dy
+        casillas.append((x, y))
+    return casillas
+
+
+def _expandir_ruta(vino_de, actual):
+    """Reconstruye la ruta completa a partir de los puntos de salto.
+
+    Args:
+        vino_de (dict): Punto de salto -> punto anterior.
+        actual (tuple[int, int]): Último punto (destino).
+
+    Returns:
+        list[tuple[int, int]]: Ruta casilla por casilla.
+    """
+    puntos = [actual]
+    while actual in vino_de:
+        actual = vino_de[actual]
+        puntos.append(actual)
+    puntos.reverse()
+
+    ruta = []
+    for desde, hasta in zip(puntos, puntos[1:]):
+        ruta.extend(casillas_tramo(desde, hasta))
+    return ruta
+
+
+def _manhattan(a, b):
+    """Heurística Manhattan (admisible: el costo mínimo por casilla es 1)."""
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
@@ -8,8 +8,8 @@ del jugador con los pedidos como (recoger,
 entregar, entre otros).
 """
 
-import time
-from collections import deque  # Para utilizar colas
+from clases import Inventario
+from reloj import reloj
 
 
 class Jugador:
@@ -29,7 +29,7 @@ class Jugador:
         """
         self.x = x           # Ubicación del personaje.
         self.y = y
-        self.inventario = deque()   # Inventario en cola.
+        self.inventario = Inventario()   # Inventario en cola (indexado).
         self.resistencia = 100
         self.max_resistencia = 100
         self.puntaje = 0
@@ -38,7 +38,7 @@ class Jugador:
         self.ticks_sin_mover = 0
         self.capacidad = capacidad
         self.bloqueado = False
-        self.ultimo_recupero = time.time()
+        self.ultimo_recupero = reloj.ahora()
         self.mensaje = ""
         self.mensaje_tiempo = 0
         # Entregas
@@ -46,14 +46,16 @@ class Jugador:
         self.cancelaciones = 0
         self.entregas_tempranas = 0
         self.entregas_tardias = 0
+        # Funciones a llamar cuando cambia de casilla (ver entregas.py)
+        self.observadores = []
 
     def peso_total(self):
-        """Calcula el peso total del inventario.
+        """Peso total del inventario (lo lleva el propio inventario).
 
         Returns:
             float: Peso total de todos los pedidos en el inventario.
         """
-        return sum(p.weight for p in self.inventario)
+        return self.inventario.peso
 
     def calcular_multiplicador_velocidad(self, clima_mult, mapa_tiles):
         """Calcula el multiplicador de velocidad del jugador.
@@ -152,16 +154,50 @@ class Jugador:
         # Bloquear si se queda sin resistencia.
         if self.resistencia <= 0:
             self.bloqueado = True
-            self.ultimo_recupero = time.time()
+            self.ultimo_recupero = reloj.ahora()
 
+        # Avisar del cambio de casilla (recogidas y entregas).
+        self._avisar_observadores()
         return True
 
+    def agregar_observador(self, funcion):
+        """Registra una función que se llama al cambiar de casilla.
+
+        También se llama al cancelar un pedido, porque cambia lo que se
+        puede recoger o entregar sin moverse.
+
+        Args:
+            funcion (callable): Recibe al jugador.
+        """
+        self.observadores.append(funcion)
+
+    def _avisar_observadores(self):
+        """Llama a los observadores con el jugador."""
+        for observador in self.observadores:
+            observador(self)
+
+    def al_recoger(self, pedido):
+        """Se llama después de recoger un pedido (ver entregas.py).
+
+        Args:
+            pedido (Pedido): Pedido recogido.
+        """
+
+    def al_entregar(self, pedido):
+        """Se llama después de entregar un pedido (ver entregas.py).
+
+        Args:
+            pedido (Pedido): Pedido entregado.
+        """
+        print(f"Pedido entregado - Puntaje: {self.puntaje},"
+              f" Reputación: {self.reputacion}")
+
     def recuperar(self):
         """Recupera resistencia automáticamente cada segundo.
 
         Si alcanza suficiente resistencia, deja de estar bloqueado.
         """
-        ahora = time.time()
+        ahora = reloj.ahora()
         if ahora - self.ultimo_recupero >= 1:  # Cada segundo
             puntos_recuperacion = 5  # 5 puntos por segundo según PDF
             self.resistencia = min(
@@ -181,17 +217,17 @@ class Jugador:
         Returns:
             bool: True si se agregó, False si excede la capacidad.
         """
-        pedido.tiempo_recogido = time.time()
+        pedido.tiempo_recogido = reloj.ahora()
 
         if self.peso_total() + pedido.weight <= self.capacidad:
             self.inventario.append(pedido)
             self.mensaje = f"Pedido recogido (Peso: {pedido.weight})"
-            self.mensaje_tiempo = time.time()
+            self.mensaje_tiempo = reloj.ahora()
             return True
         else:
             self.mensaje = \
                 f"Capacidad insuficiente (Peso necesario: {pedido.weight})"
-            self.mensaje_tiempo = time.time()
+            self.mensaje_tiempo = reloj.ahora()
             return False
 
     def cancelar_ultimo_pedido(self):
@@ -207,11 +243,13 @@ class Jugador:
             self.mensaje = \
                 (f"Pedido cancelado (-4 reputación)"
                  f" Peso liberado: {pedido_cancelado.weight}")
-            self.mensaje_tiempo = time.time()
+            self.mensaje_tiempo = reloj.ahora()
+            # Liberó espacio y puede cambiar qué pedido se entrega primero.
+            self._avisar_observadores()
             return pedido_cancelado
         else:
             self.mensaje = "No hay pedidos para cancelar"
-            self.mensaje_tiempo = time.time()
+            self.mensaje_tiempo = reloj.ahora()
             return None
 
     def entregar_pedido(self):
@@ -226,20 +264,17 @@ class Jugador:
         if not self.inventario:
             return None
 
-        # Encuentra el pedido de mayor prioridad disponible para entregar.
-        max_priority = max(p.priority for p in self.inventario)
-        pedidos_prioridad_max =\
-            [p for p in self.inventario if p.priority == max_priority]
-
-        # Revisar si el jugador está en el dropoff.
-        # De algún pedido de mayor prioridad.
-        for p in pedidos_prioridad_max:
-            if [self.x, self.y] == p.dropoff:
+        # Solo se puede entregar un pedido de la mayor prioridad, y de
+        # los que tienen su dropoff en la casilla del jugador.
+        max_priority = self.inventario.prioridad_maxima()
+        for p in self.inventario.en_entrega(self.x, self.y):
+            if p.priority == max_priority:
                 self.inventario.remove(p)
 
                 # Calcular tiempo de entrega.
+                ahora = reloj.ahora()
                 tiempo_transcurrido =\
-                    time.time() - getattr(p, "tiempo_recogido", time.time())
+                    ahora - getattr(p, "tiempo_recogido", ahora)
 
                 # Sistema de reputación mejorado con bonos.
                 if tiempo_transcurrido <= 20:  # Entrega puntual (≤20s).
@@ -280,7 +315,7 @@ class Jugador:
                     self.mensaje += f" +{bonus} bonus reputación"
 
                 self.entregas_completadas += 1
-                self.mensaje_tiempo = time.time()
+                self.mensaje_tiempo = reloj.ahora()
 
                 # Sistema de rachas.
                 # (bonus cada 3 entregas puntuales consecutivas).
@@ -312,28 +347,20 @@ class Jugador:
             list[Pedido]: Lista de pedidos ordenados.
         """
         if criterio == 'prioridad':
-            return sorted(self.inventario,
-                          key=lambda p: p.priority, reverse=True)
+            return list(self.inventario.por_prioridad())
         else:
             return list(self.inventario)
 
     def obtener_inventario_por_plata(self):
-        """Ordena los pedidos según payout usando insertion sort.
+        """Pedidos ordenados según payout (el inventario ya los tiene así).
+
+        No cambia el orden de la cola: cancelar sigue quitando el pedido
+        más reciente.
 
         Returns:
             list[Pedido]: Inventario ordenado de mayor a menor payout.
         """
-        lista = list(self.inventario)
-        # Se pasa de queue a lista para hacer el ordenamiento.
-        for i in range(1, len(lista)):
-            actual = lista[i]
-            j = i - 1
-            while j >= 0 and lista[j].payout < actual.payout:
-                lista[j + 1] = lista[j]
-                j -= 1
-            lista[j + 1] = actual
-        self.inventario = deque(lista)  # Convierte nuevamente a queue.
-        return list(self.inventario)
+        return list(self.inventario.por_pago())
 
     def obtener_estadisticas(self):
         """Obtiene estadísticas del jugador para mostrar en la UI.
@@ -342,13 +369,14 @@ class Jugador:
             dict: Estadísticas como entregas, cancelaciones, peso,
                 eficiencia y puntualidad.
         """
+        peso = self.peso_total()
         return {
             'entregas_completadas': self.entregas_completadas,
             'cancelaciones': self.cancelaciones,
             'entregas_tempranas': self.entregas_tempranas,
             'entregas_tardias': self.entregas_tardias,
-            'peso_actual': self.peso_total(),
-            'capacidad_libre': self.capacidad - self.peso_total(),
+            'peso_actual': peso,
+            'capacidad_libre': self.capacidad - peso,
             'eficiencia': self.entregas_completadas / max(
                 1, self.entregas_completadas + self.cancelaciones),
             'puntualidad': self.entregas_tempranas / max(
@@ -1,41 +1,90 @@
 """
 jugador_cpu.py.
 
-Implementa el jugador CPU con tres niveles de dificultad:
+Implementa el jugador CPU con cuatro niveles de dificultad:
 - Fácil: Movimiento aleatorio
-- Media: Evaluación con heurísticas (Greedy/Expectimax)
+- Media: Expectimax con tabla de transposición y profundización iterativa
 - Difícil: Rutas óptimas con A*/Dijkstra
+- Experto (MCTS): Búsqueda de Monte Carlo sobre qué pedido recoger o
+  entregar después (ver mcts.py), siguiendo las rutas del nivel difícil
 """
 
-import random
 import time
+from heapq import nlargest
+import numpy as np
 from jugador import Jugador
+from costos import obtener_grilla, BLOQUEADO
+from hpa import obtener_grafo
+from jps import buscar_jps_por_partes
+from cache_rutas import obtener_cache
+from tareas import Tarea, completar, NODOS_POR_PASO
+from mcts import (BuscadorMCTS, EstadoSimulado, ModeloPartida, RECOGER,
+                  acciones, accion_voraz)
+from perfil import perfilador
+from azar import flujo
+from reloj import reloj
+
+_azar = flujo('jugador_cpu')
+
+# A partir de esta cantidad de casillas se usa búsqueda jerárquica (HPA*)
+UMBRAL_HPA = 64 * 64
+# Casillas de muestra donde el MCTS sortea pedidos nuevos
+CASILLAS_MODELO = 64
+# Distancia que el MCTS usa para un pedido al que no se puede llegar
+PASOS_SIN_RUTA = 10_000
+
+
+def _clave_pedido(pedido):
+    """Identifica un pedido en el árbol MCTS (estable entre cuadros).
+
+    Args:
+        pedido (Pedido): Pedido real.
+
+    Returns:
+        tuple: (pickup, dropoff, pago).
+    """
+    return tuple(pedido.pickup), tuple(pedido.dropoff), pedido.payout
 
 
 class JugadorCPU(Jugador):
     """Jugador controlado por IA con diferentes niveles de dificultad."""
 
-    def __init__(self, x, y, dificultad='facil', capacidad=10):
+    def __init__(self, x, y, dificultad='facil', capacidad=10,
+                 planificador='a_star'):
         """Inicializa la IA del jugador CPU.
 
         Args:
             x (int): Posición inicial en el eje X.
             y (int): Posición inicial en el eje Y.
-            dificultad (str): Nivel de IA ('facil', 'media', 'dificil').
+            dificultad (str): Nivel de IA ('facil', 'media', 'dificil',
+                'mcts').
             capacidad (int): Capacidad máxima de peso que puede cargar.
+            planificador (str): Algoritmo de rutas en mapas pequeños
+                ('a_star' o 'jps'). JPS tarda más que A* en los mapas
+                medidos (ver benchmarks/bench_jps.py); queda para comparar.
         """
         super().__init__(x, y, capacidad)
         self.dificultad = dificultad
+        self.planificador = planificador
+        self.nodos_expandidos = 0  # De la última búsqueda (ruta o Expectimax)
+        # Servicio compartido cuando hay varios CPU (ver planificador.py)
+        self.servicio = None
+        # SistemaClima del que se piden pronósticos (nivel difícil)
+        self.clima = None
+        self.pedido_asignado = None  # Elegido por el despachador global
+        # Recogidos y entregados desde el último turno (ver entregas.py)
+        self.recogidos = []
+        self.entregados = []
 
         # Variables para nivel fácil
         self.objetivo_actual = None  # Pedido objetivo o [x, y]
-        self.ultimo_cambio_objetivo = time.time()
-        self.tiempo_cambio_objetivo = random.randint(3, 6)  # Segundos
+        self.ultimo_cambio_objetivo = reloj.ahora()
+        self.tiempo_cambio_objetivo = _azar.randint(3, 6)  # Segundos
 
         # Control de velocidad de movimiento
         self.movimientos_por_segundo = 8  # Movimientos por segundo
         self.tiempo_entre_movimientos = 1.0 / self.movimientos_por_segundo
-        self.ultimo_movimiento = time.time()
+        self.ultimo_movimiento = reloj.ahora()
 
         # Detección de bucles (para evitar quedar atrapado)
         self.historial_posiciones = []  # Últimas 10 posiciones
@@ -44,15 +93,59 @@ class JugadorCPU(Jugador):
         self.tiempo_escape = 0
         self.duracion_escape = 2  # Segundos en modo escape
 
-        # Variables para nivel medio (implementar después)
-        self.horizonte_busqueda = 3  # Profundidad de búsqueda
+        # Variables para nivel medio (Expectimax)
+        self.horizonte_busqueda = 6  # Profundidad máxima de búsqueda
+        self.presupuesto_busqueda_ms = 4  # Tiempo máximo por movimiento
+        # Tabla de transposición: (x, y, profundidad, turno, objetivo)
+        self.tabla_transposicion = {}
+        self.max_entradas_tabla = 50000
+        self._mapa_tabla = None  # Mapa con el que se llenó la tabla
 
         # Variables para nivel difícil (implementar después)
         self.ruta_planeada = []  # Lista de posiciones [x, y]
+        # Puntos de la ruta jerárquica que aún no se refinan (mapas grandes)
+        self.ruta_abstracta = []
 
         self.clima_mult_anterior = 1.0
+        self.mult_planeado = 1.0  # Clima esperado con el que se planificó
         self.ultimo_replan = 0
 
+        # Planificación repartida entre cuadros (ver tareas.py)
+        self.tarea_plan = None  # Plan en curso; se sigue la ruta anterior
+        self.presupuesto_plan_us = 1500  # Por cuadro, con el reloj real
+        self.pasos_plan_por_cuadro = 4  # Por cuadro, con el reloj fijo
+        # En mapas grandes cada pedido candidato es una búsqueda HPA*:
+        # el plan solo busca rutas hacia los que más prometen
+        self.candidatos_hpa = 3
+        self._recorrido_plan = []  # Casillas pisadas durante el plan
+        # Refinamiento del siguiente tramo de la ruta jerárquica, también
+        # por partes; mientras dura el CPU espera en su casilla
+        self.tarea_tramo = None
+        # Planificador en otro proceso (ver proceso_ia.py), si se usa
+        self.proceso_plan = None
+
+        # Variables para nivel experto (MCTS, ver mcts.py)
+        self.rivales = 1  # Repartidores que compiten por los pedidos
+        self.presupuesto_cuadro_ms = 3  # Búsqueda por cuadro (reloj real)
+        self.presupuesto_decision_ms = 150  # Espera máxima para decidir
+        self.iteraciones_por_cuadro = 6  # Con el reloj fijo
+        self.visitas_decision = 12  # Visitas mínimas de cada acción posible
+        self.desvio = 1.3  # Pasos reales por casilla Manhattan (aprendido)
+        self.buscador = None
+        if dificultad == 'mcts':
+            self.buscador = BuscadorMCTS(semilla=_azar.getrandbits(32))
+        self._modelo_mcts = None
+        self._mapa_modelo = None  # Mapa con el que se armó el modelo
+        self._inicio_decision = None
+        self._inalcanzables = set()  # Claves de pedidos sin ruta
+        # Al grabar (ver grabacion.py): None decide solo, 'grabar' busca
+        # con el reloj real y anota cada decisión, 'repetir' usa la
+        # decisión grabada sin volver a buscar
+        self.modo_decisiones = None
+        self.decision_cuadro = None  # (acción, iteraciones) al grabar
+        self.decision_repetida = None  # Acción grabada para este cuadro
+        self._iteraciones_decision = 0  # buscador.iteraciones al decidir
+
     def actualizar(self, mapa, pedidos_activos,
                    clima_mult, consumo_clima_extra):
         """Actualiza el comportamiento del CPU según su dificultad.
@@ -66,12 +159,25 @@ class JugadorCPU(Jugador):
         # Recuperar resistencia (heredado de Jugador)
         self.recuperar()
 
+        # El MCTS sigue buscando en todos los cuadros, aun bloqueado
+        if self.dificultad == 'mcts':
+            with perfilador.tramo('mcts'):
+                self._pensar_mcts(mapa, pedidos_activos, consumo_clima_extra)
+
+        # El plan en curso avanza en todos los cuadros, aun bloqueado
+        if self.tarea_plan is not None:
+            with perfilador.tramo('planificacion'):
+                self._avanzar_plan(mapa, pedidos_activos)
+        if self.tarea_tramo is not None:
+            with perfilador.tramo('planificacion'):
+                self._avanzar_tramo(mapa)
+
         # Si está bloqueado por falta de resistencia, no hacer nada
         if self.bloqueado:
             return
 
         # Verificar si es tiempo de moverse (control de velocidad)
-        ahora = time.time()
+        ahora = reloj.ahora()
         if ahora - self.ultimo_movimiento < self.tiempo_entre_movimientos:
             return  # Todavía no es tiempo de moverse
 
@@ -87,6 +193,9 @@ class JugadorCPU(Jugador):
         elif self.dificultad == 'dificil':
             self._ia_dificil(mapa, pedidos_activos,
                              clima_mult, consumo_clima_extra)
+        elif self.dificultad == 'mcts':
+            self._ia_mcts(mapa, pedidos_activos,
+                          clima_mult, consumo_clima_extra)
 
     # ========================================
     # NIVEL FÁCIL
@@ -102,7 +211,7 @@ class JugadorCPU(Jugador):
             clima_mult (float): Multiplicador climático.
             consumo_clima_extra (float): Costo adicional por clima.
         """
-        ahora = time.time()
+        ahora = reloj.ahora()
 
         # Guardar posición actual en historial
         self.historial_posiciones.append((self.x, self.y))
@@ -137,20 +246,15 @@ class JugadorCPU(Jugador):
                 self.tiempo_cambio_objetivo):
             self._elegir_objetivo_aleatorio(pedidos_activos)
             self.ultimo_cambio_objetivo = ahora
-            self.tiempo_cambio_objetivo = random.randint(3, 6)
+            self.tiempo_cambio_objetivo = _azar.randint(3, 6)
 
-        # Intentar recoger pedido si estamos en un pickup
-        for pedido in list(pedidos_activos):
-            if [self.x, self.y] == pedido.pickup:
-                if self.recoger_pedido(pedido):
-                    pedidos_activos.remove(pedido)
-                    # Si recogimos nuestro objetivo, cambiar a entrega
-                    if self.objetivo_actual == pedido.pickup:
-                        self.objetivo_actual = pedido.dropoff
-
-        # Intentar entregar pedido
-        entregado = self.entregar_pedido()
-        if entregado:
+        # Pedidos recogidos y entregados al moverse (ver entregas.py)
+        recogidos, entregados = self._tomar_novedades()
+        for pedido in recogidos:
+            # Si recogimos nuestro objetivo, cambiar a entrega
+            if self.objetivo_actual == pedido.pickup:
+                self.objetivo_actual = pedido.dropoff
+        if entregados:
 
             # Cambiar objetivo después de entregar
             self.objetivo_actual = None
@@ -162,7 +266,7 @@ class JugadorCPU(Jugador):
             self._mover_aleatorio(mapa, clima_mult, consumo_clima_extra)
         elif self.objetivo_actual:
             # Modo normal: 70% hacia objetivo, 30% aleatorio
-            if random.random() < 0.7:
+            if _azar.random() < 0.7:
                 (self._mover_hacia_objetivo
                  (mapa, clima_mult, consumo_clima_extra))
             else:
@@ -179,14 +283,17 @@ class JugadorCPU(Jugador):
         """
         # Si tenemos pedidos en inventario, priorizar entregarlos
         if self.inventario:
-            pedido_prioritario = max(self.inventario, key=lambda p: p.priority)
+            pedido_prioritario = self.inventario.por_prioridad()[0]
             self.objetivo_actual = pedido_prioritario.dropoff
+            self._reservar(None)
             return
 
         # Si no, elegir un pedido disponible al azar
-        if pedidos_activos:
-            pedido_aleatorio = random.choice(pedidos_activos)
+        pedidos_libres = self._pedidos_libres(pedidos_activos)
+        if pedidos_libres:
+            pedido_aleatorio = _azar.choice(pedidos_libres)
             self.objetivo_actual = pedido_aleatorio.pickup
+            self._reservar(pedido_aleatorio)
         else:
             self.objetivo_actual = None
 
@@ -276,7 +383,7 @@ class JugadorCPU(Jugador):
         ]
 
         # Mezclar para verdadera aleatoriedad
-        random.shuffle(direcciones)
+        _azar.shuffle(direcciones)
 
         # Filtrar direcciones válidas (que no sean edificios ni fuera del mapa)
         direcciones_validas = []
@@ -327,7 +434,7 @@ class JugadorCPU(Jugador):
             consumo_clima_extra (float): Costo adicional.
         """
 
-        ahora = time.time()
+        ahora = reloj.ahora()
 
         # Guardar posición actual en historial
         self.historial_posiciones.append((self.x, self.y))
@@ -358,19 +465,14 @@ class JugadorCPU(Jugador):
                 self.tiempo_cambio_objetivo):
             self._elegir_objetivo_expectimax(pedidos_activos)
             self.ultimo_cambio_objetivo = ahora
-            self.tiempo_cambio_objetivo = random.randint(5, 9)
-
-        # Recoger pedido si estamos en pickup
-        for pedido in list(pedidos_activos):
-            if [self.x, self.y] == pedido.pickup:
-                if self.recoger_pedido(pedido):
-                    pedidos_activos.remove(pedido)
-                    if self.objetivo_actual == pedido.pickup:
-                        self.objetivo_actual = pedido.dropoff
+            self.tiempo_cambio_objetivo = _azar.randint(5, 9)
 
-        # Entregar pedido si estamos en dropoff
-        entregado = self.entregar_pedido()
-        if entregado:
+        # Pedidos recogidos y entregados al moverse (ver entregas.py)
+        recogidos, entregados = self._tomar_novedades()
+        for pedido in recogidos:
+            if self.objetivo_actual == pedido.pickup:
+                self.objetivo_actual = pedido.dropoff
+        if entregados:
 
             self.objetivo_actual = None
             self.historial_posiciones.clear()
@@ -379,40 +481,83 @@ class JugadorCPU(Jugador):
         if self.modo_escape:
             self._mover_aleatorio(mapa, clima_mult, consumo_clima_extra)
         elif self.objetivo_actual:
-            self._mover_expectimax(mapa, clima_mult,
-                                   consumo_clima_extra, profundidad=2)
+            self._mover_expectimax(mapa, clima_mult, consumo_clima_extra,
+                                   profundidad=self.horizonte_busqueda)
         else:
             self._mover_aleatorio(mapa, clima_mult, consumo_clima_extra)
 
     def _mover_expectimax(self, mapa, clima_mult,
-                          consumo_clima_extra, profundidad=2):
+                          consumo_clima_extra, profundidad=2,
+                          presupuesto_ms=None):
         """Selecciona el mejor movimiento usando Expectimax.
 
+        Aplica profundización iterativa: busca con profundidad 1, 2, ...
+        hasta ``profundidad`` mientras quede tiempo del presupuesto. Cada
+        iteración evalúa primero el mejor movimiento de la anterior, así
+        una iteración interrumpida sigue siendo útil.
+
         Args:
             mapa (list[list[str]]): Mapa del juego.
             clima_mult (float): Efecto del clima.
             consumo_clima_extra (float): Costo extra.
-            profundidad (int): Profundidad de búsqueda.
+            profundidad (int): Profundidad máxima de búsqueda.
+            presupuesto_ms (float | None): Tiempo máximo en milisegundos.
+                Si es None se usa ``presupuesto_busqueda_ms``.
         """
-        direcciones = [(0, -1), (0, 1), (-1, 0), (1, 0)]
-        # Arriba, abajo, izquierda, derecha
+        if presupuesto_ms is None:
+            presupuesto_ms = self.presupuesto_busqueda_ms
+        if reloj.fijo:
+            # Grabando o repitiendo: la búsqueda no puede depender de la
+            # velocidad de la máquina, se busca hasta la profundidad pedida
+            limite = float('inf')
+        else:
+            limite = time.perf_counter() + presupuesto_ms / 1000.0
 
-        mejor_valor = float('-inf')
-        mejor_movimiento = None
+        self._preparar_tabla_transposicion(mapa)
+        self.nodos_expandidos = 0
 
-        for dx, dy in direcciones:
+        # Movimientos válidos, ordenados por cercanía al objetivo
+        movimientos = []
+        for dx, dy in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
+            # Arriba, abajo, izquierda, derecha
             nx, ny = self.x + dx, self.y + dy
 
             if not (0 <= nx < len(mapa[0]) and 0 <= ny < len(mapa)):
                 continue
             if mapa[ny][nx] == "B":
                 continue
+            movimientos.append((dx, dy))
+        movimientos.sort(
+            key=lambda m: self._distancia_objetivo(self.x + m[0],
+                                                   self.y + m[1]))
 
-            valor = (self._expectimax_valor
-                     (mapa, nx, ny, profundidad - 1, es_turno_cpu=False))
-            if valor > mejor_valor:
-                mejor_valor = valor
-                mejor_movimiento = (dx, dy)
+        mejor_movimiento = None
+
+        for prof_actual in range(1, max(1, profundidad) + 1):
+            mejor_valor = float('-inf')
+            mejor_iteracion = None
+            completa = True
+
+            for i, (dx, dy) in enumerate(movimientos):
+                # Siempre se evalúa al menos el primer movimiento
+                if i > 0 and time.perf_counter() > limite:
+                    completa = False
+                    break
+                valor = self._expectimax_valor(
+                    mapa, self.x + dx, self.y + dy,
+                    prof_actual - 1, es_turno_cpu=False)
+                if valor > mejor_valor:
+                    mejor_valor = valor
+                    mejor_iteracion = (dx, dy)
+
+            if mejor_iteracion:
+                mejor_movimiento = mejor_iteracion
+                # Ordenar: el mejor movimiento va primero en la siguiente
+                movimientos.remove(mejor_iteracion)
+                movimientos.insert(0, mejor_iteracion)
+
+            if not completa or time.perf_counter() > limite:
+                break
 
         # Ejecutar mejor movimiento encontrado
         if mejor_movimiento:
@@ -421,9 +566,27 @@ class JugadorCPU(Jugador):
         else:
             self._mover_aleatorio(mapa, clima_mult, consumo_clima_extra)
 
+    def _preparar_tabla_transposicion(self, mapa):
+        """Vacía la tabla de transposición si ya no es válida.
+
+        Los valores dependen del mapa, así que se descartan al cambiar de
+        mapa o al superar el tamaño máximo.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+        """
+        if (self._mapa_tabla is not mapa or
+                len(self.tabla_transposicion) > self.max_entradas_tabla):
+            self.tabla_transposicion.clear()
+            self._mapa_tabla = mapa
+
     def _expectimax_valor(self, mapa, x, y, profundidad, es_turno_cpu):
         """Calcula el valor esperado de un estado para Expectimax.
 
+        Los resultados se guardan en la tabla de transposición, de modo
+        que un mismo estado (posición, profundidad, tipo de nodo y
+        objetivo) solo se evalúa una vez.
+
         Args:
             mapa (list[list[str]]): Mapa del juego.
             x (int): Posición X evaluada.
@@ -437,6 +600,13 @@ class JugadorCPU(Jugador):
         if profundidad == 0 or not self.objetivo_actual:
             return -self._distancia_objetivo(x, y)
 
+        clave = (x, y, profundidad, es_turno_cpu,
+                 tuple(self.objetivo_actual))
+        valor_guardado = self.tabla_transposicion.get(clave)
+        if valor_guardado is not None:
+            return valor_guardado
+        self.nodos_expandidos += 1
+
         if es_turno_cpu:
             # CPU elige el mejor movimiento (MAX node)
             mejor = float('-inf')
@@ -449,7 +619,7 @@ class JugadorCPU(Jugador):
                 valor = (self._expectimax_valor
                          (mapa, nx, ny, profundidad - 1, es_turno_cpu=False))
                 mejor = max(mejor, valor)
-            return mejor
+            resultado = mejor
         else:
             # Turno "aleatorio" (CHANCE node):
             # se asume que puede moverse a cualquiera de 4 direcciones
@@ -465,9 +635,12 @@ class JugadorCPU(Jugador):
                 total += (self._expectimax_valor
                           (mapa, nx, ny, profundidad - 1, es_turno_cpu=True))
                 count += 1
-            return total / count if count > 0 else\
+            resultado = total / count if count > 0 else\
                 -self._distancia_objetivo(x, y)
 
+        self.tabla_transposicion[clave] = resultado
+        return resultado
+
     def _distancia_objetivo(self, x, y):
         """Calcula la distancia al objetivo actual.
 
@@ -490,10 +663,12 @@ class JugadorCPU(Jugador):
             pedidos_activos (list[Pedido]): Pedidos disponibles.
         """
         if self.inventario:
-            pedido_prioritario = max(self.inventario, key=lambda p: p.priority)
+            pedido_prioritario = self.inventario.por_prioridad()[0]
             self.objetivo_actual = pedido_prioritario.dropoff
+            self._reservar(None)
             return
 
+        pedidos_activos = self._pedidos_libres(pedidos_activos)
         if not pedidos_activos:
             self.objetivo_actual = None
             return
@@ -506,6 +681,83 @@ class JugadorCPU(Jugador):
 
         mejor_pedido = max(pedidos_activos, key=valor)
         self.objetivo_actual = mejor_pedido.pickup
+        self._reservar(mejor_pedido)
+
+    def al_recoger(self, pedido):
+        """Anota el pedido para que la IA reaccione en su turno.
+
+        Args:
+            pedido (Pedido): Pedido recogido.
+        """
+        self.recogidos.append(pedido)
+
+    def al_entregar(self, pedido):
+        """Anota el pedido para que la IA reaccione en su turno.
+
+        Args:
+            pedido (Pedido): Pedido entregado.
+        """
+        self.entregados.append(pedido)
+        print(f"CPU entregó pedido - Puntaje: {self.puntaje},"
+              f" Reputación: {self.reputacion}")
+
+    def _tomar_novedades(self):
+        """Devuelve y vacía lo recogido y entregado desde el último turno.
+
+        Returns:
+            tuple[list[Pedido], list[Pedido]]: Recogidos y entregados.
+        """
+        recogidos, entregados = self.recogidos, self.entregados
+        self.recogidos, self.entregados = [], []
+        return recogidos, entregados
+
+    def _pedidos_libres(self, pedidos_activos):
+        """Filtra los pedidos que otro CPU ya reservó.
+
+        Args:
+            pedidos_activos (list[Pedido]): Pedidos disponibles.
+
+        Returns:
+            list[Pedido]: Pedidos que este CPU puede elegir.
+        """
+        if self.servicio is None:
+            return pedidos_activos
+        # El pedido del despachador global tiene prioridad
+        if (self.pedido_asignado is not None and
+                self.pedido_asignado in pedidos_activos):
+            return [self.pedido_asignado]
+        return [p for p in pedidos_activos
+                if self.servicio.disponible(p, self)]
+
+    def recibir_asignacion(self, pedido):
+        """Cambia el pedido asignado por el despachador global.
+
+        Descarta el objetivo y la ruta actuales para que el CPU
+        replanifique hacia el nuevo pedido en su próximo turno.
+
+        Args:
+            pedido (Pedido | None): Pedido asignado, o None si no hay.
+        """
+        self.pedido_asignado = pedido
+        self.objetivo_actual = pedido.pickup if pedido is not None else None
+        self.ruta_planeada = []
+        self.ruta_abstracta = []
+        self._cancelar_tramo()
+        self._cancelar_plan()
+
+    def _reservar(self, pedido):
+        """Reserva un pedido en el servicio compartido, si hay uno.
+
+        Args:
+            pedido (Pedido | None): Pedido elegido, o None para liberar
+                la reserva actual.
+        """
+        if self.servicio is None:
+            return
+        if pedido is None:
+            self.servicio.liberar_de(self)
+        else:
+            self.servicio.reservar(pedido, self)
 
     # ========================================
     # NIVEL DIFÍCIL - A*
@@ -521,13 +773,19 @@ class JugadorCPU(Jugador):
             clima_mult (float): Modificador climático.
             consumo_clima_extra (float): Penalización climática.
         """
-        ahora = time.time()
+        ahora = reloj.ahora()
 
         # Guardar posición actual en historial
         self.historial_posiciones.append((self.x, self.y))
         if len(self.historial_posiciones) > self.max_historial:
             self.historial_posiciones.pop(0)
 
+        # En mapas grandes, refinar el siguiente tramo de la ruta
+        # jerárquica (por partes, en este cuadro y los siguientes)
+        if (self.tarea_tramo is None and not self.ruta_planeada
+                and self.ruta_abstracta):
+            self._avanzar_tramo(mapa)
+
         # Verificar si necesita replanificar ruta
         necesita_replanificar = (
                 not self.ruta_planeada or  # No hay ruta
@@ -535,66 +793,107 @@ class JugadorCPU(Jugador):
                 ahora - self.ultimo_replan > 10  # Cada 10 segundos
         )
 
-        cambio_clima = abs(clima_mult - self.clima_mult_anterior) > 0.1
+        # Con pronóstico solo se replanifica si el clima esperado para lo
+        # que falta de la ruta se aleja del que se usó al planificar
+        if self.clima is not None:
+            esperado = self._mult_esperado(len(self.ruta_planeada),
+                                           clima_mult)
+            cambio_clima = abs(esperado - self.mult_planeado) > 0.1
+        else:
+            cambio_clima = abs(clima_mult - self.clima_mult_anterior) > 0.1
         if cambio_clima:
             necesita_replanificar = True
 
         self.clima_mult_anterior = clima_mult
 
-        # Intentar recoger pedido si estamos en un pickup
-        for pedido in list(pedidos_activos):
-            if [self.x, self.y] == pedido.pickup:
-                if self.recoger_pedido(pedido):
-                    pedidos_activos.remove(pedido)
-                    necesita_replanificar = True
-                    # Replanifica despues de recoger
-
-        # Intentar entregar pedido
-        entregado = self.entregar_pedido()
-        if entregado:
-
-            necesita_replanificar = True  # Replanificar después de entregar
+        # Replanificar si recogió o entregó al moverse (ver entregas.py);
+        # un plan en curso ya no sirve porque cambió el inventario
+        recogidos, entregados = self._tomar_novedades()
+        if recogidos or entregados:
+            necesita_replanificar = True
+            self._cancelar_plan()
 
-        # Elegir mejor objetivo y planificar ruta
-        if necesita_replanificar:
-            self._planificar_estrategia_entregas(
-                mapa, pedidos_activos, clima_mult, consumo_clima_extra
-            )
+        # Elegir mejor objetivo y planificar ruta, por partes en los
+        # próximos cuadros (mientras tanto se sigue la ruta anterior)
+        if necesita_replanificar and self.tarea_plan is None:
+            self._iniciar_plan(mapa, pedidos_activos, clima_mult,
+                               consumo_clima_extra)
             self.ultimo_replan = ahora
 
         # Ejecutar siguiente paso de la ruta
         if self.ruta_planeada and len(self.ruta_planeada) > 0:
-            siguiente_pos = self.ruta_planeada[0]
-
-            # Calcular dirección hacia siguiente posición
-            dx = 0 if siguiente_pos[0] == self.x else\
-                (1 if siguiente_pos[0] > self.x else -1)
-            dy = 0 if siguiente_pos[1] == self.y else\
-                (1 if siguiente_pos[1] > self.y else -1)
-
-            # Intentar moverse
-            if self.mover(dx, dy, mapa, clima_mult, consumo_clima_extra):
-                # Si el movimiento fue exitoso y
-                # llegamos a la siguiente posición
-                if (self.x, self.y) == siguiente_pos:
-                    self.ruta_planeada.pop(0)
-            else:
-                # Si no puede moverse, replanificar
-                self.ruta_planeada = []
-        else:
+            self._seguir_ruta(mapa, clima_mult, consumo_clima_extra)
+        elif self.tarea_plan is None and self.tarea_tramo is None:
             # Sin ruta, moverse aleatorio
             self._mover_aleatorio(mapa, clima_mult, consumo_clima_extra)
 
+    def _seguir_ruta(self, mapa, clima_mult, consumo_clima_extra):
+        """Da el siguiente paso de `ruta_planeada`.
+
+        Si el paso falla se descarta la ruta para que se replanifique.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            clima_mult (float): Modificador climático.
+            consumo_clima_extra (float): Penalización climática.
+        """
+        siguiente_pos = self.ruta_planeada[0]
+
+        # Calcular dirección hacia siguiente posición
+        dx = 0 if siguiente_pos[0] == self.x else\
+            (1 if siguiente_pos[0] > self.x else -1)
+        dy = 0 if siguiente_pos[1] == self.y else\
+            (1 if siguiente_pos[1] > self.y else -1)
+
+        # Intentar moverse
+        if self.mover(dx, dy, mapa, clima_mult, consumo_clima_extra):
+            # Si el movimiento fue exitoso y
+            # llegamos a la siguiente posición
+            if (self.x, self.y) == siguiente_pos:
+                self.ruta_planeada.pop(0)
+        else:
+            # Si no puede moverse, replanificar
+            self.ruta_planeada = []
+            self.ruta_abstracta = []
+
     def _planificar_estrategia_entregas(self, mapa, pedidos_activos,
                                         clima_mult, consumo_clima_extra):
         """Planifica la mejor estrategia para recoger/entregar pedidos.
 
+        Corre todo el plan en el cuadro actual; el nivel difícil lo
+        reparte entre cuadros con `_iniciar_plan`.
+
         Args:
             mapa (list[list[str]]): Mapa.
             pedidos_activos (list[Pedido]): Lista de pedidos.
             clima_mult (float): Velocidad por clima.
             consumo_clima_extra (float): Penalización.
         """
+        self._recorrido_plan = [(self.x, self.y)]
+        self._aplicar_plan(mapa, pedidos_activos, completar(
+            self._plan_entregas(mapa, pedidos_activos, clima_mult,
+                                consumo_clima_extra)))
+
+    def _plan_entregas(self, mapa, pedidos_activos, clima_mult,
+                       consumo_clima_extra):
+        """Elige pedido y ruta sin aplicarlos (generador, ver tareas.py).
+
+        Cede entre búsquedas de ruta y dentro de cada A*. Usa la
+        posición, la resistencia y el inventario del momento en que
+        empieza.
+
+        Args:
+            mapa (list[list[str]]): Mapa.
+            pedidos_activos (list[Pedido]): Lista de pedidos.
+            clima_mult (float): Velocidad por clima.
+            consumo_clima_extra (float): Penalización.
+
+        Returns:
+            tuple: (pedido a reservar o None, ruta, multiplicador de
+            clima esperado, posición de partida).
+        """
+        inicio = (self.x, self.y)
+
         # Prioridad 1: Entregar pedidos en inventario
         if self.inventario:
             mejor_pedido = max(
@@ -603,80 +902,439 @@ class JugadorCPU(Jugador):
             )
             destino = tuple(mejor_pedido.dropoff)
 
-            # Calcular ruta con A*
-            self.ruta_planeada = self._a_star(
-                mapa, (self.x, self.y),
-                destino, clima_mult, consumo_clima_extra
+            # Calcular ruta con A* (o HPA* en mapas grandes)
+            ruta, _ = yield from self._buscar_ruta_por_partes(
+                mapa, inicio, destino, clima_mult, consumo_clima_extra
             )
 
-            if self.ruta_planeada:
-                print(f"CPU va en camino a recoge un pedido pipi:"
-                      f" {len(self.ruta_planeada)} pasos")
-            return
+            return (None, ruta, self._mult_esperado(len(ruta), clima_mult),
+                    inicio)
 
         # Prioridad 2: Recoger el mejor pedido disponible
+        pedidos_activos = self._pedidos_libres(pedidos_activos)
         if not pedidos_activos:
-            self.ruta_planeada = []
-            return
+            return None, [], clima_mult, inicio
 
         # Evaluar todos los pedidos con función de valor completa
         mejor_valor = float('-inf')
         mejor_pedido = None
         mejor_ruta = []
-
-        for pedido in pedidos_activos:
-            # Verificar capacidad
-            if self.peso_total() + pedido.weight > self.capacidad:
-                continue
-
+        mejor_mult = clima_mult
+
+        # Pedidos que caben en el inventario
+        peso_actual = self.peso_total()
+        candidatos = [p for p in pedidos_activos
+                      if peso_actual + p.weight <= self.capacidad]
+
+        # En mapas grandes, acotar las búsquedas con el valor que daría
+        # la distancia Manhattan (nunca mayor que la real)
+        if self._usa_hpa(mapa) and len(candidatos) > self.candidatos_hpa:
+            candidatos = nlargest(
+                self.candidatos_hpa, candidatos,
+                key=lambda p: self._valor_pedido(
+                    p, abs(p.pickup[0] - inicio[0])
+                    + abs(p.pickup[1] - inicio[1]), clima_mult)[0])
+
+        # Con servicio compartido, todas las rutas salen de una consulta
+        rutas = None
+        if self.servicio is not None:
+            rutas = yield from self.servicio.rutas_hacia_por_partes(
+                self, mapa, [tuple(p.pickup) for p in candidatos],
+                clima_mult, consumo_clima_extra)
+
+        for pedido in candidatos:
             destino = tuple(pedido.pickup)
 
-            # Calcular ruta con A*
-            ruta = self._a_star(
-                mapa, (self.x, self.y),
-                destino, clima_mult, consumo_clima_extra
-            )
+            # Calcular ruta con A* (o HPA* en mapas grandes)
+            if rutas is not None:
+                ruta, distancia = rutas[destino]
+            else:
+                ruta, distancia = yield from self._buscar_ruta_por_partes(
+                    mapa, inicio, destino, clima_mult, consumo_clima_extra
+                )
 
             if not ruta:
                 continue
 
-            # Calcular valor del pedido
-            distancia = len(ruta)
+            valor, mult_ruta = self._valor_pedido(pedido, distancia,
+                                                  clima_mult)
+            if valor > mejor_valor:
+                mejor_valor = valor
+                mejor_pedido = pedido
+                mejor_ruta = ruta
+                mejor_mult = mult_ruta
+
+        if mejor_pedido and mejor_ruta:
+            return mejor_pedido, mejor_ruta, mejor_mult, inicio
+        return None, [], clima_mult, inicio
 
-            # Función de valor: payout / (distancia + 1) * factores
-            valor = pedido.payout / (distancia + 1)
+    def _valor_pedido(self, pedido, distancia, clima_mult):
+        """Función de valor de `_plan_entregas` para recoger un pedido.
 
-            # Bonus por prioridad
-            if pedido.priority >= 1:
-                valor *= 1.5
+        Args:
+            pedido (Pedido): Pedido candidato.
+            distancia (float): Pasos estimados hasta el pickup.
+            clima_mult (float): Velocidad por clima.
 
-            # Penalización por clima malo
-            if clima_mult < 0.85:
-                valor *= 0.8
+        Returns:
+            tuple[float, float]: Valor del pedido y multiplicador de
+            clima esperado durante el viaje.
+        """
+        # Función de valor: payout / (distancia + 1) * factores
+        valor = pedido.payout / (distancia + 1)
 
-            # Bonus por resistencia alta (puede tomar pedidos lejanos)
-            if self.resistencia > 70:
-                valor *= 1.1
+        # Bonus por prioridad
+        if pedido.priority >= 1:
+            valor *= 1.5
 
-            # Penalización si resistencia baja (preferir pedidos cercanos)
-            if self.resistencia < 30:
-                if distancia > 10:
-                    valor *= 0.5
+        # Penalización por clima malo (esperado durante el viaje)
+        mult_ruta = self._mult_esperado(distancia, clima_mult)
+        if mult_ruta < 0.85:
+            valor *= 0.8
 
-            if valor > mejor_valor:
-                mejor_valor = valor
-                mejor_pedido = pedido
-                mejor_ruta = ruta
+        # Bonus por resistencia alta (puede tomar pedidos lejanos)
+        if self.resistencia > 70:
+            valor *= 1.1
 
-        if mejor_pedido and mejor_ruta:
-            self.ruta_planeada = mejor_ruta
+        # Penalización si resistencia baja (preferir pedidos cercanos)
+        if self.resistencia < 30:
+            if distancia > 10:
+                valor *= 0.5
+
+        return valor, mult_ruta
+
+    def _aplicar_plan(self, mapa, pedidos_activos, plan, por_partes=False):
+        """Fija la ruta y la reserva que eligió `_plan_entregas`.
+
+        Si el CPU se movió mientras se planificaba, la ruta se empalma
+        con lo recorrido desde la posición de partida. Si el pedido
+        elegido ya no está libre, se descarta el plan y se replanifica.
+
+        Args:
+            mapa (list[list[str]]): Mapa.
+            pedidos_activos (list[Pedido]): Lista de pedidos.
+            plan (tuple | None): Resultado de `_plan_entregas`; None si
+                la tarea se descartó.
+            por_partes (bool): Refinar el primer tramo en los próximos
+                cuadros (ver `_fijar_ruta`).
+        """
+        recorrido, self._recorrido_plan = self._recorrido_plan, []
+        if plan is None:
+            self.ultimo_replan = 0
+            return
+        pedido, ruta, mult, inicio = plan
+        if pedido is not None and (
+                pedido not in pedidos_activos or
+                (self.servicio is not None and
+                 not self.servicio.disponible(pedido, self))):
+            self.ultimo_replan = 0
+            return
+
+        # En mapas grandes el tramo se refina desde la posición actual
+        if ruta and not self._usa_hpa(mapa) and (self.x, self.y) != inicio:
+            ruta = self._empalmar_ruta(recorrido, ruta)
+        self._fijar_ruta(mapa, ruta, por_partes)
+        self._reservar(pedido)
+        self.mult_planeado = mult
+
+    def _empalmar_ruta(self, recorrido, ruta):
+        """Une lo recorrido durante el plan con la ruta planeada.
+
+        Vuelve por lo recorrido hasta la última casilla que está en la
+        ruta y sigue la ruta desde ahí.
+
+        Args:
+            recorrido (list[tuple[int, int]]): Casillas pisadas desde la
+                posición de partida (incluida) hasta la actual.
+            ruta (list[tuple[int, int]]): Ruta desde la posición de
+                partida, sin incluirla.
+
+        Returns:
+            list[tuple[int, int]]: Ruta desde la posición actual; vacía
+            si lo recorrido no empieza donde empieza la ruta.
+        """
+        if not recorrido or recorrido[-1] != (self.x, self.y):
+            return []
+        completa = [recorrido[0]] + ruta
+        indices = {pos: i for i, pos in enumerate(completa)}
+        for k in range(len(recorrido) - 1, -1, -1):
+            i = indices.get(recorrido[k])
+            if i is not None:
+                return recorrido[k:-1][::-1] + completa[i + 1:]
+        return []
+
+    def _iniciar_plan(self, mapa, pedidos_activos, clima_mult,
+                      consumo_clima_extra):
+        """Empieza un plan que se avanza por partes en cada cuadro.
+
+        Con un planificador en otro proceso el plan se pide ahí y en
+        cada cuadro solo se revisa si llegó la respuesta.
+
+        Args:
+            mapa (list[list[str]]): Mapa.
+            pedidos_activos (list[Pedido]): Lista de pedidos.
+            clima_mult (float): Velocidad por clima.
+            consumo_clima_extra (float): Penalización.
+        """
+        self._cancelar_plan()
+        if self.proceso_plan is not None and self.proceso_plan.activo:
+            self.tarea_plan = self.proceso_plan.solicitar(
+                self, self._pedidos_libres(pedidos_activos), clima_mult,
+                consumo_clima_extra)
+        else:
+            self.tarea_plan = Tarea(self._plan_entregas(
+                mapa, pedidos_activos, clima_mult, consumo_clima_extra))
+
+    def _avanzar_plan(self, mapa, pedidos_activos):
+        """Avanza el plan en curso dentro del presupuesto del cuadro.
+
+        Args:
+            mapa (list[list[str]]): Mapa.
+            pedidos_activos (list[Pedido]): Lista de pedidos.
+        """
+        posicion = (self.x, self.y)
+        if not self._recorrido_plan or self._recorrido_plan[-1] != posicion:
+            self._recorrido_plan.append(posicion)
+        tarea = self.tarea_plan
+        tarea.avanzar(self.presupuesto_plan_us, self.pasos_plan_por_cuadro)
+        if tarea.terminada:
+            self.tarea_plan = None
+            self._aplicar_plan(mapa, pedidos_activos, tarea.resultado,
+                               por_partes=True)
+
+    def _cancelar_plan(self):
+        """Descarta el plan en curso, si hay uno."""
+        if self.tarea_plan is not None:
+            self.tarea_plan.cancelar()
+            self.tarea_plan = None
+        self._recorrido_plan = []
+
+    def _mult_esperado(self, pasos, clima_mult):
+        """Multiplicador de clima esperado para un viaje de `pasos` casillas.
+
+        Sin sistema de clima asignado devuelve el multiplicador actual.
+        El tiempo del viaje se estima con la velocidad de la IA y el clima
+        actual.
+
+        Args:
+            pasos (float): Largo del viaje en casillas.
+            clima_mult (float): Multiplicador climático actual.
+
+        Returns:
+            float: Multiplicador promedio esperado durante el viaje.
+        """
+        if self.clima is None or pasos <= 0:
+            return clima_mult
+        segundos = pasos / (self.movimientos_por_segundo
+                            * max(clima_mult, 0.1))
+        return self.clima.pronostico(segundos)['multiplicador']
+
+    def _usa_hpa(self, mapa):
+        """Indica si el mapa es lo bastante grande para usar HPA*.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+
+        Returns:
+            bool: True si se debe usar búsqueda jerárquica.
+        """
+        return len(mapa) * len(mapa[0]) >= UMBRAL_HPA
+
+    def _buscar_ruta(self, mapa, inicio, destino, clima_mult,
+                     consumo_clima_extra):
+        """Busca una ruta con A* o, en mapas grandes, con HPA*.
+
+        Con HPA* la ruta devuelta son los puntos intermedios del grafo
+        abstracto, que luego se refinan por tramos con `_fijar_ruta`.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            inicio (tuple[int, int]): Posición inicial.
+            destino (tuple[int, int]): Meta.
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Penalización.
+
+        Returns:
+            tuple[list[tuple[int, int]], float]: Ruta (o puntos
+            intermedios) y distancia estimada en pasos.
+        """
+        return completar(self._buscar_ruta_por_partes(
+            mapa, inicio, destino, clima_mult, consumo_clima_extra))
+
+    def _buscar_ruta_por_partes(self, mapa, inicio, destino, clima_mult,
+                                consumo_clima_extra):
+        """Versión reanudable de `_buscar_ruta` (ver tareas.py).
+
+        Cede después de cada búsqueda y, dentro de ella (A*, JPS o
+        HPA*), cada `NODOS_POR_PASO` nodos. Una ruta que ya está en la
+        caché no cede.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            inicio (tuple[int, int]): Posición inicial.
+            destino (tuple[int, int]): Meta.
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Penalización.
+
+        Returns:
+            tuple[list[tuple[int, int]], float]: Ruta (o puntos
+            intermedios) y distancia estimada en pasos.
+        """
+        # Destino en otra componente conexa: sin camino, sin buscar
+        if not obtener_grilla(mapa).conectadas(inicio, destino):
+            self.nodos_expandidos = 0
+            return [], 0
+
+        if not self._usa_hpa(mapa):
+            # JPS no depende del clima; A* usa la clave de la grilla
+            if self.planificador == 'jps':
+                clave = ('jps',)
+            else:
+                clave = ('a_star',) + obtener_grilla(mapa).clave(
+                    clima_mult, consumo_clima_extra, self.resistencia)
+
+            cache = obtener_cache(mapa)
+            ruta = cache.obtener(inicio, destino, clave)
+            if ruta is not None:
+                self.nodos_expandidos = 0
+                return ruta, len(ruta)
 
+            if self.planificador == 'jps':
+                ruta = yield from self._jps_por_partes(mapa, inicio, destino)
+            else:
+                ruta = yield from self._a_star_por_partes(
+                    mapa, inicio, destino, clima_mult, consumo_clima_extra)
+            yield
+            cache.guardar(inicio, destino, clave, ruta)
+            return list(ruta), len(ruta)
+
+        if not (0 <= destino[0] < len(mapa[0]) and
+                0 <= destino[1] < len(mapa)):
+            self.nodos_expandidos = 0
+            return [], 0
+        # El grafo usa los costos base: los puntos sirven con cualquier
+        # clima, y el final de una ruta guardada también (ver caché)
+        cache = obtener_cache(mapa)
+        puntos = cache.obtener(inicio, destino, ('hpa',))
+        if puntos is None:
+            grafo = obtener_grafo(mapa)
+            resultado = yield from grafo.buscar_por_partes(inicio, destino)
+            self.nodos_expandidos = grafo.nodos_expandidos
+            yield
+            puntos = resultado[1] if resultado else []
+            cache.guardar(inicio, destino, ('hpa',), puntos)
+            puntos = list(puntos)
         else:
+            self.nodos_expandidos = 0
+
+        # Pasos estimados: Manhattan entre puntos seguidos, que están
+        # a lo sumo un sector de distancia
+        distancia, anterior = 0, inicio
+        for punto in puntos:
+            distancia += (abs(punto[0] - anterior[0])
+                          + abs(punto[1] - anterior[1]))
+            anterior = punto
+        return puntos, distancia
+
+    def _fijar_ruta(self, mapa, ruta, por_partes=False):
+        """Asigna la ruta a seguir por el CPU.
+
+        En mapas grandes solo se refina el primer tramo; los demás se
+        refinan cuando el CPU termina el anterior.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            ruta (list[tuple[int, int]]): Resultado de `_buscar_ruta`.
+            por_partes (bool): En mapas grandes, dejar el primer tramo
+                a `_avanzar_tramo` en lugar de refinarlo ya.
+        """
+        if self._usa_hpa(mapa):
+            self._cancelar_tramo()
+            self.ruta_abstracta = list(ruta)
             self.ruta_planeada = []
+            if not por_partes:
+                self._refinar_siguiente_tramo(mapa)
+        else:
+            self.ruta_abstracta = []
+            self.ruta_planeada = ruta
+
+    def _refinar_siguiente_tramo(self, mapa):
+        """Convierte el siguiente punto de la ruta jerárquica en pasos.
+
+        Si el tramo no se puede refinar (por ejemplo, si el CPU se salió
+        de la ruta) se descarta la ruta para forzar una replanificación.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+        """
+        completar(self._refinar_siguiente_tramo_por_partes(mapa))
+
+    def _refinar_siguiente_tramo_por_partes(self, mapa):
+        """Versión reanudable de `_refinar_siguiente_tramo`.
+
+        El punto se quita de `ruta_abstracta` recién al terminar, así
+        una tarea descartada (ver `Tarea.__getstate__`) se puede volver
+        a empezar.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+        """
+        grafo = obtener_grafo(mapa)
+        while self.ruta_abstracta and not self.ruta_planeada:
+            punto = self.ruta_abstracta[0]
+            if punto == (self.x, self.y):
+                self.ruta_abstracta.pop(0)
+                continue
+            tramo = yield from grafo.refinar_por_partes((self.x, self.y),
+                                                        punto)
+            self.ruta_abstracta.pop(0)
+            self.ruta_planeada = tramo
+            if not tramo:
+                self.ruta_abstracta = []
+
+    def _avanzar_tramo(self, mapa):
+        """Refina el siguiente tramo dentro del presupuesto del cuadro.
+
+        Usa el mismo presupuesto que el plan (`presupuesto_plan_us`,
+        `pasos_plan_por_cuadro`) y empieza la tarea si no hay una.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+        """
+        if self.tarea_tramo is None:
+            self.tarea_tramo = Tarea(
+                self._refinar_siguiente_tramo_por_partes(mapa))
+        tarea = self.tarea_tramo
+        tarea.avanzar(self.presupuesto_plan_us, self.pasos_plan_por_cuadro)
+        if tarea.terminada:
+            self.tarea_tramo = None
+
+    def _cancelar_tramo(self):
+        """Descarta el refinamiento en curso, si hay uno."""
+        if self.tarea_tramo is not None:
+            self.tarea_tramo.cancelar()
+            self.tarea_tramo = None
 
     def _a_star(self, mapa, inicio, destino, clima_mult, consumo_clima_extra):
         """Calcula una ruta óptima usando A*.
 
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            inicio (tuple[int, int]): Posición inicial.
+            destino (tuple[int, int]): Meta.
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Penalización.
+
+        Returns:
+            list[tuple[int, int]]: Lista de posiciones representando la ruta.
+        """
+        return completar(self._a_star_por_partes(
+            mapa, inicio, destino, clima_mult, consumo_clima_extra))
+
+    def _a_star_por_partes(self, mapa, inicio, destino, clima_mult,
+                           consumo_clima_extra):
+        """A* reanudable: cede cada `NODOS_POR_PASO` nodos expandidos.
+
         Args:
             mapa (list[list[str]]): Mapa del juego.
             inicio (tuple[int, int]): Posición inicial.
@@ -689,12 +1347,20 @@ class JugadorCPU(Jugador):
         """
         from heapq import heappush, heappop
 
+        self.nodos_expandidos = 0
+
         # Verificar que destino sea válido
         if destino[1] >= len(mapa) or destino[0] >= len(mapa[0]):
             return []
         if mapa[destino[1]][destino[0]] == "B":
             return []
 
+        # Costos por casilla según clima y resistencia (en caché)
+        grilla = obtener_grilla(mapa)
+        costos = grilla.costos(clima_mult, consumo_clima_extra,
+                               self.resistencia)
+        ancho, alto = grilla.ancho, grilla.alto
+
         # Conjuntos y estructuras
         frontera = []
         contador = 0
@@ -720,6 +1386,7 @@ class JugadorCPU(Jugador):
             _, _, actual = heappop(frontera)
 
             if actual == destino:
+                self.nodos_expandidos = len(visitados)
                 return self._reconstruir_camino(vino_de, actual)
 
             # Skip
@@ -727,24 +1394,23 @@ class JugadorCPU(Jugador):
                 continue
 
             visitados.add(actual)
+            if len(visitados) % NODOS_POR_PASO == 0:
+                yield
 
             for dx, dy in direcciones:
                 vecino = (actual[0] + dx, actual[1] + dy)
 
                 # Verifica límites
-                if not (0 <= vecino[0] < len(mapa[0]) and
-                        0 <= vecino[1] < len(mapa)):
+                if not (0 <= vecino[0] < ancho and 0 <= vecino[1] < alto):
                     continue
 
+                # Costo del movimiento leído de la grilla
+                costo_movimiento = costos[vecino[1] * ancho + vecino[0]]
+
                 # Verificar que no sea edificio
-                if mapa[vecino[1]][vecino[0]] == "B":
+                if costo_movimiento == BLOQUEADO:
                     continue
 
-                # Calcular costo del movimiento
-                costo_movimiento = self._calcular_costo_arista(
-                    mapa, actual, vecino, clima_mult, consumo_clima_extra
-                )
-
                 # Calcular g_score tentativo
                 tentativo_g = g_score[actual] + costo_movimiento
 
@@ -759,50 +1425,62 @@ class JugadorCPU(Jugador):
                     contador += 1
 
         # No se encontró ruta
+        self.nodos_expandidos = len(visitados)
         return []
 
+    def _jps(self, mapa, inicio, destino):
+        """Calcula una ruta usando Jump Point Search (ver jps.py).
+
+        Como el clima y la resistencia escalan todos los costos por el
+        mismo factor, no cambian la ruta y no se pasan a la búsqueda.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            inicio (tuple[int, int]): Posición inicial.
+            destino (tuple[int, int]): Meta.
+
+        Returns:
+            list[tuple[int, int]]: Lista de posiciones representando la ruta.
+        """
+        return completar(self._jps_por_partes(mapa, inicio, destino))
+
+    def _jps_por_partes(self, mapa, inicio, destino):
+        """JPS reanudable: cede cada `NODOS_POR_PASO` casillas de trabajo.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            inicio (tuple[int, int]): Posición inicial.
+            destino (tuple[int, int]): Meta.
+
+        Returns:
+            list[tuple[int, int]]: Lista de posiciones representando la ruta.
+        """
+        ruta, expandidos, revisadas = yield from buscar_jps_por_partes(
+            mapa, inicio, destino)
+        # Las casillas que recorren los saltos también son trabajo
+        self.nodos_expandidos = expandidos + revisadas
+        return ruta
+
     def _calcular_costo_arista(self, mapa, desde, hacia, clima_mult,
                                consumo_clima_extra):
         """Calcula el costo de mover de un nodo a otro.
 
-                Args:
-                    mapa (list[list[str]]): Mapa del juego.
-                    desde (tuple[int, int]): Nodo origen.
-                    hacia (tuple[int, int]): Nodo destino.
-                    clima_mult (float): Multiplicador climático.
-                    consumo_clima_extra (float): Costo adicional.
-
-                Returns:
-                    float: Costo total del movimiento.
-                """
-        costo = 1.0
-
-        # Factor por tipo de superficie
-        tile_destino = mapa[hacia[1]][hacia[0]]
-        surface_weights = {
-            'C': 1.0,  # Calle
-            'P': 0.95,  # Parque (más rápido)
-            'B': 999.0  # Edificio (bloqueado)
-        }
-        surface_weight = surface_weights.get(tile_destino, 1.0)
-
-        # Ajustar costo por superficie (invertir: menor peso = menor costo)
-        costo /= surface_weight
-
-        # Ajustar por clima (peor clima = mayor costo)
-        costo *= (2.0 - clima_mult)
-        # clima_mult=1.0 → costo*1.0, clima_mult=0.75 → costo*1.25
-
-        # Ajustar por consumo extra de resistencia
-        costo *= (1.0 + consumo_clima_extra)
-
-        # Penalización si resistencia baja (evitar rutas largas)
-        if self.resistencia < 30:
-            costo *= 1.5
-        elif self.resistencia < 50:
-            costo *= 1.2
+        El costo se lee de la grilla de costos del mapa (ver costos.py),
+        que ya combina superficie, clima y resistencia.
 
-        return costo
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            desde (tuple[int, int]): Nodo origen.
+            hacia (tuple[int, int]): Nodo destino.
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Costo adicional.
+
+        Returns:
+            float: Costo total del movimiento.
+        """
+        return obtener_grilla(mapa).costo(
+            hacia[0], hacia[1], clima_mult, consumo_clima_extra,
+            self.resistencia)
 
     def _heuristica(self, pos_actual, pos_destino):
         """Heurística Manhattan usada por A*.
@@ -834,3 +1512,325 @@ class JugadorCPU(Jugador):
 
         camino.reverse()
         return camino
+
+    # ========================================
+    # NIVEL EXPERTO - MCTS
+    # ========================================
+
+    def _pensar_mcts(self, mapa, pedidos_activos, consumo_clima_extra):
+        """Hace las iteraciones MCTS de este cuadro.
+
+        Se busca durante `presupuesto_cuadro_ms` (ver `_mcts_por_tiempo`);
+        con el reloj fijo fuera de una grabación (benchmarks, registros
+        viejos) se hace una cantidad fija de iteraciones y se esperan los
+        resultados del pool. Al repetir no se busca: las decisiones
+        salen del registro.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            pedidos_activos (list[Pedido]): Pedidos disponibles.
+            consumo_clima_extra (float): Costo adicional por clima.
+        """
+        if self.modo_decisiones == 'repetir':
+            return
+        estado = self._estado_mcts(pedidos_activos)
+        modelo = self._modelo_partida(mapa, estado, consumo_clima_extra)
+        if self._mcts_por_tiempo():
+            self.buscador.pensar(
+                estado, modelo,
+                limite=time.perf_counter() + self.presupuesto_cuadro_ms
+                / 1000.0)
+        else:
+            self.buscador.pensar(estado, modelo,
+                                 iteraciones=self.iteraciones_por_cuadro,
+                                 esperar=True)
+
+    def _mcts_por_tiempo(self):
+        """Indica si el MCTS busca y decide con presupuestos de tiempo.
+
+        Con el reloj real siempre; con el reloj fijo solo al grabar,
+        porque la grabación anota cada decisión y la repetición la usa
+        en vez de buscar.
+
+        Returns:
+            bool: False si se cuentan iteraciones y visitas.
+        """
+        return not reloj.fijo or self.modo_decisiones == 'grabar'
+
+    def _modelo_partida(self, mapa, estado, consumo_clima_extra):
+        """Modelo de simulación del MCTS (se arma una vez por mapa).
+
+        Los pedidos de muestra, los rivales y las distancias reales entre
+        las casillas de los pedidos se actualizan cada cuadro. En mapas
+        grandes (HPA*) no se calculan distancias y el modelo usa solo el
+        factor de desvío.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            estado (EstadoSimulado): Estado real (de `_estado_mcts`).
+            consumo_clima_extra (float): Costo adicional por clima (solo
+                se usa si el CPU no tiene sistema de clima).
+
+        Returns:
+            ModeloPartida: Modelo listo para `BuscadorMCTS.pensar`.
+        """
+        modelo = self._modelo_mcts
+        if modelo is None or self._mapa_modelo is not mapa:
+            grilla = obtener_grilla(mapa)
+            libres = np.flatnonzero(grilla.mascara_libres())
+            # Muestra pareja y sin azar, para no consumir números
+            # aleatorios al reconstruir el modelo
+            libres = libres[::max(1, len(libres) // CASILLAS_MODELO)]
+            casillas = list(zip((libres % grilla.ancho).tolist(),
+                                (libres // grilla.ancho).tolist()))
+            if self.clima is not None:
+                estados, matriz = self.clima.matriz_numpy()
+                consumos = [self.clima.consumo_resistencia.get(e, 0.0)
+                            for e in estados]
+                acumuladas = matriz.cumsum(axis=1).tolist()
+            else:
+                consumos, acumuladas = [consumo_clima_extra], [[1.0]]
+            modelo = ModeloPartida(self.capacidad, self.desvio, consumos,
+                                   acumuladas, casillas=casillas)
+            self._modelo_mcts, self._mapa_modelo = modelo, mapa
+
+        modelo.desvio = self.desvio
+        modelo.rivales = self.rivales
+        plantillas = ([p[3:6] for p in estado.disponibles]
+                      + [p[2:5] for p in estado.inventario])
+        if plantillas:
+            modelo.plantillas = plantillas
+
+        modelo.distancias = {}
+        if not self._usa_hpa(mapa):
+            grilla = obtener_grilla(mapa)
+            destinos = ({p[1] for p in estado.inventario}
+                        | {p[1] for p in estado.disponibles}
+                        | {p[2] for p in estado.disponibles})
+            origenes = destinos | {(estado.x, estado.y)}
+            for destino in destinos:
+                campo = grilla.pasos_desde(*destino)
+                for origen in origenes:
+                    pasos = campo[origen[1] * grilla.ancho + origen[0]]
+                    modelo.distancias[(origen, destino)] = (
+                        pasos if pasos >= 0 else PASOS_SIN_RUTA)
+        return modelo
+
+    def _estado_mcts(self, pedidos_activos):
+        """Estado real del CPU para empezar las iteraciones.
+
+        Args:
+            pedidos_activos (list[Pedido]): Pedidos disponibles.
+
+        Returns:
+            EstadoSimulado: Posición, resistencia, inventario, pedidos
+            libres (sin los reservados por otros) y clima actual.
+        """
+        ahora = reloj.ahora()
+        inventario = [(_clave_pedido(p), tuple(p.dropoff), p.weight,
+                       p.priority, p.payout,
+                       getattr(p, 'tiempo_recogido', ahora))
+                      for p in self.inventario]
+        disponibles = []
+        for p in self._pedidos_libres(pedidos_activos):
+            clave = _clave_pedido(p)
+            if clave not in self._inalcanzables:
+                disponibles.append((clave, tuple(p.pickup), tuple(p.dropoff),
+                                    p.weight, p.priority, p.payout))
+
+        clima, intensidad, fin_clima = 0, 0.0, None
+        if self.clima is not None:
+            estados = self.clima.matriz_numpy()[0]
+            if self.clima.estado_actual in estados:
+                clima = estados.index(self.clima.estado_actual)
+            intensidad = self.clima.intensidad_actual
+            if self.clima.tiempo_cambio > ahora:
+                fin_clima = self.clima.tiempo_cambio
+        return EstadoSimulado(
+            ahora, self.x, self.y, self.resistencia, self.bloqueado,
+            self.reputacion, getattr(self, 'racha_entregas_puntuales', 0),
+            inventario, disponibles, clima, intensidad, fin_clima)
+
+    def _ia_mcts(self, mapa, pedidos_activos, clima_mult,
+                 consumo_clima_extra):
+        """IA nivel experto: sigue la acción elegida por el MCTS.
+
+        Cuando la acción en curso termina (se recogió o entregó su
+        pedido) el árbol se conserva desde ese punto; si falla (otro se
+        llevó el pedido) se descarta. Sin acción en curso se decide una
+        nueva en cuanto cada acción posible tiene `visitas_decision`
+        visitas o pasa
+        `presupuesto_decision_ms` desde que hizo falta decidir.
+
+        La ruta de cada acción se busca por partes en `tarea_plan`, con
+        el mismo presupuesto por cuadro que el nivel difícil, y en mapas
+        grandes cada tramo se refina en `tarea_tramo`. Mientras tanto el
+        CPU sigue la ruta anterior, si le queda.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            pedidos_activos (list[Pedido]): Pedidos activos.
+            clima_mult (float): Modificador climático.
+            consumo_clima_extra (float): Penalización climática.
+        """
+        buscador = self.buscador
+        recogidos, entregados = self._tomar_novedades()
+        accion = buscador.accion_en_curso
+        if accion is not None:
+            hechos = recogidos if accion[0] == RECOGER else entregados
+            if accion[1] in {_clave_pedido(p) for p in hechos}:
+                buscador.terminar()
+            elif accion not in acciones(self._estado_mcts(pedidos_activos),
+                                        self.capacidad, sorteados=False):
+                buscador.reiniciar()
+                self._cancelar_plan()
+                self._fijar_ruta(mapa, [])
+                self._reservar(None)
+
+        if buscador.accion_en_curso is None:
+            if not self._decidir_mcts(mapa, pedidos_activos, clima_mult,
+                                      consumo_clima_extra):
+                return
+
+        # En mapas grandes, refinar el siguiente tramo de la ruta
+        # jerárquica (por partes, en este cuadro y los siguientes)
+        if (self.tarea_tramo is None and not self.ruta_planeada
+                and self.ruta_abstracta):
+            self._avanzar_tramo(mapa)
+        # Ruta perdida (paso fallido o agotamiento): volver a buscarla
+        if (not self.ruta_planeada and not self.ruta_abstracta
+                and self.tarea_plan is None and self.tarea_tramo is None):
+            self._iniciar_ruta_accion(mapa, pedidos_activos, clima_mult,
+                                      consumo_clima_extra)
+        if self.ruta_planeada:
+            self._seguir_ruta(mapa, clima_mult, consumo_clima_extra)
+
+    def _decidir_mcts(self, mapa, pedidos_activos, clima_mult,
+                      consumo_clima_extra):
+        """Elige la próxima acción si el árbol ya pensó lo suficiente.
+
+        Al grabar se anota la acción elegida en `decision_cuadro`; al
+        repetir se usa `decision_repetida`, la grabada para este cuadro.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            pedidos_activos (list[Pedido]): Pedidos activos.
+            clima_mult (float): Modificador climático.
+            consumo_clima_extra (float): Penalización climática.
+
+        Returns:
+            bool: True si hay una acción en curso (su ruta se busca por
+            partes, ver `_iniciar_ruta_accion`).
+        """
+        buscador = self.buscador
+        if self.modo_decisiones == 'repetir':
+            accion = self.decision_repetida
+            if accion is None:
+                return False
+        else:
+            estado = self._estado_mcts(pedidos_activos)
+            legales = acciones(estado, self.capacidad, sorteados=False)
+            if not legales:
+                self._inicio_decision = None
+                return False
+
+            ahora = reloj.ahora()
+            if self._inicio_decision is None:
+                self._inicio_decision = ahora
+            # Sin presupuesto de tiempo solo cuentan las visitas
+            vencido = (self._mcts_por_tiempo()
+                       and (ahora - self._inicio_decision) * 1000
+                       >= self.presupuesto_decision_ms)
+            if len(legales) == 1:
+                accion = legales[0]
+            elif (buscador.visitas(legales) >= self.visitas_decision
+                  or vencido):
+                accion = (buscador.mejor_accion(legales)
+                          or accion_voraz(estado, self._modelo_mcts))
+            else:
+                return False
+
+            self._inicio_decision = None
+            if self.modo_decisiones == 'grabar':
+                self.decision_cuadro = (
+                    accion, buscador.iteraciones - self._iteraciones_decision)
+            self._iteraciones_decision = buscador.iteraciones
+        buscador.iniciar(accion)
+        self._iniciar_ruta_accion(mapa, pedidos_activos, clima_mult,
+                                  consumo_clima_extra, aprender=True)
+        return True
+
+    def _iniciar_ruta_accion(self, mapa, pedidos_activos, clima_mult,
+                             consumo_clima_extra, aprender=False):
+        """Empieza a buscar por partes la ruta de la acción en curso.
+
+        La búsqueda avanza en `tarea_plan` como un plan del nivel
+        difícil (ver `_avanzar_plan`) y al terminar se fija con
+        `_aplicar_plan`. La primera parte corre ya, con el presupuesto
+        de este cuadro: una ruta corta o en la caché queda lista sin
+        perder el movimiento.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            pedidos_activos (list[Pedido]): Pedidos activos.
+            clima_mult (float): Modificador climático.
+            consumo_clima_extra (float): Penalización climática.
+            aprender (bool): Actualizar el factor de desvío con la ruta.
+        """
+        self._cancelar_plan()
+        self.tarea_plan = Tarea(self._ruta_accion_por_partes(
+            mapa, pedidos_activos, clima_mult, consumo_clima_extra,
+            aprender))
+        with perfilador.tramo('planificacion'):
+            self._avanzar_plan(mapa, pedidos_activos)
+
+    def _ruta_accion_por_partes(self, mapa, pedidos_activos, clima_mult,
+                                consumo_clima_extra, aprender=False):
+        """Busca la ruta hacia el pickup o dropoff de la acción en curso.
+
+        Generador (ver tareas.py). Si es la ruta de una acción recién
+        elegida (`aprender`) y no hay camino, la acción se descarta y su
+        pedido no se vuelve a elegir.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            pedidos_activos (list[Pedido]): Pedidos activos.
+            clima_mult (float): Modificador climático.
+            consumo_clima_extra (float): Penalización climática.
+            aprender (bool): Actualizar el factor de desvío con la ruta.
+
+        Returns:
+            tuple | None: Plan como el de `_plan_entregas` (pedido a
+            reservar o None, ruta, multiplicador, posición de partida);
+            None si no hay ruta.
+        """
+        accion = self.buscador.accion_en_curso
+        if accion is None:
+            return None
+        tipo, clave = accion
+        if tipo == RECOGER:
+            pedidos = pedidos_activos
+        else:
+            pedidos = self.inventario
+        pedido = next((p for p in pedidos if _clave_pedido(p) == clave),
+                      None)
+        if pedido is None:
+            return None
+        inicio = (self.x, self.y)
+        destino = tuple(pedido.pickup if tipo == RECOGER else pedido.dropoff)
+
+        ruta, distancia = yield from self._buscar_ruta_por_partes(
+            mapa, inicio, destino, clima_mult, consumo_clima_extra)
+        if not ruta:
+            if aprender and self.buscador.accion_en_curso == accion:
+                # Sin ruta al pedido: no volver a elegirlo
+                self._inalcanzables.add(clave)
+                self.buscador.reiniciar()
+            return None
+
+        manhattan = abs(destino[0] - inicio[0]) + abs(destino[1] - inicio[1])
+        if aprender and manhattan > 0:
+            # Promedio móvil de lo que se alargan las rutas reales
+            self.desvio = 0.9 * self.desvio + 0.1 * (distancia / manhattan)
+        return (pedido if tipo == RECOGER else None, ruta, clima_mult,
+                inicio)
@@ -2,24 +2,32 @@
 mapa.py.
 
 Se encarga de cargar el mapa directamente
-de la API, y dibujarlo en la pantalla.
+de la API (o de un mapa binario, ver
+mapa_binario.py), y dibujarlo en la pantalla.
 """
 
 import pygame
+from mapa_binario import MapaPaginado
 
 
-def cargar_mapa(api):
+def cargar_mapa(api, archivo=None):
     """Carga el mapa desde la API y devuelve la matriz de tiles.
 
     Args:
         api: Objeto que expone el método `obtener_mapa()`, el cual
             debe retornar un diccionario con la estructura.
+        archivo (str | None): Mapa binario por bloques. Si se da, no se
+            consulta la API y los bloques se leen a medida que se usan.
 
     Returns:
-        list[list[str]]: Matriz de tiles que representa el mapa
-        completo de la ciudad.
+        list[list[str]] | MapaPaginado: Matriz de tiles que representa
+        el mapa completo de la ciudad.
     """
-    ciudad_data = api.obtener_mapa()["data"]
+    if archivo is not None:
+        return MapaPaginado(archivo)
+    respuesta = api.obtener_mapa()
+    # La API envuelve el mapa en "data"; el archivo local no
+    ciudad_data = respuesta.get("data", respuesta)
     return ciudad_data["tiles"]
 
 
@@ -33,7 +41,9 @@ def dibujar_mapa(screen, tiles, colors, cam_x,
 
     Args:
         screen (pygame.Surface): Superficie donde se dibuja el mapa.
-        tiles (list[list[str]]): Matriz que contiene los tipos de tile.
+        tiles (list[list[str]] | MapaPaginado): Matriz que contiene los
+            tipos de tile. De un mapa paginado solo se leen los bloques
+            visibles.
         colors (dict): Diccionario que asigna colores a cada tipo de tile.
         cam_x (int): Posición X de la cámara (tile inicial visible).
         cam_y (int): Posición Y de la cámara (tile inicial visible).
@@ -43,8 +53,9 @@ def dibujar_mapa(screen, tiles, colors, cam_x,
         imagenes (dict | None): Opcional. Diccionario que asigna
             imágenes (pygame.Surface) a tipos de tile.
     """
-    for y in range(cam_y, cam_y + view_height):
-        for x in range(cam_x, cam_x + view_width):
+    # Un mapa más chico que la vista se dibuja solo hasta su borde
+    for y in range(cam_y, min(cam_y + view_height, len(tiles))):
+        for x in range(cam_x, min(cam_x + view_width, len(tiles[y]))):
             tile = tiles[y][x]
 
             screen_x = (x - cam_x) * tile_size
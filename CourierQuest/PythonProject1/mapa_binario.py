@@ -0,0 +1,262 @@
+"""
+mapa_binario.py.
+
+Formato binario por bloques para ciudades muy grandes.
+Leer una ciudad de millones de casillas del JSON (una
+lista de listas de strings de un carácter) tarda
+segundos y ocupa cientos de MB. Este formato guarda un
+byte por casilla, en bloques cuadrados de tamaño fijo,
+y se abre con memoria mapeada (numpy.memmap): solo se
+leen del disco los bloques que se usan.
+
+Estructura del archivo:
+- Cabecera (CABECERA): mágico, versión, ancho, alto,
+  lado del bloque y largo de la leyenda.
+- Leyenda en JSON: letra de cada código ("letters"),
+  la "legend" de ciudad.json y la meta ("goal").
+- Bloques de lado x lado bytes, fila por fila de
+  bloques, desde un desplazamiento alineado a
+  ALINEACION. Los bloques del borde se rellenan con
+  edificios.
+
+MapaPaginado se usa igual que la matriz de tiles
+(mapa[y][x], len(mapa)) y decodifica cada bloque la
+primera vez que se toca (ver `bloque`).
+
+Uso (desde PythonProject1):
+    python mapa_binario.py data/generado/ciudad.json data/generado/ciudad.cqm
+"""
+
+import argparse
+import json
+import struct
+from collections import OrderedDict
+import numpy as np
+
+MAGICO = b"CQMAPA\x00\x00"
+VERSION = 1
+# Mágico, versión, ancho, alto, lado del bloque, largo de la leyenda
+CABECERA = struct.Struct("<8sHIIHI")
+LADO_BLOQUE = 64
+ALINEACION = 4096  # Los bloques empiezan en una página de memoria
+MAX_BLOQUES = 1024  # Bloques decodificados en memoria (4 MB con lado 64)
+
+
+def matriz_letras(mapa):
+    """Matriz NumPy de letras de un mapa, paginado o en listas.
+
+    Args:
+        mapa (list[list[str]] | MapaPaginado): Mapa del juego.
+
+    Returns:
+        numpy.ndarray: Letras (alto x ancho, dtype 'U1').
+    """
+    if isinstance(mapa, MapaPaginado):
+        return mapa.letras[mapa.codigos()]
+    alto = len(mapa)
+    ancho = len(mapa[0]) if mapa else 0
+    return np.array(mapa, dtype='U1').reshape(alto, ancho)
+
+
+def guardar_mapa_binario(ruta, ciudad, lado=LADO_BLOQUE):
+    """Escribe una ciudad en el formato binario por bloques.
+
+    Args:
+        ruta (str): Archivo de salida.
+        ciudad (dict): Datos como ciudad.json ("tiles" y, si hay,
+            "legend" y "goal").
+        lado (int): Lado de los bloques en casillas.
+    """
+    tiles = matriz_letras(ciudad["tiles"])
+    alto, ancho = tiles.shape
+    leyenda = ciudad.get("legend", {})
+    letras = list(leyenda)
+    for letra in ["B"] + np.unique(tiles).tolist():
+        if letra not in letras:
+            letras.append(letra)
+
+    # Relleno de edificios hasta completar los bloques del borde
+    bloques_y, bloques_x = -(-alto // lado), -(-ancho // lado)
+    codigos = np.full((bloques_y * lado, bloques_x * lado),
+                      letras.index("B"), dtype=np.uint8)
+    for codigo, letra in enumerate(letras):
+        codigos[:alto, :ancho][tiles == letra] = codigo
+
+    meta = json.dumps({"letters": letras, "legend": leyenda,
+                       "goal": ciudad.get("goal")}).encode()
+    inicio = -(-(CABECERA.size + len(meta)) // ALINEACION) * ALINEACION
+    with open(ruta, "wb") as f:
+        f.write(CABECERA.pack(MAGICO, VERSION, ancho, alto, lado, len(meta)))
+        f.write(meta)
+        f.write(b"\x00" * (inicio - CABECERA.size - len(meta)))
+        # Cada bloque queda contiguo: (by, bx, fila, columna)
+        codigos.reshape(bloques_y, lado, bloques_x, lado).transpose(
+            0, 2, 1, 3).tofile(f)
+
+
+class _FilaPaginada:
+    """Fila de un MapaPaginado: `fila[x]` lee solo el bloque de x."""
+
+    __slots__ = ("_mapa", "_y")
+
+    def __init__(self, mapa, y):
+        self._mapa = mapa
+        self._y = y
+
+    def __len__(self):
+        return self._mapa.ancho
+
+    def __getitem__(self, x):
+        mapa = self._mapa
+        if x < 0:
+            x += mapa.ancho
+        if not 0 <= x < mapa.ancho:
+            raise IndexError(x)
+        lado = mapa.lado
+        return mapa.bloque(x // lado, self._y // lado)[
+            (self._y % lado) * lado + x % lado]
+
+    def __iter__(self):
+        for x in range(self._mapa.ancho):
+            yield self[x]
+
+
+class MapaPaginado:
+    """Mapa en formato binario abierto con memoria mapeada.
+
+    Attributes:
+        ruta (str): Archivo del mapa.
+        ancho (int): Columnas del mapa.
+        alto (int): Filas del mapa.
+        lado (int): Lado de los bloques.
+        letras (numpy.ndarray): Letra de cada código.
+        leyenda (dict): "legend" de la ciudad.
+        meta (int | None): "goal" de la ciudad.
+        bloques_leidos (int): Bloques decodificados desde que se abrió.
+    """
+
+    def __init__(self, ruta, max_bloques=MAX_BLOQUES):
+        """Lee la cabecera y mapea los bloques sin leerlos.
+
+        Args:
+            ruta (str): Archivo escrito por `guardar_mapa_binario`.
+            max_bloques (int): Bloques decodificados que se guardan.
+
+        Raises:
+            ValueError: Si el archivo no tiene el formato esperado.
+        """
+        with open(ruta, "rb") as f:
+            datos = f.read(CABECERA.size)
+            if len(datos) < CABECERA.size:
+                raise ValueError(f"{ruta} no es un mapa binario")
+            magico, version, ancho, alto, lado, largo = \
+                CABECERA.unpack(datos)
+            if magico != MAGICO or version != VERSION:
+                raise ValueError(f"{ruta} no es un mapa binario "
+                                 f"(versión {VERSION})")
+            meta = json.loads(f.read(largo))
+
+        self.ruta = ruta
+        self.ancho, self.alto, self.lado = ancho, alto, lado
+        self.letras = np.array(meta["letters"], dtype='U1')
+        self.leyenda = meta["legend"]
+        self.meta = meta["goal"]
+        self.max_bloques = max_bloques
+        self.bloques_leidos = 0
+
+        inicio = -(-(CABECERA.size + largo) // ALINEACION) * ALINEACION
+        self._bloques = np.memmap(
+            ruta, dtype=np.uint8, mode="r", offset=inicio,
+            shape=(-(-alto // lado), -(-ancho // lado), lado, lado))
+        # Byte de código -> byte de letra, para bytes.translate
+        tabla = bytearray(256)
+        for codigo, letra in enumerate(meta["letters"]):
+            tabla[codigo] = ord(letra)
+        self._tabla = bytes(tabla)
+        self._decodificados = OrderedDict()  # (bx, by) -> str
+
+    def bloque(self, bx, by):
+        """Letras de un bloque, leyéndolo del disco la primera vez.
+
+        Args:
+            bx (int): Columna del bloque.
+            by (int): Fila del bloque.
+
+        Returns:
+            str: lado * lado letras, fila por fila.
+        """
+        clave = (bx, by)
+        letras = self._decodificados.get(clave)
+        if letras is not None:
+            self._decodificados.move_to_end(clave)
+            return letras
+        letras = self._bloques[by, bx].tobytes().translate(
+            self._tabla).decode("ascii")
+        self._decodificados[clave] = letras
+        self.bloques_leidos += 1
+        if len(self._decodificados) > self.max_bloques:
+            self._decodificados.popitem(last=False)
+        return letras
+
+    def precargar(self, posiciones, radio):
+        """Decodifica los bloques alrededor de varias casillas.
+
+        El juego lo llama cada cuadro con la cámara y los repartidores,
+        así el dibujo y el movimiento no leen del disco a mitad de
+        cuadro.
+
+        Args:
+            posiciones (list[tuple[int, int]]): Casillas (x, y).
+            radio (int): Casillas alrededor de cada posición.
+        """
+        lado = self.lado
+        ultimo_x = (self.ancho - 1) // lado
+        ultimo_y = (self.alto - 1) // lado
+        for x, y in posiciones:
+            for by in range(max(0, (y - radio) // lado),
+                            min(ultimo_y, (y + radio) // lado) + 1):
+                for bx in range(max(0, (x - radio) // lado),
+                                min(ultimo_x, (x + radio) // lado) + 1):
+                    self.bloque(bx, by)
+
+    def codigos(self):
+        """Códigos de todas las casillas (lee el archivo entero).
+
+        Returns:
+            numpy.ndarray: Matriz alto x ancho de uint8.
+        """
+        bloques_y, bloques_x, lado, _ = self._bloques.shape
+        return np.ascontiguousarray(
+            self._bloques.transpose(0, 2, 1, 3).reshape(
+                bloques_y * lado, bloques_x * lado)[:self.alto, :self.ancho])
+
+    def __len__(self):
+        return self.alto
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.alto
+        if not 0 <= y < self.alto:
+            raise IndexError(y)
+        return _FilaPaginada(self, y)
+
+    def __iter__(self):
+        for y in range(self.alto):
+            yield _FilaPaginada(self, y)
+
+    def __reduce__(self):
+        """Se guarda (grabación, keyframes) como la ruta del archivo."""
+        return MapaPaginado, (self.ruta, self.max_bloques)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('entrada', help='ciudad.json')
+    parser.add_argument('salida', help='mapa binario a escribir')
+    parser.add_argument('--lado', type=int, default=LADO_BLOQUE,
+                        help='lado de los bloques en casillas')
+    args = parser.parse_args()
+    with open(args.entrada) as f:
+        datos = json.load(f)
+    guardar_mapa_binario(args.salida, datos.get("data", datos), args.lado)
+    print(f"{args.entrada} -> {args.salida}")
@@ -0,0 +1,102 @@
+"""
+markov.py.
+
+Herramientas de NumPy para la cadena de Markov del
+clima: convertir la matriz de transición a un
+arreglo, simular miles de cadenas a la vez y
+calcular la distribución estacionaria, para ver a
+qué climas tiende una partida larga.
+"""
+
+import numpy as np
+
+
+def matriz_numpy(matriz_transicion, estados):
+    """Convierte la matriz de transición de SistemaClima a un arreglo.
+
+    Un estado sin fila en la matriz pasa a cualquier estado con la misma
+    probabilidad, igual que `SistemaClima._cambiar_clima`.
+
+    Args:
+        matriz_transicion (dict): {origen: {'estados': [...],
+            'probabilidades': [...]}}.
+        estados (list[str]): Orden de las filas y columnas.
+
+    Returns:
+        numpy.ndarray: Matriz n x n, cada fila suma 1.
+    """
+    indice = {estado: i for i, estado in enumerate(estados)}
+    n = len(estados)
+    matriz = np.zeros((n, n))
+    for i, origen in enumerate(estados):
+        transicion = matriz_transicion.get(origen)
+        if not transicion:
+            matriz[i] = 1.0 / n
+            continue
+        for destino, probabilidad in zip(transicion['estados'],
+                                         transicion['probabilidades']):
+            if destino in indice:
+                matriz[i, indice[destino]] += probabilidad
+        suma = matriz[i].sum()
+        matriz[i] = matriz[i] / suma if suma > 0 else 1.0 / n
+    return matriz
+
+
+def simular_cadenas(matriz, inicial, pasos, cantidad=1000, semilla=None):
+    """Simula muchas cadenas de Markov a la vez.
+
+    En cada paso se sortea un número por cadena y se busca en la fila
+    acumulada de su estado actual, todo con operaciones de arreglos.
+
+    Args:
+        matriz (numpy.ndarray): Matriz de transición n x n.
+        inicial (int | numpy.ndarray): Estado inicial de todas las
+            cadenas o uno por cadena.
+        pasos (int): Cambios de clima a simular.
+        cantidad (int): Cantidad de cadenas.
+        semilla (int | None): Semilla del generador.
+
+    Returns:
+        numpy.ndarray: Estados (cantidad x pasos + 1), columna 0 = inicial.
+    """
+    rng = np.random.default_rng(semilla)
+    acumulada = np.cumsum(matriz, axis=1)
+    acumulada[:, -1] = 1.0  # Evita que el redondeo deje huecos
+    cadenas = np.empty((cantidad, pasos + 1), dtype=np.int64)
+    cadenas[:, 0] = inicial
+    for paso in range(1, pasos + 1):
+        sorteo = rng.random(cantidad)[:, None]
+        filas = acumulada[cadenas[:, paso - 1]]
+        cadenas[:, paso] = (sorteo >= filas).sum(axis=1)
+    return cadenas
+
+
+def distribucion_empirica(cadenas, n_estados, descartar=0):
+    """Frecuencia de cada estado en un lote de cadenas simuladas.
+
+    Args:
+        cadenas (numpy.ndarray): Resultado de `simular_cadenas`.
+        n_estados (int): Cantidad de estados.
+        descartar (int): Pasos iniciales a ignorar (calentamiento).
+
+    Returns:
+        numpy.ndarray: Proporción de cada estado (suma 1).
+    """
+    conteo = np.bincount(cadenas[:, descartar:].ravel(), minlength=n_estados)
+    return conteo / conteo.sum()
+
+
+def distribucion_estacionaria(matriz):
+    """Distribución estacionaria pi de la cadena (pi = pi P).
+
+    Se calcula como el autovector izquierdo de autovalor 1.
+
+    Args:
+        matriz (numpy.ndarray): Matriz de transición n x n.
+
+    Returns:
+        numpy.ndarray: Probabilidad de largo plazo de cada estado.
+    """
+    valores, vectores = np.linalg.eig(matriz.T)
+    vector = np.real(vectores[:, np.argmin(np.abs(valores - 1.0))])
+    return np.abs(vector) / np.abs(vector).sum()
@@ -0,0 +1,789 @@
+"""
+mcts.py.
+
+Búsqueda de Monte Carlo en árbol (MCTS) para el CPU de
+nivel experto. El árbol no decide casilla por casilla
+sino qué hacer a continuación: ir a recoger un pedido
+libre o ir a entregar uno del inventario. Cada acción se
+simula con un modelo simple de la partida:
+
+- Distancias reales entre las casillas de los pedidos
+  conocidos (las calcula el CPU) y, para pedidos
+  sorteados, distancia Manhattan por un factor de desvío
+  que el CPU aprende de sus rutas.
+- Resistencia como en `Jugador.mover` y `recuperar`.
+- Clima según la cadena de Markov de `SistemaClima`.
+- Pedidos nuevos cada INTERVALO_PEDIDOS segundos y
+  rivales que se llevan los pedidos libres.
+
+El árbol es de lazo abierto: un nodo es una secuencia de
+acciones y no un estado, así que el clima y los pedidos
+se vuelven a sortear en cada iteración. Las simulaciones
+desde las hojas (rollouts) se reparten en un pool de
+procesos; mientras una hoja espera su resultado cuenta
+con una visita sin valor (visita virtual), para que las
+iteraciones siguientes prueben otras ramas.
+"""
+
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+HORIZONTE = 60.0  # Segundos simulados desde la raíz
+PASOS_POR_SEGUNDO = 8  # Movimientos por segundo del CPU
+INTERVALO_PEDIDOS = 5.0  # Igual que liberar_interval en Main.py
+MAX_PEDIDOS_MAPA = 5  # Pedidos activos a la vez en Main.py
+VALOR_INVENTARIO = 0.5  # Fracción del pago que vale lo no entregado
+EXPLORACION = 0.7  # Constante de UCT (con valores normalizados)
+EPSILON = 0.25  # Probabilidad de acción al azar en los rollouts
+TASA_COMPETENCIA = 0.01  # Prob. por segundo y rival de perder un pedido
+MAX_TRABAJADORES = 4
+
+RECOGER = 'r'
+ENTREGAR = 'e'
+
+
+# ========================================
+# MODELO DE LA PARTIDA
+# ========================================
+
+class ModeloPartida:
+    """Parámetros fijos de la simulación (se envían a los procesos).
+
+    Attributes:
+        capacidad (int): Peso máximo del repartidor.
+        desvio (float): Pasos reales por casilla de distancia Manhattan.
+        distancias (dict): (origen, destino) -> pasos, para las casillas
+            de los pedidos reales.
+        consumos (list[float]): Consumo extra de cada estado de clima.
+        acumuladas (list[list[float]]): Filas acumuladas de la matriz
+            de transición, en el mismo orden que `consumos`.
+        plantillas (list[tuple]): (peso, prioridad, pago) de pedidos
+            conocidos, para sortear pedidos nuevos.
+        casillas (list[tuple[int, int]]): Casillas libres donde pueden
+            aparecer pedidos nuevos.
+        rivales (int): Otros repartidores que compiten por los pedidos.
+        horizonte (float): Segundos simulados desde la raíz.
+    """
+
+    def __init__(self, capacidad=10, desvio=1.3, consumos=(0.0,),
+                 acumuladas=((1.0,),), plantillas=(), casillas=(),
+                 rivales=1, horizonte=HORIZONTE):
+        """Crea el modelo.
+
+        Args:
+            capacidad (int): Peso máximo del repartidor.
+            desvio (float): Factor de desvío inicial.
+            consumos (Sequence[float]): Consumo extra por estado.
+            acumuladas (Sequence[Sequence[float]]): Filas acumuladas.
+            plantillas (Sequence[tuple]): Pedidos de muestra.
+            casillas (Sequence[tuple[int, int]]): Casillas libres.
+            rivales (int): Repartidores rivales.
+            horizonte (float): Segundos simulados.
+        """
+        self.capacidad = capacidad
+        self.desvio = desvio
+        self.distancias = {}
+        self.consumos = list(consumos)
+        self.acumuladas = [list(fila) for fila in acumuladas]
+        self.plantillas = list(plantillas)
+        self.casillas = list(casillas)
+        self.rivales = rivales
+        self.horizonte = horizonte
+
+    def distancia(self, origen, destino):
+        """Pasos entre dos casillas (reales si se conocen, si no estimados)."""
+        pasos = self.distancias.get((origen, destino))
+        if pasos is not None:
+            return pasos
+        return round((abs(origen[0] - destino[0])
+                      + abs(origen[1] - destino[1])) * self.desvio)
+
+
+class EstadoSimulado:
+    """Estado de la partida desde el punto de vista de un CPU.
+
+    Los pedidos son tuplas para que copiar el estado sea barato:
+    inventario ``(clave, dropoff, peso, prioridad, pago, recogido)`` y
+    disponibles ``(clave, pickup, dropoff, peso, prioridad, pago)``. La
+    clave de un pedido real es ``(pickup, dropoff, pago)``; la de uno
+    sorteado, ``('sim', n)``.
+
+    `fin_clima` y `proximo_pedido` pueden ser None si no se conocen;
+    se sortean la primera vez que hacen falta.
+    """
+
+    __slots__ = ('tiempo', 'x', 'y', 'resistencia', 'bloqueado', 'peso',
+                 'reputacion', 'racha', 'inventario', 'disponibles',
+                 'clima', 'intensidad', 'fin_clima', 'proximo_pedido',
+                 'sorteados')
+
+    def __init__(self, tiempo, x, y, resistencia, bloqueado, reputacion,
+                 racha, inventario, disponibles, clima=0, intensidad=0.0,
+                 fin_clima=None, proximo_pedido=None):
+        """Crea el estado a partir de los datos del repartidor.
+
+        Args:
+            tiempo (float): Hora del juego.
+            x (int): Posición X.
+            y (int): Posición Y.
+            resistencia (float): Resistencia actual.
+            bloqueado (bool): Si está exhausto.
+            reputacion (float): Reputación actual.
+            racha (int): Entregas puntuales seguidas.
+            inventario (list[tuple]): Pedidos cargados.
+            disponibles (list[tuple]): Pedidos libres en el mapa.
+            clima (int): Índice del estado de clima.
+            intensidad (float): Intensidad del clima.
+            fin_clima (float | None): Hora del próximo cambio de clima.
+            proximo_pedido (float | None): Hora del próximo pedido nuevo.
+        """
+        self.tiempo = tiempo
+        self.x = x
+        self.y = y
+        self.resistencia = resistencia
+        self.bloqueado = bloqueado
+        self.peso = sum(p[2] for p in inventario)
+        self.reputacion = reputacion
+        self.racha = racha
+        self.inventario = inventario
+        self.disponibles = disponibles
+        self.clima = clima
+        self.intensidad = intensidad
+        self.fin_clima = fin_clima
+        self.proximo_pedido = proximo_pedido
+        self.sorteados = 0
+
+    def copiar(self):
+        """Copia del estado (las tuplas de pedidos se comparten)."""
+        copia = EstadoSimulado.__new__(EstadoSimulado)
+        for atributo in EstadoSimulado.__slots__:
+            setattr(copia, atributo, getattr(self, atributo))
+        copia.inventario = list(self.inventario)
+        copia.disponibles = list(self.disponibles)
+        return copia
+
+    def __getstate__(self):
+        """Estado para pickle (las clases con __slots__ no tienen dict)."""
+        return tuple(getattr(self, a) for a in EstadoSimulado.__slots__)
+
+    def __setstate__(self, valores):
+        """Restaura el estado guardado por `__getstate__`."""
+        for atributo, valor in zip(EstadoSimulado.__slots__, valores):
+            setattr(self, atributo, valor)
+
+
+def acciones(estado, capacidad, sorteados=True):
+    """Acciones posibles: entregar (solo la mayor prioridad) o recoger.
+
+    Args:
+        estado (EstadoSimulado): Estado actual.
+        capacidad (int): Peso máximo.
+        sorteados (bool): Incluir pedidos sorteados por la simulación.
+            El árbol solo usa pedidos reales, que son los mismos en
+            todas las iteraciones.
+
+    Returns:
+        list[tuple[str, tuple]]: Acciones ``(tipo, clave)``.
+    """
+    resultado = []
+    if estado.inventario:
+        maxima = max(p[3] for p in estado.inventario)
+        for pedido in estado.inventario:
+            if pedido[3] == maxima and (sorteados
+                                        or pedido[0][0] != 'sim'):
+                resultado.append((ENTREGAR, pedido[0]))
+    libre = capacidad - estado.peso
+    for pedido in estado.disponibles:
+        if pedido[3] <= libre and (sorteados or pedido[0][0] != 'sim'):
+            resultado.append((RECOGER, pedido[0]))
+    return resultado
+
+
+def _buscar(pedidos, clave):
+    """Pedido con esa clave, o None."""
+    for pedido in pedidos:
+        if pedido[0] == clave:
+            return pedido
+    return None
+
+
+def _sortear_clima(acumulada, rng):
+    """Índice del siguiente estado según una fila acumulada."""
+    r = rng.random()
+    for i, limite in enumerate(acumulada):
+        if r < limite:
+            return i
+    return len(acumulada) - 1
+
+
+def proximo_evento(estado, rng):
+    """Hora del próximo cambio de clima o pedido nuevo.
+
+    Sortea las horas que todavía no se conocen.
+
+    Args:
+        estado (EstadoSimulado): Estado a consultar.
+        rng (random.Random): Generador de la iteración.
+
+    Returns:
+        float: La más cercana de las dos horas.
+    """
+    if estado.fin_clima is None:
+        estado.fin_clima = estado.tiempo + rng.uniform(0, 90)
+    if estado.proximo_pedido is None:
+        estado.proximo_pedido = estado.tiempo + rng.uniform(
+            0, INTERVALO_PEDIDOS)
+    return min(estado.fin_clima, estado.proximo_pedido)
+
+
+def avanzar(estado, segundos, modelo, rng):
+    """Hace pasar el tiempo: resistencia, clima, rivales y pedidos nuevos.
+
+    Los eventos se aplican al final del intervalo; quien llama corta
+    los intervalos en `proximo_evento` para que no se atrasen.
+
+    Args:
+        estado (EstadoSimulado): Estado a modificar.
+        segundos (float): Tiempo que pasa.
+        modelo (ModeloPartida): Parámetros de la simulación.
+        rng (random.Random): Generador de la iteración.
+    """
+    proximo_evento(estado, rng)
+    estado.tiempo += segundos
+    # Jugador.recuperar: 5 puntos por segundo, desbloquea en 30
+    estado.resistencia = min(100.0, estado.resistencia + 5.0 * segundos)
+    if estado.bloqueado and estado.resistencia >= 30:
+        estado.bloqueado = False
+
+    while estado.tiempo >= estado.fin_clima:
+        estado.clima = _sortear_clima(modelo.acumuladas[estado.clima], rng)
+        estado.intensidad = rng.uniform(0.2, 1.0)
+        estado.fin_clima += rng.uniform(45, 90)
+
+    if modelo.rivales and estado.disponibles:
+        perdida = 1.0 - math.exp(-TASA_COMPETENCIA * modelo.rivales
+                                 * segundos)
+        estado.disponibles = [p for p in estado.disponibles
+                              if rng.random() >= perdida]
+
+    while estado.tiempo >= estado.proximo_pedido:
+        if (len(estado.disponibles) < MAX_PEDIDOS_MAPA
+                and modelo.plantillas and modelo.casillas):
+            peso, prioridad, pago = rng.choice(modelo.plantillas)
+            estado.sorteados += 1
+            estado.disponibles.append((
+                ('sim', estado.sorteados), rng.choice(modelo.casillas),
+                rng.choice(modelo.casillas), peso, prioridad, pago))
+        estado.proximo_pedido += INTERVALO_PEDIDOS
+
+
+def viajar(estado, destino, modelo, rng):
+    """Lleva al repartidor hasta una casilla.
+
+    Cada paso consume resistencia como `Jugador.mover` y se recuperan
+    5 puntos por segundo; al llegar a 0 el repartidor espera hasta
+    tener 30. El viaje avanza en tramos que terminan en el próximo
+    evento o en el agotamiento, no paso a paso.
+
+    Args:
+        estado (EstadoSimulado): Estado a modificar.
+        destino (tuple[int, int]): Casilla de llegada.
+        modelo (ModeloPartida): Parámetros de la simulación.
+        rng (random.Random): Generador de la iteración.
+    """
+    pasos = modelo.distancia((estado.x, estado.y), destino)
+    recuperacion = 5.0 / PASOS_POR_SEGUNDO  # Por paso
+    while pasos > 0:
+        evento = proximo_evento(estado, rng)
+        if estado.bloqueado:
+            avanzar(estado, min((30 - estado.resistencia) / 5.0,
+                                max(evento - estado.tiempo, 0.0)) + 1e-9,
+                    modelo, rng)
+            continue
+        consumo = (0.5 + 0.2 * max(0, estado.peso - 3)
+                   + modelo.consumos[estado.clima]
+                   * (1.0 + estado.intensidad))
+        n = min(pasos, max(1, math.ceil((evento - estado.tiempo)
+                                        * PASOS_POR_SEGUNDO)))
+        if consumo > recuperacion:
+            n = min(n, max(1, math.ceil(estado.resistencia
+                                        / (consumo - recuperacion))))
+        estado.resistencia -= n * consumo
+        if estado.resistencia + n * recuperacion <= 0:
+            estado.resistencia = -n * recuperacion  # Llega a 0 al avanzar
+            estado.bloqueado = True
+        pasos -= n
+        avanzar(estado, n / PASOS_POR_SEGUNDO, modelo, rng)
+    estado.x, estado.y = destino
+
+
+def entregar(estado, pedido):
+    """Entrega un pedido con las reglas de `Jugador.entregar_pedido`.
+
+    Args:
+        estado (EstadoSimulado): Estado a modificar.
+        pedido (tuple): Pedido del inventario.
+
+    Returns:
+        float: Dinero ganado (pago más bono de reputación).
+    """
+    estado.inventario.remove(pedido)
+    estado.peso -= pedido[2]
+    demora = estado.tiempo - pedido[5]
+    if demora <= 16:
+        estado.reputacion = min(100, estado.reputacion + 5)
+    elif demora <= 20:
+        estado.reputacion = min(100, estado.reputacion + 3)
+    elif demora <= 50:
+        estado.reputacion = max(0, estado.reputacion - 2)
+    elif demora <= 140:
+        estado.reputacion = max(0, estado.reputacion - 5)
+    else:
+        estado.reputacion = max(0, estado.reputacion - 10)
+    pago = pedido[4]
+    if estado.reputacion >= 90:
+        pago += int(pedido[4] * 0.05)
+    if demora <= 20:
+        estado.racha += 1
+        if estado.racha >= 3:
+            estado.reputacion = min(100, estado.reputacion + 2)
+            estado.racha = 0
+    else:
+        estado.racha = 0
+    return pago
+
+
+def aplicar(estado, accion, modelo, rng):
+    """Ejecuta una acción completa (viaje incluido).
+
+    Si el pedido ya no está (se lo llevó un rival) o no cabe al
+    llegar, el viaje se hace igual y no se gana nada.
+
+    Args:
+        estado (EstadoSimulado): Estado a modificar.
+        accion (tuple[str, tuple]): ``(tipo, clave)``.
+        modelo (ModeloPartida): Parámetros de la simulación.
+        rng (random.Random): Generador de la iteración.
+
+    Returns:
+        float: Dinero ganado con la acción.
+    """
+    tipo, clave = accion
+    if tipo == RECOGER:
+        pedido = _buscar(estado.disponibles, clave)
+        if pedido is None:
+            return 0.0
+        viajar(estado, pedido[1], modelo, rng)
+        if (pedido in estado.disponibles
+                and estado.peso + pedido[3] <= modelo.capacidad):
+            estado.disponibles.remove(pedido)
+            estado.inventario.append((clave, pedido[2], pedido[3],
+                                      pedido[4], pedido[5], estado.tiempo))
+            estado.peso += pedido[3]
+        return 0.0
+
+    pedido = _buscar(estado.inventario, clave)
+    if pedido is None:
+        return 0.0
+    viajar(estado, pedido[1], modelo, rng)
+    return entregar(estado, pedido)
+
+
+def accion_voraz(estado, modelo):
+    """Acción con mejor pago por paso (la de los rollouts sin azar).
+
+    Args:
+        estado (EstadoSimulado): Estado actual.
+        modelo (ModeloPartida): Parámetros de la simulación.
+
+    Returns:
+        tuple | None: Acción elegida, o None si no hay ninguna.
+    """
+    posicion = (estado.x, estado.y)
+    distancia = modelo.distancia
+    mejor, mejor_valor = None, -1.0
+    if estado.inventario:
+        maxima = max(p[3] for p in estado.inventario)
+        for pedido in estado.inventario:
+            if pedido[3] != maxima:
+                continue
+            valor = pedido[4] / (distancia(posicion, pedido[1]) + 1)
+            if valor > mejor_valor:
+                mejor, mejor_valor = (ENTREGAR, pedido[0]), valor
+    libre = modelo.capacidad - estado.peso
+    for pedido in estado.disponibles:
+        if pedido[3] > libre:
+            continue
+        valor = pedido[5] / (distancia(posicion, pedido[1])
+                             + distancia(pedido[1], pedido[2]) + 1)
+        if pedido[4] >= 1:
+            valor *= 1.5
+        if valor > mejor_valor:
+            mejor, mejor_valor = (RECOGER, pedido[0]), valor
+    return mejor
+
+
+def _accion_rollout(estado, modelo, rng):
+    """Política de los rollouts: voraz, con una acción al azar a veces."""
+    if rng.random() < EPSILON:
+        opciones = acciones(estado, modelo.capacidad)
+        return rng.choice(opciones) if opciones else None
+    return accion_voraz(estado, modelo)
+
+
+def simular(estado, limite, modelo, rng):
+    """Rollout: juega con la política simple hasta el límite.
+
+    Args:
+        estado (EstadoSimulado): Estado inicial (se modifica).
+        limite (float): Hora en la que termina la simulación.
+        modelo (ModeloPartida): Parámetros de la simulación.
+        rng (random.Random): Generador del rollout.
+
+    Returns:
+        float: Dinero ganado más el valor del inventario restante.
+    """
+    total = 0.0
+    while estado.tiempo < limite:
+        accion = _accion_rollout(estado, modelo, rng)
+        if accion is None:
+            # Nada que hacer: esperar al próximo pedido o cambio de clima
+            espera = proximo_evento(estado, rng) - estado.tiempo
+            avanzar(estado, min(max(espera, 0.0) + 1e-9,
+                                limite - estado.tiempo), modelo, rng)
+        else:
+            total += aplicar(estado, accion, modelo, rng)
+    return total + VALOR_INVENTARIO * sum(p[4] for p in estado.inventario)
+
+
+def simular_lote(modelo, trabajos, rollouts):
+    """Valor promedio de varias hojas (se ejecuta en el pool).
+
+    Args:
+        modelo (ModeloPartida): Parámetros de la simulación.
+        trabajos (list[tuple]): ``(estado, limite, semilla)`` por hoja.
+        rollouts (int): Rollouts por hoja.
+
+    Returns:
+        list[float]: Promedio de los rollouts de cada hoja.
+    """
+    valores = []
+    for estado, limite, semilla in trabajos:
+        rng = random.Random(semilla)
+        total = 0.0
+        for _ in range(rollouts):
+            total += simular(estado.copiar(), limite, modelo, rng)
+        valores.append(total / rollouts)
+    return valores
+
+
+# ========================================
+# POOL DE PROCESOS
+# ========================================
+
+_pool = None
+_sin_pool = False  # No hay más de un núcleo o el pool falló
+
+
+def obtener_pool():
+    """Pool de procesos compartido, creado la primera vez que se pide.
+
+    Con un solo núcleo no conviene repartir (el juego y los procesos
+    competirían por él) y se devuelve None: los rollouts se corren en
+    el mismo proceso.
+
+    Returns:
+        ProcessPoolExecutor | None: Pool, o None si no se usa.
+    """
+    global _pool, _sin_pool
+    if _pool is None and not _sin_pool:
+        trabajadores = min(MAX_TRABAJADORES, (os.cpu_count() or 1) - 1)
+        if trabajadores < 1:
+            _sin_pool = True
+            return None
+        try:
+            _pool = ProcessPoolExecutor(max_workers=trabajadores)
+        except (OSError, ValueError, NotImplementedError) as e:
+            print(f"MCTS sin pool de procesos: {e}")
+            _sin_pool = True
+    return _pool
+
+
+def _descartar_pool():
+    """Deja de usar el pool (un proceso murió) y sigue en este proceso."""
+    global _pool, _sin_pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    _sin_pool = True
+
+
+# ========================================
+# ÁRBOL
+# ========================================
+
+class NodoMCTS:
+    """Nodo del árbol: la acción que lo originó y sus estadísticas."""
+
+    __slots__ = ('accion', 'hijos', 'visitas', 'total')
+
+    def __init__(self, accion=None):
+        """Crea un nodo sin visitas.
+
+        Args:
+            accion (tuple | None): Acción que lleva a este nodo.
+        """
+        self.accion = accion
+        self.hijos = {}
+        self.visitas = 0
+        self.total = 0.0
+
+    def __getstate__(self):
+        """Estado para pickle y deepcopy."""
+        return self.accion, self.hijos, self.visitas, self.total
+
+    def __setstate__(self, valores):
+        """Restaura el estado guardado por `__getstate__`."""
+        self.accion, self.hijos, self.visitas, self.total = valores
+
+
+class BuscadorMCTS:
+    """Árbol de búsqueda de un CPU, reutilizado entre decisiones.
+
+    La raíz representa el momento en que termina la acción en curso:
+    cada iteración parte del estado real, completa esa acción y recién
+    ahí baja por el árbol. Al elegir una acción su hijo pasa a ser la
+    raíz, así que lo ya explorado debajo de él se conserva.
+
+    Attributes:
+        raiz (NodoMCTS): Nodo de la próxima decisión.
+        accion_en_curso (tuple | None): Acción que se está ejecutando.
+        rollouts (int): Rollouts por hoja.
+        hojas_por_lote (int): Hojas que se mandan juntas al pool.
+        iteraciones (int): Iteraciones hechas en total.
+    """
+
+    def __init__(self, semilla=None, rollouts=4, hojas_por_lote=8):
+        """Crea un árbol vacío.
+
+        Args:
+            semilla (int | None): Semilla del generador de la búsqueda.
+            rollouts (int): Rollouts por hoja.
+            hojas_por_lote (int): Hojas por envío al pool.
+        """
+        self.rng = random.Random(semilla)
+        self.raiz = NodoMCTS()
+        self.accion_en_curso = None
+        self.rollouts = rollouts
+        self.hojas_por_lote = hojas_por_lote
+        self.iteraciones = 0
+        self._escala = 1.0  # Mayor retorno visto, para normalizar UCT
+        self._pendientes = []  # (future, hojas, modelo) enviados al pool
+
+    def __getstate__(self):
+        """Estado para deepcopy (fotogramas clave) sin los envíos al pool."""
+        estado = self.__dict__.copy()
+        estado['_pendientes'] = []
+        return estado
+
+    def reiniciar(self):
+        """Descarta el árbol (la acción en curso falló)."""
+        self.raiz = NodoMCTS()
+        self.accion_en_curso = None
+        self._pendientes = []
+
+    def iniciar(self, accion):
+        """Empieza a ejecutar una acción; su hijo pasa a ser la raíz.
+
+        Args:
+            accion (tuple): Acción elegida.
+        """
+        self.accion_en_curso = accion
+        self.raiz = self.raiz.hijos.get(accion) or NodoMCTS(accion)
+
+    def terminar(self):
+        """La acción en curso se completó; la raíz queda como está."""
+        self.accion_en_curso = None
+
+    def visitas(self, legales):
+        """Visitas del hijo legal menos visitado de la raíz.
+
+        Un pedido que apareció recién tiene pocas visitas frente a los
+        que el árbol ya venía explorando; se espera a que todos tengan
+        un mínimo antes de comparar sus promedios.
+
+        Args:
+            legales (list[tuple]): Acciones posibles en el estado real.
+
+        Returns:
+            int: Mínimo de visitas (0 si alguna acción no se probó).
+        """
+        minimo = None
+        for accion in legales:
+            hijo = self.raiz.hijos.get(accion)
+            visitas = hijo.visitas if hijo is not None else 0
+            if minimo is None or visitas < minimo:
+                minimo = visitas
+        return minimo or 0
+
+    def mejor_accion(self, legales):
+        """Acción legal con mayor retorno promedio.
+
+        Args:
+            legales (list[tuple]): Acciones posibles en el estado real.
+
+        Returns:
+            tuple | None: Acción elegida, o None si ninguna tiene visitas.
+        """
+        mejor, mejor_valor = None, None
+        for accion in legales:
+            hijo = self.raiz.hijos.get(accion)
+            if hijo is None or hijo.visitas == 0:
+                continue
+            valor = hijo.total / hijo.visitas
+            if mejor_valor is None or valor > mejor_valor:
+                mejor, mejor_valor = accion, valor
+        return mejor
+
+    def pensar(self, estado, modelo, iteraciones=None, limite=None,
+               esperar=False, max_pendientes=8):
+        """Hace iteraciones desde el estado real.
+
+        Args:
+            estado (EstadoSimulado): Estado real del CPU.
+            modelo (ModeloPartida): Parámetros de la simulación.
+            iteraciones (int | None): Cantidad fija de iteraciones.
+            limite (float | None): Valor de `time.perf_counter()` en el
+                que hay que parar (presupuesto por cuadro).
+            esperar (bool): Esperar todos los resultados del pool antes
+                de volver. Con el reloj fijo (grabar o repetir) el
+                árbol no puede depender de cuándo terminan los procesos.
+            max_pendientes (int): Envíos al pool sin respuesta a partir
+                de los cuales se deja de iterar en este cuadro.
+
+        Returns:
+            int: Iteraciones hechas.
+        """
+        self._recoger(esperar=False)
+        hechas = 0
+        lote = []
+        while True:
+            if iteraciones is not None and hechas >= iteraciones:
+                break
+            if limite is not None and time.perf_counter() >= limite:
+                break
+            if not esperar and len(self._pendientes) >= max_pendientes:
+                break
+            hoja = self._iterar(estado, modelo)
+            hechas += 1
+            lote.append(hoja)
+            # Sin pool cada hoja se simula enseguida, para no pasarse
+            # del presupuesto con un lote entero
+            if len(lote) >= self.hojas_por_lote or obtener_pool() is None:
+                self._enviar(modelo, lote)
+                lote = []
+        if lote:
+            self._enviar(modelo, lote)
+        self._recoger(esperar=esperar)
+        self.iteraciones += hechas
+        return hechas
+
+    def _iterar(self, estado_real, modelo):
+        """Selección y expansión de una iteración.
+
+        Returns:
+            tuple: Hoja a simular ``(camino, recompensas, estado,
+            limite, semilla)``.
+        """
+        rng = self.rng
+        estado = estado_real.copiar()
+        if self.accion_en_curso is not None:
+            aplicar(estado, self.accion_en_curso, modelo, rng)
+        limite = estado_real.tiempo + modelo.horizonte
+
+        nodo = self.raiz
+        camino = [nodo]
+        recompensas = []
+        while estado.tiempo < limite:
+            legales = acciones(estado, modelo.capacidad, sorteados=False)
+            if not legales:
+                break
+            nuevas = [a for a in legales if a not in nodo.hijos]
+            if nuevas:
+                accion = rng.choice(nuevas)
+                nodo.hijos[accion] = NodoMCTS(accion)
+            else:
+                accion = self._uct(nodo, legales)
+            nodo = nodo.hijos[accion]
+            camino.append(nodo)
+            recompensas.append(aplicar(estado, accion, modelo, rng))
+            if nuevas:
+                break
+
+        for visitado in camino:
+            visitado.visitas += 1  # Visita virtual hasta tener el valor
+        return camino, recompensas, estado, limite, rng.getrandbits(32)
+
+    def _uct(self, nodo, legales):
+        """Hijo legal con mayor cota UCT (valores normalizados)."""
+        hijos = nodo.hijos
+        padre = sum(hijos[a].visitas for a in legales)
+        logaritmo = math.log(max(1, padre))
+        escala = self._escala
+
+        def cota(accion):
+            hijo = hijos[accion]
+            return (hijo.total / (hijo.visitas * escala)
+                    + EXPLORACION * math.sqrt(logaritmo / hijo.visitas))
+        return max(legales, key=cota)
+
+    def _enviar(self, modelo, hojas):
+        """Simula las hojas en el pool o, si no hay, en este proceso."""
+        trabajos = [(h[2], h[3], h[4]) for h in hojas]
+        pool = obtener_pool()
+        if pool is not None:
+            try:
+                futuro = pool.submit(simular_lote, modelo, trabajos,
+                                     self.rollouts)
+                self._pendientes.append((futuro, hojas, modelo))
+                return
+            except (BrokenProcessPool, RuntimeError):
+                _descartar_pool()
+        for hoja, valor in zip(hojas, simular_lote(modelo, trabajos,
+                                                   self.rollouts)):
+            self._retropropagar(hoja[0], hoja[1], valor)
+
+    def _recoger(self, esperar):
+        """Retropropaga los resultados del pool que ya llegaron."""
+        pendientes = []
+        for futuro, hojas, modelo in self._pendientes:
+            if not esperar and not futuro.done():
+                pendientes.append((futuro, hojas, modelo))
+                continue
+            try:
+                valores = futuro.result()
+            except BrokenProcessPool:
+                _descartar_pool()
+                valores = simular_lote(modelo, [(h[2], h[3], h[4])
+                                                for h in hojas],
+                                       self.rollouts)
+            for hoja, valor in zip(hojas, valores):
+                self._retropropagar(hoja[0], hoja[1], valor)
+        self._pendientes = pendientes
+
+    def _retropropagar(self, camino, recompensas, valor):
+        """Suma el retorno de la hoja a cada nodo del camino.
+
+        La visita ya se contó al elegir el camino (visita virtual).
+        """
+        retorno = valor
+        for i in range(len(camino) - 1, 0, -1):
+            retorno += recompensas[i - 1]
+            camino[i].total += retorno
+        camino[0].total += retorno
+        if retorno > self._escala:
+            self._escala = retorno
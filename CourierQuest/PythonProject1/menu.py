@@ -26,6 +26,7 @@ class Menu:
             "1. IA Fácil",
             "2. IA Media",
             "3. IA Difícil",
+            "4. IA Experta (MCTS)",
             "0. Sin IA (Solo Jugador)"
         ]
 
@@ -51,7 +52,7 @@ class Menu:
         # Opciones
         y_offset = 250
         for i, opcion in enumerate(self.opciones):
-            color = (100, 255, 100) if i < 3 else (255, 255, 255)
+            color = (100, 255, 100) if i < 4 else (255, 255, 255)
             texto = self.font_opcion.render(opcion, True, color)
             texto_rect = (
                 texto.get_rect(center=(self.screen.get_width()
@@ -78,7 +79,7 @@ class Menu:
 
         Returns:
             str | None: Cadena con la dificultad seleccionada
-            ('facil', 'media', 'dificil', 'sin_ia'),
+            ('facil', 'media', 'dificil', 'mcts', 'sin_ia'),
             o None si no se seleccionó nada.
         """
         if event.type == pygame.KEYDOWN:
@@ -88,6 +89,8 @@ class Menu:
                 return 'media'
             elif event.key == pygame.K_3:
                 return 'dificil'
+            elif event.key == pygame.K_4:
+                return 'mcts'
             elif event.key == pygame.K_0:
                 return 'sin_ia'
         return None
@@ -140,3 +143,51 @@ class MenuPausa:
             self.screen.blit(rendered, rendered_rect)
 
         pygame.display.flip()
+
+
+class PantallaCarga:
+    """Pantalla que se muestra mientras terminan de cargar los datos."""
+
+    NOMBRES = {
+        'mapa': "Mapa de la ciudad",
+        'pedidos': "Pedidos",
+        'clima': "Clima",
+        'rutas': "Rutas de los CPU"
+    }
+
+    def __init__(self, screen):
+        """Inicializa la pantalla de carga.
+
+        Args:
+            screen (pygame.Surface): Superficie donde se dibuja.
+        """
+        self.screen = screen
+        self.font = pygame.font.SysFont(None, 56)
+        self.font_small = pygame.font.SysFont(None, 32)
+
+    def mostrar(self, progreso, segundos):
+        """Dibuja el avance de cada carga.
+
+        Args:
+            progreso (dict): Nombre de la carga -> True si terminó.
+            segundos (float): Tiempo que lleva la carga.
+        """
+        self.screen.fill((30, 30, 30))
+        centro = self.screen.get_width() // 2
+
+        texto = self.font.render("Cargando...", True, (255, 215, 0))
+        self.screen.blit(texto, texto.get_rect(center=(centro, 220)))
+
+        for i, (nombre, terminado) in enumerate(progreso.items()):
+            estado = "listo" if terminado else "cargando"
+            color = (100, 255, 100) if terminado else (200, 200, 200)
+            rendered = self.font_small.render(
+                f"{self.NOMBRES.get(nombre, nombre)}: {estado}", True, color)
+            self.screen.blit(rendered,
+                             rendered.get_rect(center=(centro, 300 + i * 40)))
+
+        tiempo = self.font_small.render(f"{segundos:.1f} s", True,
+                                        (150, 150, 150))
+        self.screen.blit(tiempo, tiempo.get_rect(center=(centro, 450)))
+
+        pygame.display.flip()
@@ -6,11 +6,56 @@ en el mapa del juego.
 """
 
 from collections import deque
+import numpy as np
 from clases import Pedido
-import random
+from costos import obtener_grilla
+from azar import flujo
 
+_azar = flujo('pedidos')
 
-def obtener_casillas_libres(mapa, ocupadas=None):
+
+def _alcanzables(mapa, alcanzable_desde):
+    """Función que dice si una casilla está en la zona de los repartidores.
+
+    Args:
+        mapa (list[list[str]]): Matriz del mapa.
+        alcanzable_desde (tuple[int, int] | None): Casilla de un
+            repartidor; None para aceptar cualquier casilla.
+
+    Returns:
+        callable: Recibe (x, y) y devuelve bool.
+    """
+    if alcanzable_desde is None:
+        return lambda x, y: True
+    grilla = obtener_grilla(mapa)
+    etiquetas = grilla.componentes()
+    etiqueta = grilla.componente_principal(*alcanzable_desde)
+    ancho = grilla.ancho
+    return lambda x, y: etiquetas[y * ancho + x] == etiqueta
+
+
+def _mascara_libres(mapa, ocupadas, alcanzable_desde, separacion=0):
+    """Máscara de las casillas donde se puede poner algo.
+
+    Args:
+        mapa (list[list[str]]): Matriz del mapa.
+        ocupadas (set): Tuplas (x, y) ya ocupadas.
+        alcanzable_desde (tuple[int, int] | None): Casilla de un
+            repartidor; None para aceptar cualquier casilla.
+        separacion (int): Distancia mínima (en cada eje) a las casillas
+            ocupadas.
+
+    Returns:
+        numpy.ndarray: Matriz alto x ancho de bool.
+    """
+    libres = obtener_grilla(mapa).mascara_libres(alcanzable_desde)
+    for x, y in ocupadas:
+        libres[max(0, y - separacion):max(0, y + separacion + 1),
+               max(0, x - separacion):max(0, x + separacion + 1)] = False
+    return libres
+
+
+def obtener_casillas_libres(mapa, ocupadas=None, alcanzable_desde=None):
     """Obtiene todas las casillas libres del mapa.
 
     Es decir aquella que no esté bloqueada ("B") y no esté
@@ -20,65 +65,60 @@ def obtener_casillas_libres(mapa, ocupadas=None):
         mapa (list[list[str]]): Matriz del mapa.
         ocupadas (set | None): Conjunto opcional de tuplas (x, y)
             que representan casillas ya ocupadas.
+        alcanzable_desde (tuple[int, int] | None): Si se da, solo las
+            casillas a las que se llega desde ahí (su componente conexa,
+            ver costos.py).
 
     Returns:
-        list[tuple[int, int]]: Lista de coordenadas libres del mapa.
+        list[tuple[int, int]]: Lista de coordenadas libres del mapa, fila
+        por fila.
     """
-    if ocupadas is None:
-        ocupadas = set()
-
-    casillas_libres = []
-    for y in range(len(mapa)):
-        for x in range(len(mapa[0])):
-            if mapa[y][x] != "B" and (x, y) not in ocupadas:
-                casillas_libres.append((x, y))
-    return casillas_libres
+    indices = np.flatnonzero(_mascara_libres(mapa, ocupadas or (),
+                                             alcanzable_desde))
+    ancho = len(mapa[0])
+    return list(zip((indices % ancho).tolist(), (indices // ancho).tolist()))
 
 
-def asignar_posicion_aleatoria(mapa, ocupadas, separacion=4):
+def asignar_posicion_aleatoria(mapa, ocupadas, separacion=4,
+                               alcanzable_desde=None):
     """Asigna una casilla aleatoria libre respetando separación mínima.
 
     La función busca una casilla libre que no esté bloqueada ni ocupada
     y que además cumpla con una distancia mínima definida por `separacion`
-    respecto a cualquier casilla ocupada.
+    respecto a cualquier casilla ocupada. Las candidatas salen de una
+    máscara NumPy (ver `_mascara_libres`), así en un mapa de millones de
+    casillas no se recorre cada una.
 
     Args:
         mapa (list[list[str]]): Matriz del mapa.
         ocupadas (set): Conjunto de tuplas (x, y) que representan
             casillas ocupadas.
         separacion (int): Distancia mínima alrededor de la casilla candidata.
+        alcanzable_desde (tuple[int, int] | None): Si se da, solo
+            casillas a las que se llega desde ahí.
 
     Returns:
         list[int] | None: Coordenadas [x, y] si se encuentra espacio válido,
         o None si no existe ninguna casilla adecuada.
     """
-    casillas_libres = obtener_casillas_libres(mapa, ocupadas)
-    random.shuffle(casillas_libres)
-    # Mezclar para obtener posiciones aleatorias.
-
-    for nx, ny in casillas_libres:
-        libre = True
-        for sx in range(-separacion, separacion + 1):
-            for sy in range(-separacion, separacion + 1):
-                tx, ty = nx + sx, ny + sy
-                if 0 <= tx < len(mapa[0]) and 0 <= ty < len(mapa):
-                    if (tx, ty) in ocupadas:
-                        libre = False
-                        break
-            if not libre:
-                break
-
-        if libre:
-            ocupadas.add((nx, ny))
-            return [nx, ny]
-
-    return None
-
-
-def reubicar_pedidos(pedidos, mapa, ocupadas=None, separacion=4):
+    candidatas = np.flatnonzero(_mascara_libres(mapa, ocupadas,
+                                                alcanzable_desde, separacion))
+    if not len(candidatas):
+        return None
+
+    # Una al azar entre todas las que cumplen la separación
+    indice = int(candidatas[_azar.randrange(len(candidatas))])
+    nx, ny = indice % len(mapa[0]), indice // len(mapa[0])
+    ocupadas.add((nx, ny))
+    return [nx, ny]
+
+
+def reubicar_pedidos(pedidos, mapa, ocupadas=None, separacion=4,
+                     alcanzable_desde=None):
     """Reubica pedidos evitando casillas bloqueadas u ocupadas.
 
-    Si un pickup o dropoff se encuentra en una casilla inválida, se busca
+    Si un pickup o dropoff se encuentra en una casilla inválida (o, con
+    `alcanzable_desde`, encerrada lejos de los repartidores), se busca
     la casilla libre más cercana mediante BFS,
     respetando una separación mínima.
 
@@ -89,15 +129,19 @@ def reubicar_pedidos(pedidos, mapa, ocupadas=None, separacion=4):
         ocupadas (set | None): Conjunto de tuplas (x, y) ya ocupadas.
         separacion (int): Distancia mínima a mantener respecto a
             otras casillas ocupadas.
+        alcanzable_desde (tuple[int, int] | None): Casilla de un
+            repartidor; los pedidos quedan donde se llega desde ahí.
     """
     if ocupadas is None:
         ocupadas = set()
+    alcanzable = _alcanzables(mapa, alcanzable_desde)
 
     for p in pedidos:
         for punto in ["pickup", "dropoff"]:
             x0, y0 = p[punto]
 
-            if mapa[y0][x0] == "B" or (x0, y0) in ocupadas:
+            if (mapa[y0][x0] == "B" or (x0, y0) in ocupadas
+                    or not alcanzable(x0, y0)):
                 visitados = set()
                 cola = deque([(x0, y0)])
                 encontrado = False
@@ -117,6 +161,7 @@ def reubicar_pedidos(pedidos, mapa, ocupadas=None, separacion=4):
                                 libre = (
                                         mapa[ny][nx] != "B"
                                         and (nx, ny) not in ocupadas
+                                        and alcanzable(nx, ny)
                                 )
 
                                 if libre and separacion > 0:
@@ -147,7 +192,8 @@ def reubicar_pedidos(pedidos, mapa, ocupadas=None, separacion=4):
                         for dy in range(-3, 4):
                             nx, ny = x0 + dx, y0 + dy
                             if 0 <= nx < len(mapa[0]) and 0 <= ny < len(mapa):
-                                if mapa[ny][nx] != "B":
+                                if (mapa[ny][nx] != "B"
+                                        and alcanzable(nx, ny)):
                                     p[punto] = [nx, ny]
                                     ocupadas.add((nx, ny))
                                     encontrado = True
@@ -0,0 +1,246 @@
+"""
+perfil.py.
+
+Medición del tiempo de cada cuadro por subsistema
+(mapa, HUD, CPU, auto-guardado, API...). El bucle
+principal marca tramos con nombre; el perfilador
+guarda los últimos cuadros en un buffer circular,
+calcula percentiles p50/p95/p99 por tramo y exporta
+la traza en JSON (formato de eventos de Chrome,
+se abre en chrome://tracing o Perfetto) o CSV.
+
+Desactivado, cada llamada solo revisa un booleano.
+"""
+
+import csv
+import json
+import math
+import os
+import time
+from collections import deque
+
+
+class _TramoNulo:
+    """Context manager vacío que se usa cuando el perfilador está apagado."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+
+_TRAMO_NULO = _TramoNulo()
+
+
+class _Tramo:
+    """Context manager que mide un tramo con nombre."""
+
+    def __init__(self, perfilador, nombre):
+        self.perfilador = perfilador
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.perfilador.iniciar(self.nombre)
+        return self
+
+    def __exit__(self, *_):
+        self.perfilador.terminar(self.nombre)
+        return False
+
+
+class Perfilador:
+    """Registra la duración de tramos con nombre dentro de cada cuadro.
+
+    Attributes:
+        activo (bool): Si es False no se mide nada.
+        cuadros (collections.deque): Últimos cuadros medidos; cada uno es
+            un diccionario con el número de cuadro, su inicio y la lista
+            de eventos (nombre, inicio, duración) en microsegundos.
+    """
+
+    def __init__(self, capacidad=600, activo=False):
+        """Crea el perfilador.
+
+        Args:
+            capacidad (int): Cantidad de cuadros en el buffer circular.
+            activo (bool): Medir desde el inicio.
+        """
+        self.activo = activo
+        self.cuadros = deque(maxlen=capacidad)
+        self.numero_cuadro = 0
+        self._origen = time.perf_counter()
+        self._inicio_cuadro = None
+        self._abiertos = {}  # Nombre -> inicio del tramo en curso
+        self._eventos = []  # Eventos del cuadro en curso
+
+    def _ahora_us(self):
+        """Microsegundos desde que se creó el perfilador."""
+        return (time.perf_counter() - self._origen) * 1e6
+
+    # ========================================
+    # MEDICIÓN
+    # ========================================
+
+    def inicio_cuadro(self):
+        """Empieza un cuadro nuevo (descarta uno sin terminar)."""
+        if not self.activo:
+            return
+        self._inicio_cuadro = self._ahora_us()
+        self._abiertos.clear()
+        self._eventos = []
+
+    def fin_cuadro(self):
+        """Cierra el cuadro en curso y lo guarda en el buffer."""
+        if not self.activo or self._inicio_cuadro is None:
+            return
+        fin = self._ahora_us()
+        self._eventos.append(('cuadro', self._inicio_cuadro,
+                              fin - self._inicio_cuadro))
+        self.cuadros.append({
+            'cuadro': self.numero_cuadro,
+            'inicio': self._inicio_cuadro,
+            'eventos': self._eventos
+        })
+        self.numero_cuadro += 1
+        self._inicio_cuadro = None
+        self._eventos = []
+
+    def iniciar(self, nombre):
+        """Marca el inicio de un tramo.
+
+        Args:
+            nombre (str): Nombre del subsistema medido.
+        """
+        if self.activo:
+            self._abiertos[nombre] = self._ahora_us()
+
+    def terminar(self, nombre):
+        """Marca el fin de un tramo iniciado con `iniciar`.
+
+        Args:
+            nombre (str): Nombre del subsistema medido.
+        """
+        if not self.activo:
+            return
+        inicio = self._abiertos.pop(nombre, None)
+        if inicio is not None:
+            self._eventos.append((nombre, inicio, self._ahora_us() - inicio))
+
+    def tramo(self, nombre):
+        """Context manager para medir un bloque.
+
+        Args:
+            nombre (str): Nombre del subsistema medido.
+
+        Returns:
+            Context manager que mide el bloque, o uno vacío si el
+            perfilador está apagado.
+        """
+        if not self.activo:
+            return _TRAMO_NULO
+        return _Tramo(self, nombre)
+
+    def alternar(self):
+        """Enciende o apaga la medición.
+
+        Returns:
+            bool: Nuevo estado.
+        """
+        self.activo = not self.activo
+        self._inicio_cuadro = None
+        return self.activo
+
+    # ========================================
+    # RESUMEN
+    # ========================================
+
+    def duraciones(self):
+        """Agrupa las duraciones por tramo sumando las de cada cuadro.
+
+        Returns:
+            dict: Nombre -> lista de milisegundos por cuadro (solo los
+            cuadros donde el tramo se ejecutó).
+        """
+        resultado = {}
+        for cuadro in self.cuadros:
+            por_cuadro = {}
+            for nombre, _, duracion in cuadro['eventos']:
+                por_cuadro[nombre] = por_cuadro.get(nombre, 0.0) + duracion
+            for nombre, duracion in por_cuadro.items():
+                resultado.setdefault(nombre, []).append(duracion / 1000)
+        return resultado
+
+    def resumen(self):
+        """Percentiles de cada tramo en milisegundos.
+
+        Returns:
+            dict: Nombre -> {'muestras', 'p50', 'p95', 'p99', 'max'},
+            ordenado de mayor a menor p95.
+        """
+        resumen = {}
+        for nombre, valores in self.duraciones().items():
+            valores.sort()
+            resumen[nombre] = {
+                'muestras': len(valores),
+                'p50': _percentil(valores, 50),
+                'p95': _percentil(valores, 95),
+                'p99': _percentil(valores, 99),
+                'max': valores[-1]
+            }
+        return dict(sorted(resumen.items(),
+                           key=lambda item: item[1]['p95'], reverse=True))
+
+    # ========================================
+    # EXPORTACIÓN
+    # ========================================
+
+    def exportar_json(self, archivo):
+        """Guarda la traza en formato de eventos de Chrome.
+
+        Args:
+            archivo (str): Ruta del archivo .json.
+        """
+        eventos = [
+            {'name': nombre, 'ph': 'X', 'ts': round(inicio, 1),
+             'dur': round(duracion, 1), 'pid': 0, 'tid': 0,
+             'args': {'cuadro': cuadro['cuadro']}}
+            for cuadro in self.cuadros
+            for nombre, inicio, duracion in cuadro['eventos']
+        ]
+        _crear_carpeta(archivo)
+        with open(archivo, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': eventos,
+                       'displayTimeUnit': 'ms',
+                       'resumen': self.resumen()}, f, indent=1)
+
+    def exportar_csv(self, archivo):
+        """Guarda la traza como CSV (una fila por tramo medido).
+
+        Args:
+            archivo (str): Ruta del archivo .csv.
+        """
+        _crear_carpeta(archivo)
+        with open(archivo, 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(['cuadro', 'tramo', 'inicio_us', 'duracion_us'])
+            for cuadro in self.cuadros:
+                for nombre, inicio, duracion in cuadro['eventos']:
+                    escritor.writerow([cuadro['cuadro'], nombre,
+                                       round(inicio, 1), round(duracion, 1)])
+
+
+def _percentil(valores, p):
+    """Percentil por rango más cercano de una lista ordenada."""
+    indice = max(0, math.ceil(p / 100 * len(valores)) - 1)
+    return valores[indice]
+
+
+def _crear_carpeta(archivo):
+    """Crea la carpeta de un archivo si no existe."""
+    carpeta = os.path.dirname(archivo)
+    if carpeta and not os.path.exists(carpeta):
+        os.makedirs(carpeta)
+
+
+perfilador = Perfilador()  # Instancia compartida por el juego
@@ -14,6 +14,7 @@ import shutil
 import time
 import pygame
 from datetime import datetime
+from clases import Inventario
 
 
 class SistemaPersistencia:
@@ -580,7 +581,7 @@ class HistorialMovimientos:
         jugador.resistencia = estado_anterior['resistencia']
         jugador.puntaje = estado_anterior['puntaje']
         jugador.reputacion = estado_anterior['reputacion']
-        jugador.inventario = estado_anterior['inventario'].copy()
+        jugador.inventario = Inventario(estado_anterior['inventario'])
 
         pedidos_activos.clear()
         pedidos_activos.extend(estado_anterior['pedidos_activos'])
@@ -0,0 +1,469 @@
+"""
+planificador.py.
+
+Servicio central de planificación para varios CPU.
+Reparte los pedidos para que dos CPU no persigan el
+mismo pickup y agrupa las consultas de rutas: en vez
+de correr un A* por cada pedido candidato, resuelve
+todos los destinos de un CPU con un solo Dijkstra
+sobre la grilla de costos compartida, guardando las
+rutas en la caché común del mapa.
+
+Además funciona como despachador: cada cierto tiempo
+resuelve la asignación global CPU-pedido (ver
+asignacion.py) con distancias reales de las rutas y
+entrega a cada CPU libre su pedido. Las rutas del
+despacho se calculan por partes en varios cuadros (ver
+tareas.py); mientras tanto cada CPU sigue con el pedido
+que tenía.
+"""
+
+from heapq import heappush, heappop
+from costos import obtener_grilla, BLOQUEADO
+from cache_rutas import obtener_cache
+from asignacion import resolver_asignacion, INALCANZABLE
+from tareas import Tarea, completar, NODOS_POR_PASO
+from reloj import reloj
+
+
+class ServicioPlanificacion:
+    """Coordina la planificación de todos los CPU de una partida.
+
+    Attributes:
+        reservas (dict): Pedido -> CPU que lo va a recoger.
+        busquedas_agrupadas (int): Dijkstras multi-destino ejecutados.
+        destinos_resueltos (int): Destinos resueltos por esos Dijkstras.
+        periodo_despacho (float): Segundos entre asignaciones globales.
+        candidatos_por_cpu (int): Pedidos más cercanos (Manhattan) que
+            se evalúan con rutas reales para cada CPU.
+        despachos (int): Asignaciones globales resueltas.
+        tarea_despacho (Tarea | None): Despacho en curso.
+        presupuesto_despacho_us (float): Microsegundos por cuadro para
+            el despacho, con el reloj real.
+        pasos_despacho_por_cuadro (int): Pasos por cuadro para el
+            despacho, con el reloj fijo.
+    """
+
+    def __init__(self, periodo_despacho=2.0, candidatos_por_cpu=8):
+        """Crea el servicio sin CPU registrados.
+
+        Args:
+            periodo_despacho (float): Segundos entre asignaciones globales.
+            candidatos_por_cpu (int): Pedidos evaluados por CPU.
+        """
+        self.cpus = []
+        self.reservas = {}
+        self.busquedas_agrupadas = 0
+        self.destinos_resueltos = 0
+        self.periodo_despacho = periodo_despacho
+        self.candidatos_por_cpu = candidatos_por_cpu
+        self.histeresis = 3  # Pasos de ventaja para el pedido actual
+        self.ultimo_despacho = 0.0
+        self.despachos = 0
+        self.inicio = reloj.ahora()
+        self.tarea_despacho = None
+        self.presupuesto_despacho_us = 1500  # Por cuadro, con el reloj real
+        self.pasos_despacho_por_cuadro = 4  # Por cuadro, con el reloj fijo
+
+    def registrar(self, cpu):
+        """Asocia un CPU al servicio.
+
+        Args:
+            cpu (JugadorCPU): CPU que usará el servicio.
+        """
+        cpu.servicio = self
+        self.cpus.append(cpu)
+
+    def reiniciar(self):
+        """Olvida todos los CPU y reservas (nueva partida)."""
+        for cpu in self.cpus:
+            cpu.servicio = None
+            cpu.pedido_asignado = None
+        self.cpus = []
+        self.reservas.clear()
+        self.ultimo_despacho = 0.0
+        self.despachos = 0
+        self.inicio = reloj.ahora()
+        self._cancelar_despacho()
+
+    # ========================================
+    # RESERVAS DE PEDIDOS
+    # ========================================
+
+    def disponible(self, pedido, cpu):
+        """Indica si un CPU puede elegir un pedido como objetivo.
+
+        Args:
+            pedido (Pedido): Pedido candidato.
+            cpu (JugadorCPU): CPU que pregunta.
+
+        Returns:
+            bool: True si el pedido no está reservado por otro CPU.
+        """
+        duenio = self.reservas.get(pedido)
+        return duenio is None or duenio is cpu
+
+    def reservar(self, pedido, cpu):
+        """Reserva un pedido para un CPU (libera su reserva anterior).
+
+        Args:
+            pedido (Pedido): Pedido elegido.
+            cpu (JugadorCPU): CPU que lo va a recoger.
+        """
+        self.liberar_de(cpu)
+        self.reservas[pedido] = cpu
+
+    def liberar_de(self, cpu):
+        """Elimina las reservas de un CPU.
+
+        Args:
+            cpu (JugadorCPU): CPU cuyas reservas se liberan.
+        """
+        for pedido in [p for p, c in self.reservas.items() if c is cpu]:
+            del self.reservas[pedido]
+
+    def limpiar(self, pedidos_activos):
+        """Descarta reservas de pedidos que ya no están en el mapa.
+
+        Args:
+            pedidos_activos (list[Pedido]): Pedidos aún sin recoger.
+        """
+        activos = set(map(id, pedidos_activos))
+        for cpu in self.cpus:
+            if (cpu.pedido_asignado is not None and
+                    id(cpu.pedido_asignado) not in activos):
+                # Otro jugador lo recogió: replanificar sin esperar
+                cpu.recibir_asignacion(None)
+        for pedido in [p for p in self.reservas if id(p) not in activos]:
+            del self.reservas[pedido]
+
+    # ========================================
+    # DESPACHO GLOBAL
+    # ========================================
+
+    def despachar(self, mapa, pedidos_activos, clima_mult,
+                  consumo_clima_extra, forzar=False):
+        """Avanza el despacho global en este cuadro.
+
+        Cada `periodo_despacho` segundos empieza un despacho
+        (`despachar_por_partes`), que avanza en cada llamada dentro de
+        `presupuesto_despacho_us` (o `pasos_despacho_por_cuadro` con el
+        reloj fijo). Al terminar se entregan las asignaciones; hasta
+        entonces cada CPU sigue con la que tenía.
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            pedidos_activos (list[Pedido]): Pedidos sin recoger.
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Costo adicional por clima.
+            forzar (bool): Despachar ya y entero en esta llamada, aunque
+                no haya pasado el periodo (benchmarks).
+
+        Returns:
+            bool: True si se resolvió una asignación.
+        """
+        if forzar:
+            self._cancelar_despacho()
+            self.ultimo_despacho = reloj.ahora()
+            return self._aplicar_despacho(pedidos_activos, completar(
+                self.despachar_por_partes(mapa, pedidos_activos, clima_mult,
+                                          consumo_clima_extra)))
+
+        if self.tarea_despacho is None:
+            ahora = reloj.ahora()
+            if ahora - self.ultimo_despacho < self.periodo_despacho:
+                return False
+            self.ultimo_despacho = ahora
+            self.tarea_despacho = Tarea(self.despachar_por_partes(
+                mapa, pedidos_activos, clima_mult, consumo_clima_extra))
+        tarea = self.tarea_despacho
+        tarea.avanzar(self.presupuesto_despacho_us,
+                      self.pasos_despacho_por_cuadro)
+        if not tarea.terminada:
+            return False
+        self.tarea_despacho = None
+        return self._aplicar_despacho(pedidos_activos, tarea.resultado)
+
+    def despachar_por_partes(self, mapa, pedidos_activos, clima_mult,
+                             consumo_clima_extra):
+        """Resuelve la asignación de pedidos a los CPU libres (generador).
+
+        Solo participan los CPU sin pedidos en el inventario (los demás
+        están entregando). El costo de un par es la distancia real de la
+        ruta del CPU al pickup más la del pickup al dropoff; para no
+        calcular n x m rutas solo se evalúan los ``candidatos_por_cpu``
+        pedidos más cercanos a cada CPU. Cede dentro de cada búsqueda
+        de ruta (ver `rutas_hacia_por_partes`).
+
+        Args:
+            mapa (list[list[str]]): Mapa del juego.
+            pedidos_activos (list[Pedido]): Pedidos sin recoger.
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Costo adicional por clima.
+
+        Returns:
+            tuple | None: (CPU libres, pedidos, asignación de
+            `resolver_asignacion`) con los CPU y pedidos del momento en
+            que empezó; None si no había nada que asignar.
+        """
+        libres = [cpu for cpu in self.cpus if not cpu.inventario]
+        pedidos = list(pedidos_activos)
+        if not libres or not pedidos:
+            return None
+
+        entregas = yield from self._distancias_entrega_por_partes(
+            libres[0], mapa, pedidos, clima_mult, consumo_clima_extra)
+        costos = []
+        for cpu in libres:
+            fila = [INALCANZABLE] * len(pedidos)
+            peso_libre = cpu.capacidad - cpu.peso_total()
+            cercanos = sorted(
+                (j for j, p in enumerate(pedidos)
+                 if p.weight <= peso_libre and entregas[j] is not None),
+                key=lambda j: (abs(pedidos[j].pickup[0] - cpu.x) +
+                               abs(pedidos[j].pickup[1] - cpu.y))
+            )[:self.candidatos_por_cpu]
+            rutas = yield from self.rutas_hacia_por_partes(
+                cpu, mapa, [tuple(pedidos[j].pickup) for j in cercanos],
+                clima_mult, consumo_clima_extra)
+            for j in cercanos:
+                pickup = tuple(pedidos[j].pickup)
+                ruta, distancia = rutas[pickup]
+                if ruta or pickup == (cpu.x, cpu.y):
+                    fila[j] = distancia + entregas[j]
+                    if pedidos[j] is cpu.pedido_asignado:
+                        # Histéresis: no cambiar de pedido por poco
+                        fila[j] = max(0, fila[j] - self.histeresis)
+            costos.append(fila)
+
+        return libres, pedidos, resolver_asignacion(costos)
+
+    def _aplicar_despacho(self, pedidos_activos, resultado):
+        """Entrega a cada CPU el pedido que le asignó el despacho.
+
+        Lo que cambió mientras se calculaba se respeta: un CPU que ya
+        recogió algo (o dejó el servicio) y un pedido que ya no está en
+        el mapa quedan fuera, y ese CPU sigue con el pedido que tenía.
+
+        Args:
+            pedidos_activos (list[Pedido]): Pedidos sin recoger ahora.
+            resultado (tuple | None): Lo que devolvió
+                `despachar_por_partes`.
+
+        Returns:
+            bool: True si se resolvió una asignación.
+        """
+        if resultado is None:
+            return False
+        libres, pedidos, asignacion = resultado
+        activos = set(map(id, pedidos_activos))
+        self.despachos += 1
+        for i, cpu in enumerate(libres):
+            if cpu.servicio is not self or cpu.inventario:
+                continue
+            pedido = pedidos[asignacion[i]] if i in asignacion else None
+            if pedido is not None and id(pedido) not in activos:
+                continue
+            if pedido is not cpu.pedido_asignado:
+                cpu.recibir_asignacion(pedido)
+            if pedido is not None:
+                self.reservar(pedido, cpu)
+        return True
+
+    def _cancelar_despacho(self):
+        """Descarta el despacho en curso, si hay uno."""
+        if self.tarea_despacho is not None:
+            self.tarea_despacho.cancelar()
+            self.tarea_despacho = None
+
+    def _distancias_entrega_por_partes(self, cpu, mapa, pedidos, clima_mult,
+                                       consumo_clima_extra):
+        """Distancia real pickup -> dropoff de cada pedido (generador).
+
+        No depende del CPU (el clima y la resistencia escalan igual todas
+        las casillas), así que se calcula con el planificador de uno solo
+        y la caché de rutas evita repetirla en cada despacho.
+
+        Args:
+            cpu (JugadorCPU): CPU cuyo planificador se usa.
+            mapa (list[list[str]]): Mapa del juego.
+            pedidos (list[Pedido]): Pedidos a medir.
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Costo adicional por clima.
+
+        Returns:
+            list[int | None]: Pasos de cada entrega, None si no hay ruta.
+        """
+        distancias = []
+        for pedido in pedidos:
+            pickup, dropoff = tuple(pedido.pickup), tuple(pedido.dropoff)
+            if pickup == dropoff:
+                distancias.append(0)
+                continue
+            ruta, distancia = yield from cpu._buscar_ruta_por_partes(
+                mapa, pickup, dropoff, clima_mult, consumo_clima_extra)
+            distancias.append(distancia if ruta else None)
+        return distancias
+
+    def entregas_por_minuto(self):
+        """Rendimiento de la flota desde el inicio de la partida.
+
+        Returns:
+            float: Entregas de todos los CPU por minuto.
+        """
+        minutos = (reloj.ahora() - self.inicio) / 60
+        if minutos <= 0:
+            return 0.0
+        return sum(cpu.entregas_completadas for cpu in self.cpus) / minutos
+
+    # ========================================
+    # CONSULTAS DE RUTAS AGRUPADAS
+    # ========================================
+
+    def rutas_hacia(self, cpu, mapa, destinos, clima_mult,
+                    consumo_clima_extra):
+        """Calcula las rutas desde la posición de un CPU a varios destinos.
+
+        Con A* en mapas normales se usa un solo Dijkstra que se detiene al
+        alcanzar todos los destinos; en los demás casos se delega en el
+        planificador propio del CPU.
+
+        Args:
+            cpu (JugadorCPU): CPU que consulta.
+            mapa (list[list[str]]): Mapa del juego.
+            destinos (list[tuple[int, int]]): Destinos candidatos.
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Costo adicional por clima.
+
+        Returns:
+            dict: Destino -> (ruta, distancia).
+        """
+        return completar(self.rutas_hacia_por_partes(
+            cpu, mapa, destinos, clima_mult, consumo_clima_extra))
+
+    def rutas_hacia_por_partes(self, cpu, mapa, destinos, clima_mult,
+                               consumo_clima_extra):
+        """Versión reanudable de `rutas_hacia` (ver tareas.py).
+
+        Cede cada `NODOS_POR_PASO` nodos del Dijkstra o después de cada
+        búsqueda del CPU.
+
+        Args:
+            cpu (JugadorCPU): CPU que consulta.
+            mapa (list[list[str]]): Mapa del juego.
+            destinos (list[tuple[int, int]]): Destinos candidatos.
+            clima_mult (float): Multiplicador climático.
+            consumo_clima_extra (float): Costo adicional por clima.
+
+        Returns:
+            dict: Destino -> (ruta, distancia).
+        """
+        inicio = (cpu.x, cpu.y)
+        if cpu._usa_hpa(mapa) or cpu.planificador != 'a_star':
+            resultado = {}
+            for destino in destinos:
+                resultado[destino] = yield from cpu._buscar_ruta_por_partes(
+                    mapa, inicio, destino, clima_mult, consumo_clima_extra)
+            return resultado
+
+        grilla = obtener_grilla(mapa)
+        costos = grilla.costos(clima_mult, consumo_clima_extra,
+                               cpu.resistencia)
+        clave = ('a_star',) + grilla.clave(clima_mult, consumo_clima_extra,
+                                           cpu.resistencia)
+        cache = obtener_cache(mapa)
+
+        resultado = {}
+        pendientes = set()
+        for destino in destinos:
+            ruta = cache.obtener(inicio, destino, clave)
+            if ruta is not None:
+                resultado[destino] = (ruta, len(ruta))
+            elif grilla.conectadas(inicio, destino):
+                # Los inalcanzables no hacen recorrer toda la componente
+                pendientes.add(destino)
+            else:
+                resultado[destino] = ([], 0)
+
+        if pendientes:
+            encontrados = yield from self._dijkstra_multidestino(
+                costos, grilla.ancho, grilla.alto, inicio, pendientes)
+            for destino in pendientes:
+                ruta = encontrados.get(destino, [])
+                cache.guardar(inicio, destino, clave, ruta)
+                resultado[destino] = (list(ruta), len(ruta))
+        return resultado
+
+    def _dijkstra_multidestino(self, costos, ancho, alto, inicio, destinos):
+        """Dijkstra desde un origen hasta alcanzar todos los destinos.
+
+        Es un generador: cede cada `NODOS_POR_PASO` nodos cerrados.
+
+        Args:
+            costos (list[float]): Grilla de costos aplanada.
+            ancho (int): Columnas del mapa.
+            alto (int): Filas del mapa.
+            inicio (tuple[int, int]): Origen.
+            destinos (set[tuple[int, int]]): Destinos a alcanzar.
+
+        Returns:
+            dict: Destino alcanzado -> ruta (sin incluir ``inicio``).
+        """
+        self.busquedas_agrupadas += 1
+        faltantes = set(destinos)
+        distancias = {inicio: 0}
+        vino_de = {}
+        cerrados = set()
+        frontera = [(0, inicio)]
+
+        while frontera and faltantes:
+            dist, actual = heappop(frontera)
+            if actual in cerrados:
+                continue
+            cerrados.add(actual)
+            faltantes.discard(actual)
+            if len(cerrados) % NODOS_POR_PASO == 0:
+                yield
+
+            x, y = actual
+            for nx, ny in ((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)):
+                if not (0 <= nx < ancho and 0 <= ny < alto):
+                    continue
+                costo = costos[ny * ancho + nx]
+                if costo == BLOQUEADO:
+                    continue
+                nueva = dist + costo
+                if nueva < distancias.get((nx, ny), BLOQUEADO):
+                    distancias[(nx, ny)] = nueva
+                    vino_de[(nx, ny)] = actual
+                    heappush(frontera, (nueva, (nx, ny)))
+
+        rutas = {}
+        for destino in destinos:
+            if destino not in cerrados:
+                continue
+            self.destinos_resueltos += 1
+            camino = []
+            actual = destino
+            while actual in vino_de:
+                camino.append(actual)
+                actual = vino_de[actual]
+            camino.reverse()
+            rutas[destino] = camino
+        return rutas
+
+    def estadisticas(self):
+        """Resume la actividad del servicio.
+
+        Returns:
+            dict: CPU registrados, reservas, búsquedas agrupadas,
+            despachos y entregas por minuto.
+        """
+        return {
+            'cpus': len(self.cpus),
+            'reservas': len(self.reservas),
+            'busquedas_agrupadas': self.busquedas_agrupadas,
+            'destinos_resueltos': self.destinos_resueltos,
+            'despachos': self.despachos,
+            'entregas_por_minuto': self.entregas_por_minuto()
+        }
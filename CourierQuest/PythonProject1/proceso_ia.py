@@ -0,0 +1,504 @@
+"""
+proceso_ia.py.
+
+Planificación del CPU difícil en otro proceso, para
+que las búsquedas en Python puro no compitan con el
+dibujo por el GIL. El mapa (casillas y costos base)
+se pone una sola vez en memoria compartida
+(multiprocessing.shared_memory) y el proceso lo lee
+de ahí sin copiarlo en cada pedido. Cada plan se pide
+con una foto chica del CPU (posición, resistencia,
+inventario, pedidos libres y clima) y la respuesta
+llega después; el CPU sigue su ruta anterior hasta
+que llega (ver JugadorCPU._avanzar_plan).
+
+La respuesta nunca se espera mientras se juega, aunque
+se grabe: al grabar se anota el cuadro en que llegó
+(como una decisión PLAN_LISTO, ver grabacion.py) y la
+repetición la espera justo en ese cuadro. Solo con el
+reloj fijo fuera de una grabación (benchmarks,
+registros sin decisiones) el plan se aplica siempre
+CUADROS_RELOJ_FIJO cuadros después de pedirlo,
+esperando la respuesta si hace falta.
+"""
+
+import contextlib
+import multiprocessing
+import weakref
+from multiprocessing import shared_memory
+import numpy as np
+from cache_disco import cache_disco
+from clases import Inventario, Pedido
+from clima import SistemaClima
+from costos import GrillaCostos, obtener_grilla, registrar_grilla
+from hpa import obtener_grafo
+from jugador_cpu import JugadorCPU, UMBRAL_HPA
+from mapa_binario import matriz_letras
+from reloj import reloj
+from tareas import completar
+
+# Cuadros entre el pedido y el plan con el reloj fijo
+CUADROS_RELOJ_FIJO = 2
+# Decisión que se graba en el cuadro en que llega un plan
+PLAN_LISTO = 'plan'
+# Espera máxima por una respuesta antes de dar el proceso por muerto
+ESPERA_MAXIMA = 10.0
+
+
+class MapaCompartido:
+    """Casillas y costos base de un mapa en memoria compartida.
+
+    Attributes:
+        ancho (int): Columnas del mapa.
+        alto (int): Filas del mapa.
+        casillas (numpy.ndarray): Código de cada casilla (alto x ancho,
+            uint8 con el carácter del tile).
+        base (numpy.ndarray): Costo base de cada casilla (alto x ancho),
+            ``inf`` en los edificios.
+    """
+
+    def __init__(self, bloques, ancho, alto, duenio):
+        """Arma las vistas sobre bloques ya creados o abiertos.
+
+        Args:
+            bloques (tuple[SharedMemory, SharedMemory]): Casillas y costos.
+            ancho (int): Columnas del mapa.
+            alto (int): Filas del mapa.
+            duenio (bool): Si este proceso borra los bloques al cerrar.
+        """
+        self._bloques = bloques
+        self.ancho = ancho
+        self.alto = alto
+        self._duenio = duenio
+        self.casillas = np.ndarray((alto, ancho), dtype=np.uint8,
+                                   buffer=bloques[0].buf)
+        self.base = np.ndarray((alto, ancho), dtype=np.float64,
+                               buffer=bloques[1].buf)
+
+    @classmethod
+    def crear(cls, mapa):
+        """Copia el mapa y su grilla de costos a memoria compartida.
+
+        Args:
+            mapa (list[list[str]]): Matriz del mapa.
+
+        Returns:
+            MapaCompartido: Dueño de los bloques.
+        """
+        base = obtener_grilla(mapa).base
+        alto, ancho = base.shape
+        bloques = (shared_memory.SharedMemory(create=True, size=alto * ancho),
+                   shared_memory.SharedMemory(create=True, size=base.nbytes))
+        compartido = cls(bloques, ancho, alto, duenio=True)
+        # 'U1' guarda el código de cada letra en 32 bits
+        compartido.casillas[:] = matriz_letras(mapa).view(np.uint32)
+        compartido.base[:] = base
+        return compartido
+
+    @classmethod
+    def abrir(cls, descriptor):
+        """Abre los bloques creados por otro proceso.
+
+        Args:
+            descriptor (tuple): Resultado de `descriptor`.
+
+        Returns:
+            MapaCompartido: Vistas sobre los mismos bloques.
+        """
+        casillas, costos, ancho, alto = descriptor
+        bloques = (shared_memory.SharedMemory(name=casillas),
+                   shared_memory.SharedMemory(name=costos))
+        return cls(bloques, ancho, alto, duenio=False)
+
+    def descriptor(self):
+        """Lo que necesita otro proceso para abrir los bloques.
+
+        Returns:
+            tuple: Nombres de los bloques, ancho y alto.
+        """
+        return (self._bloques[0].name, self._bloques[1].name,
+                self.ancho, self.alto)
+
+    def filas(self):
+        """Matriz del mapa (lista de filas) leída de la memoria compartida.
+
+        Returns:
+            list[list[str]]: Igual que el mapa original.
+        """
+        return [[chr(codigo) for codigo in fila]
+                for fila in self.casillas.tolist()]
+
+    def cerrar(self):
+        """Suelta las vistas y cierra los bloques (y los borra si es dueño)."""
+        self.casillas = self.base = None
+        for bloque in self._bloques:
+            bloque.close()
+            if self._duenio:
+                with contextlib.suppress(FileNotFoundError):
+                    bloque.unlink()
+        self._bloques = ()
+
+
+class _ClimaFoto:
+    """Clima del momento en que se pidió el plan.
+
+    Responde `pronostico` como SistemaClima, con la matriz de
+    transición del SistemaClima del proceso.
+    """
+
+    def __init__(self, clima, estado, multiplicador, consumo, restante):
+        self._clima = clima
+        self.estado = estado
+        self.multiplicador = multiplicador
+        self.consumo = consumo
+        self.restante = restante
+
+    def pronostico(self, horizonte):
+        """Igual que `SistemaClima.pronostico` para el clima de la foto."""
+        return self._clima.pronostico_desde(
+            self.estado, self.multiplicador, self.consumo, self.restante,
+            horizonte)
+
+
+def foto_cpu(cpu, pedidos, clima_mult, consumo_clima_extra):
+    """Resume lo que el proceso necesita para planificar por un CPU.
+
+    Args:
+        cpu (JugadorCPU): CPU que pide el plan.
+        pedidos (list[Pedido]): Pedidos libres para ese CPU.
+        clima_mult (float): Multiplicador climático actual.
+        consumo_clima_extra (float): Costo adicional por clima.
+
+    Returns:
+        dict: Solo números, tuplas y cadenas.
+    """
+    clima = None
+    if cpu.clima is not None:
+        clima = (cpu.clima.estado_actual,
+                 cpu.clima.obtener_multiplicador_actual(),
+                 cpu.clima.obtener_consumo_resistencia_extra(),
+                 max(0.0, cpu.clima.tiempo_cambio - reloj.ahora()))
+    return {
+        'cpu': id(cpu),
+        'posicion': (cpu.x, cpu.y),
+        'resistencia': cpu.resistencia,
+        'capacidad': cpu.capacidad,
+        'planificador': cpu.planificador,
+        'inventario': [_pedido_compacto(p) for p in cpu.inventario],
+        'pedidos': [_pedido_compacto(p) for p in pedidos],
+        'clima_mult': clima_mult,
+        'consumo_clima_extra': consumo_clima_extra,
+        'clima': clima
+    }
+
+
+def _pedido_compacto(pedido):
+    """Pedido como tupla (pickup, dropoff, peso, prioridad, pago)."""
+    return (tuple(pedido.pickup), tuple(pedido.dropoff), pedido.weight,
+            pedido.priority, pedido.payout)
+
+
+def _trabajar(descriptor, configuracion_clima, conexion, huella=None,
+              carpeta_cache=None):
+    """Bucle del proceso planificador.
+
+    Primero arma las estructuras del mapa y avisa con (None, None).
+    Después recibe (número, foto) y responde (número, plan), donde el
+    plan es (índice del pedido en la foto o -1, ruta, multiplicador
+    esperado, posición de partida). Termina al recibir None o si se
+    cierra la conexión.
+
+    Args:
+        descriptor (tuple): Descriptor del MapaCompartido.
+        configuracion_clima (dict): `SistemaClima.exportar_configuracion`.
+        conexion (multiprocessing.connection.Connection): Extremo del
+            proceso.
+        huella (str | None): Huella del mapa (ver cache_disco.py).
+        carpeta_cache (str | None): Carpeta de la caché en disco si el
+            juego la tiene activa; el grafo de HPA* se lee de ahí.
+    """
+    if carpeta_cache is not None:
+        cache_disco.activar(carpeta_cache)
+    compartido = MapaCompartido.abrir(descriptor)
+    mapa = compartido.filas()
+    registrar_grilla(mapa, GrillaCostos.desde_base(compartido.base,
+                                                   huella=huella))
+    with contextlib.redirect_stdout(None):
+        clima = SistemaClima(None)
+    clima.importar_configuracion(configuracion_clima)
+    espejos = {}  # id del CPU -> JugadorCPU del proceso
+    if len(mapa) * len(mapa[0]) >= UMBRAL_HPA:
+        obtener_grafo(mapa).precalcular()
+
+    try:
+        conexion.send((None, None))
+        while True:
+            mensaje = conexion.recv()
+            if mensaje is None:
+                break
+            numero, foto = mensaje
+            espejo = espejos.get(foto['cpu'])
+            if espejo is None:
+                espejo = JugadorCPU(0, 0, 'dificil', foto['capacidad'],
+                                    foto['planificador'])
+                espejos[foto['cpu']] = espejo
+            espejo.x, espejo.y = foto['posicion']
+            espejo.resistencia = foto['resistencia']
+            espejo.inventario = Inventario(
+                Pedido(*datos) for datos in foto['inventario'])
+            espejo.clima = (_ClimaFoto(clima, *foto['clima'])
+                            if foto['clima'] is not None else None)
+            pedidos = [Pedido(*datos) for datos in foto['pedidos']]
+            with contextlib.redirect_stdout(None):
+                pedido, ruta, mult, inicio = completar(espejo._plan_entregas(
+                    mapa, pedidos, foto['clima_mult'],
+                    foto['consumo_clima_extra']))
+            indice = pedidos.index(pedido) if pedido is not None else -1
+            conexion.send((numero, (indice, ruta, mult, inicio)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        # La grilla del proceso todavía usa los bloques; si no se pueden
+        # cerrar, se liberan al terminar el proceso
+        with contextlib.suppress(BufferError):
+            compartido.cerrar()
+
+
+class ProcesoPlanificador:
+    """Proceso que planifica por los CPU de una partida.
+
+    Attributes:
+        mapa (list[list[str]]): Mapa con el que se creó.
+        activo (bool): False si el proceso murió o se cerró; los CPU
+            vuelven a planificar en el proceso del juego.
+        pedidos (int): Planes pedidos.
+        respondidos (int): Planes recibidos.
+    """
+
+    def __init__(self, mapa, clima):
+        """Pone el mapa en memoria compartida y arranca el proceso.
+
+        Args:
+            mapa (list[list[str]]): Matriz del mapa.
+            clima (SistemaClima): Clima de la partida (se usa su matriz
+                de transición para los pronósticos).
+        """
+        self.mapa = mapa
+        self.activo = True
+        self.listo = False  # El proceso ya armó las estructuras del mapa
+        self.pedidos = 0
+        self.respondidos = 0
+        self._respuestas = {}  # Número -> plan recibido
+        self._descartados = set()  # Números que ya no se quieren
+        self._compartido = MapaCompartido.crear(mapa)
+        self._conexion, extremo = multiprocessing.Pipe()
+        self._proceso = multiprocessing.Process(
+            target=_trabajar,
+            args=(self._compartido.descriptor(),
+                  clima.exportar_configuracion(), extremo,
+                  obtener_grilla(mapa).huella,
+                  cache_disco.carpeta if cache_disco.activa else None),
+            daemon=True)
+        self._proceso.start()
+        extremo.close()
+        # Los bloques se borran aunque nadie llame a cerrar
+        self._finalizar = weakref.finalize(
+            self, ProcesoPlanificador._liberar, self._conexion,
+            self._proceso, self._compartido)
+
+    def solicitar(self, cpu, pedidos, clima_mult, consumo_clima_extra):
+        """Pide un plan para un CPU.
+
+        Args:
+            cpu (JugadorCPU): CPU que planifica.
+            pedidos (list[Pedido]): Pedidos libres para ese CPU.
+            clima_mult (float): Multiplicador climático actual.
+            consumo_clima_extra (float): Costo adicional por clima.
+
+        Returns:
+            PlanRemoto: Plan en curso, con la interfaz de `tareas.Tarea`.
+        """
+        numero = self.pedidos
+        self.pedidos += 1
+        try:
+            self._conexion.send((numero, foto_cpu(
+                cpu, pedidos, clima_mult, consumo_clima_extra)))
+        except (BrokenPipeError, OSError) as e:
+            self._detener(e)
+        return PlanRemoto(self, numero, list(pedidos), cpu)
+
+    def respuesta(self, numero, esperar):
+        """Devuelve el plan de un pedido si ya llegó.
+
+        Args:
+            numero (int): Número del pedido.
+            esperar (bool): Esperar hasta que llegue.
+
+        Returns:
+            tuple | None | bool: El plan; None si todavía no llegó; False
+            si no va a llegar (el proceso murió).
+        """
+        while numero not in self._respuestas:
+            if not self.activo:
+                return False
+            if not self._recibir(ESPERA_MAXIMA if esperar else 0):
+                if not esperar:
+                    return None
+                self._detener('no responde')
+        return self._respuestas.pop(numero)
+
+    def esperar_listo(self):
+        """Espera a que el proceso termine de preparar el mapa.
+
+        Los planes se pueden pedir antes; esto solo sirve para medir
+        sin contar el arranque del proceso.
+
+        Returns:
+            bool: True si el proceso está listo.
+        """
+        while self.activo and not self.listo:
+            if not self._recibir(ESPERA_MAXIMA):
+                self._detener('no responde')
+        return self.listo
+
+    def _recibir(self, espera):
+        """Recibe un mensaje del proceso, si llega a tiempo.
+
+        Args:
+            espera (float): Segundos que se espera como máximo.
+
+        Returns:
+            bool: True si llegó un mensaje (o si el proceso murió y ya
+            no hay que esperar más).
+        """
+        try:
+            if not self._conexion.poll(espera):
+                return False
+            recibido, plan = self._conexion.recv()
+        except (EOFError, OSError) as e:
+            self._detener(e)
+            return True
+        if recibido is None:
+            self.listo = True
+        elif recibido in self._descartados:
+            self.respondidos += 1
+            self._descartados.discard(recibido)
+        else:
+            self.respondidos += 1
+            self._respuestas[recibido] = plan
+        return True
+
+    def descartar(self, numero):
+        """Olvida un pedido cuya respuesta ya no interesa."""
+        if self._respuestas.pop(numero, None) is None:
+            self._descartados.add(numero)
+
+    def __deepcopy__(self, memo):
+        """Las copias (keyframes de repetición) comparten el proceso."""
+        return self
+
+    def cerrar(self):
+        """Detiene el proceso y borra la memoria compartida."""
+        self.activo = False
+        self._finalizar()
+
+    def _detener(self, motivo):
+        """Deja de usar el proceso después de un error."""
+        if self.activo:
+            print(f"Planificador en proceso detenido: {motivo}")
+        self.cerrar()
+
+    @staticmethod
+    def _liberar(conexion, proceso, compartido):
+        """Cierra la conexión, espera al proceso y borra los bloques."""
+        with contextlib.suppress(BrokenPipeError, OSError):
+            conexion.send(None)
+        proceso.join(timeout=1.0)
+        if proceso.is_alive():
+            proceso.terminate()
+        conexion.close()
+        compartido.cerrar()
+
+
+class PlanRemoto:
+    """Plan pedido a un ProcesoPlanificador, con la interfaz de Tarea.
+
+    Attributes:
+        terminada (bool): True cuando llegó la respuesta.
+        resultado (tuple | None): Como `JugadorCPU._plan_entregas`, con
+            el pedido real; None si el proceso murió.
+        cuadros (int): Cuadros que lleva esperando.
+    """
+
+    def __init__(self, proceso, numero, pedidos, cpu):
+        """Guarda el pedido hecho.
+
+        Args:
+            proceso (ProcesoPlanificador): Proceso que lo resuelve.
+            numero (int): Número del pedido.
+            pedidos (list[Pedido]): Pedidos de la foto, en su orden.
+            cpu (JugadorCPU): CPU que pidió el plan (su modo_decisiones
+                dice si se graba o se repite).
+        """
+        self._proceso = proceso
+        self._numero = numero
+        self._pedidos = pedidos
+        self._cpu = cpu
+        self.terminada = False
+        self.resultado = None
+        self.cuadros = 0
+
+    def avanzar(self, presupuesto_us, pasos_reloj_fijo):
+        """Revisa si llegó la respuesta (no planifica en este proceso).
+
+        Sin esperar, salvo al repetir (en el cuadro en que llegó al
+        grabar) y con el reloj fijo fuera de una grabación.
+
+        Args:
+            presupuesto_us (float): Sin uso; interfaz de Tarea.
+            pasos_reloj_fijo (int): Sin uso; interfaz de Tarea.
+
+        Returns:
+            bool: True si el plan terminó en este cuadro.
+        """
+        if self.terminada:
+            return False
+        self.cuadros += 1
+        modo = self._cpu.modo_decisiones
+        if modo == 'repetir':
+            if self._cpu.decision_repetida != PLAN_LISTO:
+                return False
+            esperar = True
+        elif modo == 'grabar' or not reloj.fijo:
+            esperar = False
+        elif self.cuadros < CUADROS_RELOJ_FIJO:
+            return False
+        else:
+            esperar = True
+        plan = self._proceso.respuesta(self._numero, esperar=esperar)
+        if plan is None:
+            return False
+        if modo == 'grabar':
+            self._cpu.decision_cuadro = (PLAN_LISTO, 0)
+        self.terminada = True
+        self._proceso = None
+        if plan is not False:
+            indice, ruta, mult, inicio = plan
+            pedido = self._pedidos[indice] if indice >= 0 else None
+            self.resultado = (pedido, ruta, mult, inicio)
+        return True
+
+    def cancelar(self):
+        """Descarta la respuesta que todavía no llegó."""
+        if self._proceso is not None:
+            self._proceso.descartar(self._numero)
+            self._proceso = None
+
+    def __getstate__(self):
+        """Estado para pickle y deepcopy: la copia queda sin resultado."""
+        estado = self.__dict__.copy()
+        estado['_proceso'] = None
+        if not self.terminada:
+            estado['terminada'] = True
+            estado['resultado'] = None
+        return estado
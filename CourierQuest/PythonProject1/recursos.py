@@ -0,0 +1,253 @@
+"""
+recursos.py.
+
+Gestor de imágenes y fuentes del juego. Las imágenes
+se leen de disco solo cuando se necesitan (o en un
+hilo en segundo plano mientras se muestra el menú) y
+cada variante escalada, teñida o volteada se guarda
+en caché con clave (archivo, tamaño, tinte, volteo),
+así nada se reescala dentro del bucle de dibujo.
+
+Los sprites con transparencia se pueden empaquetar en
+un atlas: una sola superficie con todos los sprites,
+de la que cada variante es una subsuperficie.
+"""
+
+import os
+import threading
+import pygame
+
+
+class GestorRecursos:
+    """Carga diferida y caché de imágenes, variantes, atlas y fuentes.
+
+    Attributes:
+        carpeta (str): Carpeta de las imágenes.
+        atlas (pygame.Surface | None): Superficie con los sprites
+            empaquetados, si se llamó a `empaquetar`.
+        cargas (int): Archivos leídos de disco.
+        aciertos (int): Variantes servidas desde la caché.
+    """
+
+    def __init__(self, carpeta="assets"):
+        """Crea el gestor sin cargar nada.
+
+        Args:
+            carpeta (str): Carpeta de las imágenes.
+        """
+        self.carpeta = carpeta
+        self.atlas = None
+        self.cargas = 0
+        self.aciertos = 0
+        self._crudas = {}  # Archivo -> superficie leída (sin convertir)
+        self._originales = {}  # Archivo -> superficie convertida
+        self._variantes = {}  # (archivo, tamaño, tinte, volteo) -> Surface
+        self._fuentes = {}  # Tamaño -> pygame.font.Font
+        self._textos = {}  # (texto, tamaño, color) -> Surface
+        self._candado = threading.Lock()
+        self._hilo = None
+
+    # ========================================
+    # CARGA
+    # ========================================
+
+    def precargar(self, archivos):
+        """Lee archivos de disco en un hilo en segundo plano.
+
+        Solo se decodifican las imágenes; la conversión al formato de
+        la pantalla se hace en el hilo principal la primera vez que se
+        piden, porque requiere la ventana.
+
+        Args:
+            archivos (list[str]): Nombres de archivo dentro de `carpeta`.
+        """
+        pendientes = [a for a in archivos if a not in self._crudas]
+        if not pendientes:
+            return
+        self._hilo = threading.Thread(target=self._leer_todos,
+                                      args=(pendientes,), daemon=True)
+        self._hilo.start()
+
+    def _leer_todos(self, archivos):
+        """Cuerpo del hilo de precarga."""
+        for archivo in archivos:
+            self._leer(archivo)
+
+    def _leer(self, archivo):
+        """Lee un archivo si nadie lo leyó todavía.
+
+        Args:
+            archivo (str): Nombre del archivo.
+
+        Returns:
+            pygame.Surface: Imagen decodificada.
+        """
+        with self._candado:
+            imagen = self._crudas.get(archivo)
+            if imagen is None:
+                imagen = pygame.image.load(os.path.join(self.carpeta,
+                                                        archivo))
+                self._crudas[archivo] = imagen
+                self.cargas += 1
+            return imagen
+
+    def listo(self):
+        """Indica si terminó la precarga en segundo plano.
+
+        Returns:
+            bool: True si no hay un hilo de precarga en curso.
+        """
+        return self._hilo is None or not self._hilo.is_alive()
+
+    def _original(self, archivo):
+        """Imagen convertida al formato de la pantalla (con caché)."""
+        imagen = self._originales.get(archivo)
+        if imagen is None:
+            cruda = self._leer(archivo)
+            if cruda.get_alpha() is not None or archivo.endswith(".png"):
+                imagen = cruda.convert_alpha()
+            else:
+                imagen = cruda.convert()
+            self._originales[archivo] = imagen
+        return imagen
+
+    def obtener(self, archivo, tamano, tinte=None, volteada=False):
+        """Devuelve una variante de una imagen, creándola si hace falta.
+
+        Args:
+            archivo (str): Nombre del archivo.
+            tamano (int | tuple[int, int]): Lado o (ancho, alto) en píxeles.
+            tinte (tuple | None): Color RGBA multiplicado sobre la imagen.
+            volteada (bool): Reflejar horizontalmente.
+
+        Returns:
+            pygame.Surface: Variante pedida.
+        """
+        if isinstance(tamano, int):
+            tamano = (tamano, tamano)
+        clave = (archivo, tamano, tinte, volteada)
+        variante = self._variantes.get(clave)
+        if variante is not None:
+            self.aciertos += 1
+            return variante
+
+        if volteada:
+            base = self.obtener(archivo, tamano, tinte)
+            variante = pygame.transform.flip(base, True, False)
+        elif tinte is not None:
+            variante = self.obtener(archivo, tamano).copy()
+            variante.fill(tinte, special_flags=pygame.BLEND_RGBA_MULT)
+        else:
+            variante = pygame.transform.scale(self._original(archivo),
+                                              tamano)
+        self._variantes[clave] = variante
+        return variante
+
+    # ========================================
+    # ATLAS
+    # ========================================
+
+    def empaquetar(self, claves, ancho_maximo=1024):
+        """Empaqueta variantes en un atlas por estantes.
+
+        Ordena los sprites de mayor a menor alto y los acomoda en filas
+        ("estantes") de izquierda a derecha. Cada variante de la caché
+        se reemplaza por una subsuperficie del atlas, así los blits
+        leen siempre de la misma superficie.
+
+        Args:
+            claves (list[tuple]): Argumentos de `obtener` de cada
+                variante: (archivo, tamaño[, tinte[, volteada]]).
+            ancho_maximo (int): Ancho del atlas en píxeles.
+
+        Returns:
+            dict: Clave normalizada -> pygame.Rect dentro del atlas.
+        """
+        sprites = []
+        for clave in claves:
+            superficie = self.obtener(*clave)
+            sprites.append((self._normalizar(*clave), superficie))
+        sprites.sort(key=lambda s: s[1].get_height(), reverse=True)
+
+        # Ubicar cada sprite
+        posiciones = {}
+        x = y = alto_estante = ancho_usado = 0
+        for clave, superficie in sprites:
+            ancho, alto = superficie.get_size()
+            if x + ancho > ancho_maximo and x > 0:
+                y += alto_estante
+                x = alto_estante = 0
+            posiciones[clave] = pygame.Rect(x, y, ancho, alto)
+            x += ancho
+            ancho_usado = max(ancho_usado, x)
+            alto_estante = max(alto_estante, alto)
+
+        self.atlas = pygame.Surface((max(1, ancho_usado),
+                                     max(1, y + alto_estante)),
+                                    pygame.SRCALPHA).convert_alpha()
+        self.atlas.fill((0, 0, 0, 0))
+        for clave, superficie in sprites:
+            self.atlas.blit(superficie, posiciones[clave])
+            self._variantes[clave] = self.atlas.subsurface(posiciones[clave])
+        return posiciones
+
+    @staticmethod
+    def _normalizar(archivo, tamano, tinte=None, volteada=False):
+        """Clave de caché con el tamaño siempre como (ancho, alto)."""
+        if isinstance(tamano, int):
+            tamano = (tamano, tamano)
+        return archivo, tamano, tinte, volteada
+
+    # ========================================
+    # FUENTES Y TEXTOS
+    # ========================================
+
+    def fuente(self, tamano):
+        """Fuente por defecto de pygame en un tamaño (con caché).
+
+        Args:
+            tamano (int): Tamaño de la fuente.
+
+        Returns:
+            pygame.font.Font: Fuente pedida.
+        """
+        fuente = self._fuentes.get(tamano)
+        if fuente is None:
+            fuente = pygame.font.SysFont(None, tamano)
+            self._fuentes[tamano] = fuente
+        return fuente
+
+    def texto(self, texto, tamano, color):
+        """Texto fijo ya renderizado (para etiquetas que no cambian).
+
+        Args:
+            texto (str): Texto a renderizar.
+            tamano (int): Tamaño de la fuente.
+            color (tuple[int, int, int]): Color del texto.
+
+        Returns:
+            pygame.Surface: Texto renderizado.
+        """
+        clave = (texto, tamano, color)
+        superficie = self._textos.get(clave)
+        if superficie is None:
+            superficie = self.fuente(tamano).render(texto, True, color)
+            self._textos[clave] = superficie
+        return superficie
+
+    def estadisticas(self):
+        """Resume el uso del gestor.
+
+        Returns:
+            dict: Archivos leídos, variantes en caché, aciertos y tamaño
+            del atlas.
+        """
+        return {
+            'cargas': self.cargas,
+            'variantes': len(self._variantes),
+            'aciertos': self.aciertos,
+            'atlas': self.atlas.get_size() if self.atlas else None
+        }
+
+
+gestor = GestorRecursos()  # Instancia compartida por el juego
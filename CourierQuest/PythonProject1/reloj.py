@@ -0,0 +1,52 @@
+"""
+reloj.py.
+
+Hora del juego. La lógica de la partida pregunta la hora
+con `reloj.ahora()` en vez de `time.time()`: normalmente
+es la hora real, pero mientras se graba o se repite una
+partida el reloj queda fijo en la hora del cuadro, así la
+repetición ve exactamente los mismos tiempos aunque corra
+mucho más rápido.
+"""
+
+import time
+
+
+class Reloj:
+    """Reloj real o fijado cuadro a cuadro.
+
+    Attributes:
+        fijo (bool): True si la hora la fija quien graba o repite.
+    """
+
+    def __init__(self):
+        """Crea el reloj siguiendo la hora real."""
+        self._momento = None
+
+    @property
+    def fijo(self):
+        """Indica si el reloj está fijado."""
+        return self._momento is not None
+
+    def ahora(self):
+        """Hora actual del juego.
+
+        Returns:
+            float: Segundos, en la misma escala que `time.time()`.
+        """
+        return time.time() if self._momento is None else self._momento
+
+    def fijar(self, momento):
+        """Fija la hora hasta la próxima llamada a `fijar` o `liberar`.
+
+        Args:
+            momento (float): Hora del cuadro.
+        """
+        self._momento = momento
+
+    def liberar(self):
+        """Vuelve a seguir la hora real."""
+        self._momento = None
+
+
+reloj = Reloj()  # Instancia compartida por el juego
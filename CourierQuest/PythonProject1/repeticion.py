@@ -0,0 +1,513 @@
+"""
+repeticion.py.
+
+Repite sin ventana una partida grabada con grabacion.py,
+mucho más rápido que en tiempo real: no dibuja, no
+espera entre cuadros y fija el reloj del juego en la
+hora grabada de cada cuadro. Con la misma semilla, los
+mismos datos y las mismas teclas, el resultado tiene
+que ser el mismo que el de la partida original.
+
+Cada cierto tiempo de juego guarda un keyframe (una
+copia de todo el estado de la partida) para poder
+saltar a cualquier segundo simulando solo desde el
+keyframe anterior. Los keyframes se guardan junto al
+registro (archivo .claves) para las próximas veces.
+
+Sirve para reproducir trabas de rendimiento (con
+--perfil muestra los cuadros más lentos) y para
+revisar puntajes discutidos.
+
+Uso (desde PythonProject1):
+    python repeticion.py REGISTRO [--hasta S] [--desde S] [--perfil]
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse  # noqa: E402
+import contextlib  # noqa: E402
+import copy  # noqa: E402
+import hashlib  # noqa: E402
+import json  # noqa: E402
+import pickle  # noqa: E402
+import time  # noqa: E402
+from collections import defaultdict, deque  # noqa: E402
+import pygame  # noqa: E402
+import api  # noqa: E402
+import azar  # noqa: E402
+from Main import Aplicacion, JUGANDO, PAUSADO  # noqa: E402
+from cache_rutas import (invalidar_todas, obtener_cache,  # noqa: E402
+                         reemplazar_cache)
+from clima import SistemaClima  # noqa: E402
+from grabacion import (AlmacenDatos, VERSION_REGISTRO,  # noqa: E402
+                       expandir_cuadros)
+from perfil import perfilador  # noqa: E402
+from persistencia import (SistemaPersistencia,  # noqa: E402
+                          HistorialMovimientos)
+from planificador import ServicioPlanificacion  # noqa: E402
+from reloj import reloj  # noqa: E402
+
+INTERVALO_KEYFRAMES = 10.0  # Segundos de juego entre keyframes
+
+# Atributos de Aplicacion que forman el estado de la partida
+ATRIBUTOS_PARTIDA = (
+    'jugador', 'jugadores_cpu', 'direccion_der', 'direccion_cpu',
+    'pos_x_anterior_cpu', 'pedidos_activos', 'coordinador_pedidos',
+    'pedidos_vistos', 'cola_pedidos', 'sistema_clima', 'historial_movimientos',
+    'servicio_planificacion', 'tiempo_inicio', 'ultimo_check',
+    'ultimo_liberado', 'ultimo_limpieza_vistos', 'ultimo_autoguardado',
+    'juego_terminado', 'juego_ganado', 'puntaje_calculado', 'estado_juego',
+    'dificultad_ia', 'meta_ingresos', 'mostrar_inventario_detallado',
+    'mostrar_estadisticas', 'ordendar_inventario'
+)
+
+
+class ObjetoRepetido:
+    """Delegado que devuelve los resultados grabados de algunos métodos.
+
+    Los demás atributos (por ejemplo `calcular_puntaje_final`) se toman
+    del objeto real.
+    """
+
+    def __init__(self, objeto, nombre, metodos, reproductor):
+        """Crea el delegado.
+
+        Args:
+            objeto (Any): Objeto real.
+            nombre (str): Prefijo de las llamadas en el registro.
+            metodos (tuple[str]): Métodos grabados.
+            reproductor (Reproductor): De dónde salen los resultados.
+        """
+        self.objeto = objeto
+        self._nombre = nombre
+        self._metodos = metodos
+        self._reproductor = reproductor
+
+    def __getattr__(self, atributo):
+        """Devuelve el atributo real, o el resultado grabado si es uno de
+        los métodos grabados."""
+        if atributo not in self._metodos:
+            return getattr(self.objeto, atributo)
+        nombre = f"{self._nombre}.{atributo}"
+        return lambda *args, **kwargs: self._reproductor.siguiente(nombre)
+
+
+class Keyframe:
+    """Copia del estado de la partida en un cuadro.
+
+    Attributes:
+        cuadro (int): Cuadros ya simulados.
+        milisegundos (int): Tiempo de juego grabado hasta ese cuadro.
+        estado (dict): Atributos de ATRIBUTOS_PARTIDA y la caché de rutas.
+        azar (dict): Estado de los generadores de azar.py.
+        llamadas (dict): Llamadas grabadas ya usadas, por nombre.
+    """
+
+    def __init__(self, cuadro, milisegundos, estado, estados_azar, llamadas):
+        """Guarda los datos del keyframe (ya copiados)."""
+        self.cuadro = cuadro
+        self.milisegundos = milisegundos
+        self.estado = estado
+        self.azar = estados_azar
+        self.llamadas = llamadas
+
+
+class Reproductor:
+    """Repite una partida grabada sin ventana.
+
+    Attributes:
+        registro (dict): Registro JSON de la grabación.
+        app (Aplicacion): Aplicación sin ventana que simula la partida.
+        cuadro (int): Cuadros ya simulados.
+        milisegundos (int): Tiempo de juego grabado hasta `cuadro`.
+        keyframes (list[Keyframe]): Ordenados por tiempo.
+        decisiones (dict | None): Cuadro -> {CPU: acción del MCTS o
+            llegada de un plan}, o None si el registro no las tiene.
+        desincronizada (bool): True si una llamada grabada no llegó en
+            el mismo cuadro que en la partida original.
+    """
+
+    def __init__(self, ruta, intervalo_keyframes=INTERVALO_KEYFRAMES):
+        """Prepara la partida en el cuadro 0.
+
+        Args:
+            ruta (str): Registro JSON de la partida.
+            intervalo_keyframes (float): Segundos de juego entre keyframes.
+
+        Raises:
+            ValueError: Si el registro es de otra versión del formato.
+        """
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        self.registro = json.loads(contenido)
+        if self.registro.get('version') != VERSION_REGISTRO:
+            raise ValueError(f"Versión de registro no soportada: "
+                             f"{self.registro.get('version')}")
+        self.ruta = ruta
+        self.huella = hashlib.sha1(contenido).hexdigest()
+        self.intervalo = intervalo_keyframes
+        self.almacen = AlmacenDatos(
+            os.path.join(os.path.dirname(ruta) or ".", "datos"))
+        self.duraciones = expandir_cuadros(self.registro['cuadros'])
+        self.entradas = defaultdict(list)  # Cuadro -> [(tecla, mod)]
+        for cuadro, tecla, modificadores in self.registro['entradas']:
+            self.entradas[cuadro].append((tecla, modificadores))
+        self.llamadas = defaultdict(list)  # Nombre -> [(cuadro, ver, error)]
+        for cuadro, nombre, version, error in self.registro['llamadas']:
+            self.llamadas[nombre].append((cuadro, version, error))
+        self.usadas = defaultdict(int)  # Nombre -> llamadas ya devueltas
+        # Cuadro -> {CPU: acción}. Los registros sin decisiones son de
+        # cuando el MCTS contaba iteraciones: ahí se vuelve a buscar
+        self.decisiones = None
+        if 'decisiones' in self.registro:
+            self.decisiones = defaultdict(dict)
+            for cuadro, indice, accion, _ in self.registro['decisiones']:
+                self.decisiones[cuadro][indice] = _tupla(accion)
+        self.desincronizada = False
+
+        self.app = self._crear_aplicacion()
+        self.cuadro = 0
+        self.milisegundos = 0
+        self.keyframes = []
+        self._empezar()
+        if not self._cargar_keyframes():
+            self._guardar_keyframe()
+
+    # ========================================
+    # PREPARACIÓN
+    # ========================================
+
+    def _crear_aplicacion(self):
+        """Aplicación sin ventana con los datos grabados.
+
+        Returns:
+            Aplicacion: Lista para `reiniciar_juego`.
+        """
+        configuracion = self.registro['configuracion']
+        app = Aplicacion(cantidad_cpu=configuracion['cantidad_cpu'],
+                         grabar=False,
+                         planificar_en_proceso=configuracion.get(
+                             'planificar_en_proceso', False))
+        app.duracion = configuracion['duracion']
+        app.meta_ingresos = configuracion['meta_ingresos']
+        app.dificultad_ia = configuracion['dificultad_ia']
+
+        datos = self.registro['datos']
+        app.tiles = self.almacen.cargar(datos['mapa'])
+        app.map_width, app.map_height = len(app.tiles[0]), len(app.tiles)
+        app.pedidos_iniciales = self.almacen.cargar(datos['pedidos'])
+        with contextlib.redirect_stdout(None):
+            app.sistema_clima = SistemaClima(None)
+        app.sistema_clima.importar_configuracion(
+            self.almacen.cargar(datos['clima']))
+        app.sistema_clima.agregar_observador(invalidar_todas)
+
+        app.historial_movimientos = HistorialMovimientos()
+        app.servicio_planificacion = ServicioPlanificacion()
+        app.api = ObjetoRepetido(api, 'api', ('obtener_pedidos',), self)
+        app.sistema_persistencia = ObjetoRepetido(
+            SistemaPersistencia(), 'persistencia',
+            ('cargar_juego', 'guardar_juego_completo', 'guardar_puntaje'),
+            self)
+        app.running = True
+        return app
+
+    def _empezar(self):
+        """Siembra los generadores y arma la partida en el segundo 0."""
+        azar.sembrar(self.registro['semilla'])
+        reloj.fijar(self.registro['inicio'])
+        self.app.reiniciar_juego()
+        self.app.estado_juego = JUGANDO
+
+    # ========================================
+    # SIMULACIÓN
+    # ========================================
+
+    @property
+    def segundo(self):
+        """Segundos de juego grabados hasta el cuadro actual."""
+        return self.milisegundos / 1000
+
+    def terminada(self):
+        """Indica si ya no quedan cuadros o la partida terminó.
+
+        Returns:
+            bool: True si no se puede seguir avanzando.
+        """
+        return (self.cuadro >= len(self.duraciones)
+                or self.app.estado_juego not in (JUGANDO, PAUSADO)
+                or not self.app.running)
+
+    def siguiente(self, nombre):
+        """Resultado grabado de la próxima llamada a `nombre`.
+
+        Args:
+            nombre (str): 'objeto.metodo'.
+
+        Returns:
+            Any: Una copia nueva del resultado grabado.
+
+        Raises:
+            RuntimeError: Si la llamada grabada había fallado o si no
+                hay más llamadas grabadas.
+        """
+        indice = self.usadas[nombre]
+        if indice >= len(self.llamadas[nombre]):
+            self.desincronizada = True
+            raise RuntimeError(f"{nombre}: no hay más llamadas grabadas")
+        self.usadas[nombre] += 1
+        cuadro, version, error = self.llamadas[nombre][indice]
+        if cuadro != self.cuadro:
+            self.desincronizada = True
+        if error is not None:
+            raise RuntimeError(error)
+        return self.almacen.cargar(version)
+
+    def paso(self):
+        """Simula un cuadro grabado."""
+        self.milisegundos += self.duraciones[self.cuadro]
+        reloj.fijar(self.registro['inicio'] + self.milisegundos / 1000)
+        self.app.eventos_repeticion = [
+            pygame.event.Event(pygame.KEYDOWN, key=tecla, mod=modificadores)
+            for tecla, modificadores in self.entradas.get(self.cuadro, ())]
+        if self.decisiones is not None:
+            self.app.decisiones_repeticion = self.decisiones.get(self.cuadro,
+                                                                 {})
+
+        perfilador.inicio_cuadro()
+        self.app.actualizar_partida()
+        perfilador.fin_cuadro()
+        # La pausa no cambia la partida: el tiempo en pausa ya está en la
+        # duración del cuadro siguiente
+        if self.app.estado_juego == PAUSADO:
+            self.app.estado_juego = JUGANDO
+        self.cuadro += 1
+
+        # Un plan o un despacho a medias (ver tareas.py) no se puede
+        # copiar: el keyframe espera al primer cuadro sin tareas en curso
+        if (self.milisegundos - self.keyframes[-1].milisegundos
+                >= self.intervalo * 1000 and
+                self.app.servicio_planificacion.tarea_despacho is None and
+                all(cpu.tarea_plan is None and cpu.tarea_tramo is None
+                    for cpu in self.app.jugadores_cpu)):
+            self._guardar_keyframe()
+
+    def avanzar_hasta(self, segundo=None):
+        """Simula cuadros hasta un segundo de juego (o hasta el final).
+
+        Args:
+            segundo (float | None): Segundo de juego; None para el final.
+        """
+        limite = float('inf') if segundo is None else segundo * 1000
+        while (not self.terminada() and
+               self.milisegundos + self.duraciones[self.cuadro] <= limite):
+            self.paso()
+
+    def ir_a(self, segundo):
+        """Salta a un segundo de juego usando el keyframe más cercano.
+
+        Si el cuadro actual está entre ese keyframe y el segundo pedido,
+        sigue desde donde está.
+
+        Args:
+            segundo (float): Segundo de juego.
+        """
+        limite = segundo * 1000
+        anteriores = [k for k in self.keyframes if k.milisegundos <= limite]
+        keyframe = anteriores[-1] if anteriores else self.keyframes[0]
+        if not keyframe.milisegundos <= self.milisegundos <= limite:
+            self._restaurar(keyframe)
+        self.avanzar_hasta(segundo)
+
+    # ========================================
+    # KEYFRAMES
+    # ========================================
+
+    def _copiar_estado(self, estado):
+        """Copia profunda que comparte el mapa (nunca cambia)."""
+        return copy.deepcopy(estado, {id(self.app.tiles): self.app.tiles})
+
+    def _guardar_keyframe(self):
+        """Agrega un keyframe con el estado del cuadro actual."""
+        estado = {atributo: getattr(self.app, atributo)
+                  for atributo in ATRIBUTOS_PARTIDA}
+        estado['cache_rutas'] = obtener_cache(self.app.tiles)
+        self.keyframes.append(Keyframe(
+            self.cuadro, self.milisegundos, self._copiar_estado(estado),
+            azar.estados(), dict(self.usadas)))
+
+    def _restaurar(self, keyframe):
+        """Vuelve la partida al estado de un keyframe.
+
+        Args:
+            keyframe (Keyframe): Keyframe a restaurar (no se modifica).
+        """
+        estado = self._copiar_estado(keyframe.estado)
+        reemplazar_cache(self.app.tiles, estado.pop('cache_rutas'))
+        for atributo, valor in estado.items():
+            setattr(self.app, atributo, valor)
+        azar.restaurar(keyframe.azar)
+        self.usadas = defaultdict(int, keyframe.llamadas)
+        self.cuadro = keyframe.cuadro
+        self.milisegundos = keyframe.milisegundos
+        reloj.fijar(self.registro['inicio'] + self.milisegundos / 1000)
+        self.app.running = True
+
+    def _archivo_keyframes(self):
+        """Ruta del archivo de keyframes del registro."""
+        return os.path.splitext(self.ruta)[0] + ".claves"
+
+    def guardar_keyframes(self):
+        """Guarda los keyframes junto al registro.
+
+        El mapa no se guarda en cada keyframe: se reemplaza por una
+        referencia y al cargar se vuelve a usar el de la repetición. Lo
+        mismo con el planificador en otro proceso (ver proceso_ia.py).
+        """
+        referencias = {id(self.app.tiles): 'mapa'}
+        if self.app.proceso_ia is not None:
+            referencias[id(self.app.proceso_ia)] = 'proceso_ia'
+        with open(self._archivo_keyframes(), 'wb') as f:
+            guardador = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+            guardador.persistent_id = lambda obj: referencias.get(id(obj))
+            guardador.dump({'registro': self.huella,
+                            'intervalo': self.intervalo,
+                            'keyframes': self.keyframes})
+
+    def _referencia(self, nombre):
+        """Objeto de la repetición que reemplaza una referencia guardada.
+
+        Args:
+            nombre (str): 'mapa' o 'proceso_ia' (ver `guardar_keyframes`).
+
+        Returns:
+            Any: El mapa o el planificador en otro proceso.
+        """
+        if nombre == 'proceso_ia':
+            return self.app._proceso_ia(self.app.dificultad_ia)
+        return self.app.tiles
+
+    def _cargar_keyframes(self):
+        """Carga los keyframes guardados de este mismo registro.
+
+        Returns:
+            bool: True si se cargaron.
+        """
+        archivo = self._archivo_keyframes()
+        if not os.path.exists(archivo):
+            return False
+        try:
+            with open(archivo, 'rb') as f:
+                lector = pickle.Unpickler(f)
+                lector.persistent_load = self._referencia
+                guardado = lector.load()
+        except (pickle.UnpicklingError, EOFError, OSError, AttributeError):
+            return False
+        if (guardado['registro'] != self.huella
+                or guardado['intervalo'] != self.intervalo):
+            return False
+        self.keyframes = guardado['keyframes']
+        return True
+
+
+def _tupla(valor):
+    """Vuelve a tuplas las listas de una acción leída del JSON.
+
+    Args:
+        valor (Any): Acción grabada, por ejemplo
+            ``['r', [[x, y], [x, y], pago]]``.
+
+    Returns:
+        Any: La misma acción con tuplas.
+    """
+    if isinstance(valor, list):
+        return tuple(_tupla(elemento) for elemento in valor)
+    return valor
+
+
+def ejecutar(ruta, desde=None, hasta=None, perfil=False, detalle=False):
+    """Repite una partida e imprime el resultado.
+
+    Args:
+        ruta (str): Registro JSON de la partida.
+        desde (float | None): Segundo desde el que medir (salta con
+            keyframes hasta ahí).
+        hasta (float | None): Segundo hasta el que simular.
+        perfil (bool): Medir cada cuadro e imprimir los más lentos.
+        detalle (bool): Mostrar lo que imprime el juego.
+    """
+    salida = contextlib.nullcontext() if detalle \
+        else contextlib.redirect_stdout(None)
+    pygame.init()
+    with salida:
+        reproductor = Reproductor(ruta)
+        keyframes_previos = len(reproductor.keyframes)
+        if desde is not None:
+            inicio = time.perf_counter()
+            reproductor.ir_a(desde)
+            salto = time.perf_counter() - inicio
+        cuadro_inicial, ms_inicial = (reproductor.cuadro,
+                                      reproductor.milisegundos)
+        if perfil:
+            perfilador.activo = True
+            perfilador.cuadros = deque(maxlen=len(reproductor.duraciones))
+        tiempos = []  # (segundos reales, segundo de juego) por cuadro
+        inicio = time.perf_counter()
+        while not reproductor.terminada() and (
+                hasta is None or reproductor.milisegundos
+                + reproductor.duraciones[reproductor.cuadro] <= hasta * 1000):
+            antes = time.perf_counter()
+            reproductor.paso()
+            tiempos.append((time.perf_counter() - antes, reproductor.segundo))
+        real = time.perf_counter() - inicio
+        if len(reproductor.keyframes) > keyframes_previos:
+            reproductor.guardar_keyframes()
+        resultado = reproductor.app.resumen_partida()
+    reloj.liberar()
+
+    simulado = (reproductor.milisegundos - ms_inicial) / 1000
+    print(f"Registro: {ruta}")
+    if desde is not None:
+        print(f"Salto al segundo {desde:.0f} en {salto:.2f} s")
+    print(f"Cuadros: {reproductor.cuadro - cuadro_inicial}, "
+          f"{simulado:.1f} s de juego en {real:.2f} s "
+          f"({simulado / real if real else float('inf'):.0f}x)")
+    print(f"Keyframes: {len(reproductor.keyframes)} "
+          f"(cada {reproductor.intervalo:.0f} s)")
+    if reproductor.desincronizada:
+        print("Aviso: las llamadas grabadas no llegaron en los mismos"
+              " cuadros; la repetición se desincronizó")
+
+    if perfil:
+        print("Cuadros más lentos:")
+        for segundos, segundo in sorted(tiempos, reverse=True)[:5]:
+            print(f"  segundo {segundo:7.2f}: {segundos * 1000:.2f} ms")
+        for tramo, datos in perfilador.resumen().items():
+            print(f"  {tramo:<14} p50 {datos['p50']:.3f} ms"
+                  f"  p95 {datos['p95']:.3f} ms  máx {datos['max']:.3f} ms")
+
+    print(f"Resultado: {resultado}")
+    if reproductor.terminada() and hasta is None:
+        grabado = reproductor.registro['resultado']
+        igual = json.loads(json.dumps(resultado)) == grabado
+        print("Coincide con la partida grabada" if igual else
+              f"No coincide con la partida grabada: {grabado}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('registro', help='archivo .json de la partida')
+    parser.add_argument('--desde', type=float,
+                        help='saltar a este segundo antes de medir')
+    parser.add_argument('--hasta', type=float,
+                        help='simular hasta este segundo')
+    parser.add_argument('--perfil', action='store_true',
+                        help='medir cada cuadro y mostrar los más lentos')
+    parser.add_argument('--detalle', action='store_true',
+                        help='mostrar lo que imprime el juego')
+    argumentos = parser.parse_args()
+    ejecutar(argumentos.registro, argumentos.desde, argumentos.hasta,
+             argumentos.perfil, argumentos.detalle)
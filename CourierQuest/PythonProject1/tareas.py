@@ -0,0 +1,119 @@
+"""
+tareas.py.
+
+Tareas reanudables para repartir la planificación de la
+IA entre cuadros. Un planificador se escribe como
+generador: hace una parte del trabajo (por ejemplo unos
+cientos de nodos de A*) y cede con `yield`; lo que
+devuelve con `return` es el resultado del plan. La
+tarea lo avanza cada cuadro hasta agotar su
+presupuesto y se retoma en el siguiente cuadro.
+
+Con el reloj real el presupuesto es de microsegundos.
+Con el reloj fijo (grabación y repetición) es una
+cantidad de pasos del generador, para que la repetición
+termine cada plan en el mismo cuadro que la partida.
+"""
+
+import time
+from reloj import reloj
+
+# Nodos que expande una búsqueda (A*, Dijkstra) entre un `yield` y otro
+NODOS_POR_PASO = 256
+
+
+def completar(generador):
+    """Corre un generador planificador hasta el final.
+
+    Args:
+        generador (Generator): Planificador que cede con `yield`.
+
+    Returns:
+        Any: Lo que el generador devuelve con `return`.
+    """
+    while True:
+        try:
+            next(generador)
+        except StopIteration as fin:
+            return fin.value
+
+
+class Tarea:
+    """Planificación en curso que se avanza por partes.
+
+    Attributes:
+        terminada (bool): True cuando el generador ya devolvió su valor.
+        resultado (Any): Valor devuelto por el generador.
+        pasos (int): Veces que el generador cedió.
+        cuadros (int): Cuadros en los que se avanzó.
+        microsegundos (float): Tiempo total dedicado a la tarea.
+    """
+
+    def __init__(self, generador):
+        """Crea la tarea sin avanzarla.
+
+        Args:
+            generador (Generator): Planificador que cede con `yield`.
+        """
+        self._generador = generador
+        self.terminada = False
+        self.resultado = None
+        self.pasos = 0
+        self.cuadros = 0
+        self.microsegundos = 0.0
+
+    def avanzar(self, presupuesto_us, pasos_reloj_fijo):
+        """Avanza la tarea dentro del presupuesto de un cuadro.
+
+        Siempre da al menos un paso, así una tarea avanza aunque el
+        presupuesto sea muy chico.
+
+        Args:
+            presupuesto_us (float): Microsegundos disponibles con el
+                reloj real.
+            pasos_reloj_fijo (int): Pasos disponibles con el reloj fijo.
+
+        Returns:
+            bool: True si la tarea terminó en este cuadro.
+        """
+        if self.terminada:
+            return False
+        inicio = time.perf_counter()
+        limite = inicio + presupuesto_us / 1_000_000
+        pasos = 0
+        self.cuadros += 1
+        try:
+            while True:
+                next(self._generador)
+                pasos += 1
+                if reloj.fijo:
+                    if pasos >= pasos_reloj_fijo:
+                        break
+                elif time.perf_counter() >= limite:
+                    break
+        except StopIteration as fin:
+            self.terminada = True
+            self.resultado = fin.value
+            self._generador = None
+        self.pasos += pasos
+        self.microsegundos += (time.perf_counter() - inicio) * 1_000_000
+        return self.terminada
+
+    def cancelar(self):
+        """Descarta el trabajo pendiente."""
+        if self._generador is not None:
+            self._generador.close()
+            self._generador = None
+
+    def __getstate__(self):
+        """Estado para pickle y deepcopy, sin el generador.
+
+        Un generador no se puede copiar: la copia queda cancelada y sin
+        resultado, y el CPU que la tenga vuelve a planificar.
+        """
+        estado = self.__dict__.copy()
+        estado['_generador'] = None
+        if not self.terminada:
+            estado['terminada'] = True
+            estado['resultado'] = None
+        return estado